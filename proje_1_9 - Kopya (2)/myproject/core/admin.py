@@ -1,5 +1,30 @@
 from django.contrib import admin
+from django.db import transaction
 
-from. models import Customer
+from. models import Customer, Payment, CustomerBalance, ChangeLog, DailyRollup
 
-admin.site.register(Customer)
\ No newline at end of file
+
+@admin.register(Customer)
+class CustomerAdmin(admin.ModelAdmin):
+    def delete_queryset(self, request, queryset):
+        # "Seçilenleri sil" QuerySet.delete() çağırır; arama dizini, değişiklik günlüğü ve özetler
+        # Customer.delete() içinde güncellendiğinden kayıtlar tek tek silinir
+        with transaction.atomic():
+            for customer in queryset:
+                customer.delete()
+
+
+@admin.register(Payment)
+class PaymentAdmin(admin.ModelAdmin):
+    def delete_queryset(self, request, queryset):
+        # QuerySet.delete() Payment.delete()'i çalıştırmaz; bakiye, günlük özet ve değişiklik günlüğü
+        # burada toplu güncellenir
+        with transaction.atomic():
+            payments = list(queryset)
+            ChangeLog.objects.record_many(payments, deleted=True)
+            super().delete_queryset(request, queryset)
+            CustomerBalance.objects.refresh_many({payment.customer_id for payment in payments})
+            DailyRollup.objects.refresh_many(payments)
+
+
+admin.site.register(CustomerBalance)
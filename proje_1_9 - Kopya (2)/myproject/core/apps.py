@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        # Referans veri önbelleği kayıt değişince sinyallerle temizlenir
+        from . import audit, reference_data
+
+        reference_data.connect_signals()
+        # Denetim kaydı (core/audit.py): model değişiklikleri sinyallerle toplanır
+        audit.connect_signals()
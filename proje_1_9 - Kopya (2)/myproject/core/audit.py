@@ -0,0 +1,253 @@
+# core/audit.py
+
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.apps import apps
+from django.conf import settings
+from django.db import transaction
+from django.db.models.fields.files import FieldFile
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Denetlenen modeller -> kayda alınmayan alanlar (ör. arka planda üretilen önizleme). Türetilmiş tablolar (bakiye defteri, günlük özet,
+# arama dizini, senkronizasyon günlüğü) kaynaklarından yeniden üretilebildiği için denetlenmez.
+AUDITED_MODELS = {
+    "core.User": ("password", "last_login"),
+    "core.ExpenseCategory": (),
+    "core.Expense": (),
+    "core.SubscriptionType": (),
+    "core.SubscriptionDuration": (),
+    "core.PaymentType": (),
+    "core.Customer": (),
+    "core.Employee": (),
+    "core.EmployeeTask": (),
+    "core.EmployeeDocument": ("thumbnail",),
+    "core.Material": (),
+    "core.MaterialTransaction": ("stock_after",),
+    "core.Payment": (),
+    "core.Complaint": (),
+    "core.Request": (),
+    "core.Vehicle": (),
+    "core.SubscriptionExtra": (),
+}
+
+# İstek boyunca biriken girdiler (AuditMiddleware açar); None ise girdi commit'te hemen yazılır
+current_buffer = ContextVar("audit_buffer", default=None)
+
+_field_cache = {}
+
+
+def audited_fields(model):
+    # (alan adı, attname) listesi; auto_now alanları her kayıtta değiştiği için atlanır
+    label = model._meta.label
+    if label not in _field_cache:
+        excluded = set(AUDITED_MODELS[label])
+        _field_cache[label] = [
+            (field.name, field.attname)
+            for field in model._meta.concrete_fields
+            if not field.primary_key and field.name not in excluded and not getattr(field, "auto_now", False)
+        ]
+    return _field_cache[label]
+
+
+def field_state(instance):
+    # Ertelenmiş (.only ile yüklenmemiş) alanlar sözlükte yer almaz; sorgu atılmaz
+    values = instance.__dict__
+    return {name: values[attname] for name, attname in audited_fields(type(instance)) if attname in values}
+
+
+def json_value(value):
+    if isinstance(value, FieldFile):
+        return value.name or None
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def diff(before, after):
+    """{alan: [eski, yeni]}; before None ise (oluşturma ya da eski hali bilinmiyor) dolu alanlar eski=None ile döner."""
+    before = before or {}
+    return {
+        name: [json_value(before.get(name)), json_value(value)]
+        for name, value in after.items()
+        if (before[name] != value if name in before else value is not None)
+    }
+
+
+class AuditBuffer:
+    """
+    Bir isteğin (ya da buffered() bloğunun) girdileri. Yapan kullanıcı girdi oluşurken istekten
+    okunur: DRF JWT kimliğini view içinde doğruladığı için middleware anında henüz bilinmez.
+    """
+
+    def __init__(self, request=None, actor=None):
+        self.request = request
+        self.actor = actor
+        self.entries = []
+
+    def actor_id(self):
+        user = self.actor or getattr(self.request, "user", None)
+        if user is not None and user.is_authenticated:
+            return user.pk
+        return None
+
+    def add(self, entries):
+        self.entries.extend(entries)
+        if len(self.entries) >= getattr(settings, "AUDIT_BUFFER_SIZE", 500):
+            self.flush()
+
+    def flush(self):
+        entries, self.entries = self.entries, []
+        write_entries(entries)
+
+
+def write_entries(entries):
+    if not entries:
+        return
+    from .models import AuditEntry
+
+    try:
+        AuditEntry.objects.bulk_create(entries, batch_size=getattr(settings, "AUDIT_BUFFER_SIZE", 500))
+    except Exception:
+        # Kayıt işlemi zaten commit edildi; denetim yazılamadıysa istek bozulmaz, hata loglanır
+        logger.exception("%d denetim kaydı yazılamadı.", len(entries))
+
+
+def build_entry(instance, action, before=None):
+    """Kaydın değişikliği için kaydedilmemiş AuditEntry; değişen alan yoksa None."""
+    from .models import AuditEntry
+
+    after = field_state(instance)
+    if action == AuditEntry.DELETE:
+        changes = {name: [json_value(value), None] for name, value in after.items()}
+    else:
+        changes = diff(before, after)
+        if not changes:
+            return None
+    buffer = current_buffer.get()
+    return AuditEntry(
+        model=instance._meta.label_lower,
+        object_id=instance.pk,
+        action=action,
+        changes=changes,
+        actor_id=buffer.actor_id() if buffer is not None else None,
+        timestamp=timezone.now(),
+    )
+
+
+def schedule(entries):
+    # Geri alınan transaction'ın değişiklikleri kayda geçmez
+    if entries:
+        transaction.on_commit(lambda: enqueue(entries))
+
+
+def enqueue(entries):
+    buffer = current_buffer.get()
+    if buffer is None:
+        write_entries(entries)
+    else:
+        buffer.add(entries)
+
+
+def record(instance, action, before=None):
+    entry = build_entry(instance, action, before)
+    schedule([entry] if entry is not None else [])
+
+
+def record_bulk(instances, previous=None):
+    """
+    bulk_create / bulk_update ile yazılan kayıtlar (sinyal çalışmaz). previous (güncellemede
+    kayıtların değişiklik öncesi kopyaları) verilirse güncelleme, verilmezse oluşturma olarak kaydedilir.
+    """
+    from .models import AuditEntry
+
+    entries = []
+    for instance, old in zip(instances, previous or [None] * len(instances)):
+        if type(instance)._meta.label not in AUDITED_MODELS:
+            continue
+        before = field_state(old) if old is not None else None
+        entry = build_entry(instance, AuditEntry.UPDATE if old is not None else AuditEntry.CREATE, before)
+        if entry is not None:
+            entries.append(entry)
+        instance._audit_state = field_state(instance)
+    schedule(entries)
+
+
+def remember_state(sender, instance, raw=False, using=None, **kwargs):
+    # Güncellenen kaydın eski hali kaydetmeden hemen önce tek sorguyla okunur; eklemede ve aynı nesne
+    # bu süreçte zaten kaydedildiyse (son kaydedilen hal bilinir) sorgu atılmaz
+    if raw or instance._state.adding or instance.pk is None or hasattr(instance, "_audit_state"):
+        return
+    fields = audited_fields(sender)
+    row = sender._base_manager.db_manager(using).filter(pk=instance.pk).values(
+        *(attname for _, attname in fields)
+    ).first()
+    if row is not None:
+        instance._audit_state = {name: row[attname] for name, attname in fields}
+
+
+def audit_save(sender, instance, created, raw=False, **kwargs):
+    from .models import AuditEntry
+
+    if raw:
+        return
+    before = None if created else getattr(instance, "_audit_state", None)
+    record(instance, AuditEntry.CREATE if created else AuditEntry.UPDATE, before)
+    instance._audit_state = field_state(instance)
+
+
+def audit_delete(sender, instance, **kwargs):
+    from .models import AuditEntry
+
+    record(instance, AuditEntry.DELETE)
+
+
+def connect_signals():
+    for label in AUDITED_MODELS:
+        model = apps.get_model(label)
+        pre_save.connect(remember_state, sender=model, dispatch_uid=f"audit_state_{label}")
+        post_save.connect(audit_save, sender=model, dispatch_uid=f"audit_save_{label}")
+        post_delete.connect(audit_delete, sender=model, dispatch_uid=f"audit_delete_{label}")
+
+
+@contextmanager
+def buffered(actor=None):
+    """İstek dışı toplu işlemler (komutlar, içe aktarma) için: girdiler blok sonunda toplu yazılır."""
+    buffer = AuditBuffer(actor=actor)
+    token = current_buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        current_buffer.reset(token)
+        buffer.flush()
+
+
+class AuditMiddleware:
+    """
+    İstek boyunca denetim girdilerini bellekte toplar; yanıt istemciye gönderildikten sonra
+    (response.close) tek bulk_create ile yazar. Böylece istek yoluna kayıt başına sorgu eklenmez.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        buffer = AuditBuffer(request)
+        token = current_buffer.set(buffer)
+        try:
+            response = self.get_response(request)
+        except Exception:
+            buffer.flush()
+            raise
+        finally:
+            current_buffer.reset(token)
+        response._resource_closers.append(buffer.flush)
+        return response
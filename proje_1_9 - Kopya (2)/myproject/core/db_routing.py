@@ -0,0 +1,64 @@
+# core/db_routing.py
+
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# İstek boyunca okumaların replikaya gidip gitmeyeceği (ReplicaReadMiddleware açar)
+replica_reads_enabled = ContextVar("replica_reads_enabled", default=False)
+
+
+def replica_reads(view_func):
+    """
+    Ağır, salt okunur liste/rapor view'larını işaretler: GET isteklerinde bu view'ın
+    sorguları DATABASE_READ_REPLICAS içindeki bir replikadan okunur.
+    """
+    view_func.replica_reads = True
+    return view_func
+
+
+class ReadReplicaRouter:
+    """
+    Okumaları yalnızca replika bağlamı açıkken (işaretli view / GET API isteği) replikaya yollar.
+    Yazmalar ve default üzerinde açık transaction içindeki okumalar (kendi yazdığını okuma,
+    select_for_update) her zaman default'a gider. Replika tanımlı değilse hiçbir şey değişmez.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, "DATABASE_READ_REPLICAS", [])
+        if not replicas or not replica_reads_enabled.get():
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replikalar default'un kopyasıdır; nesneler arası ilişki her zaman geçerlidir
+        return True
+
+
+class ReplicaReadMiddleware:
+    """GET/HEAD isteklerinde /api/ adreslerini ve @replica_reads işaretli view'ları replikadan okutur."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            return self.get_response(request)
+        finally:
+            token = getattr(request, "_replica_reads_token", None)
+            if token is not None:
+                replica_reads_enabled.reset(token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return None
+        if getattr(view_func, "replica_reads", False) or request.path.startswith("/api/"):
+            request._replica_reads_token = replica_reads_enabled.set(True)
+        return None
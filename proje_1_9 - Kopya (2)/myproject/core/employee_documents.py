@@ -0,0 +1,51 @@
+# core/employee_documents.py
+
+from django.conf import settings
+
+# Her çalışandan istenen belgeler; settings.REQUIRED_EMPLOYEE_DOCUMENTS ile değiştirilebilir
+DEFAULT_REQUIRED_DOCUMENTS = ["Sağlık Belgesi", "Sigorta Belgesi", "İkametgah Belgesi"]
+
+
+def can_view_documents(user):
+    # Belgeleri yöneticiler ve temsilciler görür (list_employee_documents ve korumalı medya aynı kuralı kullanır)
+    return user.is_authenticated and user.is_active
+
+
+def required_documents():
+    return list(getattr(settings, "REQUIRED_EMPLOYEE_DOCUMENTS", DEFAULT_REQUIRED_DOCUMENTS))
+
+
+def missing_documents_by_employee(employee_ids, required=None):
+    """
+    Verilen çalışanlar için {employee_id: [eksik belge adları]} döner.
+    Yüklenmiş zorunlu belgeler tüm çalışanlar için tek sorguda okunur.
+    """
+    from .models import EmployeeDocument
+
+    if required is None:
+        required = required_documents()
+    employee_ids = list(employee_ids)
+    uploaded = {}
+    if employee_ids and required:
+        rows = (
+            EmployeeDocument.objects
+            .filter(employee_id__in=employee_ids, document_name__in=required)
+            .order_by()
+            .values_list("employee_id", "document_name")
+            .distinct()
+        )
+        for employee_id, document_name in rows:
+            uploaded.setdefault(employee_id, set()).add(document_name)
+    return {
+        employee_id: [doc for doc in required if doc not in uploaded.get(employee_id, ())]
+        for employee_id in employee_ids
+    }
+
+
+def attach_missing_documents(employees, required=None):
+    # Her çalışana missing_docs niteliğini ekler (şablonlarda kullanılır)
+    employees = list(employees)
+    missing = missing_documents_by_employee([emp.pk for emp in employees], required)
+    for emp in employees:
+        emp.missing_docs = missing[emp.pk]
+    return employees
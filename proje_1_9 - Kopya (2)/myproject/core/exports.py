@@ -0,0 +1,67 @@
+# core/exports.py
+
+import csv
+from datetime import datetime
+
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+# Sunucu tarafı imleçten her seferde okunacak satır sayısı
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """csv.writer'ın yazdığı satırı biriktirmeden geri döndüren sahte dosya."""
+
+    def write(self, value):
+        return value
+
+
+# Excel/LibreOffice bu karakterlerle başlayan hücreyi formül olarak çalıştırır (baştaki sekme ve
+# satır başı atlanıp arkasındaki formül çalışabilir)
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def format_cell(value):
+    # Tarihler yerel saate çevrilir, None boş hücre olur
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        # Kullanıcının girdiği metin formül olarak yorumlanmasın (CSV enjeksiyonu)
+        return "'" + value
+    return value
+
+
+def stream_csv(filename, header, rows):
+    """
+    rows (satır tuple'ları üreten bir iterator) CSV olarak parça parça gönderilir;
+    bellekte yalnızca o an yazılan satır tutulur. Excel'in Türkçe karakterleri
+    doğru açması için dosya UTF-8 BOM ile başlar.
+    """
+    writer = csv.writer(Echo(), delimiter=";")
+
+    def generate():
+        yield "﻿" + writer.writerow(header)
+        for row in rows:
+            yield writer.writerow([format_cell(value) for value in row])
+
+    response = StreamingHttpResponse(generate(), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_queryset(filename, columns, queryset):
+    """
+    columns: [(başlık, alan yolu), ...]. Sorgu values_list ile yalnızca bu sütunları seçer ve
+    .iterator(chunk_size=...) ile okunur (PostgreSQL'de sunucu tarafı imleç), model nesnesi oluşturulmaz.
+    """
+    header = [title for title, _ in columns]
+    # Yanıt view döndükten sonra akar; replika yönlendirmesi o an kapanmış olacağından
+    # okuma veritabanı view içindeyken sabitlenir
+    queryset = queryset.using(queryset.db)
+    rows = queryset.values_list(*[path for _, path in columns]).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return stream_csv(filename, header, rows)
@@ -0,0 +1,341 @@
+# core/imports.py
+
+import csv
+import itertools
+import json
+
+from django import forms
+from django.db import transaction
+from rest_framework import serializers
+
+from . import audit
+from .models import (
+    User, SubscriptionType, SubscriptionDuration, PaymentType,
+    Customer, CustomerBalance, DailyRollup, Payment, SearchEntry, ChangeLog
+)
+from .payment_analysis import build_customer_balance
+from .reference_data import reference_list
+from .search import fold_text
+from .serializers import CustomerSerializer
+
+# Her bulk_create / transaction kaç satır yazar
+IMPORT_BATCH_SIZE = 5000
+
+# API yanıtında gösterilecek en fazla hata satırı (toplam sayı ayrıca döner)
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_FORMATS = ("csv", "jsonl", "json")
+
+NO_PAYMENTS = {"total": None, "count": 0, "last": None}
+
+
+class InvalidRow:
+    """Okunamayan satır (ör. bozuk JSON); hata raporuna düşer."""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def guess_format(filename, default="csv"):
+    name = (filename or "").lower()
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if name.endswith(".json"):
+        return "json"
+    if name.endswith(".csv"):
+        return "csv"
+    return default
+
+
+def read_rows(stream, fmt):
+    """
+    Metin akışından satır sözlükleri üretir; dosyanın tamamı belleğe alınmaz.
+    csv: başlık satırlı, ayraç "," veya ";" (başlıktan anlaşılır).
+    jsonl: her satırda bir JSON nesnesi. json: nesne listesi (tek seferde okunur).
+    """
+    if fmt == "csv":
+        header = stream.readline().lstrip("﻿")
+        delimiter = ";" if header.count(";") > header.count(",") else ","
+        for row in csv.DictReader(itertools.chain([header], stream), delimiter=delimiter):
+            yield {key.strip(): (value.strip() if isinstance(value, str) else value)
+                   for key, value in row.items() if key}
+    elif fmt == "jsonl":
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as exc:
+                yield InvalidRow(f"Geçersiz JSON: {exc}")
+                continue
+            yield row if isinstance(row, dict) else InvalidRow("Satır bir JSON nesnesi olmalı.")
+    elif fmt == "json":
+        data = json.load(stream)
+        if not isinstance(data, list):
+            raise ValueError("JSON içe aktarma bir nesne listesi olmalı.")
+        for row in data:
+            yield row if isinstance(row, dict) else InvalidRow("Satır bir JSON nesnesi olmalı.")
+    else:
+        raise ValueError(f"Desteklenmeyen biçim: {fmt}")
+
+
+class LookupTable:
+    """
+    Ad -> nesne tablosu. İçe aktarma başında bir kez yüklenir, satır başına sorgu atılmaz.
+    fold=True ise adlar büyük/küçük harf (Türkçe) farkı gözetmeden eşleşir.
+    """
+
+    def __init__(self, objects, key="name", fold=True):
+        self.fold = fold
+        self.items = {}
+        for obj in objects:
+            self.items.setdefault(self.normalize(getattr(obj, key)), obj)
+
+    def normalize(self, value):
+        value = str(value).strip()
+        return fold_text(value) if self.fold else value
+
+    def get(self, value):
+        return self.items.get(self.normalize(value))
+
+
+class LookupField(serializers.Field):
+    """İlişkiyi id yerine adla alır ve context["lookups"] içindeki tablodan çözer."""
+    default_error_messages = {"not_found": '"{value}" bulunamadı.'}
+
+    def __init__(self, table, **kwargs):
+        self.table = table
+        super().__init__(**kwargs)
+
+    def validate_empty_values(self, data):
+        # CSV'de boş hücre null demektir
+        if data == "":
+            data = None
+        return super().validate_empty_values(data)
+
+    def to_internal_value(self, data):
+        obj = self.context["lookups"][self.table].get(data)
+        if obj is None:
+            self.fail("not_found", value=data)
+        return obj
+
+    def to_representation(self, value):
+        return str(value)
+
+
+class CustomerImportSerializer(CustomerSerializer):
+    """
+    CustomerSerializer kuralları; ilişkiler adla verilir (rep: temsilci kullanıcı adı).
+    Kullanıcı adı benzersizliği satır satır değil, parti başına tek sorguyla kontrol edilir.
+    """
+    rep = LookupField("rep", required=False, allow_null=True)
+    subscription_type = LookupField("subscription_type", allow_null=True)
+    subscription_duration = LookupField("subscription_duration", allow_null=True)
+    payment_type = LookupField("payment_type", allow_null=True)
+
+    class Meta(CustomerSerializer.Meta):
+        fields = [
+            'rep', 'username', 'first_name', 'last_name', 'identification', 'tax_office', 'address',
+            'subscription_type', 'subscription_duration', 'subscription_start_date', 'payment_type',
+            'amount', 'description', 'agreement_status',
+        ]
+        extra_kwargs = {'username': {'validators': []}}
+
+
+class PaymentImportForm(forms.ModelForm):
+    """InlinePaymentForm kuralları; müşteri kullanıcı adıyla verilir ve parti başına çözülür."""
+    class Meta:
+        model = Payment
+        fields = ['paid_amount', 'payment_method', 'note']
+
+
+class ImportResult:
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row, errors):
+        self.error_count += 1
+        self.errors.append({"row": row, "errors": error_messages(errors)})
+
+    def sorted_errors(self):
+        # Parti kontrollerindeki (ör. mevcut kullanıcı adı) hatalar sonradan eklenir; satır sırasına diz
+        return sorted(self.errors, key=lambda error: error["row"])
+
+    def as_dict(self, max_errors=MAX_REPORTED_ERRORS):
+        return {
+            "dry_run": self.dry_run,
+            "created": self.created,
+            "error_count": self.error_count,
+            "errors": self.sorted_errors()[:max_errors],
+        }
+
+
+def error_messages(errors):
+    # DRF/Django hata yapılarını {alan: [mesaj, ...]} biçimine çevirir
+    if isinstance(errors, str):
+        return {"non_field_errors": [errors]}
+    if isinstance(errors, list):
+        return {"non_field_errors": [str(message) for message in errors]}
+    return {
+        field: [str(message) for message in (messages if isinstance(messages, list) else [messages])]
+        for field, messages in errors.items()
+    }
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def customer_lookups(user):
+    # Temsilci yalnızca kendi adına müşteri aktarabilir; yönetici/komut her temsilci adına
+    if user is not None and not user.is_superuser:
+        reps = [user]
+    else:
+        reps = User.objects.all()
+    return {
+        "rep": LookupTable(reps, key="username", fold=False),
+        "subscription_type": LookupTable(reference_list(SubscriptionType)),
+        "subscription_duration": LookupTable(reference_list(SubscriptionDuration)),
+        "payment_type": LookupTable(reference_list(PaymentType)),
+    }
+
+
+def new_balances(customers):
+    # Ödemesi olmayan yeni müşterilerin bakiye kayıtları; aynı süre/başlangıç/tutar için hesap bir kez yapılır
+    cache = {}
+    balances = []
+    for customer in customers:
+        key = (customer.subscription_duration_id, customer.subscription_start_date, customer.amount)
+        if key not in cache:
+            cache[key] = build_customer_balance(customer, NO_PAYMENTS)
+        balances.append(CustomerBalance(customer=customer, **cache[key]))
+    return balances
+
+
+def import_customers(rows, user=None, default_rep=None, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+    """
+    rows: read_rows() çıktısı. Her satır CustomerImportSerializer ile doğrulanır, geçerli satırlar
+    batch_size'lık partiler halinde tek transaction içinde bulk_create ile yazılır. Müşteri
+    save() çalışmadığından bakiye defteri, arama indeksi ve değişiklik günlüğü kayıtları da aynı
+    partide toplu yazılır.
+    user verilirse (API) temsilci yalnızca kendi adına aktarır; rep sütunu yoksa default_rep
+    (ya da temsilcinin kendisi) kullanılır.
+    """
+    if default_rep is None and user is not None and not user.is_superuser:
+        default_rep = user
+    serializer = CustomerImportSerializer(context={"lookups": customer_lookups(user)})
+    result = ImportResult(dry_run)
+    seen = set()
+
+    def valid_rows():
+        for row_no, row in enumerate(rows, start=1):
+            if isinstance(row, InvalidRow):
+                result.add_error(row_no, row.message)
+                continue
+            try:
+                data = serializer.run_validation(row)
+            except serializers.ValidationError as exc:
+                result.add_error(row_no, exc.detail)
+                continue
+            if not data.get("rep"):
+                data["rep"] = default_rep
+                if default_rep is None:
+                    result.add_error(row_no, {"rep": ["Temsilci belirtilmeli."]})
+                    continue
+            if data["username"] in seen:
+                result.add_error(row_no, {"username": ["Bu kullanıcı adı dosyada birden fazla kez geçiyor."]})
+                continue
+            seen.add(data["username"])
+            yield row_no, Customer(**data)
+
+    for batch in batched(valid_rows(), batch_size):
+        existing = set(
+            Customer.objects.filter(username__in=[customer.username for _, customer in batch])
+            .values_list("username", flat=True)
+        )
+        customers = []
+        for row_no, customer in batch:
+            if customer.username in existing:
+                result.add_error(row_no, {"username": ["Bu kullanıcı adıyla müşteri zaten var."]})
+            else:
+                customers.append(customer)
+        if not dry_run:
+            with transaction.atomic():
+                Customer.objects.bulk_create(customers)
+                CustomerBalance.objects.bulk_create(new_balances(customers))
+                SearchEntry.objects.add_many(customers)
+                ChangeLog.objects.record_many(customers)
+                audit.record_bulk(customers)
+        result.created += len(customers)
+    return result
+
+
+def import_payments(rows, user=None, batch_size=IMPORT_BATCH_SIZE, dry_run=False):
+    """
+    rows: read_rows() çıktısı; "customer" sütunu müşterinin kullanıcı adıdır. Satırlar
+    PaymentImportForm ile doğrulanır, müşteriler parti başına tek sorguyla çözülür, ödemeler
+    bulk_create ile yazılır; etkilenen müşterilerin bakiye defteri, günlük özetler ve değişiklik
+    günlüğü toplu güncellenir.
+    user verilirse (API) temsilci yalnızca kendi müşterilerine ödeme aktarabilir.
+    """
+    result = ImportResult(dry_run)
+
+    def valid_rows():
+        for row_no, row in enumerate(rows, start=1):
+            if isinstance(row, InvalidRow):
+                result.add_error(row_no, row.message)
+                continue
+            form = PaymentImportForm(data=row)
+            if not form.is_valid():
+                result.add_error(row_no, {
+                    field: [error["message"] for error in errors]
+                    for field, errors in form.errors.get_json_data().items()
+                })
+                continue
+            username = str(row.get("customer") or "").strip()
+            if not username:
+                result.add_error(row_no, {"customer": ["Bu alan zorunludur."]})
+                continue
+            yield row_no, username, form.save(commit=False)
+
+    customers = Customer.objects.all()
+    if user is not None and not user.is_superuser:
+        customers = customers.filter(rep=user)
+
+    for batch in batched(valid_rows(), batch_size):
+        customer_ids = dict(
+            customers.filter(username__in={username for _, username, _ in batch})
+            .values_list("username", "pk")
+        )
+        payments = []
+        for row_no, username, payment in batch:
+            customer_id = customer_ids.get(username)
+            if customer_id is None:
+                result.add_error(row_no, {"customer": [f'"{username}" bulunamadı.']})
+                continue
+            payment.customer_id = customer_id
+            payments.append(payment)
+        if not dry_run:
+            with transaction.atomic():
+                Payment.objects.bulk_create(payments)
+                CustomerBalance.objects.refresh_many(payment.customer_id for payment in payments)
+                DailyRollup.objects.refresh_many(payments)
+                ChangeLog.objects.record_many(payments)
+                audit.record_bulk(payments)
+        result.created += len(payments)
+    return result
+
+
+IMPORTERS = {
+    "customers": import_customers,
+    "payments": import_payments,
+}
@@ -0,0 +1,162 @@
+# core/jobs.py
+
+import logging
+import os
+import socket
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Worker bir işi bu süre içinde bitirmezse (ör. süreç öldü) iş başka worker'a tekrar verilir
+DEFAULT_VISIBILITY_TIMEOUT = 300
+DEFAULT_MAX_ATTEMPTS = 5
+# Yeniden deneme beklemesi: RETRY_BASE_DELAY * 2^(deneme-1) sn, en fazla RETRY_MAX_DELAY
+RETRY_BASE_DELAY = 10
+RETRY_MAX_DELAY = 3600
+
+
+def task_path(task):
+    # İş, fonksiyonun modül yolu ile saklanır: "core.rollups.refresh_rollup_slice"
+    return task if isinstance(task, str) else f"{task.__module__}.{task.__qualname__}"
+
+
+def is_eager():
+    # Worker çalıştırılmayan ortamlar için: işler kuyruğa yazılmadan hemen (aynı transaction'da) çalışır
+    return getattr(settings, "JOBS_EAGER", False)
+
+
+def new_job(task, payload=None, key=None, run_at=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    from .models import Job
+
+    return Job(
+        task=task_path(task), payload=payload or {}, key=key,
+        run_at=run_at or timezone.now(), max_attempts=max_attempts,
+    )
+
+
+def enqueue(task, payload=None, key=None, run_at=None, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    enqueue_many([new_job(task, payload, key, run_at, max_attempts)])
+
+
+def enqueue_many(jobs):
+    """
+    İşleri kuyruğa yazar. Açık transaction içinde çağrılırsa işler de onunla birlikte commit/rollback
+    olur; worker commit edilmemiş işi görmez. Aynı key ile bekleyen iş varsa yenisi eklenmez
+    (ör. aynı günlük özet dilimine art arda gelen yazmalar tek yeniden hesaplamada birleşir).
+    """
+    from .models import Job
+
+    if not jobs:
+        return
+    if is_eager():
+        for job in jobs:
+            import_string(job.task)(**job.payload)
+        return
+    Job.objects.bulk_create(jobs, ignore_conflicts=True)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def claim(worker_id, limit, visibility_timeout=None):
+    """
+    Çalışmaya hazır en fazla limit işi bu worker'a ayırır. Ayırma tek koşullu UPDATE'tir: aynı işi
+    iki worker aynı anda ayırmaya çalışırsa yalnızca biri başarır (SQLite ve PostgreSQL'de aynı).
+    Süresi dolmuş "running" işler (worker öldü) yeniden ayrılır. Aynı key'li iş çalışırken
+    bekleyen kopyası ayrılmaz; böylece aynı dilim iki worker'da aynı anda hesaplanmaz.
+    """
+    from .models import Job
+
+    if visibility_timeout is None:
+        visibility_timeout = getattr(settings, "JOBS_VISIBILITY_TIMEOUT", DEFAULT_VISIBILITY_TIMEOUT)
+    now = timezone.now()
+    running_keys = Job.objects.filter(status=Job.RUNNING, locked_until__gte=now, key__isnull=False).values("key")
+    claimable = (
+        Q(status=Job.QUEUED, run_at__lte=now) & (Q(key__isnull=True) | ~Q(key__in=running_keys))
+    ) | Q(status=Job.RUNNING, locked_until__lt=now)
+
+    ids = list(Job.objects.filter(claimable).order_by("run_at", "id").values_list("pk", flat=True)[:limit])
+    if not ids:
+        return []
+    token = f"{worker_id}/{uuid.uuid4().hex[:12]}"
+    Job.objects.filter(claimable, pk__in=ids).update(
+        status=Job.RUNNING, locked_by=token, locked_until=now + timedelta(seconds=visibility_timeout),
+        attempts=F("attempts") + 1,
+    )
+    return list(Job.objects.filter(locked_by=token, status=Job.RUNNING).order_by("run_at", "id"))
+
+
+def retry_delay(attempts):
+    return min(RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0), RETRY_MAX_DELAY)
+
+
+def run_job(job):
+    """
+    İşi çalıştırır; başarıda iş ile "done" işareti aynı transaction'da yazılır. Hata olursa
+    max_attempts dolana kadar artan beklemeyle yeniden kuyruğa alınır, sonra "failed" kalır.
+    İşler en az bir kez çalışır (worker ölürse tekrar çalışabilir); iş fonksiyonları idempotent olmalıdır.
+    Dönüş: True başarılı, False hatalı.
+    """
+    from .models import Job
+
+    mine = Job.objects.filter(pk=job.pk, locked_by=job.locked_by, status=Job.RUNNING)
+    try:
+        if job.attempts > job.max_attempts:
+            raise RuntimeError("Deneme hakkı doldu (worker iş bitmeden durdu).")
+        with transaction.atomic():
+            import_string(job.task)(**job.payload)
+            mine.update(status=Job.DONE, finished_at=timezone.now(), locked_until=None)
+        return True
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning("İş başarısız: %s #%s (deneme %s)\n%s", job.task, job.pk, job.attempts, error)
+
+    if job.attempts >= job.max_attempts:
+        mine.update(status=Job.FAILED, finished_at=timezone.now(), locked_until=None, last_error=error)
+        return False
+    try:
+        with transaction.atomic():
+            mine.update(
+                status=Job.QUEUED, locked_until=None, last_error=error,
+                run_at=timezone.now() + timedelta(seconds=retry_delay(job.attempts)),
+            )
+    except IntegrityError:
+        # Aynı key'li yeni bir iş zaten kuyrukta; o iş bu işin yapacağını da yapacak
+        mine.update(status=Job.DONE, finished_at=timezone.now(), locked_until=None, last_error=error)
+    return False
+
+
+def run_pending(worker_id=None, batch_size=20, max_jobs=None, visibility_timeout=None):
+    """Hazır işleri kuyruk boşalana (ya da max_jobs'a) kadar çalıştırır. Dönüş: (başarılı, hatalı)."""
+    worker_id = worker_id or default_worker_id()
+    succeeded = failed = 0
+    while max_jobs is None or succeeded + failed < max_jobs:
+        limit = batch_size if max_jobs is None else min(batch_size, max_jobs - succeeded - failed)
+        jobs = claim(worker_id, limit, visibility_timeout)
+        if not jobs:
+            break
+        for job in jobs:
+            if run_job(job):
+                succeeded += 1
+            else:
+                failed += 1
+    return succeeded, failed
+
+
+def prune(days=None):
+    # Tamamlanan eski işleri siler; başarısızlar incelenmek üzere kalır
+    from .models import Job
+
+    days = getattr(settings, "JOBS_KEEP_DAYS", 7) if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Job.objects.filter(status=Job.DONE, finished_at__lt=cutoff).delete()
+    return deleted
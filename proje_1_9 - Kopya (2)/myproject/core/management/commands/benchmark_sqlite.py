@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+
+
+def configure(db_path, profile, timeout):
+    # Alt süreç: ayarlar ortam değişkenlerinden okunduğu için django.setup() öncesi verilir
+    os.environ.update({
+        "DB_ENGINE": "sqlite",
+        "DB_NAME": db_path,
+        "DB_SQLITE_PROFILE": profile,
+        "DB_SQLITE_TIMEOUT": str(timeout),
+    })
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "myproject.settings")
+    import django
+
+    django.setup()
+
+
+def prepare_database(db_path, reps):
+    """Şablon veritabanı: şema + her temsilci için kullanıcı, müşteri ve harcama kategorisi."""
+    from datetime import date
+
+    configure(db_path, "default", 5)
+    from django.core.management import call_command
+    from core.models import Customer, ExpenseCategory, SubscriptionDuration, User
+
+    call_command("migrate", verbosity=0)
+    duration = SubscriptionDuration.objects.create(name="12 Ay")
+    ExpenseCategory.objects.create(name="Yakıt")
+    for rep_no in range(reps):
+        rep = User.objects.create_user(f"bench_rep{rep_no}", password="bench", level=2)
+        Customer.objects.create(
+            rep=rep, username=f"bench_customer{rep_no}", first_name="Test", last_name="Müşteri",
+            address="-", subscription_duration=duration, subscription_start_date=date.today(),
+            amount=1200, agreement_status="olumlu",
+        )
+
+
+def simulate_rep(db_path, profile, timeout, rep_no, operations, barrier):
+    """
+    Bir temsilci: sırayla ödeme ve harcama kaydeder (ödeme kaydı bakiye defterini de günceller).
+    Dönüş: (başarılı işlem, kilit hatası, geçen süre)
+    """
+    configure(db_path, profile, timeout)
+    from django.db import OperationalError
+    from core.models import Customer, Expense, ExpenseCategory, Payment, User
+
+    rep = User.objects.get(username=f"bench_rep{rep_no}")
+    customer = Customer.objects.get(username=f"bench_customer{rep_no}")
+    category = ExpenseCategory.objects.get()
+    barrier.wait()
+
+    succeeded = locked = 0
+    started = time.perf_counter()
+    for number in range(operations):
+        try:
+            if number % 2 == 0:
+                Payment.objects.create(customer=customer, paid_amount=100)
+            else:
+                Expense.objects.create(user=rep, category=category, amount=10)
+            succeeded += 1
+        except OperationalError as exc:
+            if "locked" not in str(exc):
+                raise
+            locked += 1
+    return succeeded, locked, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        "SQLite ayar profillerini karşılaştırır: N temsilci aynı anda ödeme ve harcama kaydeder; "
+        "profil başına işlem/sn ve 'database is locked' hata sayısı raporlanır. "
+        "Gerçek veritabanına dokunmaz, geçici kopyalar üzerinde çalışır."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--reps", type=int, default=8, help="Eşzamanlı temsilci (süreç) sayısı")
+        parser.add_argument("--operations", type=int, default=200, help="Temsilci başına işlem")
+        parser.add_argument("--profiles", default="default,performance")
+        parser.add_argument("--timeout", type=int, default=5, help="Kilit bekleme süresi, saniye")
+
+    def handle(self, *args, **options):
+        reps, operations, timeout = options["reps"], options["operations"], options["timeout"]
+        profiles = [name.strip() for name in options["profiles"].split(",") if name.strip()]
+        context = multiprocessing.get_context("spawn")
+
+        with tempfile.TemporaryDirectory() as workdir:
+            template = os.path.join(workdir, "template.sqlite3")
+            process = context.Process(target=prepare_database, args=(template, reps))
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                raise RuntimeError("Benchmark veritabanı hazırlanamadı.")
+
+            self.stdout.write(f"{reps} temsilci x {operations} işlem, kilit bekleme {timeout} sn")
+            self.stdout.write(f"{'profil':<14}{'başarılı':>10}{'kilit hatası':>14}{'süre (sn)':>12}{'işlem/sn':>12}")
+            for profile in profiles:
+                db_path = os.path.join(workdir, f"{profile}.sqlite3")
+                shutil.copyfile(template, db_path)
+                with context.Manager() as manager:
+                    barrier = manager.Barrier(reps)
+                    with context.Pool(reps) as pool:
+                        results = pool.starmap(simulate_rep, [
+                            (db_path, profile, timeout, rep_no, operations, barrier) for rep_no in range(reps)
+                        ])
+                succeeded = sum(result[0] for result in results)
+                locked = sum(result[1] for result in results)
+                elapsed = max(result[2] for result in results)
+                self.stdout.write(
+                    f"{profile:<14}{succeeded:>10}{locked:>14}{elapsed:>12.2f}{succeeded / elapsed:>12.1f}"
+                )
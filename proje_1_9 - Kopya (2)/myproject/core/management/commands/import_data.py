@@ -0,0 +1,58 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.imports import IMPORT_BATCH_SIZE, IMPORT_FORMATS, IMPORTERS, guess_format, read_rows
+from core.models import User
+
+
+class Command(BaseCommand):
+    help = "Müşteri veya ödemeleri CSV/JSON dosyasından toplu içe aktarır ve satır bazında hata raporu üretir."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(IMPORTERS))
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, help="Varsayılan: dosya uzantısından.")
+        parser.add_argument("--rep", help="rep sütunu olmayan müşteri satırları için temsilci kullanıcı adı.")
+        parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Sadece doğrula, hiçbir şey yazma.")
+        parser.add_argument("--errors", help="Hatalı satırların yazılacağı CSV dosyası.")
+
+    def handle(self, *args, **options):
+        kind = options["kind"]
+        fmt = options["format"] or guess_format(options["path"])
+        kwargs = {"batch_size": options["batch_size"], "dry_run": options["dry_run"]}
+        if kind == "customers" and options["rep"]:
+            try:
+                kwargs["default_rep"] = User.objects.get(username=options["rep"])
+            except User.DoesNotExist:
+                raise CommandError(f"Temsilci bulunamadı: {options['rep']}")
+
+        started = time.monotonic()
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as stream:
+                result = IMPORTERS[kind](read_rows(stream, fmt), **kwargs)
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        elapsed = time.monotonic() - started
+
+        errors = result.sorted_errors()
+        if options["errors"] and errors:
+            with open(options["errors"], "w", encoding="utf-8", newline="") as report:
+                writer = csv.writer(report)
+                writer.writerow(["satir", "alan", "hata"])
+                for error in errors:
+                    for field, messages in error["errors"].items():
+                        for message in messages:
+                            writer.writerow([error["row"], field, message])
+        else:
+            for error in errors[:20]:
+                self.stdout.write(f"Satır {error['row']}: {error['errors']}")
+            if result.error_count > 20:
+                self.stdout.write(f"... ve {result.error_count - 20} hata daha (tamamı için --errors)")
+
+        verb = "doğrulandı" if options["dry_run"] else "aktarıldı"
+        self.stdout.write(self.style.SUCCESS(
+            f"{result.created} kayıt {verb}, {result.error_count} satır hatalı ({elapsed:.1f} sn)."
+        ))
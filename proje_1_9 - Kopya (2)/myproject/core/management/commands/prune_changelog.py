@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import ChangeLog, ClientOperation
+
+
+class Command(BaseCommand):
+    help = (
+        "Senkronizasyon günlüğündeki eski silme kayıtlarını ve çevrimdışı kuyruğun eski işlem "
+        "kayıtlarını temizler. Token'ı bu süreden eski istemciler zaten tam senkronizasyona döner."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=getattr(settings, "SYNC_TOMBSTONE_DAYS", 30),
+            help="Bu günden eski kayıtlar temizlenir (varsayılan: SYNC_TOMBSTONE_DAYS).",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        tombstones, _ = ChangeLog.objects.filter(deleted=True, changed_at__lt=cutoff).delete()
+        operations, _ = ClientOperation.objects.filter(created_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f"{tombstones} eski silme kaydı ve {operations} eski kuyruk işlemi temizlendi."
+        ))
@@ -0,0 +1,78 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+
+from core.models import Customer, CustomerBalance, Payment
+from core.payment_analysis import MONEY_FIELD, build_customer_balance
+
+# Defterdeki bu alanlar Payment tablosuyla birebir tutmalı (is_late tarihe bağlı olduğu için sayılmaz)
+DRIFT_FIELDS = ["total_paid", "payment_count", "last_payment_date", "paid_installment_count"]
+
+
+class Command(BaseCommand):
+    help = "CustomerBalance defterini Payment tablosundan yeniden oluşturur ve sapmaları raporlar."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Hiçbir şey yazmadan sadece sapmaları raporla (sapma varsa hata koduyla çık).",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        check_only = options["check"]
+        batch_size = options["batch_size"]
+
+        # Tüm ödeme toplamları tek gruplu sorguyla
+        totals = {
+            row["customer_id"]: row
+            for row in Payment.objects.order_by().values("customer_id").annotate(
+                total=Sum("paid_amount", output_field=MONEY_FIELD),
+                count=Count("id"),
+                last=Max("payment_date"),
+            )
+        }
+        empty = {"total": None, "count": 0, "last": None}
+
+        customers = Customer.objects.select_related("subscription_duration", "balance").order_by("pk")
+        missing, changed, drifted = [], [], 0
+        for customer in customers.iterator(chunk_size=batch_size):
+            values = build_customer_balance(customer, totals.get(customer.pk, empty))
+            try:
+                balance = customer.balance
+            except CustomerBalance.DoesNotExist:
+                drifted += 1
+                self.stdout.write(f"Eksik kayıt: {customer.username}")
+                missing.append(CustomerBalance(customer=customer, **values))
+                continue
+
+            diffs = [f for f in DRIFT_FIELDS if getattr(balance, f) != values[f]]
+            if diffs:
+                drifted += 1
+                self.stdout.write(
+                    f"Sapma: {customer.username} "
+                    + ", ".join(f"{f}={getattr(balance, f)} (beklenen {values[f]})" for f in diffs)
+                )
+            for field, value in values.items():
+                setattr(balance, field, value)
+            changed.append(balance)
+
+            if not check_only and len(missing) + len(changed) >= batch_size:
+                self._write(missing, changed, batch_size)
+                missing, changed = [], []
+
+        if check_only:
+            if drifted:
+                raise CommandError(f"{drifted} müşteri bakiyesinde sapma bulundu.")
+            self.stdout.write(self.style.SUCCESS("Bakiye defteri tutarlı."))
+            return
+
+        self._write(missing, changed, batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Bakiye defteri yeniden oluşturuldu ({drifted} sapma düzeltildi)."))
+
+    def _write(self, missing, changed, batch_size):
+        with transaction.atomic():
+            CustomerBalance.objects.bulk_create(missing, batch_size=batch_size)
+            CustomerBalance.objects.bulk_update(
+                changed, DRIFT_FIELDS + ["is_late", "status_date"], batch_size=batch_size
+            )
@@ -0,0 +1,64 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import DailyRollup
+from core.rollups import ROLLUP_SOURCES, compute_rollups, rollup_values
+
+
+class Command(BaseCommand):
+    help = (
+        "Günlük özetleri (DailyRollup) kaynak tablolardan yeniden hesaplar ve sapmaları raporlar. "
+        "Gece mutabakatı için: rebuild_rollups --days 2"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Hiçbir şey yazmadan sadece sapmaları raporla (sapma varsa hata koduyla çık).",
+        )
+        parser.add_argument("--days", type=int, help="Yalnızca son N günü yeniden hesapla (varsayılan: tümü).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        check_only = options["check"]
+        day_from = None
+        if options["days"] is not None:
+            day_from = timezone.localdate() - timedelta(days=options["days"] - 1)
+
+        drifted = 0
+        for metric in ROLLUP_SOURCES:
+            expected = compute_rollups(metric, day_from=day_from)
+            stored = DailyRollup.objects.filter(metric=metric)
+            if day_from is not None:
+                stored = stored.filter(date__gte=day_from)
+
+            expected_values = rollup_values(expected)
+            stored_list = list(stored)
+            stored_values = rollup_values(stored_list)
+            # Aynı dilimde birden fazla satır (ör. silinen temsilcinin satırları) da sapmadır
+            diffs = {
+                key for key in expected_values.keys() | stored_values.keys()
+                if expected_values.get(key) != stored_values.get(key)
+            }
+            duplicates = len(stored_list) - len(stored_values)
+            if diffs or duplicates:
+                drifted += len(diffs) + duplicates
+                for key in sorted(diffs, key=str)[:20]:
+                    self.stdout.write(
+                        f"Sapma: {key} kayıtlı={stored_values.get(key)} beklenen={expected_values.get(key)}"
+                    )
+
+            if not check_only and (diffs or duplicates):
+                with transaction.atomic():
+                    stored.delete()
+                    DailyRollup.objects.bulk_create(expected, batch_size=options["batch_size"])
+
+        if check_only:
+            if drifted:
+                raise CommandError(f"Günlük özetlerde {drifted} sapma bulundu.")
+            self.stdout.write(self.style.SUCCESS("Günlük özetler tutarlı."))
+            return
+        self.stdout.write(self.style.SUCCESS(f"Günlük özetler yeniden hesaplandı ({drifted} sapma düzeltildi)."))
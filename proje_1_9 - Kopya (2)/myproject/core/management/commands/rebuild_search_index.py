@@ -0,0 +1,36 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import SearchEntry
+from core.search import FTS_TABLE, SEARCH_FIELDS, build_entries
+
+
+class Command(BaseCommand):
+    help = "Arama indeksini (SearchEntry ve FTS/trigram indeksi) kayıtlardan yeniden oluşturur."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+
+        with transaction.atomic():
+            # Tetikleyiciler FTS tablosundaki satırları da siler/ekler
+            SearchEntry.objects.all().delete()
+            total = 0
+            for label, fields in SEARCH_FIELDS.items():
+                model = apps.get_model(label)
+                batch = []
+                for row in model.objects.only("pk", *fields).order_by("pk").iterator(chunk_size=batch_size):
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        total += len(SearchEntry.objects.bulk_create(build_entries(SearchEntry, batch)))
+                        batch = []
+                total += len(SearchEntry.objects.bulk_create(build_entries(SearchEntry, batch)))
+
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+
+        self.stdout.write(self.style.SUCCESS(f"Arama indeksi yeniden oluşturuldu ({total} kayıt)."))
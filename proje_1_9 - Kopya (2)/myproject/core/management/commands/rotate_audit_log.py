@@ -0,0 +1,69 @@
+import gzip
+import json
+import os
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import AuditEntry
+
+
+class Command(BaseCommand):
+    help = (
+        "Eski denetim kayıtlarını tablodan aylık arşiv dosyalarına taşır "
+        "(AUDIT_ARCHIVE_DIR/audit-YYYY-AA.jsonl.gz, her satır bir girdi). Dosyalara yalnızca eklenir; "
+        "aynı ay için tekrar çalıştırmak dosyaya yeni bir gzip bloğu ekler. Gece çalıştırmak için uygundur."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, default=getattr(settings, "AUDIT_RETENTION_DAYS", 365),
+            help="Bu günden eski girdiler arşivlenir (varsayılan: AUDIT_RETENTION_DAYS).",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--archive-dir", default=getattr(settings, "AUDIT_ARCHIVE_DIR", None),
+            help="Arşiv klasörü (varsayılan: AUDIT_ARCHIVE_DIR).",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        archive_dir = options["archive_dir"]
+        os.makedirs(archive_dir, exist_ok=True)
+
+        moved = 0
+        while True:
+            # Parti önce dosyaya yazılır, sonra silinir: yarıda kesilirse girdi kaybolmaz (en kötü tekrar yazılır)
+            with transaction.atomic():
+                batch = list(
+                    AuditEntry.objects.filter(timestamp__lt=cutoff).order_by("timestamp", "pk")[:options["batch_size"]]
+                )
+                if not batch:
+                    break
+                by_month = {}
+                for entry in batch:
+                    by_month.setdefault(entry.timestamp.strftime("%Y-%m"), []).append(entry)
+                for month, entries in by_month.items():
+                    path = os.path.join(archive_dir, f"audit-{month}.jsonl.gz")
+                    with gzip.open(path, "at", encoding="utf-8") as archive:
+                        archive.write("".join(json.dumps(self.serialize(entry), ensure_ascii=False) + "\n"
+                                              for entry in entries))
+                AuditEntry.objects.filter(pk__in=[entry.pk for entry in batch]).delete()
+            moved += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"{moved} denetim girdisi {archive_dir} altına arşivlendi."))
+
+    @staticmethod
+    def serialize(entry):
+        return {
+            "id": entry.pk,
+            "timestamp": entry.timestamp.isoformat(),
+            "model": entry.model,
+            "object_id": entry.object_id,
+            "action": entry.action,
+            "actor": entry.actor_id,
+            "changes": entry.changes,
+        }
@@ -0,0 +1,58 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Arka plan iş kuyruğunu (core.Job) çalıştırır. Birden fazla worker aynı anda çalışabilir; "
+        "her iş tek worker'a ayrılır. --once ile kuyruğu boşaltıp çıkar (cron / yerel deneme için)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true", help="Hazır işleri bitirip çık.")
+        parser.add_argument("--batch-size", type=int, default=20, help="Tek seferde ayrılan iş sayısı")
+        parser.add_argument("--sleep", type=float, default=1.0, help="Kuyruk boşken bekleme, saniye")
+        parser.add_argument(
+            "--visibility-timeout", type=int,
+            default=getattr(settings, "JOBS_VISIBILITY_TIMEOUT", jobs.DEFAULT_VISIBILITY_TIMEOUT),
+            help="Bu sürede bitmeyen iş başka worker'a verilir, saniye",
+        )
+        parser.add_argument("--worker-id", default=None)
+
+    def handle(self, *args, **options):
+        worker_id = options["worker_id"] or jobs.default_worker_id()
+        self.stopping = False
+        # SIGTERM/SIGINT: elindeki işi bitirip çıkar
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, self.stop)
+
+        total_ok = total_failed = 0
+        last_prune = 0.0
+        self.stdout.write(f"Worker {worker_id} başladı.")
+        while not self.stopping:
+            close_old_connections()
+            succeeded, failed = jobs.run_pending(
+                worker_id, batch_size=options["batch_size"], max_jobs=options["batch_size"],
+                visibility_timeout=options["visibility_timeout"],
+            )
+            total_ok += succeeded
+            total_failed += failed
+            if succeeded or failed:
+                continue
+            if options["once"]:
+                break
+            if time.monotonic() - last_prune > 3600:
+                jobs.prune()
+                last_prune = time.monotonic()
+            time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(f"Worker {worker_id}: {total_ok} iş tamamlandı, {total_failed} hata."))
+
+    def stop(self, signum, frame):
+        self.stopping = True
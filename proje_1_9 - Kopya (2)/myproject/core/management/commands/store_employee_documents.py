@@ -0,0 +1,61 @@
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.management.base import BaseCommand
+
+from core.media import existing_thumbnail, schedule_thumbnail, store_content
+from core.models import EmployeeDocument
+
+
+class Command(BaseCommand):
+    help = (
+        "Eski yükleme yolundaki (employee_documents/<çalışan>/<ad>) belgeleri içerik adresli depoya "
+        "taşır: aynı içerik tek kopya olur, önizleme işi kuyruğa alınır. Dosya MEDIA_ROOT altında "
+        "yoksa EMPLOYEE_DOCUMENT_LEGACY_DIRS klasörlerinde aranır. Tekrar çalıştırmak güvenlidir."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--delete-originals", action="store_true",
+            help="Taşınan dosyaların eski kopyalarını siler.",
+        )
+
+    def handle(self, *args, **options):
+        stored = missing = 0
+        for document in EmployeeDocument.objects.filter(sha256="").exclude(file="").iterator():
+            old_name = document.file.name
+            path = self.locate(document)
+            if path is None:
+                missing += 1
+                self.stderr.write(f"Belge #{document.pk}: {old_name} bulunamadı.")
+                continue
+            original_name = os.path.basename(old_name)
+            with open(path, "rb") as source:
+                name, sha256, size = store_content(document.file.storage, File(source), original_name)
+            document.file.name = name
+            document.original_name = original_name[:255]
+            document.sha256 = sha256
+            document.size = size
+            document.thumbnail = existing_thumbnail(sha256)
+            document.save(update_fields=EmployeeDocument.STORED_FIELDS)
+            if not document.thumbnail:
+                schedule_thumbnail(sha256)
+            stored += 1
+            if options["delete_originals"] and not EmployeeDocument.objects.filter(file=old_name).exists():
+                os.remove(path)
+
+        self.stdout.write(self.style.SUCCESS(f"{stored} belge taşındı, {missing} belge bulunamadı."))
+
+    @staticmethod
+    def locate(document):
+        storage = document.file.storage
+        if storage.exists(document.file.name):
+            return storage.path(document.file.name)
+        # Eski yol MEDIA_ROOT yerine proje klasörüne göreydi: employee_documents/<çalışan>/<ad>
+        relative = document.file.name.removeprefix("employee_documents/")
+        for directory in getattr(settings, "EMPLOYEE_DOCUMENT_LEGACY_DIRS", []):
+            path = os.path.join(directory, relative)
+            if os.path.isfile(path):
+                return path
+        return None
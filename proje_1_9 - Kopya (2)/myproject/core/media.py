@@ -0,0 +1,316 @@
+# core/media.py
+
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db.models import Q
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+
+from . import jobs
+
+logger = logging.getLogger(__name__)
+
+# Tek dosyanın en büyük boyutu (bayt); settings.UPLOAD_MAX_SIZE ile değiştirilebilir
+DEFAULT_UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+# Önizlemenin uzun kenarı (piksel); settings.DOCUMENT_THUMBNAIL_SIZE
+DEFAULT_THUMBNAIL_SIZE = 240
+
+DOCUMENT_PREFIX = "employee_documents"
+THUMBNAIL_PREFIX = "employee_documents/thumbs"
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tif", ".tiff"}
+HASH_CHUNK_SIZE = 64 * 1024
+
+# İçerik adresli belge ve önizleme adları; özet, indeksli sha256 alanıyla aramada kullanılır
+CONTENT_NAME_RE = re.compile(
+    r"^employee_documents/(?:thumbs/[0-9a-f]{2}|[0-9a-f]{2}/[0-9a-f]{2})/([0-9a-f]{64})(?:\.[a-z0-9]+)?$"
+)
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+SERVE_CHUNK_SIZE = 64 * 1024
+
+
+def upload_max_size():
+    return getattr(settings, "UPLOAD_MAX_SIZE", DEFAULT_UPLOAD_MAX_SIZE)
+
+
+def validate_upload_size(file):
+    limit = upload_max_size()
+    if file.size > limit:
+        raise ValidationError(f"Dosya en fazla {limit // (1024 * 1024)} MB olabilir.")
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """
+    Yüklenen dosyaları bellekte biriktirmeden parça parça geçici dosyaya yazar ve yazarken
+    SHA-256 özetini çıkarır (file.sha256); içerik adresli kayıtta dosya ikinci kez okunmaz.
+    UPLOAD_MAX_SIZE aşıldıktan sonra gelen parçalar diske yazılmaz; dosya gerçek boyutuyla
+    döner ve validate_upload_size ile reddedilir.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.digest = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received <= upload_max_size():
+            self.digest.update(raw_data)
+            self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.digest.hexdigest() if self.received <= upload_max_size() else None
+        return file
+
+
+def file_sha256(file):
+    # Yükleme sırasında hesaplanmışsa o kullanılır; yoksa dosya parça parça okunur
+    sha256 = getattr(file, "sha256", None)
+    if sha256:
+        return sha256
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def safe_extension(filename):
+    # Uzantı yalnızca tür bilgisi için saklanır; kullanıcıdan gelen diğer ad parçaları yola girmez
+    ext = os.path.splitext(filename)[1].lower()
+    return ext if 1 < len(ext) <= 8 and ext[1:].isalnum() else ""
+
+
+def content_name(sha256, filename):
+    return f"{DOCUMENT_PREFIX}/{sha256[:2]}/{sha256[2:4]}/{sha256}{safe_extension(filename)}"
+
+
+def thumbnail_name(sha256):
+    return f"{THUMBNAIL_PREFIX}/{sha256[:2]}/{sha256}.jpg"
+
+
+def store_content(storage, file, filename):
+    """
+    Dosyayı içeriğinin özetinden türetilen ada yazar; aynı içerik zaten varsa yeniden yazılmaz.
+    Dönüş: (depodaki ad, sha256, boyut).
+    """
+    sha256 = file_sha256(file)
+    name = content_name(sha256, filename)
+    if not storage.exists(name):
+        saved = storage.save(name, file)
+        if saved != name:
+            # Aynı içerik eşzamanlı bir yüklemeyle az önce yazıldı; ikinci kopya gereksiz
+            storage.delete(saved)
+    return name, sha256, file.size
+
+
+def existing_thumbnail(sha256):
+    from .models import EmployeeDocument
+
+    return (
+        EmployeeDocument.objects.filter(sha256=sha256).exclude(thumbnail="")
+        .values_list("thumbnail", flat=True).first()
+    ) or ""
+
+
+def store_document(document):
+    """
+    EmployeeDocument.save içinden: yeni yüklenen dosyayı içerik adresli ada taşır ve özet, boyut,
+    özgün ad alanlarını doldurur. Aynı içeriğin önizlemesi varsa o bağlanır.
+    """
+    upload = document.file
+    original_name = os.path.basename(upload.name)
+    name, sha256, size = store_content(upload.storage, upload.file, original_name)
+    upload.name = name
+    upload._committed = True
+    document.original_name = original_name[:255]
+    document.sha256 = sha256
+    document.size = size
+    document.thumbnail = existing_thumbnail(sha256)
+
+
+def schedule_thumbnail(sha256):
+    # Aynı içerik için bekleyen iş varsa yenisi eklenmez
+    jobs.enqueue(build_document_thumbnail, {"sha256": sha256}, key=f"thumbnail:{sha256}")
+
+
+def render_thumbnail(source, ext):
+    """
+    Önizlemeyi JPEG bayt olarak döner; tür desteklenmiyorsa ya da gereken paket kurulu değilse None.
+    Görseller için Pillow, PDF'ler için PyMuPDF (fitz) gerekir; ikisi de isteğe bağlıdır.
+    """
+    size = getattr(settings, "DOCUMENT_THUMBNAIL_SIZE", DEFAULT_THUMBNAIL_SIZE)
+    if ext in IMAGE_EXTENSIONS:
+        try:
+            from PIL import Image, ImageOps
+        except ImportError:
+            return None
+        try:
+            with Image.open(source) as image:
+                # JPEG'de küçük boyutta çözer; büyük fotoğraflar belleğe tam açılmaz
+                image.draft("RGB", (size, size))
+                image = ImageOps.exif_transpose(image)
+                image.thumbnail((size, size))
+                output = io.BytesIO()
+                image.convert("RGB").save(output, "JPEG", quality=80)
+                return output.getvalue()
+        except (OSError, Image.DecompressionBombError):
+            logger.warning("Görsel önizlemesi üretilemedi.", exc_info=True)
+            return None
+    if ext == ".pdf":
+        try:
+            import fitz
+        except ImportError:
+            return None
+        with fitz.open(stream=source.read(), filetype="pdf") as pdf:
+            if not pdf.page_count:
+                return None
+            page = pdf[0]
+            zoom = size / max(page.rect.width, page.rect.height)
+            return page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False).tobytes("jpeg")
+    return None
+
+
+def build_document_thumbnail(sha256):
+    """İş (core/jobs.py): içeriğin önizlemesini üretir ve bu içeriği taşıyan tüm belgelere bağlar."""
+    from .models import EmployeeDocument
+
+    documents = EmployeeDocument.objects.filter(sha256=sha256)
+    document = documents.exclude(file="").first()
+    if document is None:
+        return
+    storage = document.thumbnail.storage
+    name = thumbnail_name(sha256)
+    if not storage.exists(name):
+        with document.file.open("rb") as source:
+            data = render_thumbnail(source, safe_extension(document.file.name))
+        if data is None:
+            return
+        saved = storage.save(name, ContentFile(data))
+        if saved != name:
+            storage.delete(saved)
+    documents.update(thumbnail=name)
+
+
+def document_for_name(name):
+    """MEDIA_ROOT altındaki dosya adının ait olduğu belge (dosyası ya da önizlemesi); yoksa None."""
+    from .models import EmployeeDocument
+
+    documents = EmployeeDocument.objects.filter(Q(file=name) | Q(thumbnail=name))
+    match = CONTENT_NAME_RE.match(name)
+    if match:
+        documents = documents.filter(sha256=match.group(1))
+    return documents.only("file", "original_name", "thumbnail").first()
+
+
+def file_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    """
+    Tek aralıklı "bytes=a-b" / "bytes=a-" / "bytes=-n" başlığı -> (ilk, son bayt, ikisi dahil).
+    Anlaşılmayan ya da çok aralıklı başlıkta None (tüm dosya gönderilir); aralık dosyanın
+    dışındaysa ValueError (416).
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError("Boş aralık.")
+        start, end = max(size - suffix, 0), size - 1
+    if start >= size:
+        raise ValueError("Aralık dosyanın dışında.")
+    return start, end
+
+
+def read_range(path, start, length):
+    with open(path, "rb") as source:
+        source.seek(start)
+        while length > 0:
+            chunk = source.read(min(SERVE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def python_response(request, path, stat, content_type):
+    """Dosyayı Django'dan parça parça gönderir: ETag / If-None-Match (304) ve tek aralıklı Range (206)."""
+    etag = file_etag(stat)
+    last_modified = int(stat.st_mtime)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        byte_range = None
+        # If-Range: istemcideki parça eski sürümdense tüm dosya gönderilir
+        range_header = request.headers.get("Range")
+        if range_header and request.headers.get("If-Range", etag) in (etag, http_date(last_modified)):
+            try:
+                byte_range = parse_range(range_header, stat.st_size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response["Content-Range"] = f"bytes */{stat.st_size}"
+                return response
+        if byte_range is None:
+            response = FileResponse(open(path, "rb"), content_type=content_type)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                read_range(path, start, end - start + 1), status=206, content_type=content_type,
+            )
+            response["Content-Range"] = f"bytes {start}-{end}/{stat.st_size}"
+            response["Content-Length"] = end - start + 1
+        response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def serve_file(request, storage, name, filename=None):
+    """
+    İzin kontrolü yapılmış dosyayı gönderir. MEDIA_SERVE_BACKEND "nginx" ise X-Accel-Redirect,
+    "apache" ise X-Sendfile başlığıyla aktarım ön sunucuya bırakılır (Range ve ETag'i o karşılar);
+    "python" ise python_response kullanılır.
+    """
+    path = storage.path(name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        raise Http404("Dosya bulunamadı.")
+    filename = filename or os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+    backend = getattr(settings, "MEDIA_SERVE_BACKEND", "python")
+    if backend == "nginx":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = quote(settings.MEDIA_ACCEL_REDIRECT_PREFIX + name)
+    elif backend == "apache":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = path
+    else:
+        response = python_response(request, path, stat, content_type)
+    if response.status_code in (200, 206):
+        response["Content-Disposition"] = content_disposition_header(False, filename)
+    # Tarayıcı saklar ama her gösterimde yeniden doğrular: izin her seferinde kontrol edilir, yanıt çoğunlukla 304
+    response["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,98 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:02
+
+from datetime import date
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Bu migration'ın yazıldığı andaki bakiye hesabı (core.payment_analysis.build_customer_balance ve
+# MONEY_FIELD); uygulamadaki hesap sonradan değişse de migration aynı kalır
+MONEY_FIELD = models.DecimalField(max_digits=20, decimal_places=2)
+
+
+def period_count(duration_name):
+    # "6 Ay" -> 6; okunamazsa veya 0 ve altıysa 1 taksit
+    try:
+        count = int(duration_name.split()[0])
+    except (IndexError, ValueError):
+        count = 1
+    return max(count, 1)
+
+
+def build_customer_balance(customer, totals, today):
+    total_paid = totals['total'].quantize(Decimal('0.01')) if totals['total'] is not None else Decimal('0.00')
+    is_late = False
+    installments = 0
+    duration = customer.subscription_duration
+    if duration is not None and customer.amount > 0:
+        days_passed = max((today - customer.subscription_start_date).days, 0)
+        if duration.name.strip().lower() == '1 ay':
+            # Süresiz aylık: her 30 günde bir taksit
+            per_period = customer.amount
+            months_passed = days_passed // 30
+            installments = int(total_paid // per_period)
+        else:
+            count = period_count(duration.name)
+            per_period = customer.amount / count
+            months_passed = min(days_passed // 30, count)
+            installments = min(int(total_paid // per_period), count)
+        is_late = customer.subscription_start_date <= today and total_paid < months_passed * per_period
+    return {
+        'total_paid': total_paid,
+        'payment_count': totals['count'],
+        'last_payment_date': totals['last'],
+        'paid_installment_count': installments,
+        'is_late': is_late,
+        'status_date': today,
+    }
+
+
+def backfill_balances(apps, schema_editor):
+    # Mevcut müşteriler için bakiye defterini ödemelerden doldur
+    from django.db.models import Count, Max, Sum
+
+    Customer = apps.get_model('core', 'Customer')
+    CustomerBalance = apps.get_model('core', 'CustomerBalance')
+    Payment = apps.get_model('core', 'Payment')
+
+    totals = {
+        row['customer_id']: row
+        for row in Payment.objects.order_by().values('customer_id').annotate(
+            total=Sum('paid_amount', output_field=MONEY_FIELD), count=Count('id'), last=Max('payment_date'),
+        )
+    }
+    empty = {'total': None, 'count': 0, 'last': None}
+    today = date.today()
+    CustomerBalance.objects.bulk_create(
+        [
+            CustomerBalance(customer=customer, **build_customer_balance(customer, totals.get(customer.pk, empty), today))
+            for customer in Customer.objects.select_related('subscription_duration')
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_subscriptionextra_subscriptionextralog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerBalance',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_paid', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Ödenen Toplam')),
+                ('payment_count', models.PositiveIntegerField(default=0, verbose_name='Ödeme Adedi')),
+                ('last_payment_date', models.DateTimeField(blank=True, null=True, verbose_name='Son Ödeme Tarihi')),
+                ('paid_installment_count', models.PositiveIntegerField(default=0, verbose_name='Ödenen Taksit')),
+                ('is_late', models.BooleanField(default=False, verbose_name='Gecikmede mi?')),
+                ('status_date', models.DateField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='balance', to='core.customer')),
+            ],
+        ),
+        migrations.RunPython(backfill_balances, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,113 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_customerbalance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['rep', '-created_at'], name='complaint_rep_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['rep', 'status', '-created_at'], name='complaint_rep_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['-created_at', '-id'], name='complaint_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['rep', '-created_at'], name='customer_rep_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['rep', 'agreement_status', '-created_at'], name='customer_rep_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['-created_at', '-id'], name='customer_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['-created_at'], name='employee_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeedocument',
+            index=models.Index(fields=['employee', '-uploaded_at'], name='empdoc_employee_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeetask',
+            index=models.Index(fields=['-created_at'], name='employeetask_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employeetasklog',
+            index=models.Index(fields=['-timestamp', '-id'], name='tasklog_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', '-created_at'], name='expense_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['-created_at', '-id'], name='expense_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expensecategorylog',
+            index=models.Index(fields=['-performed_at', '-id'], name='expcatlog_performed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='material',
+            index=models.Index(fields=['-created_at'], name='material_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='materialtransaction',
+            index=models.Index(fields=['rep', '-transaction_date'], name='mattx_rep_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='materialtransaction',
+            index=models.Index(fields=['-transaction_date', '-id'], name='mattx_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['customer', '-payment_date'], name='payment_customer_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['rep', '-created_at'], name='request_rep_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='request',
+            index=models.Index(fields=['-created_at', '-id'], name='request_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscriptionextra',
+            index=models.Index(fields=['rep', '-created_at'], name='extra_rep_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscriptionextra',
+            index=models.Index(fields=['rep', 'status', '-created_at'], name='extra_rep_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscriptionextra',
+            index=models.Index(fields=['-created_at', '-id'], name='extra_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscriptionextralog',
+            index=models.Index(fields=['-timestamp', '-id'], name='extralog_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['rep', '-created_at'], name='vehicle_rep_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicle',
+            index=models.Index(fields=['-created_at', '-id'], name='vehicle_created_idx'),
+        ),
+    ]
@@ -0,0 +1,111 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:10
+
+from django.db import migrations, models
+
+
+# Bu migration'ın yazıldığı andaki indeks tanımı; core.search sonradan değişse de migration aynı kalır
+SEARCH_FIELDS = {
+    'core.user': ('username', 'first_name', 'last_name'),
+    'core.customer': ('username', 'first_name', 'last_name'),
+    'core.vehicle': ('brand', 'model', 'chassis_no'),
+    'core.complaint': ('title',),
+    'core.request': ('name',),
+}
+
+BACKEND_INDEX_SQL = {
+    'sqlite': (
+        [
+            "CREATE VIRTUAL TABLE core_searchentry_fts USING fts5("
+            "value, content='core_searchentry', content_rowid='id', tokenize='trigram')",
+            "CREATE TRIGGER core_searchentry_ai AFTER INSERT ON core_searchentry BEGIN "
+            "INSERT INTO core_searchentry_fts(rowid, value) VALUES (new.id, new.value); END",
+            "CREATE TRIGGER core_searchentry_ad AFTER DELETE ON core_searchentry BEGIN "
+            "INSERT INTO core_searchentry_fts(core_searchentry_fts, rowid, value) VALUES ('delete', old.id, old.value); END",
+            "CREATE TRIGGER core_searchentry_au AFTER UPDATE ON core_searchentry BEGIN "
+            "INSERT INTO core_searchentry_fts(core_searchentry_fts, rowid, value) VALUES ('delete', old.id, old.value); "
+            "INSERT INTO core_searchentry_fts(rowid, value) VALUES (new.id, new.value); END",
+        ],
+        [
+            'DROP TRIGGER IF EXISTS core_searchentry_ai',
+            'DROP TRIGGER IF EXISTS core_searchentry_ad',
+            'DROP TRIGGER IF EXISTS core_searchentry_au',
+            'DROP TABLE IF EXISTS core_searchentry_fts',
+        ],
+    ),
+    'postgresql': (
+        [
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+            'CREATE INDEX core_searchentry_value_trgm ON core_searchentry USING gin (value gin_trgm_ops)',
+        ],
+        [
+            'DROP INDEX IF EXISTS core_searchentry_value_trgm',
+        ],
+    ),
+}
+
+
+def fold_text(value):
+    # Türkçe harf katlama (core.search.fold_text ile aynı): İ/I/ı/i aynı harfe indirilir
+    if value is None:
+        return ''
+    return str(value).replace('İ', 'i').replace('I', 'i').replace('ı', 'i').casefold()
+
+
+def create_backend_index(apps, schema_editor):
+    # SQLite'ta FTS5 trigram sanal tablosu + tetikleyiciler, PostgreSQL'de pg_trgm GIN indeksi
+    create, _ = BACKEND_INDEX_SQL.get(schema_editor.connection.vendor, ([], []))
+    for sql in create:
+        schema_editor.execute(sql)
+
+
+def drop_backend_index(apps, schema_editor):
+    _, drop = BACKEND_INDEX_SQL.get(schema_editor.connection.vendor, ([], []))
+    for sql in drop:
+        schema_editor.execute(sql)
+
+
+def backfill_search_entries(apps, schema_editor):
+    # Mevcut kayıtları indekse yaz (tetikleyiciler FTS tablosunu da doldurur)
+    def build_entries(label, fields, rows):
+        return [
+            SearchEntry(model=label, object_id=row.pk, field=field, value=fold_text(getattr(row, field)))
+            for row in rows
+            for field in fields
+        ]
+
+    SearchEntry = apps.get_model('core', 'SearchEntry')
+    for label, fields in SEARCH_FIELDS.items():
+        model = apps.get_model(label)
+        batch = []
+        for row in model.objects.only('pk', *fields).iterator(chunk_size=1000):
+            batch.append(row)
+            if len(batch) >= 1000:
+                SearchEntry.objects.bulk_create(build_entries(label, fields, batch))
+                batch = []
+        SearchEntry.objects.bulk_create(build_entries(label, fields, batch))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_list_view_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('field', models.CharField(max_length=50)),
+                ('value', models.TextField(blank=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['model', 'field'], name='searchentry_model_field_idx')],
+                'constraints': [models.UniqueConstraint(fields=('model', 'object_id', 'field'), name='searchentry_unique_field')],
+            },
+        ),
+        migrations.RunPython(create_backend_index, drop_backend_index),
+        migrations.RunPython(backfill_search_entries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:13
+
+from django.db import migrations, models
+
+
+# Bu migration'ın yazıldığı andaki sahip alanları (core.search.SEARCH_OWNER_FIELDS)
+SEARCH_OWNER_FIELDS = {
+    'core.user': 'pk',
+    'core.customer': 'rep_id',
+    'core.vehicle': 'rep_id',
+    'core.complaint': 'rep_id',
+    'core.request': 'rep_id',
+}
+
+
+def backfill_owners(apps, schema_editor):
+    # Mevcut indeks satırlarına kaydın sahibi temsilciyi yaz
+    from django.db.models import OuterRef, Subquery
+
+    SearchEntry = apps.get_model('core', 'SearchEntry')
+    for label, attr in SEARCH_OWNER_FIELDS.items():
+        owners = apps.get_model(label).objects.filter(pk=OuterRef('object_id')).values(attr)[:1]
+        SearchEntry.objects.filter(model=label).update(owner_id=Subquery(owners))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchentry',
+            name='owner_id',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='searchentry',
+            index=models.Index(fields=['owner_id', 'model'], name='searchentry_owner_idx'),
+        ),
+        migrations.RunPython(backfill_owners, migrations.RunPython.noop),
+    ]
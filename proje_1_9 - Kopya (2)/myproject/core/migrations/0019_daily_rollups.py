@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:52
+
+from decimal import Decimal
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Bu migration'ın yazıldığı andaki kaynaklar (core.rollups.ROLLUP_SOURCES):
+# metric -> (model, tarih alanı, temsilci yolu, anahtar alanı, tutar alanı, miktar alanı)
+ROLLUP_SOURCES = {
+    'payments': ('core.Payment', 'payment_date', 'customer__rep', None, 'paid_amount', None),
+    'expenses': ('core.Expense', 'created_at', 'user', 'category', 'amount', None),
+    'complaints': ('core.Complaint', 'created_at', 'rep', 'status', None, None),
+    'materials': ('core.MaterialTransaction', 'transaction_date', 'rep', 'material', None, 'quantity'),
+    'extras': ('core.SubscriptionExtra', 'created_at', 'rep', 'status', 'price', None),
+}
+MONEY_FIELD = models.DecimalField(max_digits=20, decimal_places=2)
+
+
+def compute_rollups(apps, metric):
+    # core.rollups.compute_rollups'ın (tarih/temsilci süzmesiz) o andaki hali
+    from django.db.models import Count, F, Sum
+    from django.db.models.functions import TruncDate
+    from django.utils import timezone
+
+    label, date_field, rep_path, key_field, amount_field, quantity_field = ROLLUP_SOURCES[metric]
+    DailyRollup = apps.get_model('core', 'DailyRollup')
+    group = {
+        'rollup_date': TruncDate(date_field, tzinfo=timezone.get_current_timezone()),
+        'rollup_rep': F(rep_path),
+    }
+    if key_field:
+        group['rollup_key'] = F(key_field)
+    totals = {'rollup_count': Count('pk')}
+    if amount_field:
+        totals['rollup_amount'] = Sum(amount_field, output_field=MONEY_FIELD)
+    if quantity_field:
+        totals['rollup_quantity'] = Sum(quantity_field)
+    rows = apps.get_model(label)._default_manager.order_by().values(**group).annotate(**totals)
+    return [
+        DailyRollup(
+            date=row['rollup_date'],
+            metric=metric,
+            rep_id=row['rollup_rep'],
+            key='' if row.get('rollup_key') is None else str(row['rollup_key']),
+            count=row['rollup_count'],
+            amount=(row.get('rollup_amount') or Decimal('0')).quantize(Decimal('0.01')),
+            quantity=row.get('rollup_quantity') or 0,
+        )
+        for row in rows
+    ]
+
+
+def backfill_rollups(apps, schema_editor):
+    # Mevcut kayıtlar için günlük özetleri kaynak tablolardan doldur
+    DailyRollup = apps.get_model('core', 'DailyRollup')
+    for metric in ROLLUP_SOURCES:
+        DailyRollup.objects.bulk_create(compute_rollups(apps, metric), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_search_entry_owner'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('metric', models.CharField(choices=[('payments', 'Tahsilat'), ('expenses', 'Harcama'), ('complaints', 'Şikayet'), ('materials', 'Verilen Malzeme'), ('extras', 'Ek Hizmet')], max_length=20)),
+                ('key', models.CharField(blank=True, max_length=50)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('quantity', models.PositiveIntegerField(default=0)),
+                ('rep', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['metric', 'date'], name='rollup_metric_date_idx'), models.Index(fields=['rep', 'metric', 'date'], name='rollup_rep_metric_date_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:00
+
+from django.db import migrations, models
+
+
+# Bu migration'ın yazıldığı andaki koleksiyonlar (core.sync.SYNC_SOURCES): koleksiyon -> (model, sahip yolu)
+SYNC_SOURCES = {
+    'customers': ('core.Customer', 'rep'),
+    'payments': ('core.Payment', 'customer__rep'),
+    'complaints': ('core.Complaint', 'rep'),
+    'expenses': ('core.Expense', 'user'),
+    'expense_categories': ('core.ExpenseCategory', None),
+    'subscription_types': ('core.SubscriptionType', None),
+    'subscription_durations': ('core.SubscriptionDuration', None),
+    'payment_types': ('core.PaymentType', None),
+}
+
+
+def backfill_changelog(apps, schema_editor):
+    # Mevcut kayıtlar için birer değişiklik satırı: ilk tam senkronizasyon bunlardan yapılır
+    ChangeLog = apps.get_model('core', 'ChangeLog')
+    for collection, (label, rep_path) in SYNC_SOURCES.items():
+        model = apps.get_model(label)
+        if rep_path is None:
+            rows = ((pk, None) for pk in model.objects.order_by('pk').values_list('pk', flat=True))
+        else:
+            rows = model.objects.order_by('pk').values_list('pk', f'{rep_path}_id').iterator()
+        ChangeLog.objects.bulk_create(
+            (ChangeLog(collection=collection, object_id=pk, owner_id=owner_id) for pk, owner_id in rows),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('collection', models.CharField(max_length=30)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('owner_id', models.PositiveBigIntegerField(blank=True, null=True)),
+                ('deleted', models.BooleanField(default=False)),
+                ('changed_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['owner_id', 'id'], name='changelog_owner_idx'), models.Index(fields=['collection', 'object_id'], name='changelog_object_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_changelog, migrations.RunPython.noop),
+    ]
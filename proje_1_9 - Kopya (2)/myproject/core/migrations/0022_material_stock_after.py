@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_client_operations'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='materialtransaction',
+            name='stock_after',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='İşlem Sonrası Stok'),
+        ),
+    ]
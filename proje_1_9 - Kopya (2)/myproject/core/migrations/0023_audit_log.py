@@ -0,0 +1,112 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_legacy_logs(apps, schema_editor):
+    # Kategori, görev ve extra loglarının geçmişi denetim kaydına taşınır
+    AuditEntry = apps.get_model('core', 'AuditEntry')
+    ExpenseCategory = apps.get_model('core', 'ExpenseCategory')
+    ExpenseCategoryLog = apps.get_model('core', 'ExpenseCategoryLog')
+    EmployeeTaskLog = apps.get_model('core', 'EmployeeTaskLog')
+    SubscriptionExtraLog = apps.get_model('core', 'SubscriptionExtraLog')
+    db = schema_editor.connection.alias
+
+    def money(value):
+        return None if value is None else str(value)
+
+    entries = []
+    # Eski kategori logu kategori adını tutar; silinmiş kategorinin numarası bilinmez (0)
+    category_ids = dict(ExpenseCategory.objects.using(db).values_list('name', 'pk'))
+    for log in ExpenseCategoryLog.objects.using(db).order_by('pk').iterator():
+        deleted = log.operation == 'delete'
+        entries.append(AuditEntry(
+            model='core.expensecategory', object_id=0 if deleted else category_ids.get(log.category_name, 0),
+            action='delete' if deleted else 'update',
+            changes={'name': [log.category_name, None if deleted else log.category_name]},
+            actor_id=log.performed_by_id, timestamp=log.performed_at,
+        ))
+    for log in EmployeeTaskLog.objects.using(db).select_related('task').order_by('pk').iterator():
+        description = log.task.task_description
+        entries.append(AuditEntry(
+            model='core.employeetask', object_id=log.task_id, action=log.operation,
+            changes={'task_description': [None if log.operation == 'create' else description,
+                                          None if log.operation == 'delete' else description]},
+            actor_id=log.performed_by_id, timestamp=log.timestamp,
+        ))
+    for log in SubscriptionExtraLog.objects.using(db).select_related('extra').order_by('pk').iterator():
+        extra = log.extra
+        changes = {'name': [None, extra.name], 'price': [None, money(extra.price)]}
+        if log.operation == 'cancel':
+            changes = {'status': ['active', 'canceled']}
+        entries.append(AuditEntry(
+            model='core.subscriptionextra', object_id=extra.pk,
+            action='create' if log.operation == 'create' else 'update',
+            changes=changes, actor_id=log.performed_by_id, timestamp=log.timestamp,
+        ))
+        if log.old_amount is not None or log.new_amount is not None:
+            entries.append(AuditEntry(
+                model='core.customer', object_id=extra.customer_id, action='update',
+                changes={'amount': [money(log.old_amount), money(log.new_amount)]},
+                actor_id=log.performed_by_id, timestamp=log.timestamp,
+            ))
+    entries.sort(key=lambda entry: entry.timestamp)
+    AuditEntry.objects.using(db).bulk_create(entries, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_material_stock_after'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('action', models.CharField(choices=[('create', 'Oluşturma'), ('update', 'Güncelleme'), ('delete', 'Silme')], max_length=10)),
+                ('changes', models.JSONField(default=dict)),
+                ('timestamp', models.DateTimeField()),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='auditentry',
+            index=models.Index(fields=['-timestamp', '-id'], name='auditentry_timestamp_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditentry',
+            index=models.Index(fields=['model', '-timestamp'], name='auditentry_model_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditentry',
+            index=models.Index(fields=['model', 'object_id'], name='auditentry_object_idx'),
+        ),
+        migrations.RunPython(copy_legacy_logs, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='expensecategorylog',
+            name='performed_by',
+        ),
+        migrations.RemoveField(
+            model_name='subscriptionextralog',
+            name='extra',
+        ),
+        migrations.RemoveField(
+            model_name='subscriptionextralog',
+            name='performed_by',
+        ),
+        migrations.DeleteModel(
+            name='EmployeeTaskLog',
+        ),
+        migrations.DeleteModel(
+            name='ExpenseCategoryLog',
+        ),
+        migrations.DeleteModel(
+            name='SubscriptionExtraLog',
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:32
+
+import core.media
+import core.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_job_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employeedocument',
+            name='original_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='employeedocument',
+            name='sha256',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='employeedocument',
+            name='size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='employeedocument',
+            name='thumbnail',
+            field=models.FileField(blank=True, max_length=255, upload_to=''),
+        ),
+        migrations.AlterField(
+            model_name='employeedocument',
+            name='file',
+            field=models.FileField(upload_to=core.models.employee_document_upload_path, validators=[core.media.validate_upload_size]),
+        ),
+        migrations.AddIndex(
+            model_name='employeedocument',
+            index=models.Index(fields=['sha256'], name='empdoc_sha256_idx'),
+        ),
+    ]
@@ -1,6 +1,13 @@
 from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.core.exceptions import ValidationError
+from functools import partial
+
+from django.db import connections, models, router, transaction
+from django.db.models import F, Q
 from django.conf import settings
+from django.utils import timezone
+
+from .media import IMAGE_EXTENSIONS, validate_upload_size
 
 class User(AbstractUser):
     department = models.CharField(max_length=100, blank=True, null=True)
@@ -13,6 +20,33 @@ class User(AbstractUser):
     )
     level = models.PositiveSmallIntegerField(choices=LEVEL_CHOICES, default=1, blank=True, null=True)
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            SearchEntry.objects.sync(self)
+
+    def delete(self, *args, **kwargs):
+        # Temsilcinin günlük özetleri kendisiyle silinir (SET_NULL ile temsilcisiz dilimlere karışmasın).
+        # Müşterileriyle birlikte silinen başka temsilcilerin şikayet/ek hizmetleri ve temsilcisi boşalan
+        # kayıtlar eski ve temsilcisiz dilimlerde yeniden toplanır.
+        with transaction.atomic():
+            SearchEntry.objects.remove(self)
+            DailyRollup.objects.filter(rep=self).delete()
+            cascaded = [
+                *Complaint.objects.filter(customer__rep=self).exclude(rep=self).only("id", "rep", "created_at"),
+                *SubscriptionExtra.objects.filter(customer__rep=self).exclude(rep=self).only("id", "rep", "created_at"),
+            ]
+            moved = [
+                *Complaint.objects.filter(rep=self).exclude(customer__rep=self).only("id", "rep", "created_at"),
+                *SubscriptionExtra.objects.filter(rep=self).exclude(customer__rep=self).only("id", "rep", "created_at"),
+                *MaterialTransaction.objects.filter(rep=self).only("id", "rep", "transaction_date"),
+            ]
+            result = super().delete(*args, **kwargs)
+            for instance in moved:
+                instance.rep_id = None
+            DailyRollup.objects.refresh_many(cascaded + moved)
+        return result
+
 # Harcama kategorisi modeli (Yönetici tarafından eklenir)
 class ExpenseCategory(models.Model):
     name = models.CharField(max_length=100)
@@ -21,6 +55,20 @@ class ExpenseCategory(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            ChangeLog.objects.record_many([self])
+
+    def delete(self, *args, **kwargs):
+        # Kategoriyle birlikte silinen harcamalar da senkronizasyon günlüğüne ve günlük özetlere düşer
+        with transaction.atomic():
+            expenses = list(self.expense_set.only("id", "user", "created_at"))
+            ChangeLog.objects.record_many(expenses + [self], deleted=True)
+            result = super().delete(*args, **kwargs)
+            DailyRollup.objects.refresh_many(expenses)
+        return result
+
 # Temsilcilerin harcamalarını tutan model
 class Expense(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -28,25 +76,32 @@ class Expense(models.Model):
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     description = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "-created_at"], name="expense_user_created_idx"),
+            models.Index(fields=["-created_at", "-id"], name="expense_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.user.username} - {self.category.name} - {self.amount}"
 
+    def save(self, *args, **kwargs):
+        # Günlük özet (DailyRollup) yenileme işi kayıtla aynı transaction içinde kuyruğa girer
+        with transaction.atomic():
+            previous = DailyRollup.objects.previous_state(self)
+            super().save(*args, **kwargs)
+            DailyRollup.objects.refresh_many([self] + previous)
+            ChangeLog.objects.record_many([self], previous)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            ChangeLog.objects.record_many([self], deleted=True)
+            result = super().delete(*args, **kwargs)
+            DailyRollup.objects.refresh_many([self])
+        return result
+
 
-class ExpenseCategoryLog(models.Model):
-    OPERATION_CHOICES = (
-        ('edit', 'Düzenleme'),
-        ('delete', 'Silme'),
-    )
-    category_name = models.CharField(max_length=100)
-    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES)
-    performed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
-    performed_at = models.DateTimeField(auto_now_add=True)
-    details = models.TextField(blank=True, null=True)
-    
-    def __str__(self):
-        return f"{self.category_name} - {self.get_operation_display()} - {self.performed_by}"
-    
 class SubscriptionType(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
@@ -54,6 +109,16 @@ class SubscriptionType(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            ChangeLog.objects.record_many([self])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            ChangeLog.objects.record_many([self], deleted=True)
+            return super().delete(*args, **kwargs)
+
 class SubscriptionDuration(models.Model):
     # Örneğin "6 Ay", "12 Ay" gibi seçenekler
     name = models.CharField(max_length=50)
@@ -61,11 +126,31 @@ class SubscriptionDuration(models.Model):
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            ChangeLog.objects.record_many([self])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            ChangeLog.objects.record_many([self], deleted=True)
+            return super().delete(*args, **kwargs)
+
 class PaymentType(models.Model):
     name = models.CharField(max_length=100)
     
     def __str__(self):
         return self.name 
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            ChangeLog.objects.record_many([self])
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            ChangeLog.objects.record_many([self], deleted=True)
+            return super().delete(*args, **kwargs)
     
 
 class Customer(models.Model):
@@ -94,9 +179,44 @@ class Customer(models.Model):
     agreement_status = models.CharField(max_length=10, choices=AGREEMENT_STATUS_CHOICES)
     
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["rep", "-created_at"], name="customer_rep_created_idx"),
+            models.Index(fields=["rep", "agreement_status", "-created_at"], name="customer_rep_status_idx"),
+            models.Index(fields=["-created_at", "-id"], name="customer_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.username} - {self.first_name} {self.last_name}"
+
+    def save(self, *args, **kwargs):
+        # amount / abonelik süresi değişince bakiye defteri aynı transaction içinde güncellenir
+        with transaction.atomic():
+            previous = DailyRollup.objects.previous_state(self)
+            super().save(*args, **kwargs)
+            CustomerBalance.objects.refresh(self.pk)
+            SearchEntry.objects.sync(self)
+            ChangeLog.objects.record_many([self], previous)
+            if previous and previous[0].rep_id != self.rep_id:
+                # Ödemelerin sahibi müşterinin temsilcisidir; müşteriyle birlikte yeni temsilciye geçer
+                ChangeLog.objects.record_moved(self.payments.only("id", "customer"), previous[0].rep_id)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            SearchEntry.objects.remove(self)
+            # Müşteriyle birlikte silinen ödeme, şikayet ve ek hizmetler de senkronizasyon günlüğüne ve
+            # günlük özetlere düşer
+            cascaded = [
+                *self.payments.only("id", "customer", "payment_date"),
+                *self.complaint_set.only("id", "rep", "created_at"),
+                *self.subscriptionextra_set.only("id", "rep", "created_at"),
+            ]
+            ChangeLog.objects.record_many(cascaded + [self], deleted=True)
+            jobs = DailyRollup.objects.refresh_jobs(cascaded)
+            result = super().delete(*args, **kwargs)
+            DailyRollup.objects.enqueue(jobs)
+        return result
     
 
 # Örneğin, çalışan ekleme için:
@@ -108,6 +228,11 @@ class Employee(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     # Diğer bilgiler eklenebilir
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at"], name="employee_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.first_name} {self.last_name}"
 
@@ -126,44 +251,131 @@ class EmployeeTask(models.Model):
     # Durum, dropdown üzerinden seçilecek
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default="atanmadı")
     created_at = models.DateTimeField(auto_now_add=True)
-    
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at"], name="employeetask_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.employee} - {self.task_description[:30]}"
 
-# Çalışan belgelerini tutmak için:
+# Çalışan belgelerini tutmak için (eski yükleme yolu; yeni dosyalar içerik adresli saklanır, bkz. core/media.py):
 def employee_document_upload_path(instance, filename):
     return f"employee_documents/{instance.employee.id}/{filename}"
 
 class EmployeeDocument(models.Model):
     employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name="documents")
     document_name = models.CharField(max_length=150)
-    file = models.FileField(upload_to=employee_document_upload_path)
+    file = models.FileField(upload_to=employee_document_upload_path, validators=[validate_upload_size])
+    # Dosya adı içeriğin SHA-256 özetinden türetilir: aynı dosya diskte tek kopya tutulur
+    original_name = models.CharField(max_length=255, blank=True)
+    sha256 = models.CharField(max_length=64, blank=True)
+    size = models.PositiveBigIntegerField(null=True, blank=True)
+    # Arka planda üretilen önizleme (görsel/PDF); boşsa listede dosya simgesi gösterilir
+    thumbnail = models.FileField(max_length=255, blank=True)
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
+    # Dosya kaydedilirken doldurulan alanlar (save(update_fields=...) çağrılarına eklenir)
+    STORED_FIELDS = ("file", "original_name", "sha256", "size", "thumbnail")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["employee", "-uploaded_at"], name="empdoc_employee_uploaded_idx"),
+            models.Index(fields=["sha256"], name="empdoc_sha256_idx"),
+        ]
+
     def __str__(self):
         return f"{self.employee} - {self.document_name}"
 
-    # Örneğin, hangi belge türleri isteniyorsa, manager tarafından tanımlanabilir.
-    # Burada varsayılan olarak; "Sağlık Belgesi", "Sigorta Belgesi", "İkametgah Belgesi" gibi belgeler
-    # istenecektir.
+    def save(self, *args, **kwargs):
+        from .media import schedule_thumbnail, store_document
+
+        stored = bool(self.file) and not self.file._committed
+        if stored:
+            store_document(self)
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], *self.STORED_FIELDS}
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if stored and not self.thumbnail:
+                schedule_thumbnail(self.sha256)
+
+    @property
+    def display_name(self):
+        return self.original_name or self.file.name.rsplit("/", 1)[-1]
+
+    @property
+    def icon(self):
+        # Önizlemesi olmayan belgeler için Bootstrap Icons sınıfı
+        ext = self.file.name.rsplit(".", 1)[-1].lower() if "." in self.file.name else ""
+        if ext == "pdf":
+            return "bi-file-earmark-pdf"
+        if "." + ext in IMAGE_EXTENSIONS:
+            return "bi-file-earmark-image"
+        return "bi-file-earmark"
+
+    # Zorunlu belge türleri settings.REQUIRED_EMPLOYEE_DOCUMENTS ile tanımlanır (bkz. core/employee_documents.py).
+
+
+class StockError(ValidationError):
+    """Stok yetmediği ya da malzeme verilemez olduğu için reddedilen hareketler; by_index: sıra -> mesaj."""
+
+    def __init__(self, by_index):
+        self.by_index = by_index
+        super().__init__(list(by_index.values()))
+
+
+class MaterialManager(models.Manager):
+    def apply_movements(self, movements):
+        """
+        movements: [(malzeme id, adet farkı)] sırasıyla; eksi değer verilen, artı değer iade edilen
+        adettir. Malzeme satırları id sırasıyla select_for_update ile kilitlenir, hareketler sırayla
+        denetlenir; stok yetmezse ya da malzeme verilemez durumdaysa StockError atılır ve hiçbir şey
+        yazılmaz. Stok F() ifadesiyle güncellenir; sıfıra inen malzeme verilemez, sıfırdan çıkan
+        yeniden verilebilir olur. Dönüş: her hareketten sonraki stok (MaterialTransaction.stock_after).
+        """
+        with transaction.atomic():
+            materials = {
+                material.pk: material
+                for material in self.select_for_update().filter(
+                    pk__in={material_id for material_id, _ in movements}
+                ).order_by("pk")
+            }
+            stock = {pk: material.quantity for pk, material in materials.items()}
+            available = {pk: material.available for pk, material in materials.items()}
+            errors = {}
+            stock_after = []
+            for index, (material_id, delta) in enumerate(movements):
+                material = materials[material_id]
+                if delta < 0 and not available[material_id]:
+                    errors[index] = f"{material.name} şu anda verilemez."
+                elif stock[material_id] + delta < 0:
+                    errors[index] = f"Yetersiz stok: {material.name} için {stock[material_id]} adet var."
+                else:
+                    if stock[material_id] == 0 and delta > 0:
+                        available[material_id] = True
+                    stock[material_id] += delta
+                    if stock[material_id] == 0:
+                        available[material_id] = False
+                stock_after.append(stock[material_id])
+            if errors:
+                raise StockError(errors)
+
+            for material_id, material in materials.items():
+                delta = stock[material_id] - material.quantity
+                if delta == 0:
+                    continue
+                values = {"quantity": F("quantity") + delta}
+                if available[material_id] != material.available:
+                    values["available"] = available[material_id]
+                # Kilit desteklemeyen veritabanında da stok eksiye düşmesin diye koşullu güncellenir
+                if not self.filter(pk=material_id, quantity__gte=max(-delta, 0)).update(**values):
+                    raise StockError({0: f"Yetersiz stok: {material.name}"})
+        return stock_after
 
 
-class EmployeeTaskLog(models.Model):
-    OPERATION_CHOICES = (
-        ('create', 'Oluşturma'),
-        ('update', 'Güncelleme'),
-        ('delete', 'Silme'),
-    )
-    task = models.ForeignKey(EmployeeTask, on_delete=models.CASCADE, related_name='logs')
-    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES)
-    performed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
-    details = models.TextField(blank=True, null=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
-    
-    def __str__(self):
-        return f"{self.task} - {self.get_operation_display()} by {self.performed_by}"
-    
 class Material(models.Model):
     name = models.CharField(max_length=150, verbose_name="Malzeme Adı")
     price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Fiyat")
@@ -171,8 +383,23 @@ class Material(models.Model):
     available = models.BooleanField(default=True, verbose_name="Verilebilir mi?")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = MaterialManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at"], name="material_created_idx"),
+        ]
+
     def __str__(self):
         return self.name
+
+    def delete(self, *args, **kwargs):
+        # Malzemeyle birlikte silinen işlemlerin günlük özet dilimleri yenilenir
+        with transaction.atomic():
+            transactions = list(self.transactions.only("id", "rep", "transaction_date"))
+            result = super().delete(*args, **kwargs)
+            DailyRollup.objects.refresh_many(transactions)
+        return result
     
 
 class MaterialTransaction(models.Model):
@@ -183,9 +410,47 @@ class MaterialTransaction(models.Model):
     quantity = models.PositiveIntegerField(verbose_name="Verilen Adet")
     transaction_date = models.DateTimeField(auto_now_add=True)
     note = models.TextField(blank=True, null=True, verbose_name="Not")
+    # Bu işlemden sonra malzemenin stoğu (malzeme başına yürüyen bakiye); stok hareketi
+    # tutulmaya başlamadan önceki işlemlerde boştur
+    stock_after = models.PositiveIntegerField(null=True, blank=True, verbose_name="İşlem Sonrası Stok")
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["rep", "-transaction_date"], name="mattx_rep_date_idx"),
+            models.Index(fields=["-transaction_date", "-id"], name="mattx_date_idx"),
+        ]
 
     def __str__(self):
         return f"{self.material.name} - {self.quantity} adet - {self.rep.username}"
+
+    def stock_movements(self, previous=None):
+        # Kaydın malzeme stoğuna etkisi: güncellemede yalnızca adet farkı, malzeme değiştiyse
+        # eski malzemeye iade ve yenisinden düşüm
+        if previous is None:
+            return [(self.material_id, -self.quantity)]
+        if previous.material_id != self.material_id:
+            return [(previous.material_id, previous.quantity), (self.material_id, -self.quantity)]
+        if previous.quantity != self.quantity:
+            return [(self.material_id, previous.quantity - self.quantity)]
+        return []
+
+    def save(self, *args, **kwargs):
+        # Stok, kayıt ve günlük özet (DailyRollup) işi aynı transaction içinde yazılır; stok yetmezse StockError
+        with transaction.atomic():
+            previous = DailyRollup.objects.previous_state(self)
+            movements = self.stock_movements(previous[0] if previous else None)
+            if movements:
+                self.stock_after = Material.objects.apply_movements(movements)[-1]
+            super().save(*args, **kwargs)
+            DailyRollup.objects.refresh_many([self] + previous)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            # Silinen işlemin adedi stoğa geri eklenir
+            Material.objects.apply_movements([(self.material_id, self.quantity)])
+            result = super().delete(*args, **kwargs)
+            DailyRollup.objects.refresh_many([self])
+        return result
     
 
 class Payment(models.Model):
@@ -195,9 +460,449 @@ class Payment(models.Model):
     note = models.TextField(blank=True, null=True, verbose_name="Not")
     payment_method = models.CharField(max_length=100, blank=True, null=True, verbose_name="Ödeme Yöntemi")
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["customer", "-payment_date"], name="payment_customer_date_idx"),
+        ]
+
     def __str__(self):
         return f"{self.customer.username} - {self.paid_amount} TL"
 
+    def save(self, *args, **kwargs):
+        # Ödeme, müşterinin bakiye kaydı ve günlük özet işi aynı transaction içinde yazılır
+        with transaction.atomic():
+            previous = DailyRollup.objects.previous_state(self)
+            super().save(*args, **kwargs)
+            # Ödeme başka müşteriye taşındıysa (PATCH, admin) eski müşterinin bakiyesi de yeniden hesaplanır
+            for customer_id in {self.customer_id, *(payment.customer_id for payment in previous)}:
+                CustomerBalance.objects.refresh(customer_id)
+            DailyRollup.objects.refresh_many([self] + previous)
+            ChangeLog.objects.record_many([self], previous)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            # Bakiye, bellekteki değil veritabanındaki müşteriye göre düzeltilir
+            previous = DailyRollup.objects.previous_state(self)
+            ChangeLog.objects.record_many([self], deleted=True)
+            result = super().delete(*args, **kwargs)
+            for customer_id in {self.customer_id, *(payment.customer_id for payment in previous)}:
+                CustomerBalance.objects.refresh(customer_id)
+            DailyRollup.objects.refresh_many([self])
+        return result
+
+
+class CustomerBalanceManager(models.Manager):
+    def refresh(self, customer_id):
+        """
+        Müşterinin bakiye kaydını ödemelerinden yeniden hesaplar (tek aggregate + upsert).
+        Payment/Customer save() içinden çağrıldığı için yazma ile aynı transaction'da çalışır.
+        """
+        from .payment_analysis import build_customer_balance
+
+        customer = Customer.objects.select_related("subscription_duration").get(pk=customer_id)
+        values = build_customer_balance(customer)
+        balance, _ = self.update_or_create(customer_id=customer_id, defaults=values)
+        return balance
+
+    def refresh_many(self, customer_ids):
+        """
+        Birden çok müşterinin bakiye kaydını toplu yeniden hesaplar: tek gruplu aggregate,
+        eski kayıtların tek DELETE ile silinmesi ve bulk_create. bulk_create ile yazılan
+        ödemelerden sonra çağrılır (bulk_create Payment.save() çalıştırmaz). Bakiye kayıtlarına
+        başka tablo bağlanmadığından silip yeniden yazmak bulk_update'in CASE ifadelerinden hızlıdır.
+        """
+        from django.db.models import Count, Max, Sum
+        from .payment_analysis import MONEY_FIELD, build_customer_balance
+
+        customer_ids = set(customer_ids)
+        if not customer_ids:
+            return
+        totals = {
+            row["customer_id"]: row
+            for row in Payment.objects.filter(customer_id__in=customer_ids).order_by().values("customer_id").annotate(
+                total=Sum("paid_amount", output_field=MONEY_FIELD), count=Count("id"), last=Max("payment_date"),
+            )
+        }
+        empty = {"total": None, "count": 0, "last": None}
+        balances = [
+            self.model(customer=customer, **build_customer_balance(customer, totals.get(customer.pk, empty)))
+            for customer in Customer.objects.filter(pk__in=customer_ids).select_related("subscription_duration")
+        ]
+        with transaction.atomic():
+            self.filter(customer_id__in=customer_ids).delete()
+            self.bulk_create(balances)
+
+
+class CustomerBalance(models.Model):
+    """
+    Müşteri başına denormalize tahsilat özeti. Tahsilat sayfaları ödenen toplamı
+    Payment tablosunu toplamak yerine buradan okur. Tutarlılık kontrolü ve yeniden
+    oluşturma için: python manage.py rebuild_customer_balances [--check]
+    """
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, related_name="balance")
+    total_paid = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Ödenen Toplam")
+    payment_count = models.PositiveIntegerField(default=0, verbose_name="Ödeme Adedi")
+    last_payment_date = models.DateTimeField(null=True, blank=True, verbose_name="Son Ödeme Tarihi")
+    paid_installment_count = models.PositiveIntegerField(default=0, verbose_name="Ödenen Taksit")
+    # Gecikme durumu tarihe bağlıdır; status_date günü itibarıyla hesaplanmıştır
+    is_late = models.BooleanField(default=False, verbose_name="Gecikmede mi?")
+    status_date = models.DateField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = CustomerBalanceManager()
+
+    def __str__(self):
+        return f"{self.customer.username} - {self.total_paid} TL"
+
+
+class DailyRollupManager(models.Manager):
+    def refresh_many(self, instances):
+        """
+        Kayıtların gün/temsilci dilimlerini kaynak tablolardan yeniden hesaplatır (bkz. core/rollups.py).
+        Hesaplama arka plan işidir (core/jobs.py); iş, kaynak modellerin save()/delete()'i ve toplu
+        yazma yollarında yazmayla aynı transaction'da kuyruğa girer. Panolar worker işi bitirene
+        kadar birkaç saniye geriden gelebilir.
+        """
+        self.enqueue(self.refresh_jobs(instances))
+
+    def refresh_jobs(self, instances):
+        # Silmeyle birlikte gidecek ödemelerin işleri silmeden önce üretilir: müşteri silinince
+        # temsilci (customer__rep) çözülemez. İşler silmeden sonra enqueue() ile kuyruğa verilir.
+        from .rollups import rollup_jobs
+
+        return rollup_jobs(list(instances))
+
+    def enqueue(self, jobs):
+        from .jobs import enqueue_many
+
+        enqueue_many(jobs)
+
+    def previous_state(self, instance):
+        # Güncellenen kaydın veritabanındaki eski hali (gün/temsilci değiştiyse eski dilim için); eklemede boş
+        if instance._state.adding or instance.pk is None:
+            return []
+        return list(type(instance)._default_manager.filter(pk=instance.pk))
+
+
+class DailyRollup(models.Model):
+    """
+    Gün, temsilci ve anahtar (harcama kategorisi, şikayet/ek hizmet durumu, malzeme) başına önceden
+    toplanmış tahsilat, harcama, şikayet, malzeme ve ek hizmet sayıları. Panolar ve /api/stats/
+    ham tablolar yerine buradan okur. Tutarlılık kontrolü ve gece mutabakatı:
+    python manage.py rebuild_rollups [--check] [--days N]
+    """
+    METRIC_CHOICES = (
+        ('payments', 'Tahsilat'),
+        ('expenses', 'Harcama'),
+        ('complaints', 'Şikayet'),
+        ('materials', 'Verilen Malzeme'),
+        ('extras', 'Ek Hizmet'),
+    )
+    date = models.DateField()
+    metric = models.CharField(max_length=20, choices=METRIC_CHOICES)
+    rep = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    key = models.CharField(max_length=50, blank=True)
+    count = models.PositiveIntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    quantity = models.PositiveIntegerField(default=0)
+
+    objects = DailyRollupManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["metric", "date"], name="rollup_metric_date_idx"),
+            models.Index(fields=["rep", "metric", "date"], name="rollup_rep_metric_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.get_metric_display()} {self.key} - {self.count}"
+
+
+class SearchEntryManager(models.Manager):
+    def sync(self, instance):
+        """
+        Kaydın arama indeksindeki satırlarını günceller. Değişmeyen alanlara dokunulmaz;
+        böylece FTS/trigram indeksi yalnızca değişen değerler için yeniden yazılır.
+        """
+        from .search import model_label, search_owner, search_values
+
+        label = model_label(instance)
+        owner_id = search_owner(instance)
+        existing = {
+            entry.field: entry
+            for entry in self.filter(model=label, object_id=instance.pk)
+        }
+        created = []
+        for field, value in search_values(instance):
+            entry = existing.get(field)
+            if entry is None:
+                created.append(self.model(
+                    model=label, object_id=instance.pk, field=field, value=value, owner_id=owner_id,
+                ))
+            elif entry.value != value or entry.owner_id != owner_id:
+                entry.value = value
+                entry.owner_id = owner_id
+                entry.save(update_fields=["value", "owner_id"])
+        if created:
+            self.bulk_create(created)
+
+    def add_many(self, instances):
+        """
+        Yeni kayıtların indeks satırlarını toplu ekler. Satır başına model nesnesi kurmadan
+        doğrudan executemany kullanır; toplu içe aktarmada (yüz binlerce satır) bulk_create'ten hızlıdır.
+        """
+        from django.db import connections
+        from .search import model_label, search_owner, search_values
+
+        rows = [
+            (model_label(instance), instance.pk, field, value, search_owner(instance))
+            for instance in instances
+            for field, value in search_values(instance)
+        ]
+        if not rows:
+            return
+        connection = connections[self.db]
+        quote = connection.ops.quote_name
+        columns = ", ".join(quote(name) for name in ("model", "object_id", "field", "value", "owner_id"))
+        sql = f"INSERT INTO {quote(self.model._meta.db_table)} ({columns}) VALUES (%s, %s, %s, %s, %s)"
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    def replace_many(self, instances):
+        # Kayıtların indeks satırlarını silip yeniden yazar (toplu güncellemeden sonra)
+        from .search import model_label
+
+        ids_by_label = {}
+        for instance in instances:
+            ids_by_label.setdefault(model_label(instance), []).append(instance.pk)
+        for label, ids in ids_by_label.items():
+            self.filter(model=label, object_id__in=ids).delete()
+        self.add_many(instances)
+
+    def remove(self, instance):
+        from .search import model_label
+
+        self.filter(model=model_label(instance), object_id=instance.pk).delete()
+
+
+class SearchEntry(models.Model):
+    """
+    Müşteri, temsilci, araç, şikayet ve istek adlarının Türkçe katlanmış kopyaları.
+    "İçerir" aramaları LIKE '%x%' yerine bu tablonun FTS5 (SQLite) veya pg_trgm (PostgreSQL)
+    indeksinden yapılır (bkz. core/search.py). Yeniden oluşturma: python manage.py rebuild_search_index
+    """
+    model = models.CharField(max_length=50)
+    object_id = models.PositiveBigIntegerField()
+    field = models.CharField(max_length=50)
+    value = models.TextField(blank=True)
+    # Kaydın sahibi temsilci; global aramada temsilci yalnızca kendi kayıtlarını görür
+    owner_id = models.PositiveBigIntegerField(null=True, blank=True)
+
+    objects = SearchEntryManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["model", "object_id", "field"], name="searchentry_unique_field"),
+        ]
+        indexes = [
+            models.Index(fields=["model", "field"], name="searchentry_model_field_idx"),
+            models.Index(fields=["owner_id", "model"], name="searchentry_owner_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model}#{self.object_id}.{self.field}"
+
+
+class ChangeLogManager(models.Manager):
+    def record_many(self, instances, previous=None, deleted=False):
+        """
+        Kayıtların değişiklik satırlarını yazar (bkz. core/sync.py). Senkronize edilmeyen modeller
+        atlanır. Modellerin save()/delete()'i ve toplu yazma yolları yazma ile aynı transaction'da çağırır;
+        silmede kayıt silinmeden önce çağrılmalıdır (pk gerekir).
+        """
+        from .sync import change_entries
+
+        self.write(change_entries(self.model, list(instances), previous, deleted))
+
+    def record_moved(self, instances, previous_owner_id):
+        # Sahibi dolaylı değişen kayıtlar (ör. müşterisi başka temsilciye geçen ödemeler)
+        from .sync import change_entries
+
+        self.write(change_entries(self.model, list(instances), previous_owner_id=previous_owner_id))
+
+    def write(self, entries):
+        """
+        Her kayıt/sahip için tek satır kalır: eski satır silinir, yenisi daha büyük id ile eklenir.
+        PostgreSQL'de satırlar yazan transaction commit edildikten sonra ayrı, kısa bir transaction'da
+        eklenir (bkz. sync.lock_changelog); iş transaction'ları günlük yüzünden sıraya girmez.
+        """
+        if not entries:
+            return
+        object_ids = {}
+        for entry in entries:
+            object_ids.setdefault((entry.collection, entry.owner_id), []).append(entry.object_id)
+        stale = Q()
+        for (collection, owner_id), ids in object_ids.items():
+            stale |= Q(collection=collection, owner_id=owner_id, object_id__in=ids)
+        using = router.db_for_write(self.model)
+        if connections[using].vendor == "postgresql":
+            transaction.on_commit(partial(self.insert, stale, entries, using), using=using, robust=True)
+        else:
+            self.insert(stale, entries, using)
+
+    def insert(self, stale, entries, using):
+        from .sync import lock_changelog
+
+        with transaction.atomic(using=using):
+            lock_changelog(using)
+            self.filter(stale).delete()
+            self.bulk_create(entries)
+
+
+class ChangeLog(models.Model):
+    """
+    Mobil istemcinin artımlı senkronizasyonu (GET /api/sync/) için değişiklik günlüğü. Kayıt ve
+    sahibi (temsilci; referans tablolarda boş) başına tek satır tutulur; yazmada eski satır silinip
+    yenisi eklendiği için id sırası son değişiklik sırasıdır ve tablo kayıt sayısıyla sınırlı kalır.
+    Satırlar sırayla eklendiğinden id sırası commit sırasıyla da aynıdır (bkz. sync.lock_changelog).
+    Silinen kayıtlar deleted=True satırıyla işaretlenir; eskileri: python manage.py prune_changelog
+    """
+    collection = models.CharField(max_length=30)
+    object_id = models.PositiveBigIntegerField()
+    owner_id = models.PositiveBigIntegerField(null=True, blank=True)
+    deleted = models.BooleanField(default=False)
+    changed_at = models.DateTimeField(auto_now=True)
+
+    objects = ChangeLogManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["owner_id", "id"], name="changelog_owner_idx"),
+            models.Index(fields=["collection", "object_id"], name="changelog_object_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.collection}#{self.object_id} ({'silindi' if self.deleted else 'değişti'})"
+
+
+class ClientOperation(models.Model):
+    """
+    Mobil uygulamanın çevrimdışı kuyruğundan gelip uygulanmış oluşturma işlemleri (POST /api/sync/push/).
+    client_id istemcinin ürettiği UUID'dir; aynı işlem tekrar gönderilirse yeni kayıt açılmaz,
+    ilk seferde oluşturulan kayıt döner. Eskileri: python manage.py prune_changelog
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    client_id = models.UUIDField()
+    collection = models.CharField(max_length=30)
+    object_id = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "client_id"], name="clientoperation_unique_client_id"),
+        ]
+
+    def __str__(self):
+        return f"{self.client_id} -> {self.collection}#{self.object_id}"
+
+
+class AuditEntry(models.Model):
+    """
+    Denetlenen modellerdeki (bkz. core/audit.py) oluşturma, güncelleme ve silmelerin alan bazında
+    farkları. Yalnızca eklenir; girdiler sinyallerle toplanıp istek sonunda toplu yazılır.
+    Kayda bağlı yabancı anahtar yoktur: silinen kaydın girdileri de kalır.
+    Eski girdiler arşiv dosyasına taşınır: python manage.py rotate_audit_log
+    """
+    CREATE = 'create'
+    UPDATE = 'update'
+    DELETE = 'delete'
+    ACTION_CHOICES = (
+        (CREATE, 'Oluşturma'),
+        (UPDATE, 'Güncelleme'),
+        (DELETE, 'Silme'),
+    )
+    # Girdi başlığında gösterilen alanlar (ilk bulunan)
+    SUMMARY_FIELDS = ('name', 'username', 'title', 'task_description', 'document_name', 'chassis_no')
+
+    model = models.CharField(max_length=50)
+    object_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # {alan: [eski, yeni]}
+    changes = models.JSONField(default=dict)
+    actor = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+    )
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-timestamp", "-id"], name="auditentry_timestamp_idx"),
+            models.Index(fields=["model", "-timestamp"], name="auditentry_model_idx"),
+            models.Index(fields=["model", "object_id"], name="auditentry_object_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.model}#{self.object_id} - {self.get_action_display()}"
+
+    @property
+    def summary(self):
+        for name in self.SUMMARY_FIELDS:
+            if name in self.changes:
+                old, new = self.changes[name]
+                return new if new is not None else old
+        return f"#{self.object_id}"
+
+    @property
+    def change_rows(self):
+        # Şablonlar için [(alan, eski, yeni)]
+        return [(name, old, new) for name, (old, new) in self.changes.items()]
+
+
+class Job(models.Model):
+    """
+    Arka plan iş kuyruğu (bkz. core/jobs.py): istek içinde yapılması gerekmeyen yan işler
+    (günlük özet yenileme, küçük resim üretme...) buraya yazılır ve worker tarafından çalıştırılır:
+    python manage.py run_worker. Harici bir kuyruk sunucusu gerekmez.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'Sırada'),
+        (RUNNING, 'Çalışıyor'),
+        (DONE, 'Tamamlandı'),
+        (FAILED, 'Başarısız'),
+    )
+
+    # Çalıştırılacak fonksiyonun yolu ve anahtar kelime argümanları
+    task = models.CharField(max_length=200)
+    payload = models.JSONField(default=dict)
+    # Aynı key ile sırada bekleyen tek iş olur (birleştirme); boşsa her iş ayrıdır
+    key = models.CharField(max_length=200, null=True, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    # Görünmezlik süresi: bu ana kadar bitmeyen iş yeniden ayrılabilir
+    locked_until = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["key"], condition=Q(status='queued'), name="job_unique_queued_key"),
+        ]
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="job_status_run_idx"),
+            models.Index(fields=["locked_by"], name="job_locked_by_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.get_status_display()})"
+
 
 class Complaint(models.Model):
     STATUS_CHOICES = (
@@ -213,9 +918,32 @@ class Complaint(models.Model):
     cozum_detay = models.TextField(blank=True, null=True, verbose_name="Çözüm/Neden Detayı")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["rep", "-created_at"], name="complaint_rep_created_idx"),
+            models.Index(fields=["rep", "status", "-created_at"], name="complaint_rep_status_idx"),
+            models.Index(fields=["-created_at", "-id"], name="complaint_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.get_status_display()}"
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            previous = DailyRollup.objects.previous_state(self)
+            super().save(*args, **kwargs)
+            SearchEntry.objects.sync(self)
+            DailyRollup.objects.refresh_many([self] + previous)
+            ChangeLog.objects.record_many([self], previous)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            SearchEntry.objects.remove(self)
+            ChangeLog.objects.record_many([self], deleted=True)
+            result = super().delete(*args, **kwargs)
+            DailyRollup.objects.refresh_many([self])
+        return result
+
 class Request(models.Model):
     rep = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, verbose_name="Temsilci")
     customer = models.ForeignKey("Customer", on_delete=models.CASCADE, verbose_name="Müşteri")
@@ -224,8 +952,24 @@ class Request(models.Model):
     description = models.TextField(blank=True, null=True, verbose_name="Açıklama")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["rep", "-created_at"], name="request_rep_created_idx"),
+            models.Index(fields=["-created_at", "-id"], name="request_created_idx"),
+        ]
+
     def __str__(self):
         return self.name
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            SearchEntry.objects.sync(self)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            SearchEntry.objects.remove(self)
+            return super().delete(*args, **kwargs)
     
 
 
@@ -244,9 +988,25 @@ class Vehicle(models.Model):
     estimated_maintenance_date = models.DateField(verbose_name="Tahmini Bakım Zamanı")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["rep", "-created_at"], name="vehicle_rep_created_idx"),
+            models.Index(fields=["-created_at", "-id"], name="vehicle_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.brand} {self.model} - {self.chassis_no}"
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            SearchEntry.objects.sync(self)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            SearchEntry.objects.remove(self)
+            return super().delete(*args, **kwargs)
+
 
 
 
@@ -272,23 +1032,25 @@ class SubscriptionExtra(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["rep", "-created_at"], name="extra_rep_created_idx"),
+            models.Index(fields=["rep", "status", "-created_at"], name="extra_rep_status_idx"),
+            models.Index(fields=["-created_at", "-id"], name="extra_created_idx"),
+        ]
+
     def __str__(self):
         return f"{self.name} - {self.get_status_display()} ({self.customer.username})"
 
+    def save(self, *args, **kwargs):
+        # Günlük özet (DailyRollup) yenileme işi kayıtla aynı transaction içinde kuyruğa girer
+        with transaction.atomic():
+            previous = DailyRollup.objects.previous_state(self)
+            super().save(*args, **kwargs)
+            DailyRollup.objects.refresh_many([self] + previous)
 
-class SubscriptionExtraLog(models.Model):
-    OPERATION_CHOICES = (
-        ('create', 'Ekstra Ekleme'),
-        ('update', 'Ekstra Güncelleme'),
-        ('cancel', 'Ekstra İptali'),
-    )
-    extra = models.ForeignKey(SubscriptionExtra, on_delete=models.CASCADE, related_name="logs")
-    operation = models.CharField(max_length=10, choices=OPERATION_CHOICES)
-    performed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
-    old_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
-    new_amount = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
-    details = models.TextField(blank=True, null=True)
-    timestamp = models.DateTimeField(auto_now_add=True)
-
-    def __str__(self):
-        return f"{self.extra.name} - {self.get_operation_display()} - {self.performed_by}"
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            result = super().delete(*args, **kwargs)
+            DailyRollup.objects.refresh_many([self])
+        return result
@@ -0,0 +1,143 @@
+# core/pagination.py
+
+import base64
+from datetime import datetime
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.pagination import CursorPagination
+from rest_framework.settings import api_settings
+
+# settings.LIST_PAGE_SIZE ile değiştirilebilir
+DEFAULT_PAGE_SIZE = 50
+# settings.API_MAX_PAGE_SIZE ile değiştirilebilir
+DEFAULT_API_MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(value, pk):
+    # (zaman damgası, id) çiftini URL'de taşınabilir bir metne çevirir
+    raw = f"{value.isoformat()}|{pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    # Bozuk/eksik imleçte None döner, sayfa baştan gösterilir
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        value, pk = raw.rsplit("|", 1)
+        value = parse_datetime(value)
+        pk = int(pk)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    # Sıralama alanları saat dilimli; saat dilimsiz değer elle değiştirilmiş imleçtir
+    if not isinstance(value, datetime) or (settings.USE_TZ and timezone.is_naive(value)):
+        return None
+    return value, pk
+
+
+def older_than(order_field, value, pk):
+    # (order_field, id) azalan sırasında verilen satırdan sonra gelenler
+    return Q(**{f"{order_field}__lt": value}) | Q(**{order_field: value, "pk__lt": pk})
+
+
+def newer_than(order_field, value, pk):
+    return Q(**{f"{order_field}__gt": value}) | Q(**{order_field: value, "pk__gt": pk})
+
+
+class KeysetPage:
+    """
+    Tek bir liste sayfası. Şablonlarda pagination.html ile kullanılır:
+    object_list, has_next/has_previous ve filtreleri koruyan next_query/previous_query.
+    """
+
+    def __init__(self, request, object_list, has_next, has_previous, order_field):
+        self.request = request
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.order_field = order_field
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def _query(self, key, obj):
+        # Mevcut GET filtrelerini koruyup yalnızca imleci değiştirir
+        params = self.request.GET.copy()
+        params.pop("after", None)
+        params.pop("before", None)
+        params[key] = encode_cursor(getattr(obj, self.order_field), obj.pk)
+        return params.urlencode()
+
+    @property
+    def next_query(self):
+        if not self.has_next:
+            return ""
+        return self._query("after", self.object_list[-1])
+
+    @property
+    def previous_query(self):
+        if not self.has_previous:
+            return ""
+        return self._query("before", self.object_list[0])
+
+    @property
+    def first_query(self):
+        params = self.request.GET.copy()
+        params.pop("after", None)
+        params.pop("before", None)
+        return params.urlencode()
+
+
+def keyset_paginate(request, queryset, order_field, per_page=None):
+    """
+    queryset'i (order_field, id) azalan sırasında, OFFSET kullanmadan sayfalar.
+    ?after=<imleç> sonraki, ?before=<imleç> önceki sayfayı getirir; diğer GET parametreleri
+    (filtreler) olduğu gibi kalır. Sorgu her zaman en fazla per_page + 1 satır okur; önceki sayfada
+    sonrasında kayıt olup olmadığı ayrıca tek EXISTS sorgusuyla bulunur. Bozuk imleç ilk sayfayı gösterir.
+    """
+    if per_page is None:
+        per_page = getattr(settings, "LIST_PAGE_SIZE", DEFAULT_PAGE_SIZE)
+
+    after = decode_cursor(request.GET.get("after", ""))
+    before = decode_cursor(request.GET.get("before", "")) if after is None else None
+
+    if before is not None:
+        # Önceki sayfa: ters sırada okuyup listeyi çeviriyoruz
+        rows = list(queryset.filter(newer_than(order_field, *before)).order_by(order_field, "pk")[:per_page + 1])
+        if len(rows) > per_page:
+            rows = rows[:per_page]
+            rows.reverse()
+            last = rows[-1]
+            has_next = queryset.filter(older_than(order_field, getattr(last, order_field), last.pk)).exists()
+            return KeysetPage(request, rows, has_next=has_next, has_previous=True, order_field=order_field)
+        # Listenin başına ulaşıldı: ilk sayfa (eksik satırlar yeni kayıtlarla dolmuş olabilir) baştan okunur
+
+    if after is not None:
+        queryset = queryset.filter(older_than(order_field, *after))
+    queryset = queryset.order_by(f"-{order_field}", "-pk")
+    rows = list(queryset[:per_page + 1])
+    has_next = len(rows) > per_page
+    return KeysetPage(request, rows[:per_page], has_next=has_next, has_previous=after is not None,
+                      order_field=order_field)
+
+
+class ApiCursorPagination(CursorPagination):
+    """
+    /api/ router'ındaki tüm viewset'ler için imleç tabanlı sayfalama.
+    Sıralama birincil anahtara göre (en yeni önce) olduğundan her modelde çalışır.
+    ?page_size= ile sayfa boyutu istenebilir, settings.API_MAX_PAGE_SIZE ile sınırlıdır.
+    """
+    ordering = "-id"
+    page_size_query_param = "page_size"
+
+    def get_page_size(self, request):
+        # Ayarlar her istekte okunur; içe aktarma anında sabitlenmez (override_settings, çalışma zamanı ayarı)
+        self.page_size = api_settings.PAGE_SIZE
+        self.max_page_size = getattr(settings, "API_MAX_PAGE_SIZE", DEFAULT_API_MAX_PAGE_SIZE)
+        return super().get_page_size(request)
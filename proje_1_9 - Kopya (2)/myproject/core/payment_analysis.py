@@ -0,0 +1,391 @@
+# core/payment_analysis.py
+
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import (
+    BooleanField, Case, Count, DateField, DecimalField, ExpressionWrapper, F, Func,
+    IntegerField, Max, Prefetch, Q, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce, Round
+
+from .models import Payment, SubscriptionDuration
+
+
+def is_monthly_duration(subscription_duration_str):
+    # "1 Ay" süresiz aylık abonelik demektir
+    return subscription_duration_str.strip().lower() == "1 ay"
+
+
+def parse_period_count(subscription_duration_str):
+    # "6 Ay" -> 6; okunamazsa veya 0 ve altıysa 1 taksit
+    try:
+        period_count = int(subscription_duration_str.split()[0])  # "6" -> 6
+    except:
+        period_count = 1
+
+    if period_count <= 0:
+        period_count = 1
+    return period_count
+
+
+def compute_payment_analysis(subscription_duration_str, start_date, total_amount, total_paid, today=None):
+    """
+    Müşterinin abonelik ödemelerini, veritabanına gitmeden, verilen değerlerle analiz eder.
+    - Eğer subscription_duration_str == "1 Ay" ise, süresiz aylık yaklaşım.
+      (her ay bir taksit, abonelik durmaz/iptal edilmezse sonsuza dek sürer)
+    - Yoksa, "6 Ay", "12 Ay" vb. ise sınırlı süreli taksit yaklaşımı.
+    """
+    if today is None:
+        today = date.today()
+
+    # Eğer start_date ileride ise (henüz başlamadıysa):
+    if start_date > today:
+        return {
+            "total_amount": total_amount,
+            "total_paid": total_paid,
+            "remaining_amount": total_amount,  # ödemeler henüz başlamadı
+            "is_late": False,
+            "next_payment_date": start_date,  # ilk ödeme start_date baz alınabilir
+            "missed_months": 0,
+            "message": "Abonelik henüz başlamadı.",
+        }
+
+    # 1) Ayırt et: "1 Ay" → Süresiz aylık, diğer → sınırlı
+    if is_monthly_duration(subscription_duration_str):
+        # SÜRESİZ AYLIK YAKLAŞIM
+
+        # Aylık ücret: customer.amount olduğunu varsayıyoruz
+        monthly_cost = total_amount  # Her ay ödenmesi beklenen ücret
+
+        # Kaç ay geçti?
+        days_diff = (today - start_date).days
+        months_passed = days_diff // 30  # Yaklaşık her 30 günde 1 ay
+
+        if months_passed < 0:
+            months_passed = 0
+
+        # Bu güne kadar ödenmesi gereken toplam
+        required_total = months_passed * monthly_cost
+
+        # Gecikme var mı?
+        if total_paid < required_total:
+            # Kaç aylık gecikme?
+            missed_amount = required_total - total_paid
+            missed_months = int(missed_amount // monthly_cost)
+            if missed_months < 1 and missed_amount > 0:
+                missed_months = 1  # kısmi bir aylık borç
+            is_late = True if missed_months >= 1 else False
+        else:
+            missed_months = 0
+            is_late = False
+
+        remaining_amount = 0  # Süresiz olduğundan tam "kalan" yok, ama o anki gecikme => missed_months
+        # Bir sonraki ödeme tarihi: start_date + months_passed * 30
+        next_payment_date = start_date + timedelta(days=(months_passed+1)*30)
+
+        return {
+            "total_amount": f"Süresiz (Her ay {monthly_cost} TL)",
+            "total_paid": total_paid,
+            "remaining_amount": remaining_amount,  # Süresiz -> o anda biriken borç var
+            "is_late": is_late,
+            "next_payment_date": next_payment_date,
+            "missed_months": missed_months,
+            "message": f"Aylık ödenmesi gereken: {monthly_cost} TL / Gecikmiş ay: {missed_months}",
+        }
+    else:
+        # SINIRLI SÜRELİ YAKLAŞIM, ÖRN: "6 Ay" = 6 taksit
+        period_count = parse_period_count(subscription_duration_str)
+
+        # Periyot başına ücret
+        per_period_amount = total_amount / period_count
+
+        # Kaç gün geçti
+        days_passed = (today - start_date).days
+        if days_passed < 0:
+            days_passed = 0
+
+        # Kaç periyot ödenmiş olmalı?
+        # Basit mantık: her periyot 30 gün -> n = days_passed // 30
+        months_passed = days_passed // 30
+        if months_passed > period_count:
+            months_passed = period_count  # maksimum
+
+        # required_total = months_passed * per_period_amount
+        required_total = months_passed * per_period_amount
+
+        # Gecikme var mı?
+        missed_amount = max(0, required_total - total_paid)
+        if per_period_amount > 0:
+            missed_months = int(missed_amount // per_period_amount)
+        else:
+            # Ücretsiz abonelikte ödenecek taksit yok (SQL tarafı da gecikme saymaz)
+            missed_months = 0
+        if missed_months < 1 and missed_amount > 0:
+            missed_months = 1
+        is_late = missed_months >= 1
+
+        # Kalan tutar
+        remaining_amount = max(0, total_amount - total_paid)
+
+        # Bir sonraki ödeme periyot index
+        periyot_odendi = int(total_paid // per_period_amount) if per_period_amount > 0 else period_count
+        if periyot_odendi > period_count:
+            periyot_odendi = period_count
+        next_period_index = periyot_odendi + 1
+        if next_period_index > period_count:
+            next_period_index = period_count
+
+        next_payment_date = None
+        if periyot_odendi < period_count:
+            offset_days = (next_period_index - 1)*30
+            next_payment_date = start_date + timedelta(days=offset_days)
+
+        return {
+            "total_amount": total_amount,
+            "total_paid": total_paid,
+            "remaining_amount": remaining_amount,
+            "is_late": is_late,
+            "next_payment_date": next_payment_date,
+            "missed_months": missed_months,
+            "message": f"Taksitli ({period_count} Ay). Geciken periyot: {missed_months}",
+        }
+
+
+MONEY_FIELD = DecimalField(max_digits=20, decimal_places=2)
+
+
+class DaysSince(Func):
+    """
+    Verilen tarih alanından bugüne kadar geçen tam gün sayısı.
+    PostgreSQL'de date - date zaten gün sayısı (integer) döner; SQLite'ta julianday farkı kullanılır.
+    """
+    arg_joiner = " - "
+    template = "(%(expressions)s)"
+    output_field = IntegerField()
+
+    def __init__(self, expression, today, **extra):
+        super().__init__(Value(today, output_field=DateField()), expression, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template="CAST(julianday(%(expressions)s) AS INTEGER)",
+            arg_joiner=") - julianday(",
+            **extra_context,
+        )
+
+
+def paid_sum_expression():
+    # Ödenen toplam CustomerBalance defterinden okunur (ödeme yoksa NULL)
+    return Case(
+        When(balance__payment_count__gt=0, then=F("balance__total_paid")),
+        default=Value(None),
+        output_field=MONEY_FIELD,
+    )
+
+
+def annotate_payment_status(customers, today=None):
+    """
+    compute_payment_analysis'teki 30 günlük taksit hesabını queryset ifadelerine çevirir.
+    Eklenen alanlar: total_paid, period_count, months_passed, required_total, remaining, is_late.
+    Böylece "gecikmede" ve "kalan tutar" filtreleri SQL WHERE olarak çalışır.
+    Abonelik süreleri küçük bir tablo olduğundan taksit sayıları Python'da okunup CASE ile verilir.
+    """
+    if today is None:
+        today = date.today()
+
+    monthly_ids = []
+    period_whens = []
+    for duration in SubscriptionDuration.objects.all():
+        if is_monthly_duration(duration.name):
+            monthly_ids.append(duration.pk)
+        else:
+            period_count = parse_period_count(duration.name)
+            if period_count != 1:
+                period_whens.append(When(subscription_duration_id=duration.pk, then=Value(period_count)))
+
+    not_started = Q(subscription_start_date__gt=today)
+    monthly = Q(subscription_duration_id__in=monthly_ids)
+    months_raw = ExpressionWrapper(
+        DaysSince("subscription_start_date", today) / Value(30), output_field=IntegerField()
+    )
+
+    customers = customers.annotate(
+        paid_sum=paid_sum_expression(),
+    ).annotate(
+        total_paid=Round(Coalesce(F("paid_sum"), Value(Decimal("0"))), 2, output_field=MONEY_FIELD),
+        # Süresiz aylıkta her ay bir taksit: period_count = 1, toplam = ay * aylık ücret
+        period_count=Case(*period_whens, default=Value(1), output_field=IntegerField()),
+        months_raw=months_raw,
+    ).annotate(
+        months_passed=Case(
+            When(not_started, then=Value(0)),
+            When(monthly, then=F("months_raw")),
+            When(months_raw__gt=F("period_count"), then=F("period_count")),
+            default=F("months_raw"),
+            output_field=IntegerField(),
+        ),
+    ).annotate(
+        required_total=ExpressionWrapper(
+            F("months_passed") * F("amount") / F("period_count"), output_field=MONEY_FIELD
+        ),
+        # Bölmeden kaçınmak için: total_paid < months_passed * amount / period_count.
+        # amount ve total_paid kuruş katı olduğundan fark da kuruş katıdır; yarım kuruşluk eşik
+        # yalnızca SQLite'ın kayan noktalı aritmetik hatasını yutar (bkz. PaymentAnalysisTests).
+        late_gap=ExpressionWrapper(
+            F("months_passed") * F("amount") - F("total_paid") * F("period_count"),
+            output_field=MONEY_FIELD,
+        ),
+        remaining=Case(
+            When(not_started, then=F("amount")),
+            When(monthly, then=Value(Decimal("0"))),
+            When(amount__gt=F("total_paid"), then=Round(F("amount") - F("total_paid"), 2)),
+            default=Value(Decimal("0")),
+            output_field=MONEY_FIELD,
+        ),
+    ).annotate(
+        is_late=Case(
+            When(not_started, then=Value(False)),
+            When(late_gap__gt=Decimal("0.005"), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    )
+    return customers
+
+
+def _parse_amount(value):
+    # Geçersiz tutar girildiyse filtre uygulanmaz (None)
+    try:
+        amount = Decimal(str(value).strip())
+    except (InvalidOperation, ValueError):
+        return None
+    return amount if amount.is_finite() else None
+
+
+def filter_payment_status(customers, late_flag='', min_remaining='', max_remaining='', today=None):
+    """
+    Tahsilat sayfalarındaki "gecikmede" (late=1) ve kalan tutar aralığı filtrelerini
+    annotate_payment_status alanları üzerinden veritabanında uygular.
+    """
+    customers = annotate_payment_status(customers, today)
+    if late_flag == "1":
+        customers = customers.filter(is_late=True)
+    min_value = _parse_amount(min_remaining) if min_remaining else None
+    if min_value is not None:
+        customers = customers.filter(remaining__gte=min_value)
+    max_value = _parse_amount(max_remaining) if max_remaining else None
+    if max_value is not None:
+        customers = customers.filter(remaining__lte=max_value)
+    return customers
+
+
+def analyze_customer_payments(customers, date_from='', date_to=''):
+    """
+    Bir Customer queryset'indeki tüm müşterileri toplu olarak analiz eder.
+    - Ödenen toplam CustomerBalance defterinden, abonelik süresi select_related ile gelir.
+      (annotate_payment_status uygulanmış queryset'te mevcut paid_sum kullanılır.)
+    - Tarih aralığına göre süzülmüş ödemeler tek bir prefetch ile alınır.
+    Her müşteri için {"customer", "analysis", "payments"} sözlüğü döner;
+    "analysis" alanı analyze_customer_payment ile aynıdır (ödemesiz müşteride total_paid int 0
+    yerine Decimal("0.00")).
+    """
+    today = date.today()
+
+    payments = Payment.objects.order_by("-payment_date")
+    if date_from:
+        payments = payments.filter(payment_date__date__gte=date_from)
+    if date_to:
+        payments = payments.filter(payment_date__date__lte=date_to)
+
+    if "paid_sum" not in customers.query.annotations:
+        customers = customers.annotate(paid_sum=paid_sum_expression())
+    customers = customers.select_related("subscription_duration").prefetch_related(
+        Prefetch("payments", queryset=payments, to_attr="filtered_payments")
+    )
+
+    customer_list = []
+    for cust in customers:
+        # Ödemesi olmayan müşteride de Decimal("0.00") döner;
+        # SQLite toplamı float döndürdüğünden kuruş hanesine yuvarlanır.
+        total_paid = Decimal("0.00")
+        if cust.paid_sum is not None:
+            total_paid = cust.paid_sum.quantize(Decimal("0.01"))
+        analysis = compute_payment_analysis(
+            cust.subscription_duration.name,
+            cust.subscription_start_date,
+            cust.amount,
+            total_paid,
+            today,
+        )
+        customer_list.append({
+            "customer": cust,
+            "analysis": analysis,
+            "payments": cust.filtered_payments,
+        })
+    return customer_list
+
+
+def paid_installment_count(subscription_duration_str, total_amount, total_paid):
+    # Ödenen toplamın karşıladığı taksit sayısı (sınırlı sürelide taksit sayısı ile sınırlı)
+    if total_amount <= 0:
+        return 0
+    if is_monthly_duration(subscription_duration_str):
+        return int(total_paid // total_amount)
+    period_count = parse_period_count(subscription_duration_str)
+    return min(int(total_paid // (total_amount / period_count)), period_count)
+
+
+def balance_values(subscription_duration_str, start_date, total_amount, total_paid, payment_count,
+                   last_payment_date, today=None):
+    """
+    CustomerBalance alanlarını ödeme toplamlarından hesaplar.
+    subscription_duration_str None ise (süre silinmiş) gecikme ve taksit hesaplanmaz.
+    """
+    if today is None:
+        today = date.today()
+    total_paid = total_paid.quantize(Decimal("0.01")) if total_paid is not None else Decimal("0.00")
+
+    is_late = False
+    installments = 0
+    if subscription_duration_str is not None and total_amount > 0:
+        analysis = compute_payment_analysis(
+            subscription_duration_str, start_date, total_amount, total_paid, today,
+        )
+        is_late = analysis["is_late"]
+        installments = paid_installment_count(subscription_duration_str, total_amount, total_paid)
+
+    return {
+        "total_paid": total_paid,
+        "payment_count": payment_count,
+        "last_payment_date": last_payment_date,
+        "paid_installment_count": installments,
+        "is_late": is_late,
+        "status_date": today,
+    }
+
+
+def payment_totals(payments):
+    # Bir Payment queryset'i için toplam, adet ve son ödeme tarihi
+    return payments.aggregate(
+        total=Sum("paid_amount", output_field=MONEY_FIELD),
+        count=Count("id"),
+        last=Max("payment_date"),
+    )
+
+
+def build_customer_balance(customer, totals=None, today=None):
+    # Tek müşteri için CustomerBalance değerleri; totals verilmezse tek aggregate sorgusu atılır
+    if totals is None:
+        totals = payment_totals(Payment.objects.filter(customer_id=customer.pk))
+    duration = customer.subscription_duration
+    return balance_values(
+        duration.name if duration is not None else None,
+        customer.subscription_start_date,
+        customer.amount,
+        totals["total"],
+        totals["count"],
+        totals["last"],
+        today,
+    )
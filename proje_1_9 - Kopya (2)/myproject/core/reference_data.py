@@ -0,0 +1,112 @@
+# core/reference_data.py
+
+from django import forms
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from rest_framework import serializers
+
+# Nadiren değişen, hemen her form ve liste sayfasında okunan tablolar
+REFERENCE_MODELS = (
+    "core.SubscriptionType",
+    "core.SubscriptionDuration",
+    "core.PaymentType",
+    "core.ExpenseCategory",
+)
+
+CACHE_KEY_PREFIX = "refdata"
+
+
+def get_cache():
+    return caches[getattr(settings, "REFERENCE_DATA_CACHE", "default")]
+
+
+def cache_key(model):
+    return f"{CACHE_KEY_PREFIX}:{model._meta.label_lower}"
+
+
+def reference_list(model):
+    """
+    Tablonun tüm kayıtları (id sırasıyla). İlk okumada veritabanından alınıp önbelleğe yazılır;
+    kayıt eklenince/değişince/silinince sinyallerle önbellekten düşer.
+    """
+    cache = get_cache()
+    key = cache_key(model)
+    objects = cache.get(key)
+    if objects is None:
+        objects = list(model._default_manager.order_by("pk"))
+        # Süre, sinyal görmeyen süreçler için (ör. her süreçte ayrı yerel bellek önbelleği) üst sınırdır
+        cache.set(key, objects, getattr(settings, "REFERENCE_DATA_TIMEOUT", 300))
+    return objects
+
+
+def reference_get(model, pk):
+    # pk ile tek kayıt; bulunamazsa veya pk geçersizse None
+    try:
+        pk = model._meta.pk.to_python(pk)
+    except ValidationError:
+        return None
+    for obj in reference_list(model):
+        if obj.pk == pk:
+            return obj
+    return None
+
+
+def invalidate(sender, **kwargs):
+    key = cache_key(sender)
+    get_cache().delete(key)
+    # Transaction bitmeden başka bir istek eski veriyi yeniden önbelleğe yazmış olabilir
+    transaction.on_commit(lambda: get_cache().delete(key))
+
+
+def connect_signals():
+    for label in REFERENCE_MODELS:
+        model = apps.get_model(label)
+        post_save.connect(invalidate, sender=model, dispatch_uid=f"refdata_save_{label}")
+        post_delete.connect(invalidate, sender=model, dispatch_uid=f"refdata_delete_{label}")
+
+
+class CachedModelChoiceIterator(forms.models.ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in reference_list(self.queryset.model):
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(reference_list(self.queryset.model)) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(reference_list(self.queryset.model))
+
+
+class CachedModelChoiceField(forms.ModelChoiceField):
+    """Seçenekleri ve doğrulamayı referans veri önbelleğinden yapan ModelChoiceField."""
+    iterator = CachedModelChoiceIterator
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, self.queryset.model):
+            value = value.pk
+        obj = reference_get(self.queryset.model, value)
+        if obj is None:
+            raise ValidationError(
+                self.error_messages["invalid_choice"], code="invalid_choice", params={"value": value},
+            )
+        return obj
+
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """id'yi sorgu atmadan referans veri önbelleğinden çözen PrimaryKeyRelatedField."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, (str, int)):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        obj = reference_get(self.get_queryset().model, data)
+        if obj is None:
+            self.fail("does_not_exist", pk_value=data)
+        return obj
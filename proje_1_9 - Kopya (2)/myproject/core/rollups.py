@@ -0,0 +1,297 @@
+# core/rollups.py
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .payment_analysis import MONEY_FIELD
+
+
+def resolve_rep_ids(model, rep_path, instances):
+    # Kayıtların temsilci id'leri; müşteri üzerinden gidenler (customer__rep) tek sorguda çözülür
+    parts = rep_path.split("__")
+    if len(parts) == 1:
+        return [getattr(instance, f"{parts[0]}_id") for instance in instances]
+    fk_name, rep_name = parts
+    related = model._meta.get_field(fk_name).related_model
+    fk_ids = {getattr(instance, f"{fk_name}_id") for instance in instances}
+    reps = dict(related._default_manager.filter(pk__in=fk_ids).values_list("pk", f"{rep_name}_id"))
+    return [reps.get(getattr(instance, f"{fk_name}_id")) for instance in instances]
+
+
+class RollupSource:
+    """
+    Bir kaynak tablonun günlük özetinin tanımı.
+    rep_path: temsilciye giden yol ("rep", "user" ya da "customer__rep").
+    key_field: gün/temsilci içinde ayrıca gruplanan alan (kategori, durum, malzeme); yoksa None.
+    """
+
+    def __init__(self, label, date_field, rep_path, key_field=None, amount_field=None, quantity_field=None):
+        self.label = label
+        self.date_field = date_field
+        self.rep_path = rep_path
+        self.key_field = key_field
+        self.amount_field = amount_field
+        self.quantity_field = quantity_field
+
+    def model(self, apps=global_apps):
+        return apps.get_model(self.label)
+
+    def rep_ids(self, instances):
+        return resolve_rep_ids(self.model(), self.rep_path, instances)
+
+    def slices(self, instances):
+        # Kayıtların düştüğü (gün, temsilci) dilimleri
+        return {
+            (local_date(getattr(instance, self.date_field)), rep_id)
+            for instance, rep_id in zip(instances, self.rep_ids(instances))
+            if getattr(instance, self.date_field) is not None
+        }
+
+    def aggregate(self, queryset):
+        group = {
+            "rollup_date": TruncDate(self.date_field, tzinfo=timezone.get_current_timezone()),
+            "rollup_rep": F(self.rep_path),
+        }
+        if self.key_field:
+            group["rollup_key"] = F(self.key_field)
+        totals = {"rollup_count": Count("pk")}
+        if self.amount_field:
+            totals["rollup_amount"] = Sum(self.amount_field, output_field=MONEY_FIELD)
+        if self.quantity_field:
+            totals["rollup_quantity"] = Sum(self.quantity_field)
+        return queryset.order_by().values(**group).annotate(**totals)
+
+
+# metric -> kaynak. DailyRollup.metric değerleri bu anahtarlardır.
+ROLLUP_SOURCES = {
+    "payments": RollupSource("core.Payment", "payment_date", "customer__rep", amount_field="paid_amount"),
+    "expenses": RollupSource("core.Expense", "created_at", "user", key_field="category", amount_field="amount"),
+    "complaints": RollupSource("core.Complaint", "created_at", "rep", key_field="status"),
+    "materials": RollupSource(
+        "core.MaterialTransaction", "transaction_date", "rep", key_field="material", quantity_field="quantity",
+    ),
+    "extras": RollupSource("core.SubscriptionExtra", "created_at", "rep", key_field="status", amount_field="price"),
+}
+
+METRIC_BY_MODEL = {source.label.lower(): metric for metric, source in ROLLUP_SOURCES.items()}
+
+# Panolarda varsayılan dönem (gün)
+DEFAULT_STATS_DAYS = 30
+
+
+def local_date(value):
+    if isinstance(value, datetime):
+        return timezone.localdate(value) if timezone.is_aware(value) else value.date()
+    return value
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def rep_q(path, rep_ids):
+    # rep_ids içinde None (temsilcisi silinmiş kayıtlar) olabilir
+    rep_ids = set(rep_ids)
+    q = Q(**{f"{path}__in": [rep_id for rep_id in rep_ids if rep_id is not None]})
+    if None in rep_ids:
+        q |= Q(**{f"{path}__isnull": True})
+    return q
+
+
+def compute_rollups(metric, day_from=None, day_to=None, rep_ids=None, apps=global_apps):
+    """Kaynak tablodan kaydedilmemiş DailyRollup nesneleri (migration'dan da çağrılır)."""
+    source = ROLLUP_SOURCES[metric]
+    rollup_model = apps.get_model("core", "DailyRollup")
+    queryset = source.model(apps)._default_manager.all()
+    if day_from is not None:
+        queryset = queryset.filter(**{f"{source.date_field}__gte": day_start(day_from)})
+    if day_to is not None:
+        queryset = queryset.filter(**{f"{source.date_field}__lt": day_start(day_to + timedelta(days=1))})
+    if rep_ids is not None:
+        queryset = queryset.filter(rep_q(source.rep_path, rep_ids))
+    return [
+        rollup_model(
+            date=row["rollup_date"],
+            metric=metric,
+            rep_id=row["rollup_rep"],
+            key="" if row.get("rollup_key") is None else str(row["rollup_key"]),
+            count=row["rollup_count"],
+            amount=(row.get("rollup_amount") or Decimal("0")).quantize(Decimal("0.01")),
+            quantity=row.get("rollup_quantity") or 0,
+        )
+        for row in source.aggregate(queryset)
+    ]
+
+
+def instance_slices(instances):
+    """
+    Kayıtların düştüğü (metric, gün, temsilci) dilimleri. instances farklı modellerden olabilir;
+    güncellemede kaydın eski hali de verilir (eski dilim için).
+    """
+    by_metric = {}
+    for instance in instances:
+        metric = METRIC_BY_MODEL.get(instance._meta.label_lower)
+        if metric is not None:
+            by_metric.setdefault(metric, []).append(instance)
+    return {
+        (metric, day, rep_id)
+        for metric, items in by_metric.items()
+        for day, rep_id in ROLLUP_SOURCES[metric].slices(items)
+    }
+
+
+def refresh_slice(metric, day, rep_ids):
+    """
+    Dilimi kaynak tablodan yeniden hesaplar. Artırıp azaltmak yerine dilim baştan toplandığı
+    için tekrar çalıştırmak güvenlidir ve sapma birikmez.
+    """
+    from .models import DailyRollup
+
+    DailyRollup.objects.filter(rep_q("rep", rep_ids), metric=metric, date=day).delete()
+    DailyRollup.objects.bulk_create(compute_rollups(metric, day, day, rep_ids))
+
+
+def refresh_rollup_slice(metric, day, rep_id):
+    # Arka plan işi (bkz. DailyRollupManager.refresh_many); day ISO tarih
+    refresh_slice(metric, date.fromisoformat(day), [rep_id])
+
+
+def rollup_jobs(instances):
+    """Kayıtların dilimleri için kaydedilmemiş yenileme işleri; aynı dilimin bekleyen işi birleşir."""
+    from .jobs import new_job
+
+    return [
+        new_job(
+            refresh_rollup_slice,
+            {"metric": metric, "day": day.isoformat(), "rep_id": rep_id},
+            key=f"rollups:{metric}:{day.isoformat()}:{rep_id}",
+        )
+        for metric, day, rep_id in sorted(instance_slices(instances), key=str)
+    ]
+
+
+def rollup_values(rollups):
+    # Karşılaştırma için (metric, gün, temsilci, anahtar) -> (adet, tutar, miktar)
+    return {
+        (r.metric, r.date, r.rep_id, r.key): (r.count, Decimal(r.amount).quantize(Decimal("0.01")), r.quantity)
+        for r in rollups
+    }
+
+
+def stats_period(params, today=None):
+    # ?date_from=&date_to= (YYYY-AA-GG); verilmezse son DEFAULT_STATS_DAYS gün
+    today = today or timezone.localdate()
+    try:
+        date_to = date.fromisoformat(params.get("date_to") or today.isoformat())
+        date_from = date.fromisoformat(
+            params.get("date_from") or (date_to - timedelta(days=DEFAULT_STATS_DAYS - 1)).isoformat()
+        )
+    except ValueError:
+        return None
+    return date_from, date_to
+
+
+def dashboard_stats(user, date_from, date_to, rep_id=None):
+    """
+    Panolar ve /api/stats/ için KPI'lar. Tarihe bağlı tüm sayılar DailyRollup'tan, bakiye ve
+    gecikme CustomerBalance defterinden okunur; ham hareket tablolarına sorgu atılmaz.
+    Temsilci yalnızca kendi sayılarını görür; yönetici rep_id ile tek temsilciye daraltabilir.
+    """
+    from .models import Customer, DailyRollup, ExpenseCategory, Material
+    from .payment_analysis import annotate_payment_status
+    from .reference_data import reference_list
+
+    if not user.is_superuser:
+        rep_id = user.pk
+    rollups = DailyRollup.objects.filter(date__gte=date_from, date__lte=date_to)
+    customers = Customer.objects.all()
+    if rep_id is not None:
+        rollups = rollups.filter(rep_id=rep_id)
+        customers = customers.filter(rep_id=rep_id)
+
+    totals = {}
+    for row in rollups.order_by().values("metric", "key").annotate(
+        count=Sum("count"), amount=Sum("amount", output_field=MONEY_FIELD), quantity=Sum("quantity"),
+    ):
+        totals.setdefault(row["metric"], {})[row["key"]] = row
+
+    def total(metric, field, keys=None):
+        rows = totals.get(metric, {})
+        values = [row[field] or 0 for key, row in rows.items() if keys is None or key in keys]
+        return sum(values, Decimal("0") if field == "amount" else 0)
+
+    def money(value):
+        return str(Decimal(value).quantize(Decimal("0.01")))
+
+    daily = [
+        {"date": row["date"], "amount": money(row["amount"] or 0), "count": row["count"]}
+        for row in rollups.filter(metric="payments").order_by("date").values("date").annotate(
+            amount=Sum("amount", output_field=MONEY_FIELD), count=Sum("count"),
+        )
+    ]
+
+    categories = {str(category.pk): category.name for category in reference_list(ExpenseCategory)}
+    expenses = sorted(
+        (
+            {"category_id": int(key), "category": categories.get(key, ""), "amount": money(row["amount"] or 0),
+             "count": row["count"]}
+            for key, row in totals.get("expenses", {}).items()
+        ),
+        key=lambda item: Decimal(item["amount"]), reverse=True,
+    )
+
+    complaint_count = total("complaints", "count")
+    resolved = total("complaints", "count", {"cozuldu"})
+
+    material_rows = totals.get("materials", {})
+    materials = dict(Material.objects.filter(pk__in=[int(key) for key in material_rows]).values_list("pk", "name"))
+
+    balance = annotate_payment_status(customers).aggregate(
+        outstanding=Sum("remaining", output_field=MONEY_FIELD),
+        late=Count("pk", filter=Q(is_late=True)),
+    )
+
+    return {
+        "date_from": date_from,
+        "date_to": date_to,
+        "rep": rep_id,
+        "revenue": {
+            "total": money(total("payments", "amount")),
+            "count": total("payments", "count"),
+            "daily": daily,
+        },
+        "outstanding_balance": money(balance["outstanding"] or 0),
+        "late_customers": balance["late"],
+        "expenses": {
+            "total": money(total("expenses", "amount")),
+            "by_category": expenses,
+        },
+        "complaints": {
+            "total": complaint_count,
+            "resolved": resolved,
+            "unresolved": total("complaints", "count", {"cozulemedi"}),
+            "pending": total("complaints", "count", {"beklemede"}),
+            "resolved_ratio": round(resolved / complaint_count, 4) if complaint_count else None,
+        },
+        "materials": {
+            "quantity": total("materials", "quantity"),
+            "count": total("materials", "count"),
+            "by_material": sorted(
+                (
+                    {"material_id": int(key), "material": materials.get(int(key), ""), "quantity": row["quantity"]}
+                    for key, row in material_rows.items()
+                ),
+                key=lambda item: item["quantity"], reverse=True,
+            ),
+        },
+        "extras": {
+            "active_count": total("extras", "count", {"active"}),
+            "active_amount": money(total("extras", "amount", {"active"})),
+            "canceled_count": total("extras", "count", {"canceled"}),
+        },
+    }
@@ -0,0 +1,15 @@
+# core/routers.py
+
+from rest_framework import routers
+
+
+class BulkRouter(routers.DefaultRouter):
+    """
+    DefaultRouter + liste adresinde PATCH -> bulk_partial_update eşlemesi.
+    Router yalnızca viewset'te bulunan action'ları bağladığından diğer viewset'ler etkilenmez.
+    """
+    routes = [
+        route._replace(mapping={**route.mapping, "patch": "bulk_partial_update"})
+        if route.name == "{basename}-list" else route
+        for route in routers.DefaultRouter.routes
+    ]
@@ -0,0 +1,291 @@
+# core/search.py
+
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.expressions import RawSQL
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+# Arama indeksine yazılan alanlar; view'lardaki "içerir" filtreleri bu alanlar için indeksten okunur
+SEARCH_FIELDS = {
+    "core.user": ("username", "first_name", "last_name"),
+    "core.customer": ("username", "first_name", "last_name"),
+    "core.vehicle": ("brand", "model", "chassis_no"),
+    "core.complaint": ("title",),
+    "core.request": ("name",),
+}
+
+# Kaydın sahibi temsilciyi veren alan (global aramada temsilci kapsamı için)
+SEARCH_OWNER_FIELDS = {
+    "core.user": "pk",
+    "core.customer": "rep_id",
+    "core.vehicle": "rep_id",
+    "core.complaint": "rep_id",
+    "core.request": "rep_id",
+}
+
+# Trigram indeksi en az 3 karakterlik aramalarda kullanılabilir
+MIN_TRIGRAM_LENGTH = 3
+
+FTS_TABLE = "core_searchentry_fts"
+
+# Arka uca özel indeks DDL'i: (oluşturma, kaldırma). 0017 migration'ı tarafından çalıştırılır.
+BACKEND_INDEX_SQL = {
+    "sqlite": (
+        [
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "value, content='core_searchentry', content_rowid='id', tokenize='trigram')",
+            f"CREATE TRIGGER core_searchentry_ai AFTER INSERT ON core_searchentry BEGIN "
+            f"INSERT INTO {FTS_TABLE}(rowid, value) VALUES (new.id, new.value); END",
+            f"CREATE TRIGGER core_searchentry_ad AFTER DELETE ON core_searchentry BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, value) VALUES ('delete', old.id, old.value); END",
+            f"CREATE TRIGGER core_searchentry_au AFTER UPDATE ON core_searchentry BEGIN "
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, value) VALUES ('delete', old.id, old.value); "
+            f"INSERT INTO {FTS_TABLE}(rowid, value) VALUES (new.id, new.value); END",
+        ],
+        [
+            "DROP TRIGGER IF EXISTS core_searchentry_ai",
+            "DROP TRIGGER IF EXISTS core_searchentry_ad",
+            "DROP TRIGGER IF EXISTS core_searchentry_au",
+            f"DROP TABLE IF EXISTS {FTS_TABLE}",
+        ],
+    ),
+    "postgresql": (
+        [
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+            "CREATE INDEX core_searchentry_value_trgm ON core_searchentry USING gin (value gin_trgm_ops)",
+        ],
+        [
+            "DROP INDEX IF EXISTS core_searchentry_value_trgm",
+        ],
+    ),
+}
+
+
+def fold_text(value):
+    """
+    Türkçe harfleri dikkate alan büyük/küçük harf katlama. İ/I/ı/i aynı harfe indirilir;
+    böylece "İSTANBUL", "Istanbul" ve "ıstanbul" aramaları birbirini bulur.
+    """
+    if value is None:
+        return ""
+    value = str(value).replace("İ", "i").replace("I", "i").replace("ı", "i")
+    return value.casefold()
+
+
+def model_label(model):
+    return model._meta.label_lower
+
+
+def search_values(instance):
+    # Kaydın indekse yazılacak (alan, katlanmış değer) çiftleri
+    fields = SEARCH_FIELDS.get(model_label(instance), ())
+    return [(field, fold_text(getattr(instance, field))) for field in fields]
+
+
+def search_owner(instance):
+    # Kaydın sahibi temsilcinin id'si (kullanıcı kayıtlarında kendisi)
+    attr = SEARCH_OWNER_FIELDS.get(model_label(instance))
+    return getattr(instance, attr) if attr else None
+
+
+def build_entries(entry_model, instances):
+    # Kayıtlar için kaydedilmemiş SearchEntry nesneleri (toplu doldurma için)
+    return [
+        entry_model(
+            model=model_label(instance), object_id=instance.pk, field=field, value=value,
+            owner_id=search_owner(instance),
+        )
+        for instance in instances
+        for field, value in search_values(instance)
+    ]
+
+
+def prefix_q(term):
+    # Değerin başında veya herhangi bir kelimenin başında eşleşme (yazarken arama için)
+    return Q(value__startswith=term) | Q(value__contains=" " + term)
+
+
+class LikeSearchBackend:
+    """
+    Yedek arka uç: katlanmış değer sütununda LIKE '%x%' araması.
+    Harici indeks gerektirmez, her veritabanında çalışır.
+    """
+
+    def entries(self, label, field):
+        from .models import SearchEntry
+
+        return SearchEntry.objects.filter(model=label, field=field)
+
+    def match(self, entries, term, prefix=False):
+        # term önceden fold_text ile katlanmış olmalı
+        if prefix:
+            return entries.filter(prefix_q(term))
+        return entries.filter(value__contains=term)
+
+    def matching_ids(self, label, field, term):
+        return self.match(self.entries(label, field), fold_text(term)).values("object_id")
+
+
+class SqliteFtsSearchBackend(LikeSearchBackend):
+    """
+    SQLite: core_searchentry_fts (FTS5, trigram tokenizer) sanal tablosu üzerinden alt dizi araması.
+    Sanal tablo 0017 migration'ında tetikleyicilerle core_searchentry'ye bağlanır.
+    """
+
+    def match(self, entries, term, prefix=False):
+        if len(term) < MIN_TRIGRAM_LENGTH:
+            return super().match(entries, term, prefix)
+        phrase = '"' + term.replace('"', '""') + '"'
+        fts_ids = RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [phrase])
+        entries = entries.filter(id__in=fts_ids)
+        # Önek araması FTS ile daraltılmış satırlarda yapılır
+        return entries.filter(prefix_q(term)) if prefix else entries
+
+
+class PostgresTrigramSearchBackend(LikeSearchBackend):
+    """
+    PostgreSQL: value sütunundaki pg_trgm GIN indeksi LIKE '%x%' sorgularını doğrudan karşılar,
+    bu yüzden sorgu yedek arka uçla aynıdır; fark migration'da oluşturulan indekstedir.
+    """
+
+
+BACKENDS = {
+    "sqlite": SqliteFtsSearchBackend,
+    "postgresql": PostgresTrigramSearchBackend,
+}
+
+_backend = None
+
+
+def get_search_backend():
+    # settings.SEARCH_BACKEND verilmişse o sınıf, yoksa veritabanına göre seçilen sınıf kullanılır
+    global _backend
+    if _backend is None:
+        path = getattr(settings, "SEARCH_BACKEND", None)
+        backend_class = import_string(path) if path else BACKENDS.get(connection.vendor, LikeSearchBackend)
+        _backend = backend_class()
+    return _backend
+
+
+def search_filter(queryset, lookup, term):
+    """
+    queryset.filter(<lookup>__icontains=term) yerine kullanılır. lookup ilişki içerebilir
+    (ör. "rep__username"); son alan SEARCH_FIELDS'ta yoksa normal icontains filtresine düşer.
+    """
+    *relations, field = lookup.split("__")
+    model = queryset.model
+    for name in relations:
+        model = model._meta.get_field(name).related_model
+
+    label = model_label(model)
+    if field not in SEARCH_FIELDS.get(label, ()):
+        return queryset.filter(**{f"{lookup}__icontains": term})
+
+    ids = get_search_backend().matching_ids(label, field, term)
+    prefix = "__".join(relations + ["pk"])
+    return queryset.filter(**{f"{prefix}__in": ids})
+
+
+# Global aramada dönen sonuç türleri
+GLOBAL_SEARCH_TYPES = {
+    "customer": "core.customer",
+    "complaint": "core.complaint",
+    "request": "core.request",
+    "vehicle": "core.vehicle",
+}
+
+# Sonuç türü -> (sonucun açılacağı liste sayfası (temsilci, yönetici), filtre parametresi, filtre alanı)
+GLOBAL_SEARCH_LINKS = {
+    "customer": (("list_customers_rep", "list_customers_admin"), ("username", "customer_username"), "username"),
+    "complaint": (("list_complaints_rep", "list_complaints_admin"), ("title", "title"), "title"),
+    "request": (("list_requests_rep", "list_requests_admin"), ("name", "name"), "name"),
+    "vehicle": (("list_vehicles_rep", "list_vehicles_admin"), ("chassis_no", "chassis_no"), "chassis_no"),
+}
+
+GLOBAL_SEARCH_MAX_LIMIT = 50
+
+
+def describe_result(kind, obj):
+    # Sonuç satırında gösterilecek başlık ve alt başlık
+    if kind == "customer":
+        return obj.username, f"{obj.first_name} {obj.last_name}"
+    if kind == "complaint":
+        return obj.title, f"{obj.customer.username} - {obj.get_status_display()}"
+    if kind == "request":
+        return obj.name, obj.customer.username
+    return f"{obj.brand} {obj.model}", obj.chassis_no
+
+
+def global_search(user, query, prefix=False, limit=20):
+    """
+    Müşteri, şikayet, istek ve araçlarda arama (tür başına tek sorgu). Eşleşmeler SearchEntry
+    indeksinden sıralanarak alınır: tam eşleşme > başta eşleşme > kelime başında eşleşme > içinde geçme.
+    Yönetici tüm kayıtları, temsilci yalnızca kendi kayıtlarını görür.
+    Dönen liste: [{"type", "id", "title", "subtitle", "url", "score"}, ...]
+    """
+    from django.apps import apps
+    from .models import SearchEntry
+
+    term = fold_text(query).strip()
+    if not term:
+        return []
+    limit = max(1, min(limit, GLOBAL_SEARCH_MAX_LIMIT))
+    kinds = {label: kind for kind, label in GLOBAL_SEARCH_TYPES.items()}
+
+    entries = SearchEntry.objects.all()
+    if not user.is_superuser:
+        entries = entries.filter(owner_id=user.pk)
+    entries = get_search_backend().match(entries, term, prefix=prefix)
+    entries = entries.annotate(
+        score=Case(
+            When(value=term, then=Value(4)),
+            When(value__startswith=term, then=Value(3)),
+            When(value__contains=" " + term, then=Value(2)),
+            default=Value(1),
+            output_field=IntegerField(),
+        )
+    ).order_by("-score", "-object_id").values_list("model", "object_id", "score")
+
+    # Tür başına ayrı sorgu: bir kayıt indekste alan sayısı kadar satırla eşleşebilir, bu yüzden
+    # her türden limit x alan sayısı satır o türün en iyi `limit` kaydını kesin olarak içerir
+    rows = []
+    for label in kinds:
+        rows += entries.filter(model=label)[:limit * len(SEARCH_FIELDS[label])]
+    rows.sort(key=lambda row: (-row[2], -row[1]))
+
+    # Bir kayıt birden fazla alanda eşleşebilir; en yüksek puanlı satırı tutuyoruz
+    ranked = {}
+    for label, object_id, score in rows:
+        ranked.setdefault((label, object_id), score)
+        if len(ranked) == limit:
+            break
+
+    # Kayıtları tür başına tek sorguyla yükle
+    ids_by_label = {}
+    for label, object_id in ranked:
+        ids_by_label.setdefault(label, []).append(object_id)
+    objects = {}
+    for label, ids in ids_by_label.items():
+        queryset = apps.get_model(label).objects.filter(pk__in=ids)
+        if kinds[label] in ("complaint", "request"):
+            queryset = queryset.select_related("customer")
+        objects.update({(label, obj.pk): obj for obj in queryset})
+
+    results = []
+    for key, score in ranked.items():
+        obj = objects.get(key)
+        if obj is None:
+            continue
+        kind = kinds[key[0]]
+        title, subtitle = describe_result(kind, obj)
+        url_names, params, field = GLOBAL_SEARCH_LINKS[kind]
+        index = 1 if user.is_superuser else 0
+        url = f"{reverse(url_names[index])}?{urlencode({params[index]: getattr(obj, field)})}"
+        results.append({
+            "type": kind, "id": obj.pk, "title": title, "subtitle": subtitle, "url": url, "score": score,
+        })
+    return results
@@ -1,19 +1,182 @@
 # core/serializers.py
 
+import copy
+
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import (
-    ExpenseCategory, Expense, ExpenseCategoryLog,
+    ExpenseCategory, Expense,
     SubscriptionType, SubscriptionDuration, PaymentType,
-    Customer, Employee, EmployeeTask, EmployeeDocument, EmployeeTaskLog,
+    Customer, Employee, EmployeeTask, EmployeeDocument,
     Material, MaterialTransaction, Payment, Complaint, Request, Vehicle,
-    SubscriptionExtra, SubscriptionExtraLog
+    SubscriptionExtra, CustomerBalance, DailyRollup, SearchEntry, ChangeLog,
+    StockError, AuditEntry
 )
+from . import audit
+from .reference_data import REFERENCE_MODELS, CachedPrimaryKeyRelatedField
+from .search import search_owner, search_values
+
+def parse_expand(value):
+    """
+    "customer,task.employee" -> {"customer": {}, "task": {"employee": {}}}
+    """
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for name in path.strip().split("."):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
+
+
+class DynamicFieldsModelSerializer(serializers.ModelSerializer):
+    """
+    ?fields= ve ?expand= desteği olan ModelSerializer.
+    - fields: yalnızca istenen alanlar döner (["id", "customer"] gibi).
+    - expand: expandable_fields içindeki ilişkiler iç içe serializer ile açılır;
+      açılmayan ilişkiler id olarak döner. İç içe açma "task.employee" şeklindedir.
+    Viewset tarafında optimize_queryset ile alanlar .only(), açılan ilişkiler select_related olur.
+    """
+    # ilişki alanı -> serializer sınıfı (açılacak serializer'lar bu sınıftan önce tanımlanır)
+    expandable_fields = {}
+    # Kaydın sahibi olan kullanıcı alanları (temsilci, harcamayı giren...). Temsilci yalnızca kendi
+    # kayıtlarını yazabilir ve sahibi kendisinden başkası yapamaz; boş bırakılırsa eklemede kendisi
+    # atanır. Yönetici sahibi serbestçe verir.
+    owner_fields = ()
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in self.owner_fields:
+            self.fields[name].required = False
+        for name, nested in (expand or {}).items():
+            serializer_class = self.get_expandable_serializer(name)
+            if serializer_class is not None:
+                self.fields[name] = serializer_class(read_only=True, expand=nested)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def get_expandable_serializer(cls, name):
+        return cls.expandable_fields.get(name)
+
+    @classmethod
+    def select_related_paths(cls, expand, prefix=""):
+        # expand ağacındaki açılabilir ilişkilerin select_related yolları
+        paths = []
+        for name, nested in expand.items():
+            serializer_class = cls.get_expandable_serializer(name)
+            if serializer_class is None:
+                continue
+            paths.append(prefix + name)
+            paths += serializer_class.select_related_paths(nested, prefix=f"{prefix}{name}__")
+        return paths
+
+    @classmethod
+    def optimize_queryset(cls, queryset, fields=None, expand=None):
+        """
+        Queryset değerlendirilmeden önce: açılan ilişkiler select_related ile tek sorguda gelir,
+        fields verilmişse sadece o kolonlar SELECT edilir.
+        """
+        expand = expand or {}
+        related = cls.select_related_paths(expand)
+        if related:
+            queryset = queryset.select_related(*related)
+        if fields:
+            concrete = {field.name for field in cls.Meta.model._meta.concrete_fields}
+            only = ["id"] + [name for name in fields if name in concrete]
+            # Açılan ilişkinin yabancı anahtarı ertelenemez
+            only += [name for name in expand if name in concrete and name not in only]
+            queryset = queryset.only(*only)
+        return queryset
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        request = self.context.get("request")
+        user = getattr(request, "user", None)
+        if not self.owner_fields or user is None or not user.is_authenticated:
+            return attrs
+        errors = {}
+        for name in self.owner_fields:
+            if self.instance is not None and not user.is_superuser and getattr(self.instance, f"{name}_id") != user.pk:
+                errors[name] = ["Başka bir kullanıcıya ait kayıt değiştirilemez."]
+            elif name not in attrs:
+                if self.instance is None:
+                    attrs[name] = user
+            elif not user.is_superuser and getattr(attrs[name], "pk", None) != user.pk:
+                errors[name] = ["Kayıt yalnızca kendi adınıza yazılabilir."]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def build_relational_field(self, field_name, relation_info):
+        # Referans tablolara (abonelik türü, ödeme tipi, harcama kategorisi...) giden ilişkiler önbellekten doğrulanır
+        field_class, field_kwargs = super().build_relational_field(field_name, relation_info)
+        if field_class is serializers.PrimaryKeyRelatedField and relation_info.related_model._meta.label in REFERENCE_MODELS:
+            field_class = CachedPrimaryKeyRelatedField
+        return field_class, field_kwargs
+
+    def before_bulk_write(self, instances, previous=None):
+        """
+        BulkListSerializer yazmadan hemen önce (aynı transaction içinde) çağrılır; kayıtlara
+        yazmadan önce hesaplanan alanlar burada doldurulur. Dönüş: güncellemede ayrıca yazılacak alanlar.
+        """
+        return ()
+
+    def after_bulk_write(self, instances, previous=None):
+        """
+        BulkListSerializer yazdıktan sonra (aynı transaction içinde) çağrılır. bulk_create/bulk_update
+        model save() çalıştırmadığından, save()'in yan kayıtları burada toplu yazılır.
+        previous: güncellemede kayıtların değişiklik öncesi kopyaları, eklemede None.
+        Varsayılan: günlük özeti olan modellerde (bkz. core/rollups.py) ilgili dilimler yenilenir,
+        senkronize edilen modellerde (bkz. core/sync.py) değişiklik günlüğü, denetlenen modellerde
+        (bkz. core/audit.py) denetim girdisi yazılır.
+        """
+        DailyRollup.objects.refresh_many(instances + (previous or []))
+        ChangeLog.objects.record_many(instances, previous)
+        audit.record_bulk(instances, previous)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    many=True ile toplu yazma: create tek bulk_create, update tek bulk_update sorgusu atar.
+    Güncellemede instance, istek gövdesiyle aynı sıradaki kayıt listesidir; her öğe "id"si
+    ile eşleşen kayda karşı (partial) doğrulanır. Transaction'ı viewset açar.
+    """
+
+    def run_child_validation(self, data):
+        if self.instance is not None:
+            instances = {str(instance.pk): instance for instance in self.instance}
+            self.child.instance = instances.get(str(data.get("id"))) if isinstance(data, dict) else None
+        return super().run_child_validation(data)
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        instances = [model(**attrs) for attrs in validated_data]
+        self.child.before_bulk_write(instances)
+        instances = model.objects.bulk_create(instances)
+        self.child.after_bulk_write(instances)
+        return instances
+
+    def update(self, instances, validated_data):
+        model = self.child.Meta.model
+        previous = [copy.copy(instance) for instance in instances]
+        fields = set()
+        for instance, attrs in zip(instances, validated_data):
+            for name, value in attrs.items():
+                setattr(instance, name, value)
+                fields.add(name)
+        if fields:
+            fields.update(self.child.before_bulk_write(instances, previous))
+            model.objects.bulk_update(instances, sorted(fields))
+        self.child.after_bulk_write(instances, previous)
+        return instances
+
 
 # 1) Custom User Serializer
 User = get_user_model()
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = User
         # İhtiyaç duyduğun alanları buraya ekle
@@ -24,67 +187,69 @@ class UserSerializer(serializers.ModelSerializer):
 
 
 # 2) ExpenseCategory Serializer
-class ExpenseCategorySerializer(serializers.ModelSerializer):
+class ExpenseCategorySerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = ExpenseCategory
         fields = '__all__'
 
 
 # 3) Expense Serializer
-class ExpenseSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
-    # Eğer istersen user'ı ID olarak POST edebilmek için `user = serializers.PrimaryKeyRelatedField(queryset=User.objects.all())` vs. yapabilirsin.
+class ExpenseSerializer(DynamicFieldsModelSerializer):
+    # user ve category varsayılan olarak id döner; ?expand=user,category ile açılır.
+    expandable_fields = {"user": UserSerializer, "category": ExpenseCategorySerializer}
+    owner_fields = ("user",)
 
     class Meta:
         model = Expense
         fields = '__all__'
-
-
-# 4) ExpenseCategoryLog Serializer
-class ExpenseCategoryLogSerializer(serializers.ModelSerializer):
-    performed_by = UserSerializer(read_only=True)
-    
-    class Meta:
-        model = ExpenseCategoryLog
-        fields = '__all__'
+        list_serializer_class = BulkListSerializer
 
 
 # 5) SubscriptionType Serializer
-class SubscriptionTypeSerializer(serializers.ModelSerializer):
+class SubscriptionTypeSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = SubscriptionType
         fields = '__all__'
 
 
 # 6) SubscriptionDuration Serializer
-class SubscriptionDurationSerializer(serializers.ModelSerializer):
+class SubscriptionDurationSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = SubscriptionDuration
         fields = '__all__'
 
 
 # 7) PaymentType Serializer
-class PaymentTypeSerializer(serializers.ModelSerializer):
+class PaymentTypeSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = PaymentType
         fields = '__all__'
 
 User = get_user_model()
 # 8) Customer Serializer
-class CustomerSerializer(serializers.ModelSerializer):
+class CustomerSerializer(DynamicFieldsModelSerializer):
     # Giriş yapan kullanıcıyı rep alanı için yazılabilir hale getirmeden default olarak doldurabilirsiniz.
     rep = serializers.PrimaryKeyRelatedField(queryset=User.objects.all(), required=False)
     
     # Yazılabilir alanlar olarak tanımlıyoruz:
-    subscription_type = serializers.PrimaryKeyRelatedField(
+    # Referans tablolar; id doğrulaması önbellekten yapılır (bkz. core/reference_data.py)
+    subscription_type = CachedPrimaryKeyRelatedField(
         queryset=SubscriptionType.objects.all(), allow_null=True
     )
-    subscription_duration = serializers.PrimaryKeyRelatedField(
+    subscription_duration = CachedPrimaryKeyRelatedField(
         queryset=SubscriptionDuration.objects.all(), allow_null=True
     )
-    payment_type = serializers.PrimaryKeyRelatedField(
+    payment_type = CachedPrimaryKeyRelatedField(
         queryset=PaymentType.objects.all(), allow_null=True
     )
+
+    expandable_fields = {
+        "rep": UserSerializer,
+        "subscription_type": SubscriptionTypeSerializer,
+        "subscription_duration": SubscriptionDurationSerializer,
+        "payment_type": PaymentTypeSerializer,
+    }
+    owner_fields = ("rep",)
     
     class Meta:
         model = Customer
@@ -104,92 +269,148 @@ class CustomerSerializer(serializers.ModelSerializer):
 
 
 # 9) Employee Serializer
-class EmployeeSerializer(serializers.ModelSerializer):
+class EmployeeSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Employee
         fields = '__all__'
 
 
 # 10) EmployeeTask Serializer
-class EmployeeTaskSerializer(serializers.ModelSerializer):
-    employee = EmployeeSerializer(read_only=True)
-    assigned_by = UserSerializer(read_only=True)
-    
+class EmployeeTaskSerializer(DynamicFieldsModelSerializer):
+    expandable_fields = {"employee": EmployeeSerializer, "assigned_by": UserSerializer}
+    owner_fields = ("assigned_by",)
+
     class Meta:
         model = EmployeeTask
         fields = '__all__'
 
 
 # 11) EmployeeDocument Serializer
-class EmployeeDocumentSerializer(serializers.ModelSerializer):
-    employee = EmployeeSerializer(read_only=True)
-    uploaded_by = UserSerializer(read_only=True)
-    
-    class Meta:
-        model = EmployeeDocument
-        fields = '__all__'
-
-
-# 12) EmployeeTaskLog Serializer
-class EmployeeTaskLogSerializer(serializers.ModelSerializer):
-    task = EmployeeTaskSerializer(read_only=True)
-    performed_by = UserSerializer(read_only=True)
+class EmployeeDocumentSerializer(DynamicFieldsModelSerializer):
+    expandable_fields = {"employee": EmployeeSerializer, "uploaded_by": UserSerializer}
+    owner_fields = ("uploaded_by",)
 
     class Meta:
-        model = EmployeeTaskLog
+        model = EmployeeDocument
         fields = '__all__'
+        # Dosya kaydedilirken doldurulur (core/media.py)
+        read_only_fields = ("original_name", "sha256", "size", "thumbnail")
 
 
 # 13) Material Serializer
-class MaterialSerializer(serializers.ModelSerializer):
+class MaterialSerializer(DynamicFieldsModelSerializer):
     class Meta:
         model = Material
         fields = '__all__'
 
 
 # 14) MaterialTransaction Serializer
-class MaterialTransactionSerializer(serializers.ModelSerializer):
-    material = MaterialSerializer(read_only=True)
-    rep = UserSerializer(read_only=True)
-    # customer = CustomerSerializer(read_only=True)
-    
+class MaterialTransactionSerializer(DynamicFieldsModelSerializer):
+    expandable_fields = {
+        "material": MaterialSerializer,
+        "rep": UserSerializer,
+        "customer": CustomerSerializer,
+    }
+    owner_fields = ("rep",)
+
     class Meta:
         model = MaterialTransaction
         fields = '__all__'
+        read_only_fields = ['stock_after']
+        list_serializer_class = BulkListSerializer
+
+    def create(self, validated_data):
+        try:
+            return super().create(validated_data)
+        except StockError as exc:
+            raise serializers.ValidationError({"quantity": exc.messages})
+
+    def update(self, instance, validated_data):
+        try:
+            return super().update(instance, validated_data)
+        except StockError as exc:
+            raise serializers.ValidationError({"quantity": exc.messages})
+
+    def before_bulk_write(self, instances, previous=None):
+        # Toplu yazmada stok tek seferde düşülür; stok yetmeyen öğeler öğe sırasıyla raporlanır
+        owners, movements = [], []
+        for index, instance in enumerate(instances):
+            for movement in instance.stock_movements(previous[index] if previous else None):
+                owners.append(index)
+                movements.append(movement)
+        if not movements:
+            return ()
+        try:
+            stock_after = Material.objects.apply_movements(movements)
+        except StockError as exc:
+            raise serializers.ValidationError({
+                owners[position]: {"quantity": [message]} for position, message in exc.by_index.items()
+            })
+        for index, value in zip(owners, stock_after):
+            instances[index].stock_after = value
+        return ("stock_after",)
 
 
 # 15) Payment Serializer
-class PaymentSerializer(serializers.ModelSerializer):
-    customer = CustomerSerializer(read_only=True)
+class PaymentSerializer(DynamicFieldsModelSerializer):
+    expandable_fields = {"customer": CustomerSerializer}
 
     class Meta:
         model = Payment
         fields = '__all__'
+        list_serializer_class = BulkListSerializer
+
+    def validate_customer(self, customer):
+        # Ödemenin sahibi müşterinin temsilcisidir; temsilci yalnızca kendi müşterisine ödeme yazabilir
+        user = getattr(self.context.get("request"), "user", None)
+        if user is not None and user.is_authenticated and not user.is_superuser and customer.rep_id != user.pk:
+            raise serializers.ValidationError("Ödeme yalnızca kendi müşterinize yazılabilir.")
+        return customer
+
+    def after_bulk_write(self, instances, previous=None):
+        # Ödemenin müşterisi değiştiyse eski müşterinin bakiyesi de yeniden hesaplanır
+        customer_ids = {payment.customer_id for payment in instances + (previous or [])}
+        CustomerBalance.objects.refresh_many(customer_ids)
+        super().after_bulk_write(instances, previous)
 
 
 # 16) Complaint Serializer
-class ComplaintSerializer(serializers.ModelSerializer):
-    rep = UserSerializer(read_only=True)
-    customer = CustomerSerializer(read_only=True)
-    
+class ComplaintSerializer(DynamicFieldsModelSerializer):
+    expandable_fields = {"rep": UserSerializer, "customer": CustomerSerializer}
+    owner_fields = ("rep",)
+
     class Meta:
         model = Complaint
         fields = '__all__'
+        list_serializer_class = BulkListSerializer
+
+    def after_bulk_write(self, instances, previous=None):
+        super().after_bulk_write(instances, previous)
+        if previous is None:
+            SearchEntry.objects.add_many(instances)
+            return
+        # Yalnızca başlığı veya temsilcisi değişen şikayetlerin indeks satırları yeniden yazılır
+        changed = [
+            complaint for complaint, old in zip(instances, previous)
+            if search_values(complaint) != search_values(old) or search_owner(complaint) != search_owner(old)
+        ]
+        SearchEntry.objects.replace_many(changed)
 
 
 # 17) Request Serializer
-class RequestSerializer(serializers.ModelSerializer):
-    rep = UserSerializer(read_only=True)
-    customer = CustomerSerializer(read_only=True)
-    
+class RequestSerializer(DynamicFieldsModelSerializer):
+    expandable_fields = {"rep": UserSerializer, "customer": CustomerSerializer}
+    owner_fields = ("rep",)
+
     class Meta:
         model = Request
         fields = '__all__'
 
 
 # 18) Vehicle Serializer
-class VehicleSerializer(serializers.ModelSerializer):
-    rep = UserSerializer(read_only=True)
+class VehicleSerializer(DynamicFieldsModelSerializer):
+    expandable_fields = {"rep": UserSerializer}
+    owner_fields = ("rep",)
 
     class Meta:
         model = Vehicle
@@ -197,20 +418,19 @@ class VehicleSerializer(serializers.ModelSerializer):
 
 
 # 19) SubscriptionExtra Serializer
-class SubscriptionExtraSerializer(serializers.ModelSerializer):
-    rep = UserSerializer(read_only=True)
-    customer = CustomerSerializer(read_only=True)
+class SubscriptionExtraSerializer(DynamicFieldsModelSerializer):
+    expandable_fields = {"rep": UserSerializer, "customer": CustomerSerializer}
+    owner_fields = ("rep",)
 
     class Meta:
         model = SubscriptionExtra
         fields = '__all__'
 
 
-# 20) SubscriptionExtraLog Serializer
-class SubscriptionExtraLogSerializer(serializers.ModelSerializer):
-    extra = SubscriptionExtraSerializer(read_only=True)
-    performed_by = UserSerializer(read_only=True)
+# 20) AuditEntry Serializer (salt okunur, bkz. core/audit.py)
+class AuditEntrySerializer(DynamicFieldsModelSerializer):
+    expandable_fields = {"actor": UserSerializer}
 
     class Meta:
-        model = SubscriptionExtraLog
+        model = AuditEntry
         fields = '__all__'
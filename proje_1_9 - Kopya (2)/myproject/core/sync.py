@@ -0,0 +1,322 @@
+# core/sync.py
+
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.apps import apps
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .rollups import resolve_rep_ids
+
+# Tek senkronizasyon yanıtındaki en fazla değişiklik (?limit= ile küçültülebilir)
+SYNC_PAGE_SIZE = 500
+SYNC_MAX_PAGE_SIZE = 2000
+
+# Çevrimdışı kuyruktan tek istekte gönderilebilecek en fazla işlem
+PUSH_MAX_OPERATIONS = 500
+
+# ChangeLog satırlarını ekleyen kısa PostgreSQL transaction'larının sıraya girdiği advisory lock anahtarı
+CHANGELOG_LOCK_KEY = 0x53594E43
+
+
+class SyncSource:
+    """
+    Mobil istemciye artımlı gönderilen bir tablo.
+    rep_path: kaydın sahibi temsilciye giden yol ("rep", "user", "customer__rep");
+    None ise tablo referans verisidir ve herkese gönderilir.
+    """
+
+    def __init__(self, label, rep_path, serializer_name):
+        self.label = label
+        self.rep_path = rep_path
+        self.serializer_name = serializer_name
+
+    def model(self):
+        return apps.get_model(self.label)
+
+    def serializer_class(self):
+        from . import serializers
+
+        return getattr(serializers, self.serializer_name)
+
+    def owner_ids(self, instances):
+        if self.rep_path is None:
+            return [None] * len(instances)
+        return resolve_rep_ids(self.model(), self.rep_path, instances)
+
+
+# koleksiyon adı -> kaynak. ChangeLog.collection değerleri ve yanıttaki anahtarlar bunlardır.
+SYNC_SOURCES = {
+    "customers": SyncSource("core.Customer", "rep", "CustomerSerializer"),
+    "payments": SyncSource("core.Payment", "customer__rep", "PaymentSerializer"),
+    "complaints": SyncSource("core.Complaint", "rep", "ComplaintSerializer"),
+    "expenses": SyncSource("core.Expense", "user", "ExpenseSerializer"),
+    "expense_categories": SyncSource("core.ExpenseCategory", None, "ExpenseCategorySerializer"),
+    "subscription_types": SyncSource("core.SubscriptionType", None, "SubscriptionTypeSerializer"),
+    "subscription_durations": SyncSource("core.SubscriptionDuration", None, "SubscriptionDurationSerializer"),
+    "payment_types": SyncSource("core.PaymentType", None, "PaymentTypeSerializer"),
+}
+
+COLLECTION_BY_MODEL = {source.label.lower(): collection for collection, source in SYNC_SOURCES.items()}
+
+# Mobil uygulamanın çevrimdışıyken oluşturup kuyruğa alabildiği koleksiyonlar
+PUSH_COLLECTIONS = ("customers", "payments", "complaints", "expenses")
+
+
+def tombstone_age():
+    # Silme kayıtlarının saklandığı süre; bundan eski token'lar tam senkronizasyona döner
+    return timedelta(days=getattr(settings, "SYNC_TOMBSTONE_DAYS", 30))
+
+
+def owned(instances):
+    """Senkronize edilen kayıtlar için [(koleksiyon, kayıt, sahip id)]; diğer modeller atlanır."""
+    by_collection = {}
+    for instance in instances:
+        collection = COLLECTION_BY_MODEL.get(instance._meta.label_lower)
+        if collection is not None:
+            by_collection.setdefault(collection, []).append(instance)
+    return [
+        (collection, instance, owner_id)
+        for collection, items in by_collection.items()
+        for instance, owner_id in zip(items, SYNC_SOURCES[collection].owner_ids(items))
+    ]
+
+
+def change_entries(log_model, instances, previous=None, deleted=False, previous_owner_id=None):
+    """
+    Kaydedilmemiş ChangeLog satırları. Güncellemede previous (kayıtların eski hali) ya da
+    previous_owner_id verilirse sahibi değişen kayıtlar için eski sahibe silme satırı da eklenir;
+    eski sahibin istemcisi kaydı böylece yerel veritabanından düşer.
+    """
+    current = owned(instances)
+    keys = {(collection, instance.pk, owner_id) for collection, instance, owner_id in current}
+    if previous_owner_id is not None:
+        old = [(collection, instance, previous_owner_id) for collection, instance, _ in current]
+    else:
+        old = owned(previous or [])
+    # Silme satırları önce yazılır: aynı kaydın yeni sahibine giden satırın id'si daha büyük olur
+    tombstones = [
+        log_model(collection=collection, object_id=instance.pk, owner_id=owner_id, deleted=True)
+        for collection, instance, owner_id in old
+        if (collection, instance.pk, owner_id) not in keys
+    ]
+    return tombstones + [
+        log_model(collection=collection, object_id=instance.pk, owner_id=owner_id, deleted=deleted)
+        for collection, instance, owner_id in current
+    ]
+
+
+def lock_changelog(using):
+    """
+    ChangeLogManager.insert içinden, satırlar eklenmeden önce. PostgreSQL'de transaction sonuna kadar
+    tutulan kilit alınır: günlük satırları id alıp commit edene kadar sırayla eklenir, böylece id
+    sırası commit sırasıyla aynı olur. Kilit olmasa id N'yi alan açık bir transaction commit etmeden
+    N+1'i yazan transaction commit edebilir; istemci N+1'li token'ı alır ve N'yi hiç görmez.
+    Kilit yalnızca satırları ekleyen kısa transaction'da tutulur; satırlar iş transaction'ı commit
+    edildikten sonra eklendiği (on_commit) için iş transaction'ları birbirini beklemez. Commit ile
+    ekleme arasında süreç ölürse o değişiklik günlüğe düşmez; kayıt bir sonraki değişikliğinde ya da
+    tam senkronizasyonda istemciye gider. SQLite yazarları zaten tek tek işlediği için orada satırlar
+    iş transaction'ı içinde eklenir ve kilit alınmaz.
+    """
+    connection = connections[using]
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [CHANGELOG_LOCK_KEY])
+
+
+def make_token(change_id, issued_at):
+    return f"{change_id}.{int(issued_at.timestamp())}"
+
+
+def parse_token(token):
+    """
+    "<son ChangeLog id>.<unix zamanı>" -> (id, datetime). Zaman, istemcinin o id'ye kadar
+    tüm değişiklikleri aldığı andır; silme kayıtları budansa bile bu andan sonrakiler durur.
+    """
+    try:
+        change_id, issued = (int(part) for part in token.split("."))
+        # Aralık dışı zaman damgası platforma göre OverflowError, OSError ya da ValueError verir
+        issued_at = datetime.fromtimestamp(issued, tz=dt_timezone.utc)
+    except (OverflowError, OSError, ValueError):
+        raise ValueError("Geçersiz senkronizasyon token'ı.")
+    if change_id < 0:
+        raise ValueError("Geçersiz senkronizasyon token'ı.")
+    return change_id, issued_at
+
+
+def sync_changes(user, token=None, limit=SYNC_PAGE_SIZE):
+    """
+    GET /api/sync/ yanıtı: token'dan sonra eklenen, değişen ve silinen kayıtlar.
+    Token yoksa ya da silme kayıtlarının saklama süresinden eskiyse tam senkronizasyon yapılır
+    (reset=True: istemci yerel verisini silip yanıtı baştan uygular). has_more=True ise istemci
+    dönen token ile hemen tekrar ister. Temsilci kendi kayıtlarını ve referans tablolarını görür.
+    Görünen satırlar id sırasıyla kesintisizdir (bkz. lock_changelog); token'dan küçük id'li
+    bir satır sonradan commit edilmez.
+    """
+    from .models import ChangeLog
+
+    now = timezone.now()
+    since, issued_at = 0, now
+    reset = not token
+    if token:
+        since, issued_at = parse_token(token)
+        if issued_at < now - tombstone_age():
+            since, issued_at, reset = 0, now, True
+
+    entries = ChangeLog.objects.filter(id__gt=since)
+    if not user.is_superuser:
+        entries = entries.filter(Q(owner_id=user.pk) | Q(owner_id__isnull=True))
+    if since == 0:
+        # Tam senkronizasyonda istemcide silinecek bir şey yoktur
+        entries = entries.filter(deleted=False)
+    entries = list(entries.order_by("id")[:limit + 1])
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+
+    # Sayfada aynı kaydın birden fazla satırı varsa (yönetici eski sahibin silme satırını da görür) sonuncusu geçerlidir
+    latest = {}
+    for entry in entries:
+        latest[(entry.collection, entry.object_id)] = entry
+
+    changes = {}
+    updated_ids = {}
+    for (collection, object_id), entry in latest.items():
+        if entry.deleted:
+            changes.setdefault(collection, {"updated": [], "deleted": []})["deleted"].append(object_id)
+        else:
+            updated_ids.setdefault(collection, []).append(object_id)
+
+    for collection, ids in updated_ids.items():
+        source = SYNC_SOURCES[collection]
+        serializer_class = source.serializer_class()
+        objects = list(serializer_class.optimize_queryset(
+            source.model()._default_manager.filter(pk__in=ids).order_by("pk")
+        ))
+        result = changes.setdefault(collection, {"updated": [], "deleted": []})
+        result["updated"] = serializer_class(objects, many=True).data
+        # Günlükte olup tabloda bulunmayan kayıt bu arada silinmiştir
+        result["deleted"] += sorted(set(ids) - {obj.pk for obj in objects})
+
+    for result in changes.values():
+        result["deleted"].sort()
+
+    return {
+        "token": make_token(entries[-1].id if entries else since, issued_at if has_more else now),
+        "reset": reset,
+        "has_more": has_more,
+        "changes": changes,
+    }
+
+
+def parse_client_id(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def client_references(data):
+    # {"customer": {"client_id": "..."}}: aynı kuyrukta daha önce oluşturulmuş kayda bağlantı
+    return {
+        name: value["client_id"]
+        for name, value in data.items()
+        if isinstance(value, dict) and set(value) == {"client_id"}
+    }
+
+
+def push_operations(request, operations):
+    """
+    POST /api/sync/push/ gövdesindeki işlemleri sırayla uygular ve işlem başına sonuç döner.
+    Her işlem: {"client_id": UUID, "collection": "customers"|..., "data": {...}}. İşlemler kendi
+    savepoint'lerinde yazılır; biri hatalıysa diğerleri yine kaydedilir. client_id daha önce
+    uygulanmışsa kayıt yeniden oluşturulmaz ("duplicate"), ilk seferki kayıt döner.
+    data içinde {"client_id": ...} değeri, o işlemle oluşturulan kaydın id'sine çevrilir.
+    """
+    from .models import ClientOperation
+
+    client_ids = set()
+    for operation in operations:
+        if isinstance(operation, dict):
+            client_ids.add(parse_client_id(operation.get("client_id")))
+            if isinstance(operation.get("data"), dict):
+                client_ids.update(parse_client_id(value) for value in client_references(operation["data"]).values())
+    client_ids.discard(None)
+    applied = {
+        op.client_id: op
+        for op in ClientOperation.objects.filter(user=request.user, client_id__in=client_ids)
+    }
+    return [apply_operation(request, operation, applied) for operation in operations]
+
+
+def operation_error(operation, errors):
+    client_id = operation.get("client_id") if isinstance(operation, dict) else None
+    return {"client_id": client_id, "status": "error", "errors": errors}
+
+
+def applied_result(client_id, op):
+    source = SYNC_SOURCES[op.collection]
+    instance = source.model()._default_manager.filter(pk=op.object_id).first()
+    record = source.serializer_class()(instance).data if instance is not None else None
+    return {"client_id": str(client_id), "status": "duplicate", "id": op.object_id, "record": record}
+
+
+def apply_operation(request, operation, applied):
+    from .models import ClientOperation
+
+    user = request.user
+    if not isinstance(operation, dict):
+        return operation_error(operation, {"non_field_errors": ["İşlem bir nesne olmalı."]})
+    client_id = parse_client_id(operation.get("client_id"))
+    if client_id is None:
+        return operation_error(operation, {"client_id": ["Geçerli bir UUID olmalı."]})
+    if client_id in applied:
+        return applied_result(client_id, applied[client_id])
+    collection = operation.get("collection")
+    if collection not in PUSH_COLLECTIONS:
+        return operation_error(operation, {"collection": ["Bilinmeyen koleksiyon."]})
+    if not isinstance(operation.get("data"), dict):
+        return operation_error(operation, {"data": ["Kayıt alanları bir nesne olmalı."]})
+
+    data = dict(operation["data"])
+    errors = {}
+    for name, reference in client_references(data).items():
+        op = applied.get(parse_client_id(reference))
+        if op is None:
+            errors[name] = ["Bağlı kayıt bulunamadı ya da oluşturulamadı."]
+        else:
+            data[name] = op.object_id
+    if errors:
+        return operation_error(operation, errors)
+
+    # Temsilci kaydı yalnızca kendi adına açar; yönetici sahibi verebilir (varsayılan kendisi)
+    source = SYNC_SOURCES[collection]
+    if "__" not in source.rep_path:
+        if user.is_superuser:
+            data.setdefault(source.rep_path, user.pk)
+        else:
+            data[source.rep_path] = user.pk
+    serializer = source.serializer_class()(data=data, context={"request": request})
+    if not serializer.is_valid():
+        return operation_error(operation, serializer.errors)
+    customer = serializer.validated_data.get("customer")
+    if customer is not None and not user.is_superuser and customer.rep_id != user.pk:
+        return operation_error(operation, {"customer": ["Bu müşteri size ait değil."]})
+
+    try:
+        with transaction.atomic():
+            instance = serializer.save()
+            op = ClientOperation.objects.create(
+                user=user, client_id=client_id, collection=collection, object_id=instance.pk,
+            )
+    except IntegrityError:
+        # Aynı kuyruk eşzamanlı iki istekle gönderildiyse diğeri önce yazmıştır
+        op = ClientOperation.objects.filter(user=user, client_id=client_id).first()
+        if op is None:
+            raise
+        applied[client_id] = op
+        return applied_result(client_id, op)
+    applied[client_id] = op
+    return {"client_id": str(client_id), "status": "created", "id": instance.pk, "record": serializer.data}
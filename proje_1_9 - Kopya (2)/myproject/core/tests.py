@@ -1,3 +1,2168 @@
-from django.test import TestCase
+import re
+import warnings
+from datetime import date
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection, connections
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import (
+    User, ExpenseCategory, Expense,
+    SubscriptionType, SubscriptionDuration, PaymentType,
+    Customer, Employee, EmployeeTask, EmployeeDocument,
+    Material, MaterialTransaction, Payment, Complaint, Request, Vehicle,
+    SubscriptionExtra, SearchEntry, DailyRollup, ChangeLog, ClientOperation, AuditEntry
+)
+from .search import fold_text, search_filter
+
+# myproject/urls.py içindeki router'a kayıtlı tüm liste endpoint'leri
+API_LIST_ENDPOINTS = [
+    'users', 'expense-categories', 'expenses',
+    'subscription-types', 'subscription-durations', 'payment-types', 'customers',
+    'employees', 'employee-tasks', 'employee-documents',
+    'materials', 'material-transactions', 'payments', 'complaints', 'requests',
+    'vehicles', 'subscription-extras', 'audit-entries',
+]
+
+# ?expand= ile tüm ilişkileri (iç içe) açan parametreler
+API_FULL_EXPAND = {
+    'expenses': 'user,category',
+    'customers': 'rep,subscription_type,subscription_duration,payment_type',
+    'employee-tasks': 'employee,assigned_by',
+    'employee-documents': 'employee,uploaded_by',
+    'material-transactions': 'material,rep,customer.rep',
+    'payments': 'customer.rep,customer.subscription_type',
+    'complaints': 'rep,customer',
+    'requests': 'rep,customer',
+    'vehicles': 'rep',
+    'subscription-extras': 'rep,customer',
+    'audit-entries': 'actor',
+}
+
+
+def make_rows(counter, count):
+    # Her modelden, ilişkileri farklı satırlara işaret eden count adet kayıt oluşturur
+    for _ in range(count):
+        counter += 1
+        n = counter
+        rep = User.objects.create_user(f'temsilci{n}', password='sifre', level=2)
+        category = ExpenseCategory.objects.create(name=f'Kategori {n}')
+        Expense.objects.create(user=rep, category=category, amount=10)
+        AuditEntry.objects.create(model='core.expensecategory', object_id=category.pk, action='update',
+                                  actor=rep, timestamp=timezone.now())
+        subscription_type = SubscriptionType.objects.create(name=f'Tür {n}')
+        duration = SubscriptionDuration.objects.create(name='6 Ay')
+        payment_type = PaymentType.objects.create(name=f'Ödeme {n}')
+        customer = Customer.objects.create(
+            rep=rep, username=f'musteri{n}', first_name='Ad', last_name='Soyad', address='Adres',
+            subscription_type=subscription_type, subscription_duration=duration,
+            subscription_start_date=date(2025, 1, 1), payment_type=payment_type,
+            amount=600, agreement_status='olumlu',
+        )
+        employee = Employee.objects.create(first_name='Çalışan', last_name=str(n), salary=1000, department='Saha')
+        EmployeeTask.objects.create(employee=employee, task_description='Görev', assigned_by=rep)
+        EmployeeDocument.objects.create(
+            employee=employee, document_name='Sağlık Belgesi', file=f'employee_documents/{n}.pdf', uploaded_by=rep
+        )
+        material = Material.objects.create(name=f'Malzeme {n}', price=5, quantity=100)
+        MaterialTransaction.objects.create(material=material, rep=rep, customer=customer, quantity=1)
+        Payment.objects.create(customer=customer, paid_amount=100)
+        Complaint.objects.create(rep=rep, customer=customer, title='Şikayet', description='Açıklama')
+        Request.objects.create(rep=rep, customer=customer, name='İstek')
+        Vehicle.objects.create(
+            rep=rep, brand='Marka', model='Model', chassis_no=f'SASI{n}', maintenance_price=100,
+            last_maintenance_date=date(2025, 1, 1), estimated_maintenance_date=date(2025, 6, 1),
+        )
+        SubscriptionExtra.objects.create(rep=rep, customer=customer, name='Ekstra', price=50)
+    return counter
+
+
+class ApiListQueryCountTests(TestCase):
+    """
+    Liste endpoint'leri satır sayısından bağımsız olarak sabit sayıda sorgu atmalı (N+1 yok).
+    Her endpoint önce az, sonra çok kayıtla çağrılır ve sorgu sayıları karşılaştırılır.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('yonetici', 'yonetici@example.com', 'sifre')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.counter = 0
+
+    def make_rows(self, count):
+        self.counter = make_rows(self.counter, count)
+
+    def count_queries(self, endpoint, query=''):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/{endpoint}/{query}')
+        self.assertEqual(response.status_code, 200, endpoint)
+        return len(queries)
+
+    def test_list_endpoints_use_constant_query_count(self):
+        self.make_rows(2)
+        few = {endpoint: self.count_queries(endpoint) for endpoint in API_LIST_ENDPOINTS}
+        self.make_rows(8)
+        for endpoint in API_LIST_ENDPOINTS:
+            with self.subTest(endpoint=endpoint):
+                self.assertEqual(self.count_queries(endpoint), few[endpoint])
+
+    def test_expanded_endpoints_use_constant_query_count(self):
+        self.make_rows(2)
+        few = {
+            endpoint: self.count_queries(endpoint, f'?expand={expand}')
+            for endpoint, expand in API_FULL_EXPAND.items()
+        }
+        self.make_rows(8)
+        for endpoint, expand in API_FULL_EXPAND.items():
+            with self.subTest(endpoint=endpoint):
+                self.assertEqual(self.count_queries(endpoint, f'?expand={expand}'), few[endpoint])
+
+
+class ApiFieldSelectionTests(TestCase):
+    """?fields= ve ?expand= parametreleri."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('yonetici', 'yonetici@example.com', 'sifre')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        duration = SubscriptionDuration.objects.create(name='6 Ay')
+        self.customer = Customer.objects.create(
+            rep=self.admin, username='musteri', first_name='Ad', last_name='Soyad', address='Adres',
+            subscription_duration=duration, subscription_start_date=date(2025, 1, 1),
+            amount=600, agreement_status='olumlu',
+        )
+        Payment.objects.create(customer=self.customer, paid_amount=100, note='not')
+
+    def test_relations_are_ids_by_default(self):
+        row = self.client.get('/api/payments/').data['results'][0]
+        self.assertEqual(row['customer'], self.customer.id)
+
+    def test_expand_returns_nested_objects(self):
+        row = self.client.get('/api/payments/?expand=customer.rep').data['results'][0]
+        self.assertEqual(row['customer']['username'], 'musteri')
+        self.assertEqual(row['customer']['rep']['username'], 'yonetici')
+
+    def test_fields_prunes_response_and_selected_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/payments/?fields=id,paid_amount')
+        self.assertEqual(set(response.data['results'][0]), {'id', 'paid_amount'})
+        payment_sql = [q['sql'] for q in queries if 'FROM "core_payment"' in q['sql']]
+        self.assertTrue(payment_sql)
+        self.assertNotIn('"note"', payment_sql[0])
+
+
+class ListViewQueryPlanTests(TestCase):
+    """
+    Liste view'larının ana tablo sorguları indeks kullanmalı; tam tablo taraması olursa test düşer.
+    SQLite'ta EXPLAIN QUERY PLAN, PostgreSQL'de EXPLAIN (enable_seqscan kapalı) çıktısına bakılır.
+    """
+    ADMIN_VIEWS = [
+        ('/list-customers-admin/', 'core_customer'),
+        ('/list-expenses-admin/', 'core_expense'),
+        ('/list-complaints-admin/', 'core_complaint'),
+        ('/list-complaints-admin/?status=beklemede', 'core_complaint'),
+        ('/list-requests-admin/', 'core_request'),
+        ('/list-vehicles-admin/', 'core_vehicle'),
+        ('/list-subscription-extras-admin/', 'core_subscriptionextra'),
+        ('/list-material-transactions-admin/', 'core_materialtransaction'),
+        ('/employee-task-logs/', 'core_auditentry'),
+        ('/expense-category-logs/', 'core_auditentry'),
+        ('/audit-log/', 'core_auditentry'),
+        ('/audit-log/?model=core.customer', 'core_auditentry'),
+        ('/list-payments-admin/', 'core_payment'),
+    ]
+    REP_VIEWS = [
+        ('/list-customers-rep/', 'core_customer'),
+        ('/list-customers-rep/?agreement_status=olumlu', 'core_customer'),
+        ('/pending-customers/', 'core_customer'),
+        ('/list-expenses-rep/', 'core_expense'),
+        ('/list-complaints-rep/', 'core_complaint'),
+        ('/list-complaints-rep/?status=cozuldu', 'core_complaint'),
+        ('/list-requests-rep/', 'core_request'),
+        ('/list-vehicles-rep/', 'core_vehicle'),
+        ('/list-subscription-extras-rep/', 'core_subscriptionextra'),
+        ('/list-subscription-extras-rep/?status=active', 'core_subscriptionextra'),
+        ('/list-material-transactions-rep/', 'core_materialtransaction'),
+        ('/list-payments-rep/', 'core_payment'),
+    ]
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('yonetici', 'yonetici@example.com', 'sifre')
+        make_rows(0, 3)
+        self.rep = User.objects.get(username='temsilci1')
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET enable_seqscan TO off')
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                cursor.execute('EXPLAIN QUERY PLAN ' + sql)
+                return [row[-1] for row in cursor.fetchall()]
+            cursor.execute('EXPLAIN ' + sql)
+            return [row[0] for row in cursor.fetchall()]
+
+    def is_full_scan(self, line, table):
+        if connection.vendor == 'sqlite':
+            return re.fullmatch(rf'SCAN (TABLE )?{table}( AS \w+)?', line.strip()) is not None
+        return f'Seq Scan on {table}' in line
+
+    def assertNoFullScan(self, client, url, table):
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        statements = [q['sql'] for q in queries if q['sql'].startswith('SELECT') and f'FROM "{table}"' in q['sql']]
+        self.assertTrue(statements, f'{url} sayfasında {table} sorgusu yok')
+        for sql in statements:
+            plan = self.explain(sql)
+            self.assertFalse(
+                any(self.is_full_scan(line, table) for line in plan),
+                f'{url}: {table} tam tablo taraması yapıyor\n{sql}\n' + '\n'.join(plan),
+            )
+
+    def test_admin_list_views_use_indexes(self):
+        client = Client()
+        client.force_login(self.admin)
+        for url, table in self.ADMIN_VIEWS:
+            with self.subTest(url=url):
+                self.assertNoFullScan(client, url, table)
+
+    def test_rep_list_views_use_indexes(self):
+        client = Client()
+        client.force_login(self.rep)
+        for url, table in self.REP_VIEWS:
+            with self.subTest(url=url):
+                self.assertNoFullScan(client, url, table)
+
+
+class SearchIndexTests(TestCase):
+    """Arama indeksi: Türkçe katlama, save/delete ile senkron kalma ve ilişki üzerinden arama."""
+
+    def setUp(self):
+        self.rep = User.objects.create_user('IŞIL.temsilci', password='sifre', level=2)
+        duration = SubscriptionDuration.objects.create(name='6 Ay')
+        self.customer = Customer.objects.create(
+            rep=self.rep, username='istanbul_musteri', first_name='İSMAİL', last_name='Işık', address='Adres',
+            subscription_duration=duration, subscription_start_date=date(2025, 1, 1),
+            amount=600, agreement_status='olumlu',
+        )
+        self.vehicle = Vehicle.objects.create(
+            rep=self.rep, brand='Fiat', model='Doblo', chassis_no='ZFA26300006123456', maintenance_price=100,
+            last_maintenance_date=date(2025, 1, 1), estimated_maintenance_date=date(2025, 6, 1),
+        )
+
+    def search(self, queryset, lookup, term):
+        return list(search_filter(queryset, lookup, term))
+
+    def test_fold_text_handles_turkish_i(self):
+        self.assertEqual(fold_text('İSTANBUL'), fold_text('ıstanbul'))
+        self.assertEqual(fold_text('Işık'), fold_text('IŞIK'))
+        self.assertEqual(fold_text('ŞÇĞÜÖ'), 'şçğüö')
+
+    def test_turkish_case_insensitive_substring(self):
+        customers = Customer.objects.all()
+        self.assertEqual(self.search(customers, 'first_name', 'smail'), [self.customer])
+        self.assertEqual(self.search(customers, 'first_name', 'İsmail'), [self.customer])
+        self.assertEqual(self.search(customers, 'last_name', 'IŞI'), [self.customer])
+        self.assertEqual(self.search(customers, 'username', 'İSTANBUL'), [self.customer])
+        self.assertEqual(self.search(customers, 'username', 'ankara'), [])
+
+    def test_short_terms_fall_back_to_like(self):
+        self.assertEqual(self.search(Vehicle.objects.all(), 'brand', 'fi'), [self.vehicle])
+
+    def test_relation_lookup(self):
+        self.assertEqual(self.search(Customer.objects.all(), 'rep__username', 'ışıl'), [self.customer])
+        self.assertEqual(self.search(Vehicle.objects.all(), 'rep__username', 'IŞIL'), [self.vehicle])
+
+    def test_index_follows_save_and_delete(self):
+        vehicles = Vehicle.objects.all()
+        self.assertEqual(self.search(vehicles, 'chassis_no', '6123456'), [self.vehicle])
+        self.vehicle.chassis_no = 'WVWZZZ1JZXW000001'
+        self.vehicle.save()
+        self.assertEqual(self.search(vehicles, 'chassis_no', '6123456'), [])
+        self.assertEqual(self.search(vehicles, 'chassis_no', 'zzz1jz'), [self.vehicle])
+        self.vehicle.delete()
+        self.assertFalse(SearchEntry.objects.filter(model='core.vehicle').exists())
+
+    def test_unindexed_field_uses_icontains(self):
+        self.assertEqual(self.search(Customer.objects.all(), 'address', 'adr'), [self.customer])
+
+    def test_list_view_uses_search_index(self):
+        complaint = Complaint.objects.create(rep=self.rep, customer=self.customer, title='İnternet kesintisi')
+        Complaint.objects.create(rep=self.rep, customer=self.customer, title='Fatura')
+        self.client.force_login(self.rep)
+        response = self.client.get('/list-complaints-rep/?title=INTERNET')
+        self.assertEqual(list(response.context['complaints']), [complaint])
+
+
+class GlobalSearchTests(TestCase):
+    """/api/search/ ve /search/: sıralama, tür bilgisi, temsilci kapsamı ve önek araması."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('yonetici', 'yonetici@example.com', 'sifre')
+        self.rep = User.objects.create_user('temsilci', password='sifre', level=2)
+        self.other_rep = User.objects.create_user('diger', password='sifre', level=2)
+        duration = SubscriptionDuration.objects.create(name='6 Ay')
+
+        def customer(rep, username, first_name):
+            return Customer.objects.create(
+                rep=rep, username=username, first_name=first_name, last_name='Yılmaz', address='Adres',
+                subscription_duration=duration, subscription_start_date=date(2025, 1, 1),
+                amount=600, agreement_status='olumlu',
+            )
+
+        self.exact = customer(self.rep, 'kaya', 'Ali')
+        self.starts = customer(self.rep, 'kayahan', 'Veli')
+        self.other = customer(self.other_rep, 'kaya2', 'Deniz')
+        self.complaint = Complaint.objects.create(rep=self.rep, customer=self.exact, title='Sayaç kayası')
+        self.vehicle = Vehicle.objects.create(
+            rep=self.rep, brand='Ford', model='Okayama', chassis_no='KAYA123', maintenance_price=100,
+            last_maintenance_date=date(2025, 1, 1), estimated_maintenance_date=date(2025, 6, 1),
+        )
+        self.client = APIClient()
+
+    def search(self, user, query):
+        self.client.force_authenticate(user)
+        response = self.client.get('/api/search/' + query)
+        self.assertEqual(response.status_code, 200)
+        return [(row['type'], row['id']) for row in response.data['results']]
+
+    def test_results_are_typed_ranked_and_scoped_to_rep(self):
+        results = self.search(self.rep, '?q=KAYA')
+        self.assertEqual(results[0], ('customer', self.exact.id))
+        self.assertEqual(
+            set(results),
+            {('customer', self.exact.id), ('customer', self.starts.id),
+             ('complaint', self.complaint.id), ('vehicle', self.vehicle.id)},
+        )
+        self.assertNotIn(('customer', self.other.id), results)
+
+    def test_admin_sees_all_records(self):
+        self.assertIn(('customer', self.other.id), self.search(self.admin, '?q=kaya'))
+
+    def test_prefix_mode_matches_word_starts_only(self):
+        results = self.search(self.rep, '?q=kay&prefix=1')
+        self.assertIn(('complaint', self.complaint.id), results)
+        self.assertIn(('vehicle', self.vehicle.id), results)
+        # "aya" yalnızca kelime ortasında geçiyor (Okayama, kayası)
+        self.assertEqual(self.search(self.rep, '?q=aya&prefix=1'), [])
+        self.assertIn(('vehicle', self.vehicle.id), self.search(self.rep, '?q=aya'))
+
+    def test_empty_query(self):
+        self.assertEqual(self.search(self.rep, '?q='), [])
+
+    def test_html_page(self):
+        client = Client()
+        client.force_login(self.rep)
+        response = client.get('/search/?q=kayahan')
+        self.assertEqual([r['id'] for r in response.context['results']], [self.starts.id])
+        self.assertContains(response, '/list-customers-rep/?username=kayahan')
+
+    def test_html_page_prefix_mode(self):
+        client = Client()
+        client.force_login(self.rep)
+        self.assertTrue(client.get('/search/?q=aya').context['results'])
+        response = client.get('/search/?q=aya&prefix=1')
+        self.assertEqual(response.context['results'], [])
+        self.assertContains(response, 'name="prefix" value="1" id="prefix" checked')
+
+    def test_limit_counts_records_not_matching_fields(self):
+        # Her müşteri üç alanda da eşleşir; limit yine kayıt sayısıdır ve en yeni kayıtlar döner
+        duration = SubscriptionDuration.objects.get()
+        customers = [
+            Customer.objects.create(
+                rep=self.rep, username=f'zeki{i}', first_name='Zeki', last_name='Zekioğlu', address='Adres',
+                subscription_duration=duration, subscription_start_date=date(2025, 1, 1),
+                amount=600, agreement_status='olumlu',
+            )
+            for i in range(4)
+        ]
+        Vehicle.objects.create(
+            rep=self.rep, brand='Zeki', model='Zeki', chassis_no='ZEKI1', maintenance_price=100,
+            last_maintenance_date=date(2025, 1, 1), estimated_maintenance_date=date(2025, 6, 1),
+        )
+        results = self.search(self.rep, '?q=zeki&limit=3')
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[:2], [('customer', customers[3].id), ('customer', customers[2].id)])
+
+
+class EmployeeMissingDocumentsTests(TestCase):
+    """Çalışan listesinde eksik belgeler çalışan sayısından bağımsız sabit sayıda sorguyla hesaplanır."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('yonetici', 'yonetici@example.com', 'sifre')
+        self.client.force_login(self.admin)
+
+    def make_employees(self, count):
+        employees = Employee.objects.bulk_create([
+            Employee(first_name='Çalışan', last_name=str(n), salary=1000, department='Saha') for n in range(count)
+        ])
+        EmployeeDocument.objects.bulk_create([
+            EmployeeDocument(employee=employee, document_name='Sağlık Belgesi', file='employee_documents/x.pdf')
+            for employee in employees
+        ])
+        return employees
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/list-employees-admin/')
+        self.assertEqual(response.status_code, 200)
+        return len(queries), response
+
+    def test_constant_query_count(self):
+        self.make_employees(2)
+        few, _ = self.count_queries()
+        self.make_employees(40)
+        many, response = self.count_queries()
+        self.assertEqual(many, few)
+        for employee in response.context['employees']:
+            self.assertEqual(employee.missing_docs, ['Sigorta Belgesi', 'İkametgah Belgesi'])
+
+    def test_registry_comes_from_settings(self):
+        employee = self.make_employees(1)[0]
+        with self.settings(REQUIRED_EMPLOYEE_DOCUMENTS=['Sağlık Belgesi']):
+            _, response = self.count_queries()
+            self.assertEqual(response.context['required_documents'], ['Sağlık Belgesi'])
+            self.assertEqual(response.context['employees'][0].missing_docs, [])
+        response = self.client.get(f'/admin-panel/view-employee-documents/{employee.id}/')
+        self.assertEqual(response.context['missing_docs'], ['Sigorta Belgesi', 'İkametgah Belgesi'])
+
+    def test_document_form_choices_follow_settings(self):
+        employee = self.make_employees(1)[0]
+        with self.settings(REQUIRED_EMPLOYEE_DOCUMENTS=['Ehliyet']):
+            response = self.client.get(f'/add-employee-document/{employee.id}/')
+            self.assertEqual(response.context['form'].fields['default_document'].choices, [('Ehliyet', 'Ehliyet')])
+        response = self.client.get(f'/add-employee-document/{employee.id}/')
+        self.assertEqual(
+            [name for name, _ in response.context['form'].fields['default_document'].choices],
+            ['Sağlık Belgesi', 'Sigorta Belgesi', 'İkametgah Belgesi'],
+        )
+
+
+class CsvExportTests(TestCase):
+    """Yönetici CSV dışa aktarmaları: akış halinde yanıt ve liste sayfasıyla aynı filtreler."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('yonetici', 'yonetici@example.com', 'sifre')
+        self.client.force_login(self.admin)
+        make_rows(0, 3)
+
+    def export(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        return [line.split(';') for line in content.splitlines()]
+
+    def test_expenses_export_uses_list_filters(self):
+        rows = self.export('/export-expenses-admin/')
+        self.assertEqual(rows[0][:3], ['Harcama No', 'Tarih', 'Temsilci'])
+        self.assertEqual(len(rows), 4)
+        rows = self.export('/export-expenses-admin/?username=temsilci2')
+        self.assertEqual([row[2] for row in rows[1:]], ['temsilci2'])
+
+    def test_payments_export_uses_customer_filters(self):
+        self.assertEqual(len(self.export('/export-payments-admin/')), 4)
+        rows = self.export('/export-payments-admin/?q_username=musteri3')
+        self.assertEqual([row[2] for row in rows[1:]], ['musteri3'])
+        self.assertEqual(rows[1][6], '100.00')
+
+    def test_material_transactions_export(self):
+        rows = self.export('/export-material-transactions-admin/')
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[1][2], 'Malzeme 3')
+        material = Material.objects.get(name='Malzeme 2')
+        rows = self.export(f'/export-material-transactions-admin/?material={material.pk}')
+        self.assertEqual([row[2] for row in rows[1:]], ['Malzeme 2'])
+        rows = self.export('/export-material-transactions-admin/?username=temsilci1')
+        self.assertEqual([row[5] for row in rows[1:]], ['temsilci1'])
+
+    def test_formula_cells_are_escaped(self):
+        from .exports import format_cell
+
+        Expense.objects.update(description='=HYPERLINK("http://example.com")')
+        Expense.objects.filter(user__username='temsilci1').update(description='-10')
+        Expense.objects.filter(user__username='temsilci3').update(description='\t=1+2')
+        descriptions = {row[2]: row[5] for row in self.export('/export-expenses-admin/')[1:]}
+        self.assertEqual(descriptions['temsilci1'], "'-10")
+        self.assertEqual(descriptions['temsilci2'], '"\'=HYPERLINK(""http://example.com"")"')
+        self.assertEqual(descriptions['temsilci3'], "'\t=1+2")
+        self.assertEqual(format_cell('\r=1+2'), "'\r=1+2")
+        # Sayısal hücreler (tutar) olduğu gibi kalır
+        self.assertEqual(self.export('/export-expenses-admin/')[1][4], '10.00')
+
+    def test_rep_cannot_export(self):
+        self.client.force_login(User.objects.get(username='temsilci1'))
+        self.assertEqual(self.client.get('/export-expenses-admin/').status_code, 302)
+
+
+class BulkImportTests(TestCase):
+    """Toplu müşteri/ödeme içe aktarma: doğrulama, hata raporu, defter ve arama indeksi."""
+
+    def setUp(self):
+        self.rep = User.objects.create_user('temsilci', password='sifre', level=2)
+        self.other_rep = User.objects.create_user('diger', password='sifre', level=2)
+        SubscriptionDuration.objects.create(name='6 Ay')
+        SubscriptionType.objects.create(name='Standart')
+        self.client = APIClient()
+        self.client.force_authenticate(self.rep)
+
+    def upload(self, kind, name, content, query=''):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        upload = SimpleUploadedFile(name, content.encode('utf-8'))
+        response = self.client.post(f'/api/import/{kind}/{query}', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 200, response.data)
+        return response.data
+
+    def test_customer_csv_import(self):
+        content = (
+            'username;first_name;last_name;address;subscription_type;subscription_duration;'
+            'subscription_start_date;payment_type;amount;agreement_status\n'
+            'yeni1;Ali;Yılmaz;Adres;STANDART;6 ay;2025-01-01;;600;olumlu\n'
+            'yeni2;Ayşe;Kaya;Adres;Yok;6 Ay;2025-01-01;;600;olumlu\n'
+            'yeni1;Ali;Yılmaz;Adres;;6 Ay;2025-01-01;;600;olumlu\n'
+            'yeni3;Veli;Demir;Adres;;6 Ay;tarih;;600;olumlu\n'
+        )
+        result = self.upload('customers', 'musteriler.csv', content)
+        self.assertEqual(result['created'], 1)
+        self.assertEqual([error['row'] for error in result['errors']], [2, 3, 4])
+        self.assertIn('subscription_type', result['errors'][0]['errors'])
+        self.assertIn('subscription_start_date', result['errors'][2]['errors'])
+
+        customer = Customer.objects.get(username='yeni1')
+        self.assertEqual(customer.rep, self.rep)
+        self.assertEqual(customer.subscription_type.name, 'Standart')
+        self.assertEqual(customer.balance.payment_count, 0)
+        self.assertEqual(list(search_filter(Customer.objects.all(), 'last_name', 'YILMAZ')), [customer])
+
+    def test_dry_run_and_existing_usernames(self):
+        row = {'username': 'yeni1', 'first_name': 'Ali', 'last_name': 'Yılmaz', 'address': 'Adres',
+               'subscription_type': None, 'subscription_duration': '6 Ay',
+               'subscription_start_date': '2025-01-01', 'payment_type': None, 'amount': '600',
+               'agreement_status': 'olumlu'}
+        response = self.client.post('/api/import/customers/?dry_run=1', [row], format='json')
+        self.assertEqual(response.data['created'], 1)
+        self.assertFalse(Customer.objects.exists())
+        self.client.post('/api/import/customers/', [row], format='json')
+        response = self.client.post('/api/import/customers/', [row], format='json')
+        self.assertEqual(response.data['created'], 0)
+        self.assertIn('username', response.data['errors'][0]['errors'])
+
+    def test_rep_cannot_import_for_other_rep(self):
+        content = '{"username": "yeni1", "rep": "diger", "first_name": "A", "last_name": "B", "address": "C", ' \
+                  '"subscription_type": null, "subscription_duration": "6 Ay", ' \
+                  '"subscription_start_date": "2025-01-01", "payment_type": null, "amount": "1", ' \
+                  '"agreement_status": "olumlu"}\n{bozuk\n'
+        result = self.upload('customers', 'musteriler.jsonl', content)
+        self.assertEqual(result['created'], 0)
+        self.assertIn('rep', result['errors'][0]['errors'])
+        self.assertEqual(result['errors'][1]['row'], 2)
+
+    def test_payment_import_updates_balances(self):
+        duration = SubscriptionDuration.objects.get()
+        own = Customer.objects.create(
+            rep=self.rep, username='benim', first_name='A', last_name='B', address='C',
+            subscription_duration=duration, subscription_start_date=date(2025, 1, 1), amount=600,
+            agreement_status='olumlu',
+        )
+        Customer.objects.create(
+            rep=self.other_rep, username='baskasi', first_name='A', last_name='B', address='C',
+            subscription_duration=duration, subscription_start_date=date(2025, 1, 1), amount=600,
+            agreement_status='olumlu',
+        )
+        content = (
+            'customer,paid_amount,payment_method,note\n'
+            'benim,100,Nakit,\n'
+            'benim,50.50,,ikinci\n'
+            'baskasi,100,,\n'
+            'benim,abc,,\n'
+        )
+        result = self.upload('payments', 'odemeler.csv', content)
+        self.assertEqual(result['created'], 2)
+        self.assertEqual([error['row'] for error in result['errors']], [3, 4])
+        own.balance.refresh_from_db()
+        self.assertEqual(own.balance.total_paid, Decimal('150.50'))
+        self.assertEqual(own.balance.payment_count, 2)
+
+
+class BulkWriteApiTests(TestCase):
+    """Viewset'lerde liste gövdeli POST/PATCH: toplu yazma, hepsi-ya-da-hiçbiri, yan kayıtlar."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', password='sifre')
+        duration = SubscriptionDuration.objects.create(name='6 Ay')
+        self.customers = [
+            Customer.objects.create(
+                rep=self.admin, username=f'musteri{i}', first_name='A', last_name='B', address='C',
+                subscription_duration=duration, subscription_start_date=date(2025, 1, 1), amount=600,
+                agreement_status='olumlu',
+            )
+            for i in range(2)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_bulk_create_payments(self):
+        first, second = self.customers
+        items = [
+            {'customer': first.pk, 'paid_amount': '100'},
+            {'customer': first.pk, 'paid_amount': '50'},
+            {'customer': second.pk, 'paid_amount': '75'},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/api/payments/', items, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual([item['paid_amount'] for item in response.data], ['100.00', '50.00', '75.00'])
+        self.assertTrue(all(item['id'] for item in response.data))
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "core_payment"')]
+        self.assertEqual(len(inserts), 1)
+        first.balance.refresh_from_db()
+        self.assertEqual(first.balance.total_paid, Decimal('150.00'))
+
+    def test_bulk_create_is_all_or_nothing(self):
+        items = [
+            {'customer': self.customers[0].pk, 'paid_amount': '100'},
+            {'customer': self.customers[0].pk, 'paid_amount': 'abc'},
+        ]
+        response = self.client.post('/api/payments/', items, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()), ['1'])
+        self.assertIn('paid_amount', response.json()['1'])
+        self.assertFalse(Payment.objects.exists())
+
+    def test_single_create_still_works(self):
+        response = self.client.post('/api/payments/', {'customer': self.customers[0].pk, 'paid_amount': '10'},
+                                    format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['paid_amount'], '10.00')
+
+    def test_bulk_partial_update_complaints(self):
+        complaints = [
+            Complaint.objects.create(rep=self.admin, customer=self.customers[0], title=f'Arıza {i}',
+                                     description='-')
+            for i in range(2)
+        ]
+        items = [
+            {'id': complaints[0].pk, 'status': 'cozuldu'},
+            {'id': complaints[1].pk, 'title': 'İnternet kesintisi'},
+        ]
+        response = self.client.patch('/api/complaints/', items, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data[1]['title'], 'İnternet kesintisi')
+        complaints[0].refresh_from_db()
+        self.assertEqual(complaints[0].status, 'cozuldu')
+        self.assertEqual(complaints[0].title, 'Arıza 0')
+        found = search_filter(Complaint.objects.all(), 'title', 'internet')
+        self.assertEqual(list(found), [complaints[1]])
+        self.assertFalse(search_filter(Complaint.objects.all(), 'title', 'arıza 1').exists())
+
+    def test_bulk_partial_update_moves_payment_balance(self):
+        first, second = self.customers
+        payment = Payment.objects.create(customer=first, paid_amount=100)
+        response = self.client.patch('/api/payments/', [{'id': payment.pk, 'customer': second.pk}], format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+        first.balance.refresh_from_db()
+        second.balance.refresh_from_db()
+        self.assertEqual(first.balance.payment_count, 0)
+        self.assertEqual(second.balance.total_paid, Decimal('100.00'))
+
+    def test_bulk_partial_update_rejects_unknown_and_duplicate_ids(self):
+        expense = Expense.objects.create(
+            user=self.admin, category=ExpenseCategory.objects.create(name='Yakıt'), amount=10,
+        )
+        items = [{'id': expense.pk, 'amount': '20'}, {'id': 999999}, {'id': expense.pk, 'amount': '30'}]
+        response = self.client.patch('/api/expenses/', items, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(sorted(response.json()), ['1', '2'])
+        self.assertIn('id', response.json()['2'])
+        expense.refresh_from_db()
+        self.assertEqual(expense.amount, 10)
+
+    def test_patch_on_list_only_for_bulk_viewsets(self):
+        response = self.client.patch('/api/vehicles/', [], format='json')
+        self.assertEqual(response.status_code, 405)
+
+
+class ApiOwnershipTests(TestCase):
+    """Sahip alanları (Expense.user, Complaint.rep...): temsilci yalnızca kendi adına yazabilir."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', password='sifre')
+        self.rep = User.objects.create_user('temsilci', password='sifre', level=2)
+        self.other_rep = User.objects.create_user('diger', password='sifre', level=2)
+        self.category = ExpenseCategory.objects.create(name='Yakıt')
+        self.client = APIClient()
+        self.client.force_authenticate(self.rep)
+
+    def test_rep_cannot_write_for_another_user(self):
+        response = self.client.post('/api/expenses/', {
+            'user': self.other_rep.pk, 'category': self.category.pk, 'amount': '10',
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('user', response.json())
+        self.assertFalse(Expense.objects.exists())
+
+    def test_owner_defaults_to_rep(self):
+        response = self.client.post('/api/expenses/', {'category': self.category.pk, 'amount': '10'}, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(Expense.objects.get().user, self.rep)
+
+    def test_rep_cannot_reassign_or_edit_others_records(self):
+        own = Expense.objects.create(user=self.rep, category=self.category, amount=10)
+        other = Expense.objects.create(user=self.other_rep, category=self.category, amount=10)
+        response = self.client.patch(f'/api/expenses/{own.pk}/', {'user': self.other_rep.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.patch('/api/expenses/', [
+            {'id': own.pk, 'amount': '20'}, {'id': other.pk, 'amount': '20'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()), ['1'])
+        self.assertEqual(set(Expense.objects.values_list('amount', flat=True)), {Decimal('10.00')})
+
+    def test_rep_cannot_write_payments_for_others_customers(self):
+        duration = SubscriptionDuration.objects.create(name='6 Ay')
+        own, other = [
+            Customer.objects.create(
+                rep=rep, username=f'musteri{n}', first_name='A', last_name='B', address='C',
+                subscription_duration=duration, subscription_start_date=date(2025, 1, 1), amount=600,
+                agreement_status='olumlu',
+            )
+            for n, rep in enumerate([self.rep, self.other_rep])
+        ]
+        response = self.client.post('/api/payments/', {'customer': other.pk, 'paid_amount': '10'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('customer', response.json())
+        response = self.client.post('/api/payments/', [
+            {'customer': own.pk, 'paid_amount': '10'}, {'customer': other.pk, 'paid_amount': '10'},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()), ['1'])
+        payment = Payment.objects.create(customer=own, paid_amount=10)
+        response = self.client.patch(f'/api/payments/{payment.pk}/', {'customer': other.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(Payment.objects.values_list('customer', flat=True)), [own.pk])
+
+    def test_admin_can_set_any_owner(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post('/api/expenses/', {
+            'user': self.other_rep.pk, 'category': self.category.pk, 'amount': '10',
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        expense = Expense.objects.get()
+        self.assertEqual(expense.user, self.other_rep)
+        response = self.client.patch(f'/api/expenses/{expense.pk}/', {'user': self.rep.pk}, format='json')
+        self.assertEqual(response.status_code, 200, response.data)
+
+
+class DatabaseSettingsTests(TestCase):
+    """Ortam değişkenlerinden DATABASES (myproject/database.py)."""
+
+    def test_sqlite_default(self):
+        from pathlib import Path
+        from myproject.database import database_settings
+
+        databases, replicas = database_settings({}, Path('/srv/app'))
+        self.assertEqual(databases['default']['NAME'], '/srv/app/db.sqlite3')
+        self.assertEqual(list(databases), ['default'])
+        self.assertEqual(replicas, [])
+
+    def test_sqlite_replica(self):
+        from pathlib import Path
+        from myproject.database import database_settings
+
+        databases, replicas = database_settings({'DB_REPLICA_NAME': '/srv/replica/db.sqlite3'}, Path('/srv/app'))
+        self.assertEqual(databases['replica']['NAME'], '/srv/replica/db.sqlite3')
+        self.assertEqual(databases['replica']['OPTIONS'], databases['default']['OPTIONS'])
+        self.assertEqual(databases['replica']['TEST'], {'MIRROR': 'default'})
+        self.assertEqual(replicas, ['replica'])
+
+    def test_sqlite_profiles(self):
+        from pathlib import Path
+        from myproject.database import database_settings
+
+        databases, _ = database_settings({'DB_SQLITE_TIMEOUT': '3'}, Path('.'))
+        options = databases['default']['OPTIONS']
+        self.assertEqual(options['transaction_mode'], 'IMMEDIATE')
+        self.assertIn('PRAGMA journal_mode = WAL', options['init_command'])
+        self.assertIn('PRAGMA busy_timeout = 3000', options['init_command'])
+
+        databases, _ = database_settings({'DB_SQLITE_PROFILE': 'default'}, Path('.'))
+        self.assertEqual(databases['default']['OPTIONS'], {'timeout': 20})
+        with self.assertRaises(ValueError):
+            database_settings({'DB_SQLITE_PROFILE': 'hizli'}, Path('.'))
+
+    def test_sqlite_pragmas_applied_on_connection(self):
+        import tempfile
+        from pathlib import Path
+        from django.db.backends.sqlite3.base import DatabaseWrapper
+        from myproject.database import database_settings
+
+        with tempfile.TemporaryDirectory() as workdir:
+            databases, _ = database_settings({}, Path(workdir))
+            wrapper = DatabaseWrapper({**connection.settings_dict, **databases['default']}, alias='pragma_test')
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA synchronous')
+                    self.assertEqual(cursor.fetchone()[0], 1)  # NORMAL
+            finally:
+                wrapper.close()
+
+    def test_postgresql_persistent_connections(self):
+        from pathlib import Path
+        from myproject.database import database_settings
+
+        env = {'DB_ENGINE': 'postgresql', 'DB_NAME': 'crm', 'DB_HOST': 'db', 'DB_CONN_MAX_AGE': '300'}
+        databases, replicas = database_settings(env, Path('.'))
+        self.assertEqual(databases['default']['ENGINE'], 'django.db.backends.postgresql')
+        self.assertEqual(databases['default']['CONN_MAX_AGE'], 300)
+        self.assertTrue(databases['default']['CONN_HEALTH_CHECKS'])
+        self.assertEqual(replicas, [])
+
+    def test_postgresql_pool_and_replica(self):
+        from pathlib import Path
+        from myproject.database import database_settings
+
+        env = {'DB_ENGINE': 'postgresql', 'DB_POOL': '1', 'DB_POOL_MAX_SIZE': '20', 'DB_REPLICA_HOST': 'db-ro'}
+        databases, replicas = database_settings(env, Path('.'))
+        self.assertEqual(databases['default']['CONN_MAX_AGE'], 0)
+        self.assertEqual(databases['default']['OPTIONS']['pool'], {'min_size': 2, 'max_size': 20})
+        self.assertEqual(databases['replica']['HOST'], 'db-ro')
+        self.assertEqual(databases['replica']['TEST'], {'MIRROR': 'default'})
+        self.assertEqual(replicas, ['replica'])
+
+    def test_unknown_engine(self):
+        from pathlib import Path
+        from myproject.database import database_settings
+
+        with self.assertRaises(ValueError):
+            database_settings({'DB_ENGINE': 'oracle'}, Path('.'))
+
+
+class ReadReplicaRouterTests(TransactionTestCase):
+    """
+    Yönlendirici iki ayrı yerel veritabanıyla denenir: replikaya yalnızca orada bulunan bir kayıt
+    yazılır; GET API isteği onu görmeli, yazmalar ve istek dışı okumalar default'ta kalmalı.
+    'replica' alias'ı ayarlarda tanımlı değildir; yalnızca bu testler için ayrı bellek içi veritabanıyla
+    eklenir (test çalıştırıcısı sınıf kurulmadan önce databases'taki alias'ları denetlediği için orada yok).
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.databases = {'default', 'replica'}
+        default = connections['default'].settings_dict
+        replica = {**default, 'NAME': ':memory:', 'OPTIONS': dict(default['OPTIONS']),
+                   'TEST': {**default['TEST'], 'NAME': None, 'MIRROR': None}}
+        cls.replica_settings = override_settings(
+            DATABASES={**settings.DATABASES, 'replica': replica}, DATABASE_READ_REPLICAS=['replica'],
+        )
+        with warnings.catch_warnings():
+            # Django DATABASES değişikliğinde uyarır; bağlantı yöneticisi aşağıda elle güncelleniyor
+            warnings.simplefilter('ignore')
+            cls.replica_settings.enable()
+        # Bağlantı yöneticisi DATABASES'ı ilk erişimde okuyup saklar; yeni alias ona da eklenir
+        connections.settings['replica'] = replica
+        connections['replica'].creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].creation.destroy_test_db(':memory:', verbosity=0)
+        del connections['replica']
+        del connections.settings['replica']
+        cls.replica_settings.disable()
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', password='sifre')
+        ExpenseCategory.objects.using('replica').create(name='Replikadaki')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_get_api_reads_from_replica(self):
+        response = self.client.get('/api/expense-categories/')
+        self.assertEqual([item['name'] for item in response.data['results']], ['Replikadaki'])
+
+    def test_writes_and_plain_reads_use_default(self):
+        response = self.client.post('/api/expense-categories/', {'name': 'Yeni'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(ExpenseCategory.objects.values_list('name', flat=True)), ['Yeni'])
+        self.assertEqual(ExpenseCategory.objects.using('replica').count(), 1)
+
+    def test_reads_inside_transaction_use_default(self):
+        from django.db import transaction
+        from .db_routing import replica_reads_enabled
+
+        token = replica_reads_enabled.set(True)
+        try:
+            self.assertEqual(ExpenseCategory.objects.get().name, 'Replikadaki')
+            with transaction.atomic():
+                self.assertFalse(ExpenseCategory.objects.exists())
+        finally:
+            replica_reads_enabled.reset(token)
+
+
+class ReferenceDataCacheTests(TestCase):
+    """Abonelik türü/süresi, ödeme tipi ve harcama kategorisi önbellekten okunur, değişince temizlenir."""
+
+    def setUp(self):
+        from .reference_data import get_cache
+
+        get_cache().clear()
+        self.duration = SubscriptionDuration.objects.create(name='6 Ay')
+        self.category = ExpenseCategory.objects.create(name='Yakıt')
+
+    def test_cached_until_changed(self):
+        from .reference_data import reference_list
+
+        self.assertEqual([d.name for d in reference_list(SubscriptionDuration)], ['6 Ay'])
+        with self.assertNumQueries(0):
+            reference_list(SubscriptionDuration)
+
+        self.duration.name = '12 Ay'
+        self.duration.save()
+        self.assertEqual([d.name for d in reference_list(SubscriptionDuration)], ['12 Ay'])
+        self.duration.delete()
+        self.assertEqual(reference_list(SubscriptionDuration), [])
+
+    def test_customer_form_reads_choices_from_cache(self):
+        from .views import CustomerForm
+
+        CustomerForm().as_p()  # önbelleği doldurur
+        with self.assertNumQueries(0):
+            html = CustomerForm().as_p()
+        self.assertIn('6 Ay', html)
+
+        form = CustomerForm(data={'subscription_duration': self.duration.pk + 100})
+        form.is_valid()
+        self.assertIn('subscription_duration', form.errors)
+        form = CustomerForm(data={'subscription_duration': self.duration.pk})
+        form.is_valid()
+        self.assertNotIn('subscription_duration', form.errors)
+        self.assertEqual(form.cleaned_data['subscription_duration'], self.duration)
+
+    def test_serializer_validates_from_cache(self):
+        from .reference_data import reference_list
+        from .serializers import ExpenseSerializer
+
+        user = User.objects.create_user('temsilci', password='sifre')
+        reference_list(ExpenseCategory)
+        serializer = ExpenseSerializer(data={'user': user.pk, 'category': self.category.pk, 'amount': '10'})
+        with self.assertNumQueries(1):  # yalnızca kullanıcı
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer = ExpenseSerializer(data={'user': user.pk, 'category': 999, 'amount': '10'})
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['category'][0].code, 'does_not_exist')
+
+
+class DailyRollupTests(TestCase):
+    """
+    Günlük özetler yazmanın kuyruğa attığı işlerle güncellenir, mutabakat komutu sapmayı bulur,
+    /api/stats/ yalnızca özetten okur.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('admin', password='sifre')
+        self.rep = User.objects.create_user('temsilci', password='sifre', level=2)
+        self.other_rep = User.objects.create_user('diger', password='sifre', level=2)
+        duration = SubscriptionDuration.objects.create(name='6 Ay')
+        self.customer, self.other_customer = [
+            Customer.objects.create(
+                rep=rep, username=f'musteri{i}', first_name='A', last_name='B', address='C',
+                subscription_duration=duration, subscription_start_date=date(2025, 1, 1), amount=600,
+                agreement_status='olumlu',
+            )
+            for i, rep in enumerate([self.rep, self.other_rep])
+        ]
+        self.category = ExpenseCategory.objects.create(name='Yakıt')
+        self.material = Material.objects.create(name='Modem', price=10, quantity=100)
+
+    def rollup(self, metric, rep, key=''):
+        return DailyRollup.objects.get(metric=metric, rep=rep, key=key)
+
+    def run_jobs(self):
+        from .jobs import run_pending
+
+        self.assertEqual(run_pending()[1], 0)
+
+    def test_writes_update_rollups(self):
+        from .models import Job
+
+        Payment.objects.create(customer=self.customer, paid_amount=100)
+        payment = Payment.objects.create(customer=self.customer, paid_amount=50)
+        # Aynı dilime gelen iki yazma tek bekleyen işte birleşir
+        self.assertEqual(Job.objects.filter(status=Job.QUEUED, key__startswith='rollups:payments:').count(), 1)
+        Expense.objects.create(user=self.rep, category=self.category, amount=30)
+        MaterialTransaction.objects.create(material=self.material, rep=self.rep, quantity=3)
+        complaint = Complaint.objects.create(rep=self.rep, customer=self.customer, title='Arıza', description='-')
+        self.assertFalse(DailyRollup.objects.exists())
+        self.run_jobs()
+
+        rollup = self.rollup('payments', self.rep)
+        self.assertEqual((rollup.count, rollup.amount, rollup.date), (2, Decimal('150.00'), timezone.localdate()))
+        self.assertEqual(self.rollup('expenses', self.rep, str(self.category.pk)).amount, Decimal('30.00'))
+        self.assertEqual(self.rollup('materials', self.rep, str(self.material.pk)).quantity, 3)
+        self.assertEqual(self.rollup('complaints', self.rep, 'beklemede').count, 1)
+
+        complaint.status = 'cozuldu'
+        complaint.save()
+        self.run_jobs()
+        self.assertFalse(DailyRollup.objects.filter(metric='complaints', key='beklemede').exists())
+        self.assertEqual(self.rollup('complaints', self.rep, 'cozuldu').count, 1)
+
+        # Ödeme başka temsilcinin müşterisine taşınınca iki dilim de güncellenir
+        payment.customer = self.other_customer
+        payment.save()
+        self.run_jobs()
+        self.assertEqual(self.rollup('payments', self.rep).amount, Decimal('100.00'))
+        self.assertEqual(self.rollup('payments', self.other_rep).amount, Decimal('50.00'))
+        payment.delete()
+        self.run_jobs()
+        self.assertFalse(DailyRollup.objects.filter(metric='payments', rep=self.other_rep).exists())
+
+    def test_rebuild_command_detects_and_fixes_drift(self):
+        from io import StringIO
+        from django.core.management import CommandError, call_command
+
+        Payment.objects.create(customer=self.customer, paid_amount=100)
+        self.run_jobs()
+        call_command('rebuild_rollups', '--check', stdout=StringIO())
+        DailyRollup.objects.filter(metric='payments').update(amount=1)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', '--check', stdout=StringIO())
+        call_command('rebuild_rollups', '--days', '2', stdout=StringIO())
+        self.assertEqual(self.rollup('payments', self.rep).amount, Decimal('100.00'))
+        call_command('rebuild_rollups', '--check', stdout=StringIO())
+
+    @override_settings(JOBS_EAGER=True)
+    def test_cascade_deletes_refresh_rollups(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from .rollups import dashboard_stats
+
+        Payment.objects.create(customer=self.customer, paid_amount=100)
+        Complaint.objects.create(rep=self.rep, customer=self.customer, title='Arıza', description='-')
+        SubscriptionExtra.objects.create(rep=self.rep, customer=self.customer, name='Ekstra', price=20)
+        Complaint.objects.create(rep=self.rep, customer=self.other_customer, title='Arıza', description='-')
+        MaterialTransaction.objects.create(material=self.material, rep=self.rep, quantity=3)
+        MaterialTransaction.objects.create(material=self.material, rep=self.other_rep, quantity=1)
+        MaterialTransaction.objects.create(
+            material=Material.objects.create(name='Kablo', price=1, quantity=10), rep=self.other_rep, quantity=2,
+        )
+        Expense.objects.create(user=self.rep, category=self.category, amount=30)
+        Expense.objects.create(user=self.other_rep, category=ExpenseCategory.objects.create(name='Yemek'), amount=5)
+
+        self.customer.delete()
+        today = timezone.localdate()
+        self.assertEqual(dashboard_stats(self.admin, today, today)['revenue']['total'], '0.00')
+        self.material.delete()
+        self.category.delete()
+        # Temsilcinin müşterisiyle başka temsilcinin şikayeti silinir, malzeme işlemi temsilcisiz kalır
+        self.other_rep.delete()
+        self.assertTrue(DailyRollup.objects.filter(metric='materials', rep=None, quantity=2).exists())
+        call_command('rebuild_rollups', '--check', stdout=StringIO())
+
+    def test_stats_api_reads_only_rollups(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        client.post('/api/payments/', [
+            {'customer': self.customer.pk, 'paid_amount': '100'},
+            {'customer': self.other_customer.pk, 'paid_amount': '40'},
+        ], format='json')
+        Complaint.objects.create(rep=self.rep, customer=self.customer, title='Arıza', description='-',
+                                 status='cozuldu')
+        Complaint.objects.create(rep=self.rep, customer=self.customer, title='Arıza 2', description='-')
+        Expense.objects.create(user=self.rep, category=self.category, amount=30)
+        self.run_jobs()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/stats/')
+        self.assertEqual(response.status_code, 200)
+        raw_tables = ('"core_payment"', '"core_expense"', '"core_complaint"', '"core_materialtransaction"')
+        self.assertFalse([q['sql'] for q in queries.captured_queries if any(t in q['sql'] for t in raw_tables)])
+        self.assertEqual(response.data['revenue']['total'], '140.00')
+        self.assertEqual(response.data['revenue']['daily'][0]['count'], 2)
+        self.assertEqual(response.data['complaints']['resolved_ratio'], 0.5)
+        self.assertEqual(response.data['expenses']['by_category'][0]['category'], 'Yakıt')
+
+        # Temsilci yalnızca kendi sayılarını görür, rep parametresi yok sayılır
+        client.force_authenticate(self.other_rep)
+        response = client.get(f'/api/stats/?rep={self.rep.pk}')
+        self.assertEqual(response.data['revenue']['total'], '40.00')
+        self.assertEqual(response.data['complaints']['total'], 0)
+        self.assertEqual(client.get('/api/stats/?date_from=dun').status_code, 400)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_panels_show_stats(self):
+        # Worker'sız ortam: işler yazma anında çalışır
+        Payment.objects.create(customer=self.customer, paid_amount=100)
+        client = Client()
+        client.force_login(self.rep)
+        response = client.get('/temsilci-panel/')
+        self.assertContains(response, '100.00 TL')
+
+
+class SyncApiTests(TestCase):
+    """/api/sync/ token'dan sonraki ekleme, güncelleme ve silmeleri temsilci kapsamında döner."""
+
+    def setUp(self):
+        self.rep = User.objects.create_user('temsilci', password='sifre', level=2)
+        self.other_rep = User.objects.create_user('diger', password='sifre', level=2)
+        self.duration = SubscriptionDuration.objects.create(name='12 Ay')
+        self.customer = self.create_customer('musteri1', self.rep)
+        self.other_customer = self.create_customer('musteri2', self.other_rep)
+        self.client = APIClient()
+        self.client.force_authenticate(self.rep)
+
+    def create_customer(self, username, rep):
+        return Customer.objects.create(
+            rep=rep, username=username, first_name='A', last_name='B', address='C',
+            subscription_duration=self.duration, subscription_start_date=date(2025, 1, 1), amount=1200,
+            agreement_status='olumlu',
+        )
+
+    def sync(self, token=None, **params):
+        if token is not None:
+            params['since'] = token
+        response = self.client.get('/api/sync/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def ids(self, data, collection, kind='updated'):
+        items = data['changes'].get(collection, {}).get(kind, [])
+        return sorted(item['id'] if kind == 'updated' else item for item in items)
+
+    def test_full_sync_is_scoped_to_rep(self):
+        data = self.sync()
+        self.assertTrue(data['reset'])
+        self.assertFalse(data['has_more'])
+        self.assertEqual(self.ids(data, 'customers'), [self.customer.pk])
+        self.assertEqual(self.ids(data, 'subscription_durations'), [self.duration.pk])
+        # Sayfalama: has_more ile aynı sonuç parça parça gelir
+        first = self.sync(limit=1)
+        self.assertTrue(first['has_more'])
+        second = self.sync(first['token'], limit=10)
+        self.assertFalse(second['reset'])
+        self.assertEqual(len(self.ids(first, 'customers') + self.ids(second, 'customers')), 1)
+
+    def test_delta_contains_only_changes_since_token(self):
+        token = self.sync()['token']
+        self.assertEqual(self.sync(token)['changes'], {})
+
+        payment = Payment.objects.create(customer=self.customer, paid_amount=100)
+        Payment.objects.create(customer=self.other_customer, paid_amount=50)
+        self.customer.address = 'Yeni adres'
+        self.customer.save()
+        data = self.sync(token)
+        self.assertEqual(self.ids(data, 'payments'), [payment.pk])
+        self.assertEqual(data['changes']['customers']['updated'][0]['address'], 'Yeni adres')
+        self.assertEqual(set(data['changes']), {'payments', 'customers'})
+
+        token, payment_id = data['token'], payment.pk
+        payment.delete()
+        data = self.sync(token)
+        self.assertEqual(data['changes'], {'payments': {'updated': [], 'deleted': [payment_id]}})
+
+    def test_changelog_is_compacted(self):
+        for amount in ('100', '200', '300'):
+            self.customer.amount = amount
+            self.customer.save()
+        self.assertEqual(ChangeLog.objects.filter(collection='customers', object_id=self.customer.pk).count(), 1)
+
+    def test_moving_customer_to_another_rep(self):
+        payment = Payment.objects.create(customer=self.customer, paid_amount=100)
+        token = self.sync()['token']
+        self.client.force_authenticate(self.other_rep)
+        other_token = self.sync()['token']
+
+        self.customer.rep = self.other_rep
+        self.customer.save()
+        data = self.sync(other_token)
+        self.assertEqual(self.ids(data, 'customers'), [self.customer.pk])
+        self.assertEqual(self.ids(data, 'payments'), [payment.pk])
+
+        self.client.force_authenticate(self.rep)
+        data = self.sync(token)
+        self.assertEqual(self.ids(data, 'customers', 'deleted'), [self.customer.pk])
+        self.assertEqual(self.ids(data, 'payments', 'deleted'), [payment.pk])
+
+    def test_bulk_writes_and_cascade_deletes_are_logged(self):
+        token = self.sync()['token']
+        response = self.client.post('/api/payments/', [
+            {'customer': self.customer.pk, 'paid_amount': '10'},
+            {'customer': self.customer.pk, 'paid_amount': '20'},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        complaint = Complaint.objects.create(rep=self.rep, customer=self.customer, title='Arıza', description='-')
+        data = self.sync(token)
+        payment_ids = [item['id'] for item in response.data]
+        self.assertEqual(self.ids(data, 'payments'), sorted(payment_ids))
+
+        token, customer_id, complaint_id = data['token'], self.customer.pk, complaint.pk
+        self.customer.delete()
+        data = self.sync(token)
+        self.assertEqual(self.ids(data, 'customers', 'deleted'), [customer_id])
+        self.assertEqual(self.ids(data, 'payments', 'deleted'), sorted(payment_ids))
+        self.assertEqual(self.ids(data, 'complaints', 'deleted'), [complaint_id])
+
+    def test_stale_or_invalid_token(self):
+        from datetime import timedelta
+        from io import StringIO
+        from django.core.management import call_command
+        from django.utils import timezone
+
+        long_ago = timezone.now() - timedelta(days=60)
+        old_token = f"{ChangeLog.objects.order_by('-id').first().pk}.{int(long_ago.timestamp())}"
+        data = self.sync(old_token)
+        self.assertTrue(data['reset'])
+        self.assertEqual(self.ids(data, 'customers'), [self.customer.pk])
+        for token in ('abc', '1.99999999999999999'):
+            self.assertEqual(self.client.get('/api/sync/', {'since': token}).status_code, 400)
+
+        payment = Payment.objects.create(customer=self.customer, paid_amount=100)
+        payment.delete()
+        ChangeLog.objects.filter(deleted=True).update(changed_at=long_ago)
+        call_command('prune_changelog', stdout=StringIO())
+        self.assertFalse(ChangeLog.objects.filter(deleted=True).exists())
+
+
+@skipUnless(connection.vendor == 'postgresql', "SQLite yazarları zaten sıraya soktuğu için PostgreSQL gerekir")
+class SyncCommitOrderTests(TransactionTestCase):
+    """
+    İki transaction iç içe geçer: ilki kaydını yazıp açık kalırken ikincisi yazar ve commit eder.
+    İkincisi ilkini beklememeli, arada alınan token da ilk transaction'ın satırını atlamamalı
+    (bkz. sync.lock_changelog).
+    """
+
+    def test_open_transaction_is_not_skipped(self):
+        import threading
+        from django.db import close_old_connections, transaction
+        from .sync import sync_changes
+
+        # Farklı temsilciler: özet işleri ayrı anahtarlı, iki yazma ortak bir satırı kilitlemez
+        admin = User.objects.create_superuser('admin', password='sifre')
+        reps = [User.objects.create_user(f'temsilci{n}', password='sifre', level=2) for n in range(2)]
+        category = ExpenseCategory.objects.create(name='Yakıt')
+        token = sync_changes(admin)['token']
+        first_written = threading.Event()
+        release_first = threading.Event()
+        created = {}
+
+        def first():
+            try:
+                with transaction.atomic():
+                    created['first'] = Expense.objects.create(user=reps[0], category=category, amount=1).pk
+                    first_written.set()
+                    release_first.wait(10)
+            finally:
+                close_old_connections()
+
+        def second():
+            try:
+                created['second'] = Expense.objects.create(user=reps[1], category=category, amount=2).pk
+            finally:
+                close_old_connections()
+
+        first_thread = threading.Thread(target=first)
+        first_thread.start()
+        self.assertTrue(first_written.wait(10))
+        second_thread = threading.Thread(target=second)
+        second_thread.start()
+        try:
+            # İlk transaction açıkken ikincisi commit eder; istemci yalnızca ikincinin satırını görür
+            second_thread.join(10)
+            self.assertFalse(second_thread.is_alive())
+            response = sync_changes(admin, token)
+            ids = {item['id'] for item in response['changes']['expenses']['updated']}
+            self.assertEqual(ids, {created['second']})
+            token = response['token']
+        finally:
+            release_first.set()
+            first_thread.join()
+            second_thread.join()
+
+        response = sync_changes(admin, token)
+        ids = {item['id'] for item in response['changes']['expenses']['updated']}
+        self.assertEqual(ids, {created['first']})
+
+
+class SyncPushTests(TestCase):
+    """/api/sync/push/ çevrimdışı kuyruğu tek istekte uygular ve client_id ile tekrarları ayıklar."""
+
+    def setUp(self):
+        self.rep = User.objects.create_user('temsilci', password='sifre', level=2)
+        self.other_rep = User.objects.create_user('diger', password='sifre', level=2)
+        self.duration = SubscriptionDuration.objects.create(name='12 Ay')
+        self.category = ExpenseCategory.objects.create(name='Yakıt')
+        self.other_customer = Customer.objects.create(
+            rep=self.other_rep, username='baskasi', first_name='A', last_name='B', address='C',
+            subscription_duration=self.duration, subscription_start_date=date(2025, 1, 1), amount=600,
+            agreement_status='olumlu',
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.rep)
+
+    def push(self, operations):
+        response = self.client.post('/api/sync/push/', {'operations': operations}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def queue(self):
+        import uuid
+
+        customer_id = str(uuid.uuid4())
+        return [
+            {'client_id': customer_id, 'collection': 'customers', 'data': {
+                'username': 'sahada', 'first_name': 'Ali', 'last_name': 'Veli', 'address': 'Köy',
+                'subscription_duration': self.duration.pk, 'subscription_start_date': '2025-03-01',
+                'amount': '1200', 'agreement_status': 'olumlu', 'subscription_type': None, 'payment_type': None,
+                # Temsilci başkası adına müşteri açamaz; rep yok sayılır
+                'rep': self.other_rep.pk,
+            }},
+            {'client_id': str(uuid.uuid4()), 'collection': 'payments',
+             'data': {'customer': {'client_id': customer_id}, 'paid_amount': '100'}},
+            {'client_id': str(uuid.uuid4()), 'collection': 'expenses',
+             'data': {'category': self.category.pk, 'amount': '25'}},
+        ]
+
+    def test_replay_creates_once(self):
+        operations = self.queue()
+        results = self.push(operations)
+        self.assertEqual([result['status'] for result in results], ['created'] * 3)
+        customer = Customer.objects.get(username='sahada')
+        self.assertEqual(customer.rep, self.rep)
+        self.assertEqual(Payment.objects.get().customer, customer)
+        self.assertEqual(Expense.objects.get().user, self.rep)
+        self.assertEqual(results[1]['record']['customer'], customer.pk)
+
+        # Bağlantı koptuğu için yanıtı alamayan istemci kuyruğu tekrar gönderir
+        again = self.push(operations)
+        self.assertEqual([result['status'] for result in again], ['duplicate'] * 3)
+        self.assertEqual([result['id'] for result in again], [result['id'] for result in results])
+        self.assertEqual(Customer.objects.filter(username='sahada').count(), 1)
+        self.assertEqual(Payment.objects.count(), 1)
+        self.assertEqual(ClientOperation.objects.count(), 3)
+
+        # Önceki istekte oluşturulan müşteriye client_id ile bağlanan yeni ödeme
+        import uuid
+        later = self.push([{'client_id': str(uuid.uuid4()), 'collection': 'payments',
+                            'data': {'customer': {'client_id': operations[0]['client_id']}, 'paid_amount': '50'}}])
+        self.assertEqual(later[0]['status'], 'created')
+
+    def test_invalid_operations_do_not_block_others(self):
+        import uuid
+
+        operations = self.queue()
+        operations[0]['data']['username'] = ''
+        operations += [
+            {'client_id': str(uuid.uuid4()), 'collection': 'payments',
+             'data': {'customer': self.other_customer.pk, 'paid_amount': '10'}},
+            {'client_id': 'uuid-degil', 'collection': 'payments', 'data': {}},
+            {'client_id': str(uuid.uuid4()), 'collection': 'employees', 'data': {}},
+        ]
+        results = self.push(operations)
+        self.assertEqual([result['status'] for result in results], ['error', 'error', 'created', 'error', 'error', 'error'])
+        self.assertIn('username', results[0]['errors'])
+        self.assertIn('customer', results[1]['errors'])
+        self.assertIn('customer', results[3]['errors'])
+        self.assertEqual(Expense.objects.count(), 1)
+        self.assertFalse(Payment.objects.exists())
+        # Hatalı işlem kaydedilmediği için düzeltilip aynı client_id ile yeniden gönderilebilir
+        operations[0]['data']['username'] = 'sahada'
+        self.assertEqual(self.push(operations[:2])[0]['status'], 'created')
+        self.assertEqual(self.client.post('/api/sync/push/', [], format='json').status_code, 400)
+
+
+class MaterialStockTests(TestCase):
+    """Malzeme işlemleri stoğu düşer, fazlasını reddeder ve malzeme başına yürüyen bakiye tutar."""
+
+    def setUp(self):
+        self.rep = User.objects.create_user('temsilci', password='sifre', level=2)
+        self.material = Material.objects.create(name='Modem', price=10, quantity=5)
+        self.cable = Material.objects.create(name='Kablo', price=1, quantity=3)
+
+    def stock(self, material):
+        material.refresh_from_db()
+        return material.quantity, material.available
+
+    def test_handout_update_and_delete_move_stock(self):
+        from .models import StockError
+
+        first = MaterialTransaction.objects.create(material=self.material, rep=self.rep, quantity=2)
+        second = MaterialTransaction.objects.create(material=self.material, rep=self.rep, quantity=3)
+        self.assertEqual((first.stock_after, second.stock_after), (3, 0))
+        self.assertEqual(self.stock(self.material), (0, False))
+        with self.assertRaises(StockError):
+            MaterialTransaction.objects.create(material=self.material, rep=self.rep, quantity=1)
+        self.assertEqual(MaterialTransaction.objects.count(), 2)
+
+        # Adet azaltılınca fark iade edilir, malzeme değişince eski malzemeye geri eklenir
+        second.quantity = 1
+        second.save()
+        self.assertEqual(self.stock(self.material), (2, True))
+        second.material = self.cable
+        second.save()
+        self.assertEqual(self.stock(self.material), (3, True))
+        self.assertEqual(self.stock(self.cable), (2, True))
+        second.delete()
+        self.assertEqual(self.stock(self.cable), (3, True))
+
+    def test_api_rejects_oversell(self):
+        client = APIClient()
+        client.force_authenticate(self.rep)
+        response = client.post('/api/material-transactions/', {
+            'material': self.material.pk, 'rep': self.rep.pk, 'quantity': 6,
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('quantity', response.data)
+
+        # Toplu yazma: bir öğe bile stoğu aşarsa hiçbir işlem yazılmaz
+        response = client.post('/api/material-transactions/', [
+            {'material': self.material.pk, 'rep': self.rep.pk, 'quantity': 4},
+            {'material': self.cable.pk, 'rep': self.rep.pk, 'quantity': 1},
+            {'material': self.material.pk, 'rep': self.rep.pk, 'quantity': 2},
+        ], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data), [2])
+        self.assertEqual(self.stock(self.material), (5, True))
+        self.assertFalse(MaterialTransaction.objects.exists())
+
+        response = client.post('/api/material-transactions/', [
+            {'material': self.material.pk, 'rep': self.rep.pk, 'quantity': 4},
+            {'material': self.material.pk, 'rep': self.rep.pk, 'quantity': 1, 'stock_after': 99},
+        ], format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([item['stock_after'] for item in response.data], [1, 0])
+        self.assertEqual(self.stock(self.material), (0, False))
+
+        response = client.patch('/api/material-transactions/', [
+            {'id': response.data[0]['id'], 'quantity': 2},
+        ], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stock(self.material), (2, True))
+
+    def test_form_shows_stock_error(self):
+        client = Client()
+        client.force_login(self.rep)
+        response = client.post('/add-material-transaction/', {'material': self.material.pk, 'quantity': 9})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Yetersiz stok')
+        self.assertFalse(MaterialTransaction.objects.exists())
+
+
+class MaterialStockConcurrencyTests(TransactionTestCase):
+    """
+    Aynı anda yapılan çok sayıda dağıtım stoğu hiçbir zaman eksiye düşürmez. PostgreSQL'de
+    (DB_ENGINE=postgresql) satır kilidini ve koşullu F() güncellemesini sınar; SQLite yazarları
+    zaten sıraya soktuğu için orada kilit hatası alan işlem yeniden denenir.
+    Commit sonrası yazılan denetim kaydı da bellek içi SQLite'ta kilide takılabilir; core.audit
+    bunu loglayıp geçer. Bu loglar test çıktısına basılmaz, toplanıp kilit hatası oldukları doğrulanır.
+    """
+
+    def test_parallel_handouts_never_oversell(self):
+        import logging
+        import logging.handlers
+        import threading
+        import time
+        from django.db import OperationalError, close_old_connections
+        from .models import StockError
+
+        audit_logger = logging.getLogger('core.audit')
+        audit_failures = logging.handlers.BufferingHandler(capacity=10000)
+        audit_logger.addHandler(audit_failures)
+        audit_logger.propagate = False
+        self.addCleanup(setattr, audit_logger, 'propagate', True)
+        self.addCleanup(audit_logger.removeHandler, audit_failures)
+
+        rep = User.objects.create_user('temsilci', password='sifre', level=2)
+        material = Material.objects.create(name='Modem', price=10, quantity=25)
+        outcomes = []
+        barrier = threading.Barrier(10)
+
+        def worker():
+            barrier.wait()
+            try:
+                for _ in range(5):
+                    for _attempt in range(500):
+                        try:
+                            MaterialTransaction.objects.create(material=material, rep=rep, quantity=1)
+                            outcomes.append('ok')
+                        except StockError:
+                            outcomes.append('rejected')
+                        except OperationalError:
+                            time.sleep(0.01)
+                            continue
+                        break
+                    else:
+                        outcomes.append('gave_up')
+            finally:
+                close_old_connections()
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        material.refresh_from_db()
+        self.assertEqual(outcomes.count('ok'), 25)
+        self.assertEqual(outcomes.count('rejected'), 25)
+        self.assertEqual((material.quantity, material.available), (0, False))
+        self.assertEqual(
+            sorted(MaterialTransaction.objects.values_list('stock_after', flat=True)), list(range(25)),
+        )
+        for failure in audit_failures.buffer:
+            self.assertEqual(connection.vendor, 'sqlite')
+            self.assertIsInstance(failure.exc_info[1], OperationalError)
+            self.assertIn('locked', str(failure.exc_info[1]))
+
+
+class AuditLogTests(TestCase):
+    """Model değişiklikleri sinyallerle alan bazında denetim kaydına düşer; geri alınan işlem düşmez."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('yonetici', 'yonetici@example.com', 'sifre')
+        self.category = ExpenseCategory.objects.create(name='Yakıt')
+        AuditEntry.objects.all().delete()
+        self.client.force_login(self.admin)
+
+    def test_form_edit_and_delete_record_field_diffs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/edit-expense-category/{self.category.pk}/', {'name': 'Akaryakıt', 'description': ''})
+        entry = AuditEntry.objects.get()
+        self.assertEqual((entry.model, entry.object_id, entry.action), ('core.expensecategory', self.category.pk, 'update'))
+        self.assertEqual(entry.changes, {'name': ['Yakıt', 'Akaryakıt'], 'description': [None, '']})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/delete-expense-category/{self.category.pk}/')
+        deleted = AuditEntry.objects.get(action='delete')
+        self.assertEqual(deleted.changes['name'], ['Akaryakıt', None])
+        self.assertContains(self.client.get('/expense-category-logs/'), 'Akaryakıt')
+
+        # Değişmeyen kayıt ve geri alınan transaction girdi üretmez
+        category = ExpenseCategory.objects.create(name='Yemek')
+        with self.captureOnCommitCallbacks(execute=True):
+            ExpenseCategory.objects.get(pk=category.pk).save()
+        from django.db import transaction
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    ExpenseCategory.objects.create(name='Geçici')
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(AuditEntry.objects.count(), 2)
+
+    def test_bulk_api_update_is_audited(self):
+        rep = User.objects.create_user('temsilci', password='sifre', level=2)
+        expenses = [Expense.objects.create(user=rep, category=self.category, amount=10) for _ in range(2)]
+        AuditEntry.objects.all().delete()
+        api = APIClient()
+        api.force_authenticate(self.admin)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = api.patch('/api/expenses/', [
+                {'id': expenses[0].pk, 'amount': '25.00'}, {'id': expenses[1].pk, 'description': 'not'},
+            ], format='json')
+        self.assertEqual(response.status_code, 200)
+        changes = dict(AuditEntry.objects.filter(action='update').values_list('object_id', 'changes'))
+        self.assertEqual(changes, {
+            expenses[0].pk: {'amount': ['10.00', '25.00']},
+            expenses[1].pk: {'description': [None, 'not']},
+        })
+        self.assertEqual(set(AuditEntry.objects.values_list('actor', flat=True)), {self.admin.pk})
+
+        # Denetim kaydını yalnızca yönetici okuyabilir
+        api.force_authenticate(rep)
+        self.assertEqual(api.get('/api/audit-entries/').data['results'], [])
+
+    def test_rotate_moves_old_entries_to_archive(self):
+        import gzip
+        import json
+        import tempfile
+        from datetime import timedelta
+        from io import StringIO
+        from django.core.management import call_command
+
+        old = AuditEntry.objects.create(
+            model='core.expensecategory', object_id=1, action='create', changes={'name': [None, 'Eski']},
+            timestamp=timezone.now() - timedelta(days=400),
+        )
+        AuditEntry.objects.create(model='core.expensecategory', object_id=2, action='create', timestamp=timezone.now())
+        with tempfile.TemporaryDirectory() as archive_dir:
+            call_command('rotate_audit_log', '--days', '365', '--archive-dir', archive_dir, stdout=StringIO())
+            path = f"{archive_dir}/audit-{old.timestamp:%Y-%m}.jsonl.gz"
+            with gzip.open(path, 'rt', encoding='utf-8') as archive:
+                rows = [json.loads(line) for line in archive]
+        self.assertEqual([(row['id'], row['changes']) for row in rows], [(old.pk, {'name': [None, 'Eski']})])
+        self.assertEqual(list(AuditEntry.objects.values_list('object_id', flat=True)), [2])
+
+
+class AuditMiddlewareTests(TransactionTestCase):
+    """İsteğin tüm denetim girdileri yanıttan sonra tek INSERT ile yazılır."""
+
+    def test_request_entries_are_written_in_one_batch(self):
+        admin = User.objects.create_superuser('yonetici', 'yonetici@example.com', 'sifre')
+        duration = SubscriptionDuration.objects.create(name='12 Ay')
+        customer = Customer.objects.create(
+            rep=admin, username='musteri', first_name='Ad', last_name='Soyad', address='Adres',
+            subscription_duration=duration, subscription_start_date=date(2025, 1, 1),
+            amount=600, agreement_status='olumlu',
+        )
+        AuditEntry.objects.all().delete()
+        client = Client()
+        client.force_login(admin)
+        with CaptureQueriesContext(connection) as queries:
+            client.post('/add-subscription-extra/', {'customer': customer.pk, 'name': 'Ekstra', 'price': '50'})
+        inserts = [q['sql'] for q in queries if q['sql'].startswith('INSERT INTO "core_auditentry"')]
+        self.assertEqual(len(inserts), 1)
+        entries = {entry.model: entry for entry in AuditEntry.objects.all()}
+        self.assertEqual(entries['core.customer'].changes, {'amount': ['600.00', '650.00']})
+        self.assertEqual(entries['core.subscriptionextra'].action, 'create')
+        self.assertEqual({entry.actor_id for entry in entries.values()}, {admin.pk})
+
+
+def failing_job(fail_times, marker):
+    # JobQueueTests için: ilk fail_times denemede hata verir
+    from .models import Job
+
+    job = Job.objects.get(key=marker) if Job.objects.filter(key=marker).exists() else None
+    if job is not None and job.attempts <= fail_times:
+        raise RuntimeError('geçici hata')
+    ExpenseCategory.objects.create(name=marker)
+
+
+class JobQueueTests(TestCase):
+    """Veritabanı iş kuyruğu: ayırma, yeniden deneme, görünmezlik süresi ve worker komutu."""
+
+    def test_retries_with_backoff_then_fails(self):
+        from datetime import timedelta
+        from .jobs import enqueue, run_pending
+        from .models import Job
+
+        enqueue('core.tests.failing_job', {'fail_times': 1, 'marker': 'iki'}, key='iki')
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertEqual(run_pending(), (0, 1))
+        job = Job.objects.get(key='iki')
+        self.assertEqual((job.status, job.attempts), (Job.QUEUED, 1))
+        self.assertIn('geçici hata', job.last_error)
+        # Bekleme süresi dolmadan tekrar denenmez
+        self.assertEqual(run_pending(), (0, 0))
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(run_pending(), (1, 0))
+        self.assertEqual(Job.objects.get(pk=job.pk).status, Job.DONE)
+        self.assertTrue(ExpenseCategory.objects.filter(name='iki').exists())
+
+        enqueue('core.tests.failing_job', {'fail_times': 9, 'marker': 'hep'}, key='hep', max_attempts=1)
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertEqual(run_pending(), (0, 1))
+        self.assertEqual(Job.objects.get(key='hep').status, Job.FAILED)
+
+    def test_expired_claim_is_reclaimed_and_running_key_waits(self):
+        from datetime import timedelta
+        from .jobs import claim, enqueue
+        from .models import Job
+
+        enqueue('core.tests.failing_job', {'fail_times': 0, 'marker': 'dilim'}, key='dilim')
+        [job] = claim('worker-a', 10)
+        # Aynı key'in yeni işi kuyruğa girer ama ilk iş çalışırken ayrılmaz
+        enqueue('core.tests.failing_job', {'fail_times': 0, 'marker': 'dilim'}, key='dilim')
+        self.assertEqual(claim('worker-b', 10), [])
+
+        # worker-a öldü: görünmezlik süresi dolunca iş yeniden ayrılır
+        Job.objects.filter(pk=job.pk).update(locked_until=timezone.now() - timedelta(seconds=1))
+        reclaimed = claim('worker-b', 10)
+        self.assertEqual([(j.pk, j.attempts) for j in reclaimed][0], (job.pk, 2))
+        self.assertTrue(all(j.locked_by.startswith('worker-b/') for j in reclaimed))
+
+    def test_worker_command_drains_queue(self):
+        from io import StringIO
+        from django.core.management import call_command
+        from .jobs import enqueue
+        from .models import Job
+
+        for name in ('bir', 'iki', 'üç'):
+            enqueue('core.tests.failing_job', {'fail_times': 0, 'marker': name})
+        out = StringIO()
+        call_command('run_worker', '--once', '--batch-size', '2', stdout=out)
+        self.assertIn('3 iş tamamlandı', out.getvalue())
+        self.assertEqual(Job.objects.filter(status=Job.DONE).count(), 3)
+
+
+class EmployeeDocumentMediaTests(TestCase):
+    """Belgeler içerik adresli saklanır (aynı dosya tek kopya), boyut sınırlıdır, listede önizleme gösterilir."""
+
+    def setUp(self):
+        import shutil
+        import tempfile
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings = self.settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.admin = User.objects.create_superuser('yonetici', 'yonetici@example.com', 'sifre')
+        self.client.force_login(self.admin)
+        self.employees = Employee.objects.bulk_create([
+            Employee(first_name='Çalışan', last_name=str(n), salary=1000, department='Saha') for n in range(2)
+        ])
+
+    def upload(self, employee, name, content):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        return self.client.post(f'/add-employee-document/{employee.id}/', {
+            'document_choice': 'default', 'default_document': 'Sağlık Belgesi',
+            'file': SimpleUploadedFile(name, content),
+        })
+
+    def stored_files(self):
+        import os
+
+        return sorted(
+            os.path.relpath(os.path.join(root, name), self.media_root)
+            for root, _, names in os.walk(self.media_root) for name in names
+        )
+
+    def test_identical_uploads_share_one_file(self):
+        import hashlib
+        from .models import Job
+
+        content = b'%PDF-1.4 saglik raporu'
+        sha256 = hashlib.sha256(content).hexdigest()
+        for employee, name in zip(self.employees, ('rapor.pdf', 'Rapor Kopya.PDF')):
+            self.assertEqual(self.upload(employee, name, content).status_code, 302)
+
+        documents = list(EmployeeDocument.objects.order_by('pk'))
+        expected = f'employee_documents/{sha256[:2]}/{sha256[2:4]}/{sha256}.pdf'
+        self.assertEqual({doc.file.name for doc in documents}, {expected})
+        self.assertEqual([doc.original_name for doc in documents], ['rapor.pdf', 'Rapor Kopya.PDF'])
+        self.assertEqual({(doc.sha256, doc.size) for doc in documents}, {(sha256, len(content))})
+        self.assertEqual(self.stored_files(), [expected])
+        # Aynı içeriğin önizlemesi tek işte üretilir
+        self.assertEqual(list(Job.objects.values_list('key', flat=True)), [f'thumbnail:{sha256}'])
+
+    def test_oversized_upload_is_rejected(self):
+        with self.settings(UPLOAD_MAX_SIZE=10):
+            response = self.upload(self.employees[0], 'buyuk.pdf', b'x' * 11)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('file', response.context['form'].errors)
+        self.assertFalse(EmployeeDocument.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_listing_shows_thumbnail_instead_of_original(self):
+        from unittest import mock
+        from .jobs import run_pending
+
+        self.upload(self.employees[0], 'foto.png', b'png-icerik')
+        document = EmployeeDocument.objects.get()
+        url = f'/list-employee-documents/{self.employees[0].id}/'
+        # Önizleme hazır olana kadar dosya simgesi gösterilir
+        self.assertContains(self.client.get(url), 'bi-file-earmark-image')
+
+        # Önizleme üretimi Pillow'a bağlıdır; burada üretilen bayt dizisi sabitlenir
+        with mock.patch('core.media.render_thumbnail', return_value=b'jpeg-onizleme'):
+            self.assertEqual(run_pending(), (1, 0))
+        document.refresh_from_db()
+        self.assertEqual(document.thumbnail.name, f'employee_documents/thumbs/{document.sha256[:2]}/{document.sha256}.jpg')
+        for url in (url, f'/admin-panel/view-employee-documents/{self.employees[0].id}/'):
+            response = self.client.get(url)
+            self.assertContains(response, f'<img src="{document.thumbnail.url}"')
+            self.assertContains(response, 'foto.png')
+
+        # Aynı içeriğin sonraki yüklemesi hazır önizlemeyi hemen alır
+        self.upload(self.employees[1], 'foto-kopya.png', b'png-icerik')
+        self.assertEqual(EmployeeDocument.objects.latest('pk').thumbnail.name, document.thumbnail.name)
+
+    def test_store_command_moves_legacy_files(self):
+        import os
+        import tempfile
+        from io import StringIO
+        from django.core.management import call_command
+
+        legacy = EmployeeDocument.objects.create(
+            employee=self.employees[0], document_name='Sağlık Belgesi', file='employee_documents/1/eski.png',
+        )
+        lost = EmployeeDocument.objects.create(
+            employee=self.employees[0], document_name='Sigorta Belgesi', file='employee_documents/1/kayip.png',
+        )
+        with tempfile.TemporaryDirectory() as legacy_dir:
+            os.makedirs(os.path.join(legacy_dir, '1'))
+            with open(os.path.join(legacy_dir, '1', 'eski.png'), 'wb') as f:
+                f.write(b'eski-icerik')
+            with self.settings(EMPLOYEE_DOCUMENT_LEGACY_DIRS=[legacy_dir]):
+                call_command('store_employee_documents', '--delete-originals', stdout=StringIO(), stderr=StringIO())
+            self.assertFalse(os.path.exists(os.path.join(legacy_dir, '1', 'eski.png')))
+
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.original_name, 'eski.png')
+        self.assertEqual(self.stored_files(), [legacy.file.name])
+        with legacy.file.open('rb') as f:
+            self.assertEqual(f.read(), b'eski-icerik')
+        lost.refresh_from_db()
+        self.assertEqual((lost.sha256, lost.file.name), ('', 'employee_documents/1/kayip.png'))
+
+
+class ProtectedMediaTests(TestCase):
+    """Belge dosyaları izin kontrolüyle verilir: Range (206), ETag / If-None-Match (304), X-Accel-Redirect / X-Sendfile."""
+
+    content = b'0123456789abcdef'
+
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings = self.settings(MEDIA_ROOT=self.media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        employee = Employee.objects.create(first_name='Çalışan', last_name='Bir', salary=1000, department='Saha')
+        self.document = EmployeeDocument.objects.create(
+            employee=employee, document_name='Sağlık Belgesi', file=SimpleUploadedFile('rapor.pdf', self.content),
+        )
+        self.url = self.document.file.url
+        rep = User.objects.create_user('temsilci', password='sifre', level=2)
+        self.client.force_login(rep)
+
+    def test_requires_login_and_known_document(self):
+        response = Client().get(self.url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('/login/', response['Location'])
+        self.assertEqual(self.client.get('/media/employee_documents/baska.pdf').status_code, 404)
+        self.assertEqual(self.client.get('/media/../db.sqlite3').status_code, 404)
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), self.content)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(response['Content-Disposition'], 'inline; filename="rapor.pdf"')
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+
+    def test_range_and_conditional_requests(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual((response['Content-Range'], response['Content-Length']), ('bytes 2-5/16', '4'))
+        response = self.client.get(self.url, HTTP_RANGE='bytes=-3')
+        self.assertEqual(b''.join(response.streaming_content), b'def')
+        response = self.client.get(self.url, HTTP_RANGE='bytes=16-')
+        self.assertEqual((response.status_code, response['Content-Range']), (416, 'bytes */16'))
+
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual((response.status_code, response['ETag']), (304, etag))
+        # Eski sürümün parçası istenirse tüm dosya gönderilir
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5', HTTP_IF_RANGE='"eski"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_front_end_server_backends(self):
+        with self.settings(MEDIA_SERVE_BACKEND='nginx'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.document.file.name)
+        self.assertEqual(response.content, b'')
+        with self.settings(MEDIA_SERVE_BACKEND='apache'):
+            response = self.client.get(self.url)
+        self.assertEqual(response['X-Sendfile'], self.document.file.path)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+
+
+class PaymentAnalysisTests(TestCase):
+    """Toplu tahsilat analizi tek müşteri analiziyle, SQL filtreleri Python hesabıyla aynı sonucu verir."""
+
+    def setUp(self):
+        self.rep = User.objects.create_user('temsilci', password='sifre', level=2)
+        self.durations = {
+            name: SubscriptionDuration.objects.create(name=name) for name in ('1 Ay', '3 Ay', '6 Ay', '7 Ay', '12 Ay')
+        }
+        self.counter = 0
+
+    def make_customer(self, duration, amount, days_ago, paid=()):
+        from datetime import timedelta
+
+        self.counter += 1
+        customer = Customer.objects.create(
+            rep=self.rep, username=f'musteri{self.counter}', first_name='Ad', last_name='Soyad', address='Adres',
+            subscription_duration=self.durations[duration],
+            subscription_start_date=date.today() - timedelta(days=days_ago),
+            amount=Decimal(amount), agreement_status='olumlu',
+        )
+        for value in paid:
+            Payment.objects.create(customer=customer, paid_amount=Decimal(value))
+        return customer
+
+    def test_batched_analysis_matches_single_customer(self):
+        from .payment_analysis import analyze_customer_payments
+        from .views import analyze_customer_payment
+
+        self.make_customer('1 Ay', '100', 95, paid=['100'])           # aylık, gecikmeli
+        self.make_customer('1 Ay', '100', 65, paid=['100', '100'])    # aylık, güncel
+        self.make_customer('6 Ay', '600', 100)                        # ödemesiz
+        self.make_customer('3 Ay', '100', 45, paid=['33.33'])         # bölünmeyen taksit
+        self.make_customer('12 Ay', '1200', 400, paid=['1500'])       # fazla ödeme
+        self.make_customer('6 Ay', '600', -10)                        # henüz başlamadı
+
+        rows = analyze_customer_payments(Customer.objects.order_by('pk'))
+        self.assertEqual(len(rows), 6)
+        for row in rows:
+            expected = analyze_customer_payment(Customer.objects.get(pk=row['customer'].pk))
+            # Tek müşteri analizi ödemesiz müşteride sum() gibi int 0 döner; toplu analiz Decimal
+            expected['total_paid'] = Decimal(expected['total_paid']).quantize(Decimal('0.01'))
+            self.assertEqual(row['analysis'], expected)
+            for key, value in expected.items():
+                self.assertIs(type(row['analysis'][key]), type(value), key)
+        self.assertEqual(rows[2]['analysis']['total_paid'], Decimal('0.00'))
+
+    def test_sql_status_matches_python_analysis(self):
+        from decimal import ROUND_CEILING, ROUND_FLOOR
+        from .payment_analysis import (
+            annotate_payment_status, compute_payment_analysis, filter_payment_status, parse_period_count,
+        )
+
+        cent = Decimal('0.01')
+        for duration in ('1 Ay', '3 Ay', '7 Ay', '12 Ay'):
+            period_count = 1 if duration == '1 Ay' else parse_period_count(duration)
+            for amount in ('0', '0.01', '0.10', '100', '100.01', '199.99', '1000000.01'):
+                for days_ago in (-5, 29, 30, 95, 400):
+                    months = max(min(days_ago // 30, 10 ** 6 if duration == '1 Ay' else period_count), 0)
+                    required = Decimal(amount) * months / period_count
+                    paid_options = {
+                        Decimal('0'), required.quantize(cent, ROUND_FLOOR), required.quantize(cent, ROUND_CEILING),
+                        Decimal(amount) + cent,
+                    }
+                    for paid in paid_options:
+                        self.make_customer(duration, amount, days_ago, paid=[paid] if paid else [])
+
+        mismatches = []
+        python_late = set()
+        for customer in annotate_payment_status(Customer.objects.select_related('subscription_duration')):
+            analysis = compute_payment_analysis(
+                customer.subscription_duration.name, customer.subscription_start_date,
+                customer.amount, customer.total_paid,
+            )
+            if analysis['is_late']:
+                python_late.add(customer.pk)
+            sql = (customer.is_late, customer.remaining)
+            python = (analysis['is_late'], analysis['remaining_amount'])
+            if sql != python:
+                mismatches.append((customer.subscription_duration.name, customer.amount,
+                                   customer.subscription_start_date, customer.total_paid, sql, python))
+        self.assertEqual(mismatches, [])
+        # Liste sayfalarının kullandığı WHERE filtresi de aynı kümeyi seçer
+        late = filter_payment_status(Customer.objects.all(), late_flag='1')
+        self.assertEqual(set(late.values_list('pk', flat=True)), python_late)
+        self.assertTrue(python_late)
+
+
+class CustomerBalanceTests(TestCase):
+    """CustomerBalance defteri ödeme yazma yollarıyla güncel kalır; rebuild_customer_balances sapmaları bulur."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('yonetici', 'yonetici@example.com', 'sifre')
+        duration = SubscriptionDuration.objects.create(name='6 Ay')
+        self.customers = [
+            Customer.objects.create(
+                rep=self.admin, username=f'musteri{n}', first_name='Ad', last_name='Soyad', address='Adres',
+                subscription_duration=duration, subscription_start_date=date(2025, 1, 1),
+                amount=600, agreement_status='olumlu',
+            )
+            for n in range(2)
+        ]
+
+    def balances(self):
+        return {
+            customer.pk: (customer.balance.total_paid, customer.balance.payment_count)
+            for customer in Customer.objects.select_related('balance')
+        }
+
+    def test_moving_payment_refreshes_both_customers(self):
+        first, second = self.customers
+        payment = Payment.objects.create(customer=first, paid_amount=Decimal('100'))
+        Payment.objects.create(customer=second, paid_amount=Decimal('50'))
+        self.assertEqual(self.balances(), {first.pk: (Decimal('100'), 1), second.pk: (Decimal('50'), 1)})
+
+        api = APIClient()
+        api.force_authenticate(self.admin)
+        response = api.patch(f'/api/payments/{payment.pk}/', {'customer': second.pk}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.balances(), {first.pk: (Decimal('0'), 0), second.pk: (Decimal('150'), 2)})
+
+        # Bellekteki eski müşteriyle silinse de veritabanındaki müşterinin bakiyesi düşer
+        payment.delete()
+        self.assertEqual(self.balances(), {first.pk: (Decimal('0'), 0), second.pk: (Decimal('50'), 1)})
+
+    @override_settings(JOBS_EAGER=True)
+    def test_admin_bulk_delete_keeps_balance_and_changelog(self):
+        first, second = self.customers
+        payments = [Payment.objects.create(customer=first, paid_amount=Decimal('50')) for _ in range(2)]
+        Payment.objects.create(customer=second, paid_amount=Decimal('30'))
+
+        client = Client()
+        client.force_login(self.admin)
+        response = client.post('/admin/core/payment/', {
+            'action': 'delete_selected', 'post': 'yes',
+            '_selected_action': [payment.pk for payment in payments],
+        })
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(self.balances(), {first.pk: (Decimal('0'), 0), second.pk: (Decimal('30'), 1)})
+        self.assertEqual(
+            set(ChangeLog.objects.filter(collection='payments', deleted=True).values_list('object_id', flat=True)),
+            {payment.pk for payment in payments},
+        )
+        self.assertFalse(DailyRollup.objects.filter(metric='payments', amount=Decimal('100')).exists())
+        self.assertTrue(DailyRollup.objects.filter(metric='payments', amount=Decimal('30')).exists())
+
+    def test_rebuild_check_reports_and_fixes_drift(self):
+        from io import StringIO
+        from django.core.management import CommandError, call_command
+        from .models import CustomerBalance
+
+        first, second = self.customers
+        Payment.objects.create(customer=first, paid_amount=Decimal('100'))
+        call_command('rebuild_customer_balances', '--check', stdout=StringIO())
+
+        CustomerBalance.objects.filter(customer=first).update(total_paid=Decimal('1'))
+        CustomerBalance.objects.filter(customer=second).delete()
+        out = StringIO()
+        with self.assertRaisesMessage(CommandError, '2 müşteri'):
+            call_command('rebuild_customer_balances', '--check', stdout=out)
+        self.assertIn('Sapma: musteri0 total_paid=1.00 (beklenen 100.00)', out.getvalue())
+        self.assertIn('Eksik kayıt: musteri1', out.getvalue())
+        # --check hiçbir şey yazmaz
+        self.assertEqual(CustomerBalance.objects.get(customer=first).total_paid, Decimal('1'))
+
+        call_command('rebuild_customer_balances', stdout=StringIO())
+        call_command('rebuild_customer_balances', '--check', stdout=StringIO())
+        self.assertEqual(self.balances(), {first.pk: (Decimal('100'), 1), second.pk: (Decimal('0'), 0)})
+
+
+@override_settings(LIST_PAGE_SIZE=3)
+class KeysetPaginationTests(TestCase):
+    """HTML liste sayfalarının imleç sayfalaması: iki yön, eşit sıralama değerleri, bozuk imleç, filtreler."""
+
+    def setUp(self):
+        from datetime import datetime, timedelta, timezone as dt_timezone
+
+        self.admin = User.objects.create_superuser('yonetici', 'yonetici@example.com', 'sifre')
+        self.client.force_login(self.admin)
+        self.category = ExpenseCategory.objects.create(name='Yakıt')
+        other = ExpenseCategory.objects.create(name='Yemek')
+        expenses = [Expense.objects.create(user=self.admin, category=self.category, amount=n) for n in range(7)]
+        Expense.objects.create(user=self.admin, category=other, amount=99)
+        # Dört kayıt aynı zamanda: sıralama id ile ayrışmalı
+        moment = datetime(2025, 3, 1, 12, tzinfo=dt_timezone.utc)
+        for index, expense in enumerate(expenses):
+            created = moment if index < 4 else moment + timedelta(hours=index)
+            Expense.objects.filter(pk=expense.pk).update(created_at=created)
+        self.expected = list(
+            Expense.objects.filter(category=self.category).order_by('-created_at', '-pk').values_list('pk', flat=True)
+        )
+
+    def page(self, query=''):
+        response = self.client.get(f'/list-expenses-admin/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.context['page']
+
+    def ids(self, page):
+        return [expense.pk for expense in page.object_list]
+
+    def test_walks_forward_and_back_with_filters(self):
+        page = self.page(f'category={self.category.pk}')
+        forward = [page]
+        while page.has_next:
+            self.assertIn(f'category={self.category.pk}', page.next_query)
+            page = self.page(page.next_query)
+            forward.append(page)
+        self.assertEqual([pk for p in forward for pk in self.ids(p)], self.expected)
+        self.assertEqual([(p.has_previous, p.has_next) for p in forward],
+                         [(False, True), (True, True), (True, False)])
+
+        backward = [page]
+        while page.has_previous:
+            self.assertIn(f'category={self.category.pk}', page.previous_query)
+            page = self.page(page.previous_query)
+            backward.append(page)
+        self.assertEqual([self.ids(p) for p in reversed(backward)], [self.ids(p) for p in forward])
+        self.assertEqual([(p.has_previous, p.has_next) for p in reversed(backward)],
+                         [(False, True), (True, True), (True, False)])
+        self.assertEqual(forward[1].first_query, f'category={self.category.pk}')
+
+    def test_invalid_cursors_show_first_page(self):
+        import base64
+        from .pagination import encode_cursor
+
+        first = self.ids(self.page(f'category={self.category.pk}'))
+        tampered = [
+            '!!!',
+            base64.urlsafe_b64encode(b'tarih|id').decode(),
+            base64.urlsafe_b64encode(b'2025-03-01T12:00:00|5').decode(),  # saat dilimsiz
+            base64.urlsafe_b64encode(b'\xff\xfe').decode(),
+        ]
+        for cursor in tampered:
+            for key in ('after', 'before'):
+                page = self.page(f'category={self.category.pk}&{key}={cursor}')
+                self.assertEqual((self.ids(page), page.has_previous), (first, False), (key, cursor))
+
+        # En yeni kaydın öncesi istenirse ilk sayfa gösterilir
+        newest = Expense.objects.get(pk=self.expected[0])
+        page = self.page(f'category={self.category.pk}&before={encode_cursor(newest.created_at, newest.pk)}')
+        self.assertEqual((self.ids(page), page.has_previous, page.has_next), (first, False, True))
+
+    def test_previous_page_knows_when_nothing_follows(self):
+        from .pagination import encode_cursor
+
+        # Son sayfadaki tek kayıt silindikten sonra "Önceki" ile gelinen sayfanın ardı boştur
+        oldest = Expense.objects.get(pk=self.expected[-1])
+        cursor = encode_cursor(oldest.created_at, oldest.pk)
+        oldest.delete()
+        page = self.page(f'category={self.category.pk}&before={cursor}')
+        self.assertEqual(self.ids(page), self.expected[3:6])
+        self.assertEqual((page.has_previous, page.has_next), (True, False))
+
+
+class ApiCursorPaginationTests(TestCase):
+    """API imleç sayfalaması: sayfa boyutu sınırı, imleçle gidip gelme, araya eklenen kayıtlarda kararlı sıra."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser('yonetici', 'yonetici@example.com', 'sifre')
+        self.api = APIClient()
+        self.api.force_authenticate(self.admin)
+        category = ExpenseCategory.objects.create(name='Yakıt')
+        self.expenses = [Expense.objects.create(user=self.admin, category=category, amount=n) for n in range(7)]
+
+    def walk(self, url, key='next'):
+        pages = []
+        while url:
+            data = self.api.get(url).data
+            pages.append([row['id'] for row in data['results']])
+            url = data[key]
+        return pages
+
+    def test_page_size_is_capped_by_runtime_setting(self):
+        self.assertEqual(len(self.api.get('/api/expenses/?page_size=6').data['results']), 6)
+        with self.settings(API_MAX_PAGE_SIZE=4):
+            self.assertEqual(len(self.api.get('/api/expenses/?page_size=6').data['results']), 4)
+        with self.settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'PAGE_SIZE': 2}):
+            self.assertEqual(len(self.api.get('/api/expenses/').data['results']), 2)
+
+    def test_cursor_round_trip_is_stable(self):
+        expected = sorted((expense.pk for expense in self.expenses), reverse=True)
+        pages = self.walk('/api/expenses/?page_size=3')
+        self.assertEqual(pages, [expected[:3], expected[3:6], expected[6:]])
+
+        # Sayfalar arasında eklenen kayıt sonraki sayfaları kaydırmaz
+        first = self.api.get('/api/expenses/?page_size=3').data
+        Expense.objects.create(user=self.admin, category=self.expenses[0].category, amount=100)
+        rest = self.walk(first['next'])
+        self.assertEqual(rest, [expected[3:6], expected[6:]])
+
+        # İkinci sayfadan geri dönüş ilk sayfayı verir; "previous" sayfa boyutunu korur
+        second = self.api.get(first['next']).data
+        back = self.api.get(second['previous']).data
+        self.assertEqual([row['id'] for row in back['results']], expected[:3])
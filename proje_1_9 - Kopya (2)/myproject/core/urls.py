@@ -1,7 +1,6 @@
 from django.urls import path
 from . import views
 from django.conf import settings
-from django.conf.urls.static import static
 
 
 
@@ -71,4 +70,11 @@ urlpatterns = [
     path('list-subscription-extras-rep/', views.list_subscription_extras_rep, name='list_subscription_extras_rep'),
     path('list-subscription-extras-admin/', views.list_subscription_extras_admin, name='list_subscription_extras_admin'),
     path('cancel-subscription-extra/<int:extra_id>/', views.cancel_subscription_extra, name='cancel_subscription_extra'),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path('search/', views.global_search_page, name='global_search'),
+    path('export-payments-admin/', views.export_payments_admin, name='export_payments_admin'),
+    path('export-expenses-admin/', views.export_expenses_admin, name='export_expenses_admin'),
+    path('export-material-transactions-admin/', views.export_material_transactions_admin, name='export_material_transactions_admin'),
+    path('audit-log/', views.audit_log, name='audit_log'),
+    # Yüklenen dosyalar izin kontrolüyle verilir (bkz. views.protected_media)
+    path(f"{settings.MEDIA_URL.lstrip('/')}<path:name>", views.protected_media, name='protected_media'),
+]
@@ -4,7 +4,12 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.views import LoginView
 from django import forms
 from django.db.models import Q
-from .models import User, ExpenseCategory, Expense, ExpenseCategoryLog, EmployeeTaskLog
+from .models import User, ExpenseCategory, Expense, AuditEntry
+from .pagination import keyset_paginate
+from .search import search_filter
+from .db_routing import replica_reads
+from .reference_data import CachedModelChoiceField, reference_get, reference_list
+from .rollups import dashboard_stats, stats_period
 
 # Inline temsilci ekleme formu (önceki adımda tanımlanan)
 class TemsilciForm(forms.ModelForm):
@@ -39,17 +44,21 @@ class TemsilciLoginView(LoginView):
         login(self.request, user)
         return redirect('temsilci_panel')
 
+@replica_reads
 @login_required
 def admin_panel(request):
     if not request.user.is_superuser:
         return redirect('home')
-    return render(request, 'admin_panel.html')
+    stats = dashboard_stats(request.user, *stats_period({}))
+    return render(request, 'admin_panel.html', {'stats': stats})
 
+@replica_reads
 @login_required
 def temsilci_panel(request):
     if request.user.is_superuser:
         return redirect('home')
-    return render(request, 'temsilci_panel.html')
+    stats = dashboard_stats(request.user, *stats_period({}))
+    return render(request, 'temsilci_panel.html', {'stats': stats})
 
 @login_required
 def add_temsilci(request):
@@ -86,11 +95,11 @@ def list_temsilci(request):
     level       = request.GET.get('level', '')
     
     if username:
-        temsilciler = temsilciler.filter(username__icontains=username)
+        temsilciler = search_filter(temsilciler, 'username', username)
     if first_name:
-        temsilciler = temsilciler.filter(first_name__icontains=first_name)
+        temsilciler = search_filter(temsilciler, 'first_name', first_name)
     if last_name:
-        temsilciler = temsilciler.filter(last_name__icontains=last_name)
+        temsilciler = search_filter(temsilciler, 'last_name', last_name)
     if department:
         temsilciler = temsilciler.filter(department__icontains=department)
     if level:
@@ -116,7 +125,7 @@ def temsilci_logout(request):
 def list_expense_categories(request):
     if not request.user.is_superuser:
         return redirect('home')
-    categories = ExpenseCategory.objects.all()
+    categories = reference_list(ExpenseCategory)
     return render(request, "list_expense_categories.html", {"categories": categories})
 
 # 2. Temsilci: Harcama Girişi  
@@ -129,43 +138,49 @@ def add_expense(request):
         amount = request.POST.get("amount")
         description = request.POST.get("description", "")
         if category_id and amount:
-            try:
-                category = ExpenseCategory.objects.get(id=category_id)
+            category = reference_get(ExpenseCategory, category_id)
+            if category is not None:  # Hatalı kategori id girildiğinde form yeniden gösterilir
                 Expense.objects.create(user=request.user, category=category, amount=amount, description=description)
                 return redirect("list_expenses_rep")
-            except ExpenseCategory.DoesNotExist:
-                pass  # Hatalı kategori id girildiğinde yapılacak
-    context = {"categories": ExpenseCategory.objects.all()}
+    context = {"categories": reference_list(ExpenseCategory)}
     return render(request, "add_expense.html", context)
 
 # 3. Yönetici: Temsilcilerin Harcamalarını Detaylı Filtreleme ile Listeleme  
-@login_required
-def list_expenses_admin(request):
-    if not request.user.is_superuser:
-        return redirect('home')
-    expenses = Expense.objects.all().order_by("-created_at")
+def filter_admin_expenses(params):
+    # Liste sayfası ve CSV dışa aktarma aynı filtreleri kullanır
+    expenses = Expense.objects.select_related("user", "category").order_by("-created_at")
     # Filtreleme parametreleri: temsilci kullanıcı adı, kategori, tarih aralığı
-    username    = request.GET.get('username', '')
-    category_id = request.GET.get('category', '')
-    date_from   = request.GET.get('date_from', '')
-    date_to     = request.GET.get('date_to', '')
+    username    = params.get('username', '')
+    category_id = params.get('category', '')
+    date_from   = params.get('date_from', '')
+    date_to     = params.get('date_to', '')
     
     if username:
-        expenses = expenses.filter(user__username__icontains=username)
+        expenses = search_filter(expenses, 'user__username', username)
     if category_id:
         expenses = expenses.filter(category__id=category_id)
     if date_from:
         expenses = expenses.filter(created_at__gte=date_from)
     if date_to:
         expenses = expenses.filter(created_at__lte=date_to)
-    
+    return expenses
+
+@replica_reads
+@login_required
+def list_expenses_admin(request):
+    if not request.user.is_superuser:
+        return redirect('home')
+    expenses = filter_admin_expenses(request.GET)
+    page = keyset_paginate(request, expenses, "created_at")
     context = {
-        'expenses': expenses,
-        'categories': ExpenseCategory.objects.all(),
+        'expenses': page.object_list,
+        'page': page,
+        'categories': reference_list(ExpenseCategory),
     }
     return render(request, "list_expenses_admin.html", context)
 
 # 4. Temsilci: Kendi Harcamalarını Filtreleme ile Listeleme  
+@replica_reads
 @login_required
 def list_expenses_rep(request):
     if request.user.is_superuser:
@@ -185,7 +200,7 @@ def list_expenses_rep(request):
     
     context = {
         'expenses': expenses,
-        'categories': ExpenseCategory.objects.all(),
+        'categories': reference_list(ExpenseCategory),
     }
     return render(request, "list_expenses_rep.html", context)
 
@@ -209,7 +224,7 @@ def add_expense_category(request):
 def list_expense_categories(request):
     if not request.user.is_superuser:
         return redirect('home')
-    categories = ExpenseCategory.objects.all()
+    categories = reference_list(ExpenseCategory)
     return render(request, "list_expense_categories.html", {"categories": categories})
 
 # Inline form for düzenleme
@@ -229,14 +244,8 @@ def edit_expense_category(request, category_id):
     if request.method == "POST":
         form = ExpenseCategoryForm(request.POST, instance=category)
         if form.is_valid():
+            # Değişiklik denetim kaydına sinyalle düşer (core/audit.py)
             form.save()
-            # Log kaydı oluşturma
-            ExpenseCategoryLog.objects.create(
-                category_name=category.name,
-                operation='edit',
-                performed_by=request.user,
-                details="Kategori düzenlendi."
-            )
             return redirect('list_expense_categories')
     else:
         form = ExpenseCategoryForm(instance=category)
@@ -252,13 +261,6 @@ def delete_expense_category(request, category_id):
         return redirect('list_expense_categories')
     
     if request.method == "POST":
-        # Silme işleminden önce log kaydı
-        ExpenseCategoryLog.objects.create(
-            category_name=category.name,
-            operation='delete',
-            performed_by=request.user,
-            details="Kategori silindi."
-        )
         category.delete()
         return redirect('list_expense_categories')
     
@@ -269,8 +271,9 @@ def delete_expense_category(request, category_id):
 def expense_category_logs(request):
     if not request.user.is_superuser:
         return redirect('home')
-    logs = ExpenseCategoryLog.objects.all().order_by("-performed_at")
-    return render(request, "expense_category_logs.html", {"logs": logs})
+    logs = AuditEntry.objects.filter(model="core.expensecategory").select_related("actor")
+    page = keyset_paginate(request, logs, "timestamp")
+    return render(request, "expense_category_logs.html", {"logs": page.object_list, "page": page})
 
 
 # core/views.py
@@ -302,6 +305,12 @@ class CustomerForm(forms.ModelForm):
         widgets = {
             'subscription_start_date': forms.DateInput(attrs={'type': 'date'}),
         }
+        # Seçenekler ve doğrulama referans veri önbelleğinden
+        field_classes = {
+            'subscription_type': CachedModelChoiceField,
+            'subscription_duration': CachedModelChoiceField,
+            'payment_type': CachedModelChoiceField,
+        }
 
 @login_required
 def add_customer(request):
@@ -320,6 +329,7 @@ def add_customer(request):
         form = CustomerForm()
     return render(request, "add_customer.html", {"form": form})
 
+@replica_reads
 @login_required
 def list_customers_rep(request):
     # Yalnızca 2. kademe ve üzeri temsilciler kendi müşterilerini görebilir.
@@ -336,9 +346,9 @@ def list_customers_rep(request):
     agreement_status = request.GET.get('agreement_status', '')
     
     if username:
-        customers = customers.filter(username__icontains=username)
+        customers = search_filter(customers, 'username', username)
     if first_name:
-        customers = customers.filter(first_name__icontains=first_name)
+        customers = search_filter(customers, 'first_name', first_name)
     if subscription_type:
         try:
             subscription_type_id = int(subscription_type)
@@ -350,15 +360,16 @@ def list_customers_rep(request):
     
     context = {
         'customers': customers,
-        'subscription_types': SubscriptionType.objects.all(),
+        'subscription_types': reference_list(SubscriptionType),
     }
     return render(request, "list_customers_rep.html", context)
 
+@replica_reads
 @login_required
 def list_customers_admin(request):
     if not request.user.is_superuser:
         return redirect('home')
-    customers = Customer.objects.all().order_by("-created_at")
+    customers = Customer.objects.select_related("rep", "subscription_type").order_by("-created_at")
     
     # Filtreleme: temsilci kullanıcı adı, müşteri kullanıcı adı, abonelik türü, anlaşma durumu
     rep_username = request.GET.get('rep_username', '')
@@ -367,17 +378,19 @@ def list_customers_admin(request):
     agreement_status = request.GET.get('agreement_status', '')
     
     if rep_username:
-        customers = customers.filter(rep__username__icontains=rep_username)
+        customers = search_filter(customers, 'rep__username', rep_username)
     if customer_username:
-        customers = customers.filter(username__icontains=customer_username)
+        customers = search_filter(customers, 'username', customer_username)
     if subscription_type:
         customers = customers.filter(subscription_type__id=subscription_type)
     if agreement_status:
         customers = customers.filter(agreement_status=agreement_status)
     
+    page = keyset_paginate(request, customers, "created_at")
     context = {
-        'customers': customers,
-        'subscription_types': SubscriptionType.objects.all(),
+        'customers': page.object_list,
+        'page': page,
+        'subscription_types': reference_list(SubscriptionType),
     }
     return render(request, "list_customers_admin.html", context)
 
@@ -403,7 +416,7 @@ def add_subscription_type(request):
 def list_subscription_types(request):
     if not request.user.is_superuser:
         return redirect('home')
-    types = SubscriptionType.objects.all()
+    types = reference_list(SubscriptionType)
     return render(request, 'list_subscription_types.html', {'subscription_types': types})
 
 
@@ -430,7 +443,7 @@ def add_subscription_duration(request):
 def list_subscription_durations(request):
     if not request.user.is_superuser:
         return redirect('home')
-    durations = SubscriptionDuration.objects.all()
+    durations = reference_list(SubscriptionDuration)
     return render(request, 'list_subscription_durations.html', {'subscription_durations': durations})
 
 
@@ -457,10 +470,11 @@ def add_payment_type(request):
 def list_payment_types(request):
     if not request.user.is_superuser:
         return redirect('home')
-    payment_types = PaymentType.objects.all()
+    payment_types = reference_list(PaymentType)
     return render(request, 'list_payment_types.html', {'payment_types': payment_types})
 
 
+@replica_reads
 @login_required
 def list_pending_customers(request):
     # Sadece 2. kademe ve üzeri temsilciler (superuser olmayanlar) kendi müşterileri üzerinde işlem yapabilsin.
@@ -490,6 +504,9 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django import forms
 from .models import Employee, EmployeeTask, EmployeeDocument
+from .employee_documents import (
+    can_view_documents, required_documents, missing_documents_by_employee, attach_missing_documents,
+)
 
 # Çalışan ekleme formu
 class EmployeeForm(forms.ModelForm):
@@ -510,34 +527,6 @@ def add_employee(request):
         form = EmployeeForm()
     return render(request, "add_employee.html", {"form": form})
 
-# Çalışanları detaylı filtreleme ile listeleme (Yönetici)
-@login_required
-def list_employees_admin(request):
-    if not request.user.is_superuser:
-        return redirect('home')
-    employees = Employee.objects.all().order_by("-created_at")
-    
-    # Filtreleme: ad, soyad, departman, maaş aralığı
-    first_name = request.GET.get('first_name', '')
-    last_name = request.GET.get('last_name', '')
-    department = request.GET.get('department', '')
-    min_salary = request.GET.get('min_salary', '')
-    max_salary = request.GET.get('max_salary', '')
-    
-    if first_name:
-        employees = employees.filter(first_name__icontains=first_name)
-    if last_name:
-        employees = employees.filter(last_name__icontains=last_name)
-    if department:
-        employees = employees.filter(department__icontains=department)
-    if min_salary:
-        employees = employees.filter(salary__gte=min_salary)
-    if max_salary:
-        employees = employees.filter(salary__lte=max_salary)
-    
-    context = {'employees': employees}
-    return render(request, "list_employees_admin.html", context)
-
 # Çalışan görevlerini güncelleme (Görev ataması)
 class EmployeeTaskForm(forms.ModelForm):
     class Meta:
@@ -567,12 +556,6 @@ def assign_employee_task(request, employee_id):
     return render(request, "assign_employee_task.html", {"form": form, "employee": employee})
 
 
-DEFAULT_DOCUMENT_CHOICES = [
-    ('Sağlık Belgesi', 'Sağlık Belgesi'),
-    ('Sigorta Belgesi', 'Sigorta Belgesi'),
-    ('İkametgah Belgesi', 'İkametgah Belgesi'),
-]
-
 class EmployeeDocumentForm(forms.ModelForm):
     DOCUMENT_CHOICES = [
         ('default', 'Varsayılan Belge Seç'),
@@ -585,7 +568,6 @@ class EmployeeDocumentForm(forms.ModelForm):
         label="Belge Türü Seçimi"
     )
     default_document = forms.ChoiceField(
-        choices=DEFAULT_DOCUMENT_CHOICES,
         required=False,
         label="Varsayılan Belge Seçiniz"
     )
@@ -598,6 +580,11 @@ class EmployeeDocumentForm(forms.ModelForm):
     class Meta:
         model = EmployeeDocument
         fields = ['file']  # Belge dosyası
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Zorunlu belgeler ayarlardan her formda yeniden okunur
+        self.fields['default_document'].choices = [(name, name) for name in required_documents()]
         
     def clean(self):
         cleaned_data = super().clean()
@@ -638,8 +625,11 @@ def add_employee_document(request, employee_id):
 @login_required
 def list_employee_documents(request, employee_id):
     # Hem yöneticiler hem de temsilciler, çalışan belgelerini görebilir.
+    if not can_view_documents(request.user):
+        return redirect('home')
     employee = get_object_or_404(Employee, id=employee_id)
-    documents = employee.documents.all().order_by("-uploaded_at")
+    # Listede dosyaların kendisi değil önizlemeleri (thumbnail) yüklenir
+    documents = employee.documents.select_related("uploaded_by").order_by("-uploaded_at")
     return render(request, "list_employee_documents.html", {"employee": employee, "documents": documents})
 
 
@@ -654,55 +644,37 @@ def list_employees_for_rep(request):
     return render(request, "list_employees_for_rep.html", context)
 
 
+@replica_reads
 @login_required
 def list_employees_admin(request):
     if not request.user.is_superuser:
         return redirect('home')
     employees = Employee.objects.all().order_by("-created_at")
-    
-    # Varsayılan (zorunlu) belgeler
-    required_documents = ["Sağlık Belgesi", "Sigorta Belgesi", "İkametgah Belgesi"]
-    for emp in employees:
-        uploaded_doc_names = list(emp.documents.values_list("document_name", flat=True))
-        missing = [doc for doc in required_documents if doc not in uploaded_doc_names]
-        emp.missing_docs = missing  # Bu bilgiyi template'te kullanacağız.
-    
-    context = {
-        'employees': employees,
-        'required_documents': required_documents,
-    }
-    return render(request, "list_employees_admin.html", context)
+    page = keyset_paginate(request, employees, "created_at")
 
+    # Zorunlu belgeler kayıt defterinden; eksikler sayfadaki tüm çalışanlar için tek sorguda
+    required = required_documents()
+    attach_missing_documents(page.object_list, required)
 
-@login_required
-def admin_view_employee_documents(request, employee_id):
-    if not request.user.is_superuser:
-        return redirect('home')
-    employee = get_object_or_404(Employee, id=employee_id)
-    required_documents = ["Sağlık Belgesi", "Sigorta Belgesi", "İkametgah Belgesi"]
-    uploaded_doc_names = list(employee.documents.values_list("document_name", flat=True))
-    missing = [doc for doc in required_documents if doc not in uploaded_doc_names]
     context = {
-         'employee': employee,
-         'documents': employee.documents.all().order_by("-uploaded_at"),
-         'missing_docs': missing,
-         'required_documents': required_documents,
+        'employees': page.object_list,
+        'page': page,
+        'required_documents': required,
     }
-    return render(request, "admin_view_employee_documents.html", context)
+    return render(request, "list_employees_admin.html", context)
+
 
 @login_required
 def admin_view_employee_documents(request, employee_id):
     if not request.user.is_superuser:
         return redirect('home')
     employee = get_object_or_404(Employee, id=employee_id)
-    required_documents = ["Sağlık Belgesi", "Sigorta Belgesi", "İkametgah Belgesi"]
-    uploaded_doc_names = list(employee.documents.values_list("document_name", flat=True))
-    missing = [doc for doc in required_documents if doc not in uploaded_doc_names]
+    required = required_documents()
     context = {
          'employee': employee,
-         'documents': employee.documents.all().order_by("-uploaded_at"),
-         'missing_docs': missing,
-         'required_documents': required_documents,
+         'documents': employee.documents.select_related("uploaded_by").order_by("-uploaded_at"),
+         'missing_docs': missing_documents_by_employee([employee.pk], required)[employee.pk],
+         'required_documents': required,
     }
     return render(request, "admin_view_employee_documents.html", context)
 
@@ -725,12 +697,6 @@ def update_employee_task(request, task_id):
         form = EmployeeTaskForm(request.POST, instance=task)
         if form.is_valid():
             form.save()
-            EmployeeTaskLog.objects.create(
-                task=task,
-                operation="update",
-                performed_by=request.user,
-                details="Görev güncellendi."
-            )
             return redirect('list_employee_tasks')
     else:
         form = EmployeeTaskForm(instance=task)
@@ -743,12 +709,6 @@ def delete_employee_task(request, task_id):
         return redirect('home')
     task = get_object_or_404(EmployeeTask, id=task_id)
     if request.method == "POST":
-        EmployeeTaskLog.objects.create(
-            task=task,
-            operation="delete",
-            performed_by=request.user,
-            details="Görev silindi."
-        )
         task.delete()
         return redirect('list_employee_tasks')
     return render(request, "delete_employee_task.html", {"task": task})
@@ -758,15 +718,16 @@ def delete_employee_task(request, task_id):
 def list_employee_task_logs(request):
     if not request.user.is_superuser:
         return redirect('home')
-    logs = EmployeeTaskLog.objects.all().order_by("-timestamp")
-    return render(request, "list_employee_task_logs.html", {"logs": logs})
+    logs = AuditEntry.objects.filter(model="core.employeetask").select_related("actor")
+    page = keyset_paginate(request, logs, "timestamp")
+    return render(request, "list_employee_task_logs.html", {"logs": page.object_list, "page": page})
 
 
 
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django import forms
-from .models import Material, MaterialTransaction
+from .models import Material, MaterialTransaction, StockError
 # Eğer Customer modeli varsa import edin: from .models import Customer
 
 # Inline MaterialForm
@@ -832,6 +793,9 @@ def delete_material(request, material_id):
 
 # Inline Transaction Form
 class InlineMaterialTransactionForm(forms.ModelForm):
+    # Yalnızca verilebilir (stoğu olan) malzemeler listelenir
+    material = forms.ModelChoiceField(queryset=Material.objects.filter(available=True).order_by("name"))
+
     class Meta:
         model = MaterialTransaction
         fields = ['material', 'customer', 'quantity', 'note']
@@ -848,24 +812,56 @@ def add_material_transaction(request):
         if form.is_valid():
             transaction = form.save(commit=False)
             transaction.rep = request.user
-            transaction.save()
-            return redirect('list_material_transactions_for_rep')
+            try:
+                # Stok, malzeme satırı kilitlenerek düşülür; aynı anda verilen son adetler eksiye düşürmez
+                transaction.save()
+            except StockError as exc:
+                form.add_error('quantity', exc.messages)
+            else:
+                return redirect('list_material_transactions_for_rep')
     else:
         form = InlineMaterialTransactionForm()
     
     return render(request, "add_material_transaction.html", {"form": form})
 
 
+def filter_admin_material_transactions(params):
+    # Liste sayfası ve CSV dışa aktarma aynı filtreleri kullanır
+    transactions = MaterialTransaction.objects.select_related("material", "rep", "customer").order_by("-transaction_date")
+    # Filtreleme parametreleri: malzeme, temsilci kullanıcı adı, tarih aralığı
+    material_id = params.get('material', '')
+    username    = params.get('username', '')
+    date_from   = params.get('date_from', '')
+    date_to     = params.get('date_to', '')
+
+    if material_id:
+        transactions = transactions.filter(material__id=material_id)
+    if username:
+        transactions = search_filter(transactions, 'rep__username', username)
+    if date_from:
+        transactions = transactions.filter(transaction_date__gte=date_from)
+    if date_to:
+        transactions = transactions.filter(transaction_date__lte=date_to)
+    return transactions
+
+@replica_reads
 @login_required
 def list_material_transactions_admin(request):
     # Yalnızca yönetici tüm işlemleri görebilir
     if not request.user.is_superuser:
         return redirect('home')
     
-    transactions = MaterialTransaction.objects.all().order_by("-transaction_date")
-    return render(request, "list_material_transactions_admin.html", {"transactions": transactions})
+    transactions = filter_admin_material_transactions(request.GET)
+    page = keyset_paginate(request, transactions, "transaction_date")
+    context = {
+        "transactions": page.object_list,
+        "page": page,
+        "materials": Material.objects.order_by("name"),
+    }
+    return render(request, "list_material_transactions_admin.html", context)
 
 
+@replica_reads
 @login_required
 def list_material_transactions_for_rep(request):
     # 2. kademe ve üzeri temsilciler kendi işlemlerini görebilir
@@ -881,7 +877,7 @@ def list_material_transactions_for_rep(request):
 
 from datetime import date, timedelta
 
-from datetime import date, timedelta
+from .payment_analysis import compute_payment_analysis, analyze_customer_payments, filter_payment_status
 
 def analyze_customer_payment(customer):
     """
@@ -889,128 +885,16 @@ def analyze_customer_payment(customer):
     - Eğer subscription_duration.name == "1 Ay" ise, süresiz aylık yaklaşım.
       (her ay bir taksit, abonelik durmaz/iptal edilmezse sonsuza dek sürer)
     - Yoksa, "6 Ay", "12 Ay" vb. ise sınırlı süreli taksit yaklaşımı.
+    Tek müşteri içindir; listeler için analyze_customer_payments kullanılır.
     """
-    # Ortak veriler
-    subscription_duration_str = customer.subscription_duration.name  # "1 Ay", "6 Ay"
-    start_date = customer.subscription_start_date
-    total_amount = customer.amount  # Müşterinin 'amount' alanı
     payments = customer.payments.all()
     total_paid = sum(p.paid_amount for p in payments)
-    today = date.today()
-
-    # Eğer start_date ileride ise (henüz başlamadıysa):
-    if start_date > today:
-        return {
-            "total_amount": total_amount,
-            "total_paid": total_paid,
-            "remaining_amount": total_amount,  # ödemeler henüz başlamadı
-            "is_late": False,
-            "next_payment_date": start_date,  # ilk ödeme start_date baz alınabilir
-            "missed_months": 0,
-            "message": "Abonelik henüz başlamadı.",
-        }
-
-    # 1) Ayırt et: "1 Ay" → Süresiz aylık, diğer → sınırlı
-    if subscription_duration_str.strip().lower() == "1 ay":
-        # SÜRESİZ AYLIK YAKLAŞIM
-
-        # Aylık ücret: customer.amount olduğunu varsayıyoruz
-        monthly_cost = total_amount  # Her ay ödenmesi beklenen ücret
-
-        # Kaç ay geçti?
-        days_diff = (today - start_date).days
-        months_passed = days_diff // 30  # Yaklaşık her 30 günde 1 ay
-
-        if months_passed < 0:
-            months_passed = 0
-
-        # Bu güne kadar ödenmesi gereken toplam
-        required_total = months_passed * monthly_cost
-
-        # Gecikme var mı?
-        if total_paid < required_total:
-            # Kaç aylık gecikme?
-            missed_amount = required_total - total_paid
-            missed_months = int(missed_amount // monthly_cost)
-            if missed_months < 1 and missed_amount > 0:
-                missed_months = 1  # kısmi bir aylık borç
-            is_late = True if missed_months >= 1 else False
-        else:
-            missed_months = 0
-            is_late = False
-
-        remaining_amount = 0  # Süresiz olduğundan tam "kalan" yok, ama o anki gecikme => missed_months
-        # Bir sonraki ödeme tarihi: start_date + months_passed * 30
-        next_payment_date = start_date + timedelta(days=(months_passed+1)*30)
-
-        return {
-            "total_amount": f"Süresiz (Her ay {monthly_cost} TL)",
-            "total_paid": total_paid,
-            "remaining_amount": remaining_amount,  # Süresiz -> o anda biriken borç var
-            "is_late": is_late,
-            "next_payment_date": next_payment_date,
-            "missed_months": missed_months,
-            "message": f"Aylık ödenmesi gereken: {monthly_cost} TL / Gecikmiş ay: {missed_months}",
-        }
-    else:
-        # SINIRLI SÜRELİ YAKLAŞIM, ÖRN: "6 Ay" = 6 taksit
-        try:
-            period_count = int(subscription_duration_str.split()[0])  # "6" -> 6
-        except:
-            period_count = 1
-
-        if period_count <= 0:
-            period_count = 1
-
-        # Periyot başına ücret
-        per_period_amount = total_amount / period_count
-
-        # Kaç gün geçti
-        days_passed = (today - start_date).days
-        if days_passed < 0:
-            days_passed = 0
-
-        # Kaç periyot ödenmiş olmalı?
-        # Basit mantık: her periyot 30 gün -> n = days_passed // 30
-        months_passed = days_passed // 30
-        if months_passed > period_count:
-            months_passed = period_count  # maksimum
-
-        # required_total = months_passed * per_period_amount
-        required_total = months_passed * per_period_amount
-
-        # Gecikme var mı?
-        missed_amount = max(0, required_total - total_paid)
-        missed_months = int(missed_amount // per_period_amount)
-        if missed_months < 1 and missed_amount > 0:
-            missed_months = 1
-        is_late = missed_months >= 1
-
-        # Kalan tutar
-        remaining_amount = max(0, total_amount - total_paid)
-
-        # Bir sonraki ödeme periyot index
-        periyot_odendi = int(total_paid // per_period_amount)
-        if periyot_odendi > period_count:
-            periyot_odendi = period_count
-        next_period_index = periyot_odendi + 1
-        if next_period_index > period_count:
-            next_period_index = period_count
-
-        next_payment_date = None
-        if periyot_odendi < period_count:
-            offset_days = (next_period_index - 1)*30
-            next_payment_date = start_date + timedelta(days=offset_days)
-
-        return {
-            "total_amount": total_amount,
-            "total_paid": total_paid,
-            "remaining_amount": remaining_amount,
-            "is_late": is_late,
-            "next_payment_date": next_payment_date,
-            "missed_months": missed_months,
-            "message": f"Taksitli ({period_count} Ay). Geciken periyot: {missed_months}",
-        }
+    return compute_payment_analysis(
+        customer.subscription_duration.name,  # "1 Ay", "6 Ay"
+        customer.subscription_start_date,
+        customer.amount,  # Müşterinin 'amount' alanı
+        total_paid,
+    )
 
 
 
@@ -1050,65 +934,50 @@ def add_payment(request):
     })
 
 
-@login_required
-def list_payments_rep(request):
-    # 2. kademe temsilci
-    if request.user.is_superuser or (request.user.level and request.user.level < 2):
-        return redirect('home')
+def filter_payment_customers(customers, params):
+    """
+    Tahsilat sayfalarının müşteri filtreleri (liste sayfaları ve CSV dışa aktarma ortak kullanır).
+    Tarih aralığı (date_from, date_to) müşteriyi değil ödemeleri süzer, burada uygulanmaz.
+    """
+    # 1) Müşteri arama (username, first_name, last_name)
+    q_username = params.get('q_username', '').strip()
+    q_first_name = params.get('q_first_name', '').strip()
+    q_last_name = params.get('q_last_name', '').strip()
 
-    customers = Customer.objects.filter(rep=request.user)
+    # 2) Gecikme (late=1)
+    late_flag = params.get('late', '')
 
-    # Filtre parametreleri
-    q_username = request.GET.get('q_username', '').strip()
-    q_first_name = request.GET.get('q_first_name', '').strip()
-    q_last_name = request.GET.get('q_last_name', '').strip()
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-    late_flag = request.GET.get('late', '')
-    q_status = request.GET.get('status', '')
-    q_min_rem = request.GET.get('min_remaining', '')
-    q_max_rem = request.GET.get('max_remaining', '')
+    # 3) Abonelik Durumu (agreement_status) = 'olumlu', 'beklemede', 'olumsuz'
+    q_status = params.get('status', '')
+
+    # 4) Kalan Tutar aralığı (min_remaining, max_remaining)
+    q_min_rem = params.get('min_remaining', '')
+    q_max_rem = params.get('max_remaining', '')
 
     if q_username:
-        customers = customers.filter(username__icontains=q_username)
+        customers = search_filter(customers, 'username', q_username)
     if q_first_name:
-        customers = customers.filter(first_name__icontains=q_first_name)
+        customers = search_filter(customers, 'first_name', q_first_name)
     if q_last_name:
-        customers = customers.filter(last_name__icontains=q_last_name)
+        customers = search_filter(customers, 'last_name', q_last_name)
     if q_status:
         customers = customers.filter(agreement_status=q_status)
 
-    customer_list = []
-    for cust in customers:
-        analysis = analyze_customer_payment(cust)
-        payments = cust.payments.all().order_by("-payment_date")
-        if date_from:
-            payments = payments.filter(payment_date__date__gte=date_from)
-        if date_to:
-            payments = payments.filter(payment_date__date__lte=date_to)
-        if late_flag == "1" and not analysis["is_late"]:
-            continue
-        rem = analysis["remaining_amount"]
-        if q_min_rem:
-            try:
-                minval = float(q_min_rem)
-                if rem < minval:
-                    continue
-            except:
-                pass
-        if q_max_rem:
-            try:
-                maxval = float(q_max_rem)
-                if rem > maxval:
-                    continue
-            except:
-                pass
-
-        customer_list.append({
-            "customer": cust,
-            "analysis": analysis,
-            "payments": payments,
-        })
+    # Gecikme ve kalan tutar aralığı (analysis["remaining_amount"] karşılığı) SQL WHERE olarak uygulanır
+    return filter_payment_status(customers, late_flag, q_min_rem, q_max_rem)
+
+
+@replica_reads
+@login_required
+def list_payments_rep(request):
+    # 2. kademe temsilci
+    if request.user.is_superuser or (request.user.level and request.user.level < 2):
+        return redirect('home')
+
+    customers = filter_payment_customers(Customer.objects.filter(rep=request.user), request.GET)
+    customer_list = analyze_customer_payments(
+        customers, request.GET.get('date_from', ''), request.GET.get('date_to', '')
+    )
 
     return render(request, "list_payments_rep.html", {
         "customer_list": customer_list
@@ -1118,6 +987,7 @@ def list_payments_rep(request):
 
 
 
+@replica_reads
 @login_required
 def list_payments_admin(request):
     """
@@ -1127,79 +997,12 @@ def list_payments_admin(request):
     if not request.user.is_superuser:
         return redirect('home')
 
-    customers = Customer.objects.all()
-
-    # Filtre parametreleri
-    # 1) Müşteri arama (username, first_name, last_name)
-    q_username = request.GET.get('q_username', '').strip()
-    q_first_name = request.GET.get('q_first_name', '').strip()
-    q_last_name = request.GET.get('q_last_name', '').strip()
-
-    # 2) Tarih aralığı (date_from, date_to) -> Payment.payment_date
-    date_from = request.GET.get('date_from', '')
-    date_to = request.GET.get('date_to', '')
-
-    # 3) Gecikme (late=1)
-    late_flag = request.GET.get('late', '')
-
-    # 4) Abonelik Durumu (agreement_status) = 'olumlu', 'beklemede', 'olumsuz'
-    q_status = request.GET.get('status', '')
-
-    # 5) Kalan Tutar aralığı (min_remaining, max_remaining)
-    q_min_rem = request.GET.get('min_remaining', '')
-    q_max_rem = request.GET.get('max_remaining', '')
-
-    # Uygula
-    if q_username:
-        customers = customers.filter(username__icontains=q_username)
-    if q_first_name:
-        customers = customers.filter(first_name__icontains=q_first_name)
-    if q_last_name:
-        customers = customers.filter(last_name__icontains=q_last_name)
-    if q_status:
-        customers = customers.filter(agreement_status=q_status)
-
-    # Aşağıda, her müşteri için analyze + Payment filtresi
-    customer_list = []
-    for cust in customers:
-        # Dinamik hesap
-        analysis = analyze_customer_payment(cust)
-
-        # Payment kayıtları
-        payments = cust.payments.all().order_by("-payment_date")
-        if date_from:
-            payments = payments.filter(payment_date__date__gte=date_from)
-        if date_to:
-            payments = payments.filter(payment_date__date__lte=date_to)
-
-        # Gecikme
-        if late_flag == "1" and not analysis["is_late"]:
-            continue
+    customers = filter_payment_customers(Customer.objects.all(), request.GET)
 
-        # Kalan tutar aralığı
-        # analysis["remaining_amount"] ile kıyaslayalım
-        remaining_amount = analysis["remaining_amount"]
-
-        if q_min_rem:
-            try:
-                val_min = float(q_min_rem)
-                if remaining_amount < val_min:
-                    continue
-            except:
-                pass
-        if q_max_rem:
-            try:
-                val_max = float(q_max_rem)
-                if remaining_amount > val_max:
-                    continue
-            except:
-                pass
-
-        customer_list.append({
-            "customer": cust,
-            "analysis": analysis,
-            "payments": payments,
-        })
+    # Aşağıda, kalan müşteriler toplu analiz edilir (tarih aralığı -> Payment filtresi)
+    customer_list = analyze_customer_payments(
+        customers, request.GET.get('date_from', ''), request.GET.get('date_to', '')
+    )
 
     return render(request, "list_payments_admin.html", {
         "customer_list": customer_list
@@ -1273,6 +1076,7 @@ def add_complaint(request):
     return render(request, "add_complaint.html", {"form": form})
 
 
+@replica_reads
 @login_required
 def list_complaints_rep(request):
     # Temsilci (level 2+) 
@@ -1289,7 +1093,7 @@ def list_complaints_rep(request):
     if q_status:
         complaints = complaints.filter(status=q_status)
     if q_title:
-        complaints = complaints.filter(title__icontains=q_title)
+        complaints = search_filter(complaints, 'title', q_title)
     if date_from:
         complaints = complaints.filter(created_at__date__gte=date_from)
     if date_to:
@@ -1297,6 +1101,7 @@ def list_complaints_rep(request):
 
     return render(request, "list_complaints_rep.html", {"complaints": complaints})
 
+@replica_reads
 @login_required
 def list_complaints_admin(request):
     if not request.user.is_superuser:
@@ -1308,19 +1113,20 @@ def list_complaints_admin(request):
     q_title = request.GET.get('title', '')
     q_rep = request.GET.get('rep', '')
 
-    complaints = Complaint.objects.all().order_by("-created_at")
+    complaints = Complaint.objects.select_related("rep", "customer").order_by("-created_at")
     if q_status:
         complaints = complaints.filter(status=q_status)
     if q_title:
-        complaints = complaints.filter(title__icontains=q_title)
+        complaints = search_filter(complaints, 'title', q_title)
     if date_from:
         complaints = complaints.filter(created_at__date__gte=date_from)
     if date_to:
         complaints = complaints.filter(created_at__date__lte=date_to)
     if q_rep:
-        complaints = complaints.filter(rep__username__icontains=q_rep)
+        complaints = search_filter(complaints, 'rep__username', q_rep)
 
-    return render(request, "list_complaints_admin.html", {"complaints": complaints})
+    page = keyset_paginate(request, complaints, "created_at")
+    return render(request, "list_complaints_admin.html", {"complaints": page.object_list, "page": page})
 
 @login_required
 def update_complaint(request, complaint_id):
@@ -1363,6 +1169,7 @@ def add_request(request):
     return render(request, "add_request.html", {"form": form})
 
 
+@replica_reads
 @login_required
 def list_requests_rep(request):
     if request.user.is_superuser or (request.user.level and request.user.level < 2):
@@ -1374,7 +1181,7 @@ def list_requests_rep(request):
 
     reqs = Request.objects.filter(rep=request.user).order_by("-created_at")
     if q_name:
-        reqs = reqs.filter(name__icontains=q_name)
+        reqs = search_filter(reqs, 'name', q_name)
     if date_from:
         reqs = reqs.filter(created_at__date__gte=date_from)
     if date_to:
@@ -1383,6 +1190,7 @@ def list_requests_rep(request):
     return render(request, "list_requests_rep.html", {"reqs": reqs})
 
 
+@replica_reads
 @login_required
 def list_requests_admin(request):
     if not request.user.is_superuser:
@@ -1393,17 +1201,18 @@ def list_requests_admin(request):
     date_from = request.GET.get('date_from', '')
     date_to = request.GET.get('date_to', '')
 
-    reqs = Request.objects.all().order_by("-created_at")
+    reqs = Request.objects.select_related("rep", "customer").order_by("-created_at")
     if q_name:
-        reqs = reqs.filter(name__icontains=q_name)
+        reqs = search_filter(reqs, 'name', q_name)
     if q_rep:
-        reqs = reqs.filter(rep__username__icontains=q_rep)
+        reqs = search_filter(reqs, 'rep__username', q_rep)
     if date_from:
         reqs = reqs.filter(created_at__date__gte=date_from)
     if date_to:
         reqs = reqs.filter(created_at__date__lte=date_to)
 
-    return render(request, "list_requests_admin.html", {"reqs": reqs})
+    page = keyset_paginate(request, reqs, "created_at")
+    return render(request, "list_requests_admin.html", {"reqs": page.object_list, "page": page})
 
 
 from django import forms
@@ -1444,6 +1253,7 @@ def add_vehicle(request):
     return render(request, "add_vehicle.html", {"form": form})
 
 
+@replica_reads
 @login_required
 def list_vehicles_rep(request):
     # 2. kademe temsilci
@@ -1460,11 +1270,11 @@ def list_vehicles_rep(request):
     date_to = request.GET.get('date_to', '')
 
     if q_brand:
-        vehicles = vehicles.filter(brand__icontains=q_brand)
+        vehicles = search_filter(vehicles, 'brand', q_brand)
     if q_model:
-        vehicles = vehicles.filter(model__icontains=q_model)
+        vehicles = search_filter(vehicles, 'model', q_model)
     if q_chassis:
-        vehicles = vehicles.filter(chassis_no__icontains=q_chassis)
+        vehicles = search_filter(vehicles, 'chassis_no', q_chassis)
 
     if date_from:
         vehicles = vehicles.filter(created_at__date__gte=date_from)
@@ -1473,12 +1283,13 @@ def list_vehicles_rep(request):
 
     return render(request, "list_vehicles_rep.html", {"vehicles": vehicles})
 
+@replica_reads
 @login_required
 def list_vehicles_admin(request):
     if not request.user.is_superuser:
         return redirect('home')
 
-    vehicles = Vehicle.objects.all().order_by("-created_at")
+    vehicles = Vehicle.objects.select_related("rep").order_by("-created_at")
 
     # Filtre parametreleri
     q_brand = request.GET.get('brand', '').strip()
@@ -1489,25 +1300,26 @@ def list_vehicles_admin(request):
     date_to = request.GET.get('date_to', '')
 
     if q_brand:
-        vehicles = vehicles.filter(brand__icontains=q_brand)
+        vehicles = search_filter(vehicles, 'brand', q_brand)
     if q_model:
-        vehicles = vehicles.filter(model__icontains=q_model)
+        vehicles = search_filter(vehicles, 'model', q_model)
     if q_chassis:
-        vehicles = vehicles.filter(chassis_no__icontains=q_chassis)
+        vehicles = search_filter(vehicles, 'chassis_no', q_chassis)
     if q_rep:
-        vehicles = vehicles.filter(rep__username__icontains=q_rep)
+        vehicles = search_filter(vehicles, 'rep__username', q_rep)
 
     if date_from:
         vehicles = vehicles.filter(created_at__date__gte=date_from)
     if date_to:
         vehicles = vehicles.filter(created_at__date__lte=date_to)
 
-    return render(request, "list_vehicles_admin.html", {"vehicles": vehicles})
+    page = keyset_paginate(request, vehicles, "created_at")
+    return render(request, "list_vehicles_admin.html", {"vehicles": page.object_list, "page": page})
 
 
 from django import forms
+from django.db import transaction
 from .models import SubscriptionExtra
-from .models import SubscriptionExtra, SubscriptionExtraLog 
 
 class InlineSubscriptionExtraForm(forms.ModelForm):
     class Meta:
@@ -1524,26 +1336,17 @@ def add_subscription_extra(request):
     if request.method == 'POST':
         form = InlineSubscriptionExtraForm(request.POST)
         if form.is_valid():
-            extra = form.save(commit=False)
-            extra.rep = request.user
-            extra.status = 'active'
-            extra.save()
-            # Müşteri abonelik fiyatını yükselt
-            customer = extra.customer
-            old_amount = customer.amount
-            new_amount = old_amount + extra.price
-            customer.amount = new_amount
-            customer.save()
-
-            # Log kaydı
-            SubscriptionExtraLog.objects.create(
-                extra=extra,
-                operation='create',
-                performed_by=request.user,
-                old_amount=old_amount,
-                new_amount=new_amount,
-                details=f"Extra eklendi: {extra.name}, +{extra.price}"
-            )
+            # Extra ile müşteri tutarı (ve bakiye defteri) tek transaction içinde yazılır;
+            # ikisinin denetim girdileri commit'ten sonra sıraya girer (core/audit.py)
+            with transaction.atomic():
+                extra = form.save(commit=False)
+                extra.rep = request.user
+                extra.status = 'active'
+                extra.save()
+                # Müşteri abonelik fiyatını yükselt
+                customer = extra.customer
+                customer.amount = customer.amount + extra.price
+                customer.save()
 
             # Yönlendirme
             if request.user.is_superuser:
@@ -1555,6 +1358,7 @@ def add_subscription_extra(request):
     
     return render(request, "add_subscription_extra.html", {"form": form})
 
+@replica_reads
 @login_required
 def list_subscription_extras_rep(request):
     # 2. kademe temsilci
@@ -1573,7 +1377,7 @@ def list_subscription_extras_rep(request):
     if q_name:
         extras = extras.filter(name__icontains=q_name)
     if q_customer:
-        extras = extras.filter(customer__username__icontains=q_customer)
+        extras = search_filter(extras, 'customer__username', q_customer)
     if q_status:
         extras = extras.filter(status=q_status)
     if date_from:
@@ -1584,12 +1388,13 @@ def list_subscription_extras_rep(request):
     return render(request, "list_subscription_extras_rep.html", {"extras": extras})
 
 
+@replica_reads
 @login_required
 def list_subscription_extras_admin(request):
     if not request.user.is_superuser:
         return redirect('home')
 
-    extras = SubscriptionExtra.objects.all().order_by("-created_at")
+    extras = SubscriptionExtra.objects.select_related("rep", "customer").order_by("-created_at")
 
     q_name = request.GET.get('name', '').strip()
     q_customer = request.GET.get('customer', '').strip()
@@ -1601,9 +1406,9 @@ def list_subscription_extras_admin(request):
     if q_name:
         extras = extras.filter(name__icontains=q_name)
     if q_customer:
-        extras = extras.filter(customer__username__icontains=q_customer)
+        extras = search_filter(extras, 'customer__username', q_customer)
     if q_rep:
-        extras = extras.filter(rep__username__icontains=q_rep)
+        extras = search_filter(extras, 'rep__username', q_rep)
     if q_status:
         extras = extras.filter(status=q_status)
     if date_from:
@@ -1611,7 +1416,8 @@ def list_subscription_extras_admin(request):
     if date_to:
         extras = extras.filter(created_at__date__lte=date_to)
 
-    return render(request, "list_subscription_extras_admin.html", {"extras": extras})
+    page = keyset_paginate(request, extras, "created_at")
+    return render(request, "list_subscription_extras_admin.html", {"extras": page.object_list, "page": page})
 
 
 @login_required
@@ -1625,24 +1431,13 @@ def cancel_subscription_extra(request, extra_id):
     
     # Durum kontrol
     if extra.status == 'active':
-        customer = extra.customer
-        old_amount = customer.amount
-        new_amount = old_amount - extra.price
-        customer.amount = new_amount
-        customer.save()
-        
-        extra.status = 'canceled'
-        extra.save()
-
-        # Log kaydı
-        SubscriptionExtraLog.objects.create(
-            extra=extra,
-            operation='cancel',
-            performed_by=request.user,
-            old_amount=old_amount,
-            new_amount=new_amount,
-            details=f"Extra iptal edildi: {extra.name}, -{extra.price}"
-        )
+        with transaction.atomic():
+            customer = extra.customer
+            customer.amount = customer.amount - extra.price
+            customer.save()
+            
+            extra.status = 'canceled'
+            extra.save()
 
     # Yönlendirme
     if request.user.is_superuser:
@@ -1651,111 +1446,266 @@ def cancel_subscription_extra(request, extra_id):
         return redirect('list_subscription_extras_rep')
 
 
+
+# CSV dışa aktarma (yönetici). Liste sayfalarının GET filtreleri aynen geçerlidir;
+# satırlar sunucu tarafı imleçten okunup parça parça gönderilir (bkz. core/exports.py).
+from .exports import export_queryset
+
+@replica_reads
+@login_required
+def export_payments_admin(request):
+    if not request.user.is_superuser:
+        return redirect('home')
+    payments = Payment.objects.all()
+    customers = filter_payment_customers(Customer.objects.all(), request.GET)
+    if customers.query.has_filters():
+        payments = payments.filter(customer__in=customers.values('pk'))
+    date_from = request.GET.get('date_from', '')
+    date_to = request.GET.get('date_to', '')
+    if date_from:
+        payments = payments.filter(payment_date__date__gte=date_from)
+    if date_to:
+        payments = payments.filter(payment_date__date__lte=date_to)
+    # payment_date auto_now_add olduğundan id sırası tarih sırasıdır; birincil anahtar sıralaması sıralama adımı gerektirmez
+    payments = payments.order_by("-id")
+    columns = [
+        ("Ödeme No", "id"), ("Tarih", "payment_date"), ("Müşteri", "customer__username"),
+        ("Ad", "customer__first_name"), ("Soyad", "customer__last_name"), ("Temsilci", "customer__rep__username"),
+        ("Ödenen Tutar", "paid_amount"), ("Ödeme Yöntemi", "payment_method"), ("Not", "note"),
+    ]
+    return export_queryset(f"tahsilatlar_{date.today():%Y%m%d}.csv", columns, payments)
+
+@replica_reads
+@login_required
+def export_expenses_admin(request):
+    if not request.user.is_superuser:
+        return redirect('home')
+    expenses = filter_admin_expenses(request.GET).order_by("-created_at", "-id")
+    columns = [
+        ("Harcama No", "id"), ("Tarih", "created_at"), ("Temsilci", "user__username"),
+        ("Kategori", "category__name"), ("Tutar", "amount"), ("Açıklama", "description"),
+    ]
+    return export_queryset(f"harcamalar_{date.today():%Y%m%d}.csv", columns, expenses)
+
+@replica_reads
+@login_required
+def export_material_transactions_admin(request):
+    if not request.user.is_superuser:
+        return redirect('home')
+    transactions = filter_admin_material_transactions(request.GET).order_by("-transaction_date", "-id")
+    columns = [
+        ("İşlem No", "id"), ("Tarih", "transaction_date"), ("Malzeme", "material__name"), ("Adet", "quantity"),
+        ("Kalan Stok", "stock_after"), ("Temsilci", "rep__username"), ("Müşteri", "customer__username"), ("Not", "note"),
+    ]
+    return export_queryset(f"malzeme_islemleri_{date.today():%Y%m%d}.csv", columns, transactions)
+
+
+
+# Global arama (müşteri, şikayet, istek, araç)
+from .search import global_search, GLOBAL_SEARCH_MAX_LIMIT
+
+@replica_reads
+@login_required
+def global_search_page(request):
+    q = request.GET.get('q', '').strip()
+    # prefix=1: API'deki gibi yalnızca değerin ya da bir kelimenin başında eşleşenler
+    prefix = request.GET.get('prefix', '') in ('1', 'true')
+    results = global_search(request.user, q, prefix=prefix, limit=GLOBAL_SEARCH_MAX_LIMIT) if q else []
+    return render(request, "global_search.html", {"q": q, "prefix": prefix, "results": results})
+
+
 # core/views.py
 
-from rest_framework import viewsets
+from django.db import transaction
+from rest_framework import status, viewsets
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
 from django.contrib.auth import get_user_model
 from .models import (
-    ExpenseCategory, Expense, ExpenseCategoryLog,
+    ExpenseCategory, Expense,
     SubscriptionType, SubscriptionDuration, PaymentType,
-    Customer, Employee, EmployeeTask, EmployeeDocument, EmployeeTaskLog,
+    Customer, Employee, EmployeeTask, EmployeeDocument,
     Material, MaterialTransaction, Payment, Complaint, Request, Vehicle,
-    SubscriptionExtra, SubscriptionExtraLog
+    SubscriptionExtra, AuditEntry
 )
 from .serializers import (
-    UserSerializer, ExpenseCategorySerializer, ExpenseSerializer, ExpenseCategoryLogSerializer,
+    UserSerializer, ExpenseCategorySerializer, ExpenseSerializer,
     SubscriptionTypeSerializer, SubscriptionDurationSerializer, PaymentTypeSerializer,
     CustomerSerializer, EmployeeSerializer, EmployeeTaskSerializer, EmployeeDocumentSerializer,
-    EmployeeTaskLogSerializer, MaterialSerializer, MaterialTransactionSerializer,
+    MaterialSerializer, MaterialTransactionSerializer,
     PaymentSerializer, ComplaintSerializer, RequestSerializer, VehicleSerializer,
-    SubscriptionExtraSerializer, SubscriptionExtraLogSerializer
+    SubscriptionExtraSerializer, AuditEntrySerializer, parse_expand
 )
 
 User = get_user_model()
 
+class ExpandableViewSetMixin:
+    """
+    GET isteklerinde ?fields= ve ?expand= parametrelerini serializer'a iletir ve
+    sorgu planını (select_related / only) serializer'ın expandable_fields tanımından çıkarır.
+    Böylece liste endpoint'leri satır sayısından bağımsız sabit sayıda sorgu atar.
+    """
+
+    def get_field_params(self):
+        request = getattr(self, "request", None)
+        if request is None or request.method not in SAFE_METHODS:
+            return None, {}
+        fields = [name.strip() for name in request.query_params.get("fields", "").split(",") if name.strip()]
+        expand = parse_expand(request.query_params.get("expand", ""))
+        return fields or None, expand
+
+    def get_serializer(self, *args, **kwargs):
+        fields, expand = self.get_field_params()
+        kwargs.setdefault("fields", fields)
+        kwargs.setdefault("expand", expand)
+        return super().get_serializer(*args, **kwargs)
+
+    def get_queryset(self):
+        fields, expand = self.get_field_params()
+        return self.get_serializer_class().optimize_queryset(super().get_queryset(), fields, expand)
+
+
+# Tek toplu istekte gönderilebilecek en fazla kayıt
+BULK_MAX_ITEMS = 1000
+
+
+class BulkWriteViewSetMixin:
+    """
+    Liste adresine gelen liste gövdeli POST ve PATCH isteklerini tek transaction'da toplu yazar
+    (serializer'ın BulkListSerializer'ı: bulk_create / bulk_update). Hepsi ya da hiçbiri:
+    tek bir öğe hatalıysa hiçbir kayıt yazılmaz; 400 yanıtı hatalı öğelerin sırasını hatalarına eşler.
+    PATCH öğeleri "id" içermelidir; PATCH'in liste adresine bağlanması için BulkRouter kullanılır.
+    """
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data, many=True, allow_empty=False, max_length=BULK_MAX_ITEMS)
+        with transaction.atomic():
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def bulk_partial_update(self, request, *args, **kwargs):
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"non_field_errors": ["Güncellenecek kayıtların listesi gönderilmeli."]},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > BULK_MAX_ITEMS:
+            return Response({"non_field_errors": [f"En fazla {BULK_MAX_ITEMS} kayıt gönderilebilir."]},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        ids = [str(item.get("id")) if isinstance(item, dict) else None for item in items]
+        with transaction.atomic():
+            instances = {
+                str(instance.pk): instance
+                for instance in self.filter_queryset(self.get_queryset()).filter(
+                    pk__in=[pk for pk in ids if pk and pk.isdigit()]
+                ).select_for_update()
+            }
+            # Hatalar ListSerializer'daki gibi öğe sırası -> hata sözlüğü biçiminde döner
+            errors = {}
+            for index, pk in enumerate(ids):
+                if pk not in instances:
+                    errors[index] = {"id": ["Kayıt bulunamadı."]}
+                elif pk in ids[:index]:
+                    errors[index] = {"id": ["Kayıt listede birden fazla kez geçiyor."]}
+            if errors:
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+            serializer = self.get_serializer([instances[pk] for pk in ids], data=items, many=True, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response(serializer.data)
+
+
 # Örnek: User ViewSet
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
 
-class ExpenseCategoryViewSet(viewsets.ModelViewSet):
+class ExpenseCategoryViewSet(ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = ExpenseCategory.objects.all()
     serializer_class = ExpenseCategorySerializer
 
-class ExpenseViewSet(viewsets.ModelViewSet):
+class ExpenseViewSet(BulkWriteViewSetMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = Expense.objects.all()
     serializer_class = ExpenseSerializer
 
-class ExpenseCategoryLogViewSet(viewsets.ModelViewSet):
-    queryset = ExpenseCategoryLog.objects.all()
-    serializer_class = ExpenseCategoryLogSerializer
-
-class SubscriptionTypeViewSet(viewsets.ModelViewSet):
+class SubscriptionTypeViewSet(ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = SubscriptionType.objects.all()
     serializer_class = SubscriptionTypeSerializer
 
-class SubscriptionDurationViewSet(viewsets.ModelViewSet):
+class SubscriptionDurationViewSet(ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = SubscriptionDuration.objects.all()
     serializer_class = SubscriptionDurationSerializer
 
-class PaymentTypeViewSet(viewsets.ModelViewSet):
+class PaymentTypeViewSet(ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = PaymentType.objects.all()
     serializer_class = PaymentTypeSerializer
 
 from rest_framework.permissions import AllowAny
 
-class CustomerViewSet(viewsets.ModelViewSet):
+class CustomerViewSet(ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = Customer.objects.all()
     serializer_class = CustomerSerializer
     permission_classes = [AllowAny]
 
-class EmployeeViewSet(viewsets.ModelViewSet):
+class EmployeeViewSet(ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = Employee.objects.all()
     serializer_class = EmployeeSerializer
 
-class EmployeeTaskViewSet(viewsets.ModelViewSet):
+class EmployeeTaskViewSet(ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = EmployeeTask.objects.all()
     serializer_class = EmployeeTaskSerializer
 
-class EmployeeDocumentViewSet(viewsets.ModelViewSet):
+class EmployeeDocumentViewSet(ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = EmployeeDocument.objects.all()
     serializer_class = EmployeeDocumentSerializer
 
-class EmployeeTaskLogViewSet(viewsets.ModelViewSet):
-    queryset = EmployeeTaskLog.objects.all()
-    serializer_class = EmployeeTaskLogSerializer
-
-class MaterialViewSet(viewsets.ModelViewSet):
+class MaterialViewSet(ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = Material.objects.all()
     serializer_class = MaterialSerializer
 
-class MaterialTransactionViewSet(viewsets.ModelViewSet):
+class MaterialTransactionViewSet(BulkWriteViewSetMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = MaterialTransaction.objects.all()
     serializer_class = MaterialTransactionSerializer
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(BulkWriteViewSetMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
 
-class ComplaintViewSet(viewsets.ModelViewSet):
+class ComplaintViewSet(BulkWriteViewSetMixin, ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = Complaint.objects.all()
     serializer_class = ComplaintSerializer
 
-class RequestViewSet(viewsets.ModelViewSet):
+class RequestViewSet(ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = Request.objects.all()
     serializer_class = RequestSerializer
 
-class VehicleViewSet(viewsets.ModelViewSet):
+class VehicleViewSet(ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = Vehicle.objects.all()
     serializer_class = VehicleSerializer
 
-class SubscriptionExtraViewSet(viewsets.ModelViewSet):
+class SubscriptionExtraViewSet(ExpandableViewSetMixin, viewsets.ModelViewSet):
     queryset = SubscriptionExtra.objects.all()
     serializer_class = SubscriptionExtraSerializer
 
-class SubscriptionExtraLogViewSet(viewsets.ModelViewSet):
-    queryset = SubscriptionExtraLog.objects.all()
-    serializer_class = SubscriptionExtraLogSerializer
+class AuditEntryViewSet(ExpandableViewSetMixin, viewsets.ReadOnlyModelViewSet):
+    """Denetim kaydı (salt okunur, yalnızca yönetici). ?model=core.customer&object_id=&action=&actor= ile süzülür."""
+    queryset = AuditEntry.objects.all()
+    serializer_class = AuditEntrySerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.request.user.is_superuser:
+            return queryset.none()
+        params = self.request.query_params
+        for name in ("model", "object_id", "action", "actor"):
+            value = params.get(name, "").strip()
+            if value:
+                queryset = queryset.filter(**{name: value})
+        return queryset
 
 
 from rest_framework.views import APIView
@@ -1783,4 +1733,176 @@ class UserDetailView(APIView):
             'last_name': user.last_name,
             'email': user.email,
         }
-        return Response(data)
\ No newline at end of file
+        return Response(data)
+
+
+class GlobalSearchView(APIView):
+    """
+    GET /api/search/?q=<metin>[&prefix=1][&limit=20]
+    Müşteri, şikayet, istek ve araçlarda sıralı, türü belirtilmiş sonuçlar döner.
+    prefix=1 yazarken arama (type-ahead) içindir: yalnızca kelime başında eşleşmeler.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        q = request.query_params.get('q', '').strip()
+        prefix = request.query_params.get('prefix', '') in ('1', 'true')
+        try:
+            limit = int(request.query_params.get('limit', 20))
+        except ValueError:
+            limit = 20
+        results = global_search(request.user, q, prefix=prefix, limit=limit) if q else []
+        return Response({'query': q, 'results': results})
+
+
+import io
+from .imports import IMPORTERS, guess_format, read_rows
+
+class BulkImportView(APIView):
+    """
+    POST /api/import/customers/ veya /api/import/payments/
+    Gövde: "file" alanında CSV/JSONL/JSON dosyası (multipart) ya da doğrudan JSON nesne listesi.
+    ?dry_run=1 yalnızca doğrular. Yanıt: {"created", "error_count", "errors": [{"row", "errors"}]}
+    Temsilci müşterileri kendi adına, ödemeleri yalnızca kendi müşterilerine aktarabilir.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, kind):
+        if kind not in IMPORTERS:
+            return Response({'detail': 'Bilinmeyen içe aktarma türü.'}, status=status.HTTP_404_NOT_FOUND)
+        user = request.user
+        if kind == 'customers' and not user.is_superuser and (user.level or 0) < 2:
+            return Response({'detail': 'Müşteri aktarma yetkiniz yok.'}, status=status.HTTP_403_FORBIDDEN)
+
+        upload = request.FILES.get('file')
+        if upload is not None:
+            stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            rows = read_rows(stream, guess_format(upload.name))
+        elif isinstance(request.data, list):
+            rows = request.data
+        else:
+            return Response({'detail': 'file alanı ya da JSON liste gönderilmeli.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        dry_run = request.query_params.get('dry_run', '') in ('1', 'true')
+        try:
+            result = IMPORTERS[kind](rows, user=user, dry_run=dry_run)
+        except (ValueError, UnicodeDecodeError) as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(result.as_dict())
+
+
+class StatsView(APIView):
+    """
+    GET /api/stats/?date_from=YYYY-AA-GG&date_to=YYYY-AA-GG[&rep=<id>]
+    Pano KPI'ları (günlük tahsilat, açık bakiye, geciken müşteri, kategori bazında harcama,
+    şikayet çözüm oranı, verilen malzeme, ek hizmetler). Yalnızca günlük özetlerden okunur.
+    Varsayılan dönem son 30 gündür; rep yalnızca yönetici için geçerlidir.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        period = stats_period(request.query_params)
+        if period is None:
+            return Response({'detail': 'Tarihler YYYY-AA-GG biçiminde olmalı.'}, status=status.HTTP_400_BAD_REQUEST)
+        rep_id = request.query_params.get('rep')
+        if rep_id is not None and not rep_id.isdigit():
+            return Response({'detail': 'rep bir temsilci id olmalı.'}, status=status.HTTP_400_BAD_REQUEST)
+        stats = dashboard_stats(request.user, *period, rep_id=int(rep_id) if rep_id else None)
+        return Response(stats)
+
+
+from .sync import PUSH_MAX_OPERATIONS, SYNC_MAX_PAGE_SIZE, SYNC_PAGE_SIZE, push_operations, sync_changes
+
+class SyncView(APIView):
+    """
+    GET /api/sync/[?since=<token>][&limit=500]
+    Mobil istemci için artımlı senkronizasyon: token'dan bu yana eklenen/değişen kayıtlar
+    (updated) ve silinen kayıtların id'leri (deleted), koleksiyon başına. Yanıttaki token bir
+    sonraki istekte since olarak gönderilir; has_more=True ise hemen tekrar istenir.
+    reset=True: token yok ya da çok eski; istemci yerel verisini silip yanıtı baştan uygular.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', SYNC_PAGE_SIZE)), SYNC_MAX_PAGE_SIZE)
+        except ValueError:
+            limit = SYNC_PAGE_SIZE
+        try:
+            data = sync_changes(request.user, request.query_params.get('since'), limit=max(limit, 1))
+        except ValueError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(data)
+
+
+class SyncPushView(APIView):
+    """
+    POST /api/sync/push/  {"operations": [{"client_id": UUID, "collection": ..., "data": {...}}, ...]}
+    Mobil uygulamanın çevrimdışı kuyruğunu tek istekte uygular (customers, payments, complaints,
+    expenses). Aynı client_id ile tekrar gönderilen işlem yeni kayıt açmaz. Yanıt, işlem sırasıyla
+    {"client_id", "status": "created"|"duplicate"|"error", "id", "record" | "errors"} listesidir.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        operations = request.data.get('operations') if isinstance(request.data, dict) else None
+        if not isinstance(operations, list):
+            return Response({'detail': 'operations listesi gönderilmeli.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(operations) > PUSH_MAX_OPERATIONS:
+            return Response({'detail': f'En fazla {PUSH_MAX_OPERATIONS} işlem gönderilebilir.'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response({'results': push_operations(request, operations)})
+
+
+# Denetim kaydı sayfası (yönetici). Tüm denetlenen modellerin değişiklikleri (bkz. core/audit.py);
+# ?model=&action=&actor=&object_id= filtreleri
+from django.apps import apps
+from .audit import AUDITED_MODELS
+
+@replica_reads
+@login_required
+def audit_log(request):
+    if not request.user.is_superuser:
+        return redirect('home')
+
+    entries = AuditEntry.objects.select_related("actor")
+    q_model = request.GET.get('model', '').strip()
+    q_action = request.GET.get('action', '').strip()
+    q_actor = request.GET.get('actor', '').strip()
+    q_object_id = request.GET.get('object_id', '').strip()
+
+    if q_model:
+        entries = entries.filter(model=q_model)
+    if q_action:
+        entries = entries.filter(action=q_action)
+    if q_actor:
+        entries = entries.filter(actor__username=q_actor)
+    if q_object_id.isdigit():
+        entries = entries.filter(object_id=q_object_id)
+
+    models = [
+        (label.lower(), apps.get_model(label)._meta.verbose_name.title()) for label in AUDITED_MODELS
+    ]
+    page = keyset_paginate(request, entries, "timestamp")
+    return render(request, "audit_log.html", {
+        "entries": page.object_list, "page": page,
+        "models": models, "actions": AuditEntry.ACTION_CHOICES,
+    })
+
+
+# Korumalı medya: MEDIA_URL altındaki dosyalar yalnızca bir çalışan belgesine (dosyası ya da
+# önizlemesi) aitse ve kullanıcı belgeleri görebiliyorsa verilir. Gönderim core/media.py serve_file ile
+# (MEDIA_SERVE_BACKEND: Django'dan ya da X-Accel-Redirect / X-Sendfile ile ön sunucudan).
+from django.core.files.storage import default_storage
+from django.http import Http404
+from .media import document_for_name, serve_file
+
+@login_required
+def protected_media(request, name):
+    if not can_view_documents(request.user):
+        return redirect('home')
+    document = document_for_name(name)
+    if document is None:
+        raise Http404("Dosya bulunamadı.")
+    filename = document.display_name if document.file.name == name else None
+    return serve_file(request, default_storage, name, filename)
@@ -1,5 +1,5 @@
 import 'react-native-gesture-handler';
-import React, { useContext } from 'react';
+import React, { useContext, useEffect } from 'react';
 import { NavigationContainer } from '@react-navigation/native';
 import { createDrawerNavigator } from '@react-navigation/drawer';
 import { AuthProvider, AuthContext } from './context/AuthContext';
@@ -7,11 +7,27 @@ import LoginScreen from './screens/LoginScreen';
 import HomeScreen from './screens/HomeScreen';
 import CustomersScreen from './screens/CustomersScreen';
 import AddCustomerScreen from './screens/AddCustomerScreen';
+import { flush } from './services/outbox';
+
+// Çevrimdışı kuyruk, giriş yapılmışken bu aralıkla yeniden gönderilmeye çalışılır (ms)
+const OUTBOX_RETRY_INTERVAL = 30000;
 
 const Drawer = createDrawerNavigator();
 
 function AppNavigator() {
-  const { user } = useContext(AuthContext);
+  const { user, token } = useContext(AuthContext);
+
+  // Yalnızca giriş yapan kullanıcının kuyruğu, onun token'ıyla gönderilir
+  const userId = user ? user.id : null;
+  useEffect(() => {
+    if (!token || userId === null) {
+      return undefined;
+    }
+    const replay = () => flush(userId, token).catch((error) => console.log('Kuyruk bekliyor:', error.message));
+    replay();
+    const timer = setInterval(replay, OUTBOX_RETRY_INTERVAL);
+    return () => clearInterval(timer);
+  }, [userId, token]);
 
   // Eğer user null ise, kullanıcı henüz giriş yapmamış demektir.
   if (!user) {
@@ -0,0 +1,17 @@
+// expo-file-system yerine bellekte tutulan dosyalar
+export const documentDirectory = 'file:///documents/';
+
+export const files = new Map();
+
+export const getInfoAsync = async (path) => ({ exists: files.has(path) });
+
+export const readAsStringAsync = async (path) => {
+  if (!files.has(path)) {
+    throw new Error(`Dosya yok: ${path}`);
+  }
+  return files.get(path);
+};
+
+export const writeAsStringAsync = async (path, contents) => {
+  files.set(path, contents);
+};
@@ -0,0 +1,19 @@
+// Modül yükleme kancaları: yerel cihaz API'leri test eşdeğerleriyle değiştirilir,
+// uygulama dosyaları (package.json'da "type" yok) ES modülü olarak okunur.
+const FAKES = {
+  'expo-file-system': new URL('./fakes/fileSystem.mjs', import.meta.url).href,
+};
+
+export async function resolve(specifier, context, nextResolve) {
+  if (FAKES[specifier]) {
+    return { url: FAKES[specifier], shortCircuit: true };
+  }
+  return nextResolve(specifier, context);
+}
+
+export async function load(url, context, nextLoad) {
+  if (url.startsWith('file:') && url.endsWith('.js') && !url.includes('/node_modules/')) {
+    return nextLoad(url, { ...context, format: 'module' });
+  }
+  return nextLoad(url, context);
+}
@@ -0,0 +1,51 @@
+import assert from 'node:assert/strict';
+import { beforeEach, test } from 'node:test';
+import { files } from 'expo-file-system';
+import { enqueue, flush, getPending } from '../services/outbox.js';
+
+const pushes = [];
+
+globalThis.fetch = async (url, options) => {
+  const { operations } = JSON.parse(options.body);
+  pushes.push({ authorization: options.headers.Authorization, operations });
+  return {
+    ok: true,
+    status: 200,
+    json: async () => ({
+      results: operations.map(({ client_id }) => ({ client_id, status: 'created', id: 1 })),
+    }),
+  };
+};
+
+beforeEach(() => {
+  pushes.length = 0;
+});
+
+test('kuyruk yalnızca işlemi ekleyen kullanıcının oturumunda gönderilir', async () => {
+  const clientId = await enqueue(1, 'customers', { username: 'a-musterisi' });
+
+  // A çıkış yaptı, B giriş yaptı: B'nin gönderiminde A'nın işlemi yok
+  assert.deepEqual(await flush(2, 'token-b'), {});
+  assert.equal(pushes.length, 0);
+  assert.equal((await getPending(1)).length, 1);
+
+  // A tekrar girince işlem A'nın token'ıyla gider
+  const results = await flush(1, 'token-a');
+  assert.equal(results[clientId].status, 'created');
+  assert.equal(pushes.length, 1);
+  assert.equal(pushes[0].authorization, 'Bearer token-a');
+  assert.deepEqual(pushes[0].operations.map((op) => op.client_id), [clientId]);
+  assert.deepEqual(await getPending(1), []);
+});
+
+test('kuyruklar kullanıcı başına ayrı dosyada saklanır', async () => {
+  await enqueue(3, 'expenses', { amount: 10 });
+  await enqueue(4, 'expenses', { amount: 20 });
+  const stored = (userId) => JSON.parse(files.get(`file:///documents/outbox-${userId}.json`));
+  assert.deepEqual(stored(3).pending.map((op) => op.data.amount), [10]);
+  assert.deepEqual(stored(4).pending.map((op) => op.data.amount), [20]);
+});
+
+test('kullanıcısız kuyruk işlemi reddedilir', async () => {
+  await assert.rejects(enqueue(null, 'customers', {}));
+});
@@ -0,0 +1,4 @@
+// node --test için: servis modüllerini Expo/Metro olmadan yükler (bkz. hooks.mjs)
+import { register } from 'node:module';
+
+register('./hooks.mjs', import.meta.url);
@@ -0,0 +1,64 @@
+import assert from 'node:assert/strict';
+import { beforeEach, test } from 'node:test';
+import { getRecords, resetSync, syncNow } from '../services/sync.js';
+
+const requests = [];
+let respond = null;
+
+globalThis.fetch = async (url, options) => {
+  requests.push({ url, authorization: options.headers.Authorization });
+  return respond(url);
+};
+
+const reply = (body) => ({ ok: true, status: 200, json: async () => body });
+
+const page = (token, customers, reset = false) => ({
+  token, reset, has_more: false, changes: { customers: { updated: customers, deleted: [] } },
+});
+
+beforeEach(() => {
+  resetSync();
+  requests.length = 0;
+});
+
+test('resetSync önceki kullanıcının kayıtlarını ve token\'ını bırakır', async () => {
+  respond = () => reply(page('5.100', [{ id: 1, username: 'a-musterisi' }], true));
+  await syncNow('token-a');
+  assert.deepEqual(getRecords('customers').map((c) => c.id), [1]);
+
+  resetSync();
+  assert.deepEqual(getRecords('customers'), []);
+
+  respond = () => reply(page('7.200', [{ id: 2, username: 'b-musterisi' }], true));
+  await syncNow('token-b');
+  // B'nin ilk isteği A'nın token'ıyla değil tam senkronizasyon olarak gider
+  assert.equal(requests[1].url.includes('since='), false);
+  assert.equal(requests[1].authorization, 'Bearer token-b');
+  assert.deepEqual(getRecords('customers').map((c) => c.id), [2]);
+});
+
+test('sıfırlamadan önce başlamış senkronizasyonun yanıtı uygulanmaz', async () => {
+  let release;
+  respond = () => new Promise((resolve) => {
+    release = () => resolve(reply(page('5.100', [{ id: 1 }], true)));
+  });
+  const stale = syncNow('token-a');
+  resetSync();
+
+  respond = () => reply(page('7.200', [{ id: 2 }], true));
+  const fresh = syncNow('token-b');
+  assert.notEqual(fresh, stale);
+  await fresh;
+
+  release();
+  await stale;
+  assert.deepEqual(getRecords('customers').map((c) => c.id), [2]);
+});
+
+test('sonraki senkronizasyon son token\'la artımlı istenir', async () => {
+  respond = () => reply(page('5.100', [{ id: 1 }], true));
+  await syncNow('token-a');
+  respond = () => reply({ token: '6.150', reset: false, has_more: false, changes: {} });
+  await syncNow('token-a');
+  assert.match(requests[1].url, /since=5\.100$/);
+});
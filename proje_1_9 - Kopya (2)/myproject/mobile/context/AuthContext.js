@@ -1,4 +1,5 @@
 import React, { createContext, useState } from 'react';
+import { resetSync } from '../services/sync';
 
 export const AuthContext = createContext();
 
@@ -6,8 +7,21 @@ export const AuthProvider = ({ children }) => {
   const [user, setUser] = useState(null); // Giriş yapan kullanıcı
   const [token, setToken] = useState(null); // Token bilgisi
 
+  // Senkronize yerel kopya kullanıcıya aittir: girişte ve çıkışta önceki oturumunki bırakılır
+  const signIn = (userData, accessToken) => {
+    resetSync();
+    setToken(accessToken);
+    setUser(userData);
+  };
+
+  const signOut = () => {
+    resetSync();
+    setToken(null);
+    setUser(null);
+  };
+
   return (
-    <AuthContext.Provider value={{ user, setUser, token, setToken }}>
+    <AuthContext.Provider value={{ user, token, signIn, signOut }}>
       {children}
     </AuthContext.Provider>
   );
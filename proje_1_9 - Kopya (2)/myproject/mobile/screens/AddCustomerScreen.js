@@ -14,6 +14,15 @@ import {
 import { Picker } from '@react-native-picker/picker';
 import DateTimePicker from '@react-native-community/datetimepicker';
 import { AuthContext } from '../context/AuthContext';
+import { dismissFailed, enqueue, flush } from '../services/outbox';
+import { getRecords, syncNow } from '../services/sync';
+
+// Anlaşma Durumları: Modelde choices olduğu için sabit tanımlıyoruz
+const AGREEMENT_STATUSES = [
+  { id: 'beklemede', name: 'Beklemede' },
+  { id: 'olumlu', name: 'Olumlu' },
+  { id: 'olumsuz', name: 'Olumsuz' },
+];
 
 export default function AddCustomerScreen({ navigation }) {
   const { user, token } = useContext(AuthContext);  // Giriş yapan temsilci bilgisi ve token
@@ -51,44 +60,50 @@ export default function AddCustomerScreen({ navigation }) {
 
   const fetchPickerOptions = async () => {
     try {
-      // Eğer token varsa header ekleyelim:
-      const headers = token
-        ? { 'Content-Type': 'application/json', 'Authorization': `Bearer ${token}` }
-        : { 'Content-Type': 'application/json' };
+      if (token) {
+        // Giriş yapılmışsa referans tablolar senkronizasyon deposundan gelir;
+        // sunucudan yalnızca son senkronizasyondan bu yana değişenler indirilir.
+        await syncNow(token);
+        setSubscriptionTypes(getRecords('subscription_types'));
+        setSubscriptionDurations(getRecords('subscription_durations'));
+        setPaymentTypes(getRecords('payment_types'));
+        setAgreementStatuses(AGREEMENT_STATUSES);
+        return;
+      }
+
+      // Giriş yapılmamışsa listeler doğrudan çekilir
+      const headers = { 'Content-Type': 'application/json' };
 
+      // Liste endpoint'leri sayfalı döner ({ next, previous, results });
+      // referans tabloları küçük olduğundan tek sayfada (page_size=200) alınır.
       // Abonelik Türü
-      const subTypesResponse = await fetch(`${SERVER_IP}/api/subscription-types/`, { headers });
+      const subTypesResponse = await fetch(`${SERVER_IP}/api/subscription-types/?page_size=200`, { headers });
       if (subTypesResponse.ok) {
         const subTypesData = await subTypesResponse.json();
-        setSubscriptionTypes(subTypesData);
+        setSubscriptionTypes(subTypesData.results);
       } else {
         console.error('Subscription types fetch failed', subTypesResponse.status);
       }
       
       // Abonelik Süresi
-      const subDurationsResponse = await fetch(`${SERVER_IP}/api/subscription-durations/`, { headers });
+      const subDurationsResponse = await fetch(`${SERVER_IP}/api/subscription-durations/?page_size=200`, { headers });
       if (subDurationsResponse.ok) {
         const subDurationsData = await subDurationsResponse.json();
-        setSubscriptionDurations(subDurationsData);
+        setSubscriptionDurations(subDurationsData.results);
       } else {
         console.error('Subscription durations fetch failed', subDurationsResponse.status);
       }
       
       // Ödeme Türü
-      const paymentTypesResponse = await fetch(`${SERVER_IP}/api/payment-types/`, { headers });
+      const paymentTypesResponse = await fetch(`${SERVER_IP}/api/payment-types/?page_size=200`, { headers });
       if (paymentTypesResponse.ok) {
         const paymentTypesData = await paymentTypesResponse.json();
-        setPaymentTypes(paymentTypesData);
+        setPaymentTypes(paymentTypesData.results);
       } else {
         console.error('Payment types fetch failed', paymentTypesResponse.status);
       }
       
-      // Anlaşma Durumları: Modelde choices olduğu için sabit tanımlıyoruz
-      setAgreementStatuses([
-        { id: 'beklemede', name: 'Beklemede' },
-        { id: 'olumlu', name: 'Olumlu' },
-        { id: 'olumsuz', name: 'Olumsuz' },
-      ]);
+      setAgreementStatuses(AGREEMENT_STATUSES);
     } catch (error) {
       console.error('Failed to fetch picker options', error);
     }
@@ -141,25 +156,30 @@ export default function AddCustomerScreen({ navigation }) {
       rep: user.id
     };
 
+    // Kayıt önce cihazdaki kuyruğa yazılır; bağlantı yoksa bağlantı gelince gönderilir.
+    // Aynı kayıt tekrar gönderilse de sunucu client_id sayesinde ikinci müşteri açmaz.
+    const clientId = await enqueue(user.id, 'customers', newCustomer);
     try {
-      const response = await fetch(`${SERVER_IP}/api/customers/`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': token ? `Bearer ${token}` : ''
-        },
-        body: JSON.stringify(newCustomer)
-      });
-
-      if (response.ok) {
-        Alert.alert('Başarılı', 'Müşteri başarıyla eklendi!');
-        navigation.navigate('Customers');
-      } else {
-        Alert.alert('Hata', 'Müşteri eklenemedi. Status: ' + response.status);
+      let results = await flush(user.id, token);
+      if (!results[clientId]) {
+        // Kayıt, o sırada sürmekte olan gönderime yetişmediyse bir kez daha gönderilir
+        results = await flush(user.id, token);
+      }
+      const result = results[clientId];
+      if (result && result.status === 'error') {
+        await dismissFailed(user.id, clientId);
+        const messages = Object.entries(result.errors)
+          .map(([field, errors]) => `${field}: ${[].concat(errors).join(' ')}`)
+          .join('\n');
+        Alert.alert('Hata', `Müşteri eklenemedi.\n${messages}`);
+        return;
       }
+      Alert.alert('Başarılı', 'Müşteri başarıyla eklendi!');
+      navigation.navigate('Customers');
     } catch (error) {
-      console.error('Hata:', error);
-      Alert.alert('Hata', 'Müşteri eklenirken bir hata oluştu.');
+      console.log('Kuyruk gönderilemedi:', error);
+      Alert.alert('Çevrimdışı', 'Bağlantı yok. Müşteri kaydedildi ve bağlantı gelince otomatik gönderilecek.');
+      navigation.navigate('Customers');
     }
   };
 
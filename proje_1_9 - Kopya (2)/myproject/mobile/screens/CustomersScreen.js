@@ -1,32 +1,77 @@
-import React, { useEffect, useState } from 'react';
+import React, { useContext, useEffect, useState } from 'react';
 import { View, Text, FlatList, StyleSheet, TouchableOpacity, ActivityIndicator, Image, SafeAreaView, StatusBar } from 'react-native';
 import { MaterialIcons } from '@expo/vector-icons'; // Expo kullanıyorsanız
+import { AuthContext } from '../context/AuthContext';
+import { getRecords, syncNow } from '../services/sync';
+
+const CUSTOMERS_URL = 'http://172.20.10.3:8000/api/customers/';
 
 export default function CustomersScreen() {
+  const { token } = useContext(AuthContext);
   const [customers, setCustomers] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [refreshing, setRefreshing] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [nextUrl, setNextUrl] = useState(null); // API'nin döndürdüğü sonraki sayfa (cursor) adresi
   const [error, setError] = useState(null);
 
   useEffect(() => {
     fetchCustomers();
-  }, []);
+  }, [token]);
 
-  const fetchCustomers = async () => {
-    setLoading(true);
+  // İlk sayfayı (yeniden) yükler; aşağı çekip yenilemede de bu kullanılır
+  const fetchCustomers = async (isRefresh = false) => {
+    if (isRefresh) {
+      setRefreshing(true);
+    } else {
+      setLoading(true);
+    }
     try {
+      if (token) {
+        // Giriş yapılmışsa temsilcinin müşterileri senkronizasyon deposundan gelir;
+        // sunucudan yalnızca son senkronizasyondan bu yana değişenler indirilir.
+        await syncNow(token);
+        setCustomers(getRecords('customers').sort((a, b) => b.created_at.localeCompare(a.created_at)));
+        setNextUrl(null);
+        setError(null);
+        return;
+      }
       // Django server IP'ni burada ayarla (localhost çalışmayabilir)
-      const response = await fetch('http://172.20.10.3:8000/api/customers/');
+      const response = await fetch(CUSTOMERS_URL);
       if (!response.ok) {
         throw new Error('Sunucu yanıt vermedi');
       }
       const data = await response.json();
-      setCustomers(data);
+      setCustomers(data.results);
+      setNextUrl(data.next);
       setError(null);
     } catch (error) {
       console.error('Hata:', error);
       setError('Müşteriler yüklenirken bir hata oluştu');
     } finally {
       setLoading(false);
+      setRefreshing(false);
+    }
+  };
+
+  // Liste sonuna gelindiğinde sonraki sayfayı ekler
+  const fetchMoreCustomers = async () => {
+    if (!nextUrl || loadingMore || refreshing) {
+      return;
+    }
+    setLoadingMore(true);
+    try {
+      const response = await fetch(nextUrl);
+      if (!response.ok) {
+        throw new Error('Sunucu yanıt vermedi');
+      }
+      const data = await response.json();
+      setCustomers((prev) => [...prev, ...data.results]);
+      setNextUrl(data.next);
+    } catch (error) {
+      console.error('Hata:', error);
+    } finally {
+      setLoadingMore(false);
     }
   };
 
@@ -91,7 +136,7 @@ export default function CustomersScreen() {
         <View style={styles.errorContainer}>
           <MaterialIcons name="error-outline" size={48} color="#ff6b6b" />
           <Text style={styles.errorText}>{error}</Text>
-          <TouchableOpacity style={styles.retryButton} onPress={fetchCustomers}>
+          <TouchableOpacity style={styles.retryButton} onPress={() => fetchCustomers()}>
             <Text style={styles.retryButtonText}>Tekrar Dene</Text>
           </TouchableOpacity>
         </View>
@@ -111,8 +156,11 @@ export default function CustomersScreen() {
           contentContainerStyle={styles.listContainer}
           showsVerticalScrollIndicator={false}
           ItemSeparatorComponent={() => <View style={styles.separator} />}
-          refreshing={loading}
-          onRefresh={fetchCustomers}
+          refreshing={refreshing}
+          onRefresh={() => fetchCustomers(true)}
+          onEndReached={fetchMoreCustomers}
+          onEndReachedThreshold={0.5}
+          ListFooterComponent={loadingMore ? <ActivityIndicator style={styles.footerLoader} color="#0066cc" /> : null}
         />
       )}
     </SafeAreaView>
@@ -249,6 +297,9 @@ const styles = StyleSheet.create({
   separator: {
     height: 12,
   },
+  footerLoader: {
+    marginVertical: 16,
+  },
   loaderContainer: {
     flex: 1,
     justifyContent: 'center',
@@ -1,12 +1,18 @@
 // mobile/screens/HomeScreen.js
-import React from 'react';
-import { View, Text, StyleSheet } from 'react-native';
+import React, { useContext } from 'react';
+import { View, Text, Button, StyleSheet } from 'react-native';
+import { AuthContext } from '../context/AuthContext';
 
 export default function HomeScreen() {
+  const { signOut } = useContext(AuthContext);
+
   return (
     <View style={styles.container}>
       <Text style={styles.title}>Hoşgeldiniz</Text>
       <Text style={styles.subtitle}>Sol menüden istediğiniz bölüme geçiş yapabilirsiniz.</Text>
+      <View style={styles.logout}>
+        <Button title="Çıkış Yap" onPress={signOut} color="#6200ee" />
+      </View>
     </View>
   );
 }
@@ -28,4 +34,7 @@ const styles = StyleSheet.create({
     textAlign: 'center',
     color: '#666',
   },
+  logout: {
+    marginTop: 30,
+  },
 });
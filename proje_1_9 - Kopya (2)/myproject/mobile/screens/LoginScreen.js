@@ -5,7 +5,7 @@ import { CommonActions } from '@react-navigation/native';
 import { AuthContext } from '../context/AuthContext';
 
 export default function LoginScreen({ navigation }) {
-  const { setUser, setToken } = useContext(AuthContext);
+  const { signIn } = useContext(AuthContext);
   const [username, setUsername] = useState('');
   const [password, setPassword] = useState('');
   const SERVER_IP = 'http://172.20.10.3:8000';
@@ -24,7 +24,6 @@ export default function LoginScreen({ navigation }) {
       }
 
       const tokenData = await tokenResponse.json();
-      setToken(tokenData.access);
 
       const userResponse = await fetch(`${SERVER_IP}/api/users/me/`, {
         method: 'GET',
@@ -40,7 +39,7 @@ export default function LoginScreen({ navigation }) {
       }
 
       const userData = await userResponse.json();
-      setUser(userData);
+      signIn(userData, tokenData.access);
 
       // Reset navigasyonu, navigator tamamen mount olduktan sonra çalışsın.
       setTimeout(() => {
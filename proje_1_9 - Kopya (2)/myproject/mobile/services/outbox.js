@@ -0,0 +1,113 @@
+// mobile/services/outbox.js
+// Çevrimdışı yazma kuyruğu: sahada bağlantı yokken oluşturulan müşteri, ödeme, şikayet ve
+// harcamalar cihazda saklanır; bağlantı gelince tek istekte /api/sync/push/'a gönderilir.
+// Her işlemin cihazda üretilen client_id'si (UUID) vardır; sunucu aynı işlemi ikinci kez
+// uygulamaz, bu yüzden yanıtı alınamayan gönderim güvenle tekrarlanabilir.
+// Kuyruk kullanıcıya aittir (her kullanıcının ayrı dosyası): sunucu push'ta kayıtların sahibini
+// token'ın kullanıcısı yapar, bu yüzden bir kullanıcının işlemleri yalnızca onun oturumunda gönderilir.
+// Çıkış yapılınca gönderilmemiş işlemler silinmez; aynı kullanıcı tekrar girince gönderilir.
+import * as FileSystem from 'expo-file-system';
+
+const SERVER_IP = 'http://172.20.10.3:8000';
+// Sunucudaki PUSH_MAX_OPERATIONS ile aynı
+const MAX_BATCH = 500;
+
+const outboxFile = (userId) => `${FileSystem.documentDirectory}outbox-${userId}.json`;
+
+// Kullanıcı id -> { pending: gönderilecek işlemler (sırası korunur), failed: sunucunun doğrulama
+// hatasıyla reddettikleri }
+const states = {};
+const flushing = {};
+
+// RFC 4122 sürüm 4 UUID
+export const uuid4 = () =>
+  'xxxxxxxx-xxxx-4xxx-yxxx-xxxxxxxxxxxx'.replace(/[xy]/g, (c) => {
+    const r = (Math.random() * 16) | 0;
+    return (c === 'x' ? r : (r & 0x3) | 0x8).toString(16);
+  });
+
+const load = async (userId) => {
+  if (userId === undefined || userId === null) {
+    throw new Error('Kuyruk için kullanıcı gerekli.');
+  }
+  if (states[userId]) {
+    return states[userId];
+  }
+  let state;
+  try {
+    const info = await FileSystem.getInfoAsync(outboxFile(userId));
+    state = info.exists
+      ? JSON.parse(await FileSystem.readAsStringAsync(outboxFile(userId)))
+      : { pending: [], failed: [] };
+  } catch (error) {
+    console.error('Kuyruk okunamadı:', error);
+    state = { pending: [], failed: [] };
+  }
+  // Dosya okunurken başka bir çağrı durumu yüklemiş olabilir
+  states[userId] = states[userId] || state;
+  return states[userId];
+};
+
+const save = (userId) => FileSystem.writeAsStringAsync(outboxFile(userId), JSON.stringify(states[userId]));
+
+// collection: 'customers' | 'payments' | 'complaints' | 'expenses'.
+// Aynı kuyruktaki kayda bağlanmak için alan değeri { client_id } verilebilir, ör.
+// enqueue(user.id, 'payments', { customer: { client_id: customerClientId }, paid_amount: 100 })
+export const enqueue = async (userId, collection, data) => {
+  const state = await load(userId);
+  const operation = { client_id: uuid4(), collection, data, queued_at: new Date().toISOString() };
+  state.pending.push(operation);
+  await save(userId);
+  return operation.client_id;
+};
+
+export const getPending = async (userId) => (await load(userId)).pending;
+
+export const getFailed = async (userId) => (await load(userId)).failed;
+
+export const dismissFailed = async (userId, clientId) => {
+  const state = await load(userId);
+  state.failed = state.failed.filter((operation) => operation.client_id !== clientId);
+  await save(userId);
+};
+
+const runFlush = async (userId, authToken) => {
+  const state = await load(userId);
+  const results = {};
+  while (state.pending.length > 0) {
+    const batch = state.pending.slice(0, MAX_BATCH);
+    // Ağ hatasında istisna yukarı çıkar; işlemler kuyrukta kalır ve sonra tekrar denenir
+    const response = await fetch(`${SERVER_IP}/api/sync/push/`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json', Authorization: `Bearer ${authToken}` },
+      body: JSON.stringify({
+        operations: batch.map(({ client_id, collection, data }) => ({ client_id, collection, data })),
+      }),
+    });
+    if (!response.ok) {
+      throw new Error(`Kuyruk gönderilemedi: ${response.status}`);
+    }
+    const data = await response.json();
+    data.results.forEach((result, index) => {
+      const operation = batch[index];
+      results[operation.client_id] = result;
+      if (result.status === 'error') {
+        state.failed.push({ ...operation, errors: result.errors });
+      }
+    });
+    state.pending = state.pending.slice(batch.length);
+    await save(userId);
+  }
+  return results;
+};
+
+// Kullanıcının kuyruğunu onun token'ıyla gönderir; client_id -> sunucu sonucu
+// ({ status, id, record | errors }) döner. Aynı kullanıcı için aynı anda gelen çağrılar tek gönderimi paylaşır.
+export const flush = (userId, authToken) => {
+  if (!flushing[userId]) {
+    flushing[userId] = runFlush(userId, authToken).finally(() => {
+      delete flushing[userId];
+    });
+  }
+  return flushing[userId];
+};
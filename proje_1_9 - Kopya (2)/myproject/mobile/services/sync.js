@@ -0,0 +1,80 @@
+// mobile/services/sync.js
+// Sunucudaki /api/sync/ ile artımlı senkronizasyon. Her ekran listeyi baştan çekmek yerine
+// syncNow() ile yalnızca son token'dan bu yana değişen kayıtları alır ve yerel kopyaya uygular.
+
+const SERVER_IP = 'http://172.20.10.3:8000';
+
+// Koleksiyon adı -> (id -> kayıt). Anahtarlar sunucudaki SYNC_SOURCES ile aynıdır
+// (customers, payments, complaints, expenses, subscription_types, ...).
+let collections = {};
+let syncToken = null;
+let pending = null;
+// resetSync() her çağrıldığında artar; sıfırlamadan önce başlamış isteğin yanıtı uygulanmaz
+let generation = 0;
+
+const applyChanges = (data) => {
+  if (data.reset) {
+    collections = {};
+  }
+  Object.entries(data.changes).forEach(([name, { updated, deleted }]) => {
+    const records = collections[name] || (collections[name] = {});
+    updated.forEach((record) => {
+      records[record.id] = record;
+    });
+    deleted.forEach((id) => {
+      delete records[id];
+    });
+  });
+  syncToken = data.token;
+};
+
+const runSync = async (authToken, started) => {
+  const headers = { 'Content-Type': 'application/json', Authorization: `Bearer ${authToken}` };
+  let hasMore = true;
+  while (hasMore) {
+    const query = syncToken ? `?since=${encodeURIComponent(syncToken)}` : '';
+    const response = await fetch(`${SERVER_IP}/api/sync/${query}`, { headers });
+    if (started !== generation) {
+      // Bu arada çıkış/giriş yapıldı: yanıt önceki kullanıcıya ait
+      return;
+    }
+    if (response.status === 400) {
+      // Token bozuk: bir sonraki denemede tam senkronizasyon yapılır
+      syncToken = null;
+    }
+    if (!response.ok) {
+      throw new Error(`Senkronizasyon başarısız: ${response.status}`);
+    }
+    const data = await response.json();
+    if (started !== generation) {
+      return;
+    }
+    applyChanges(data);
+    hasMore = data.has_more;
+  }
+};
+
+// Aynı anda açılan ekranlar tek bir senkronizasyonu paylaşır
+export const syncNow = (authToken) => {
+  if (!pending) {
+    const current = runSync(authToken, generation).finally(() => {
+      if (pending === current) {
+        pending = null;
+      }
+    });
+    pending = current;
+  }
+  return pending;
+};
+
+// Koleksiyondaki kayıtlar (id sırasıyla)
+export const getRecords = (name) =>
+  Object.values(collections[name] || {}).sort((a, b) => a.id - b.id);
+
+// Girişte ve çıkışta (AuthContext) yerel kopya temizlenir; yarım kalan senkronizasyon da bırakılır
+export const resetSync = () => {
+  collections = {};
+  syncToken = null;
+  pending = null;
+  generation += 1;
+};
@@ -0,0 +1,125 @@
+# myproject/database.py
+"""
+Ortam değişkenlerinden DATABASES ayarı.
+
+DB_ENGINE                sqlite (varsayılan) veya postgresql
+DB_NAME / DB_USER / DB_PASSWORD / DB_HOST / DB_PORT
+DB_CONN_MAX_AGE          kalıcı bağlantı süresi, saniye (varsayılan 60; havuz açıkken 0)
+DB_POOL                  1 ise psycopg bağlantı havuzu (psycopg[pool] gerekir)
+DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE
+DB_REPLICA_HOST / DB_REPLICA_PORT   PostgreSQL okuma replikası; verilirse "replica" alias'ı okumaya açılır
+DB_REPLICA_NAME          SQLite okuma replikasının dosyası (ör. LiteFS/Litestream kopyası); aynı şekilde
+DB_SQLITE_TIMEOUT        SQLite kilit bekleme süresi (busy_timeout), saniye
+DB_SQLITE_PROFILE        performance (varsayılan) veya default; bkz. SQLITE_PROFILES
+"""
+
+REPLICA_ALIAS = "replica"
+
+# Her yeni SQLite bağlantısında uygulanan ayar profilleri.
+# performance: WAL ile okuyucular yazarı beklemez; yazma transaction'ları BEGIN IMMEDIATE ile
+# başlar, böylece okuma kilidinden yazma kilidine yükselirken oluşan kilitlenme (busy_timeout'u
+# beklemeden "database is locked") yaşanmaz. Karşılaştırma: python manage.py benchmark_sqlite
+SQLITE_PROFILES = {
+    "default": {
+        "pragmas": {},
+        "transaction_mode": None,
+    },
+    "performance": {
+        "pragmas": {
+            "journal_mode": "WAL",
+            "synchronous": "NORMAL",
+            "mmap_size": 256 * 1024 * 1024,
+            "cache_size": -64000,  # negatif değer KiB cinsindendir (~64 MB)
+            "temp_store": "MEMORY",
+        },
+        "transaction_mode": "IMMEDIATE",
+    },
+}
+
+
+def env_bool(env, name, default=False):
+    value = env.get(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def env_int(env, name, default):
+    value = env.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def sqlite_settings(env, base_dir):
+    name = env.get("DB_NAME") or str(base_dir / "db.sqlite3")
+    profile_name = env.get("DB_SQLITE_PROFILE", "performance")
+    if profile_name not in SQLITE_PROFILES:
+        raise ValueError(f"Desteklenmeyen DB_SQLITE_PROFILE: {profile_name}")
+    profile = SQLITE_PROFILES[profile_name]
+    timeout = env_int(env, "DB_SQLITE_TIMEOUT", 20)
+    options = {"timeout": timeout}
+    if profile["pragmas"]:
+        pragmas = {**profile["pragmas"], "busy_timeout": timeout * 1000}
+        options["init_command"] = "; ".join(f"PRAGMA {key} = {value}" for key, value in pragmas.items())
+    if profile["transaction_mode"]:
+        options["transaction_mode"] = profile["transaction_mode"]
+    default = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": name,
+        "OPTIONS": options,
+    }
+    databases = {"default": default}
+    read_replicas = []
+    if env.get("DB_REPLICA_NAME"):
+        databases[REPLICA_ALIAS] = {
+            **default,
+            "NAME": env["DB_REPLICA_NAME"],
+            "OPTIONS": dict(options),
+            # Testlerde replika ayrı veritabanı değil, default'un aynısıdır
+            "TEST": {"MIRROR": "default"},
+        }
+        read_replicas.append(REPLICA_ALIAS)
+    return databases, read_replicas
+
+
+def postgresql_settings(env):
+    pool = env_bool(env, "DB_POOL")
+    options = {}
+    if pool:
+        options["pool"] = {
+            "min_size": env_int(env, "DB_POOL_MIN_SIZE", 2),
+            "max_size": env_int(env, "DB_POOL_MAX_SIZE", 10),
+        }
+    default = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": env.get("DB_NAME", "myproject"),
+        "USER": env.get("DB_USER", ""),
+        "PASSWORD": env.get("DB_PASSWORD", ""),
+        "HOST": env.get("DB_HOST", "localhost"),
+        "PORT": env.get("DB_PORT", "5432"),
+        # Django havuzla birlikte kalıcı bağlantıya izin vermez; bağlantıları havuz saklar
+        "CONN_MAX_AGE": 0 if pool else env_int(env, "DB_CONN_MAX_AGE", 60),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": options,
+    }
+    databases = {"default": default}
+    read_replicas = []
+    if env.get("DB_REPLICA_HOST"):
+        databases[REPLICA_ALIAS] = {
+            **default,
+            "HOST": env["DB_REPLICA_HOST"],
+            "PORT": env.get("DB_REPLICA_PORT", default["PORT"]),
+            # Testlerde replika ayrı veritabanı değil, default'un aynısıdır
+            "TEST": {"MIRROR": "default"},
+        }
+        read_replicas.append(REPLICA_ALIAS)
+    return databases, read_replicas
+
+
+def database_settings(env, base_dir):
+    """(DATABASES, DATABASE_READ_REPLICAS) döndürür."""
+    engine = env.get("DB_ENGINE", "sqlite").lower()
+    if engine in ("postgres", "postgresql"):
+        return postgresql_settings(env)
+    if engine in ("sqlite", "sqlite3"):
+        return sqlite_settings(env, base_dir)
+    raise ValueError(f"Desteklenmeyen DB_ENGINE: {engine}")
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .database import database_settings
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -51,6 +54,8 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.db_routing.ReplicaReadMiddleware',
+    'core.audit.AuditMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -81,12 +86,11 @@ WSGI_APPLICATION = 'myproject.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
+# Ayrıntılar ve değişken listesi: myproject/database.py. Varsayılan: BASE_DIR/db.sqlite3
+DATABASES, DATABASE_READ_REPLICAS = database_settings(os.environ, BASE_DIR)
+
+# GET API istekleri ve @replica_reads işaretli liste/rapor sayfaları replikadan okunur
+DATABASE_ROUTERS = ['core.db_routing.ReadReplicaRouter']
 
 
 # Password validation
@@ -137,6 +141,21 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Yüklemeler (core/media.py): dosyalar bellekte tutulmadan parça parça geçici dosyaya yazılır ve
+# yazılırken SHA-256 özeti çıkarılır. UPLOAD_MAX_SIZE (bayt) üstündeki dosyalar reddedilir.
+FILE_UPLOAD_HANDLERS = ['core.media.HashingUploadHandler']
+UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+# Çalışan belgesi önizlemelerinin uzun kenarı (piksel); Pillow / PyMuPDF kuruluysa üretilir
+DOCUMENT_THUMBNAIL_SIZE = 240
+# Eski yükleme yolundan kalan dosyaların arandığı ek klasörler (store_employee_documents komutu)
+EMPLOYEE_DOCUMENT_LEGACY_DIRS = [os.path.join(BASE_DIR, 'employee_documents')]
+# MEDIA_URL altındaki dosyalar izin kontrolünden sonra gönderilir (core.views.protected_media).
+# "python": Django parça parça gönderir (Range, ETag / If-None-Match -> 304); "nginx": X-Accel-Redirect
+# ile MEDIA_ACCEL_REDIRECT_PREFIX altındaki internal location'a bırakılır
+# (location /protected-media/ { internal; alias <MEDIA_ROOT>/; }); "apache": X-Sendfile (mod_xsendfile).
+MEDIA_SERVE_BACKEND = os.environ.get('MEDIA_SERVE_BACKEND', 'python')
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -145,9 +164,61 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.ApiCursorPagination',
+    'PAGE_SIZE': 50,
 }
 
+# API'de ?page_size= ile istenebilecek en büyük sayfa boyutu
+API_MAX_PAGE_SIZE = 200
+
+
+# Önbellek: varsayılan süreç içi bellek; REDIS_URL verilirse Redis (redis paketi gerekir)
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'myproject',
+        }
+    }
+
+# Referans veri önbelleği (core/reference_data.py): kullanılan önbellek ve en uzun saklama süresi (sn).
+# Değişiklikler sinyallerle hemen temizlenir; süre, yerel bellek önbelleğinde diğer süreçler içindir.
+REFERENCE_DATA_CACHE = 'default'
+REFERENCE_DATA_TIMEOUT = 300
+
+# Mobil senkronizasyon (/api/sync/): silme kayıtlarının saklandığı gün sayısı. Bundan uzun süre
+# senkronize olmayan istemci tam senkronizasyona döner (bkz. core/sync.py, prune_changelog).
+SYNC_TOMBSTONE_DAYS = 30
+
+# Denetim kaydı (core/audit.py): girdiler istek boyunca bellekte toplanır ve en geç bu sayıya
+# ulaşınca toplu yazılır. rotate_audit_log, AUDIT_RETENTION_DAYS günden eski girdileri
+# AUDIT_ARCHIVE_DIR altındaki aylık sıkıştırılmış JSON satır dosyalarına taşır.
+AUDIT_BUFFER_SIZE = 500
+AUDIT_RETENTION_DAYS = 365
+AUDIT_ARCHIVE_DIR = os.path.join(BASE_DIR, 'audit_archive')
+
+# Arka plan iş kuyruğu (core/jobs.py): işler veritabanındaki kuyruğa yazılır ve
+# "python manage.py run_worker" ile çalıştırılır. JOBS_EAGER=1 ise worker gerekmez, işler
+# istek içinde hemen çalışır (worker'sız geliştirme ortamı). Görünmezlik süresi (sn) içinde
+# bitmeyen iş başka worker'a verilir; tamamlanan işler JOBS_KEEP_DAYS gün sonra silinir.
+JOBS_EAGER = os.environ.get('JOBS_EAGER', '0') == '1'
+JOBS_VISIBILITY_TIMEOUT = 300
+JOBS_KEEP_DAYS = 7
+
 
 CORS_ORIGIN_ALLOW_ALL = True
 
 LOGIN_URL = '/login/'
+
+# HTML liste sayfalarında (keyset sayfalama) sayfa başına kayıt
+LIST_PAGE_SIZE = 50
+
+# Her çalışandan istenen zorunlu belgeler (çalışan listesinde eksikler bu listeye göre gösterilir)
+REQUIRED_EMPLOYEE_DOCUMENTS = ["Sağlık Belgesi", "Sigorta Belgesi", "İkametgah Belgesi"]
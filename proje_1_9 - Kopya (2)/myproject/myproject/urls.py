@@ -1,21 +1,21 @@
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework import routers
+from core.routers import BulkRouter
 from core.views import (
-    UserViewSet, ExpenseCategoryViewSet, ExpenseViewSet, ExpenseCategoryLogViewSet,
+    UserViewSet, ExpenseCategoryViewSet, ExpenseViewSet,
     SubscriptionTypeViewSet, SubscriptionDurationViewSet, PaymentTypeViewSet,
     CustomerViewSet, EmployeeViewSet, EmployeeTaskViewSet, EmployeeDocumentViewSet,
-    EmployeeTaskLogViewSet, MaterialViewSet, MaterialTransactionViewSet,
+    MaterialViewSet, MaterialTransactionViewSet,
     PaymentViewSet, ComplaintViewSet, RequestViewSet, VehicleViewSet,
-    SubscriptionExtraViewSet, SubscriptionExtraLogViewSet, UserDetailView
+    SubscriptionExtraViewSet, AuditEntryViewSet, UserDetailView, GlobalSearchView,
+    BulkImportView, StatsView, SyncView, SyncPushView
 )
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
-router = routers.DefaultRouter()
+router = BulkRouter()
 router.register(r'users', UserViewSet)
 router.register(r'expense-categories', ExpenseCategoryViewSet)
 router.register(r'expenses', ExpenseViewSet)
-router.register(r'expense-category-logs', ExpenseCategoryLogViewSet)
 router.register(r'subscription-types', SubscriptionTypeViewSet)
 router.register(r'subscription-durations', SubscriptionDurationViewSet)
 router.register(r'payment-types', PaymentTypeViewSet)
@@ -23,7 +23,6 @@ router.register(r'customers', CustomerViewSet)
 router.register(r'employees', EmployeeViewSet)
 router.register(r'employee-tasks', EmployeeTaskViewSet)
 router.register(r'employee-documents', EmployeeDocumentViewSet)
-router.register(r'employee-task-logs', EmployeeTaskLogViewSet)
 router.register(r'materials', MaterialViewSet)
 router.register(r'material-transactions', MaterialTransactionViewSet)
 router.register(r'payments', PaymentViewSet)
@@ -31,7 +30,7 @@ router.register(r'complaints', ComplaintViewSet)
 router.register(r'requests', RequestViewSet)
 router.register(r'vehicles', VehicleViewSet)
 router.register(r'subscription-extras', SubscriptionExtraViewSet)
-router.register(r'subscription-extra-logs', SubscriptionExtraLogViewSet)
+router.register(r'audit-entries', AuditEntryViewSet)
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -40,6 +39,11 @@ urlpatterns = [
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     # Custom kullanıcı detay endpoint'ini router'dan önce ekleyin:
     path('api/users/me/', UserDetailView.as_view(), name='user-detail'),
+    path('api/search/', GlobalSearchView.as_view(), name='global-search'),
+    path('api/import/<str:kind>/', BulkImportView.as_view(), name='bulk-import'),
+    path('api/stats/', StatsView.as_view(), name='stats'),
+    path('api/sync/', SyncView.as_view(), name='sync'),
+    path('api/sync/push/', SyncPushView.as_view(), name='sync-push'),
     # Diğer URL'ler:
     path('', include('core.urls')),
     path('api/', include(router.urls)),